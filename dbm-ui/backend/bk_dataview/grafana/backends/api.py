@@ -14,10 +14,9 @@ from typing import List
 
 from .. import client
 from ..provisioning import Datasource as DataSource
+from ..state import ProvisionState
 from . import BaseHandler
 
-_ORG_DATASOURCES_CACHE = {}
-
 logger = logging.getLogger(__name__)
 
 
@@ -29,11 +28,11 @@ class APIHandler(BaseHandler):
         pass
 
     def handle_datasources(self, request, org_name: str, org_id: int, ds_list: List[DataSource]):
-        """API不能批量处理多个数据源"""
-        _ORG_DATASOURCES_CACHE.setdefault(org_name, {})
-
+        """API不能批量处理多个数据源，数据源定义未变化时跳过"""
         for ds in ds_list:
-            if ds.name in _ORG_DATASOURCES_CACHE[org_name]:
+            # 更新时会修改 version，需要在修改前记录数据源定义
+            ds_content = asdict(ds)
+            if ProvisionState.is_provisioned("datasource", org_name, ds.name, ds_content):
                 continue
 
             resp = client.get_datasource(org_id, ds.name)
@@ -42,7 +41,7 @@ class APIHandler(BaseHandler):
                 ds.version = result["version"] + 1
                 resp = client.update_datasource(org_id, result["id"], ds)
                 if resp.status_code == 200:
-                    _ORG_DATASOURCES_CACHE[org_name][ds.name] = ds
+                    ProvisionState.set_provisioned("datasource", org_name, ds.name, ds_content)
                     logger.info("update provision datasource success, %s", resp)
                     return
 
@@ -51,7 +50,7 @@ class APIHandler(BaseHandler):
                 resp = client.create_datasource(org_id, ds)
                 # 412 code 代表已经存在
                 if resp.status_code == 200:
-                    _ORG_DATASOURCES_CACHE[org_name][ds.name] = ds
+                    ProvisionState.set_provisioned("datasource", org_name, ds.name, ds_content)
                 else:
                     logger.error(asdict(ds))
                     logger.error("create provision datasource failed, %s", resp)
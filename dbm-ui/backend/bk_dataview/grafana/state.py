@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional, Set
+
+from django.core.cache import cache
+
+# 注入状态的缓存时间(秒)，过期后重新向 grafana 校验
+PROVISION_STATE_TIMEOUT = 7 * 24 * 60 * 60
+PROVISION_STATE_KEY_PREFIX = "bk_dataview:grafana"
+
+
+def content_hash(content: Any) -> str:
+    """计算注入内容的摘要，用于判断面板/数据源定义是否变化"""
+    return hashlib.md5(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ProvisionState:
+    """
+    grafana 用户、org、面板和数据源的注入状态。
+    状态保存在共享缓存中，多个 worker 以及重启后均可复用；
+    用户和 org 的映射不会变化，额外在进程内缓存，避免每次代理请求都访问共享缓存
+    """
+
+    _local: Dict[str, Any] = {}
+
+    @staticmethod
+    def key(*parts) -> str:
+        return ":".join([PROVISION_STATE_KEY_PREFIX, *[str(part) for part in parts]])
+
+    @classmethod
+    def _get(cls, key: str) -> Any:
+        if key in cls._local:
+            return cls._local[key]
+        value = cache.get(key)
+        if value is not None:
+            cls._local[key] = value
+        return value
+
+    @classmethod
+    def _set(cls, key: str, value: Any):
+        cls._local[key] = value
+        cache.set(key, value, PROVISION_STATE_TIMEOUT)
+
+    @classmethod
+    def get_user(cls, username: str) -> Optional[Dict]:
+        return cls._get(cls.key("user", username))
+
+    @classmethod
+    def set_user(cls, username: str, user: Dict):
+        cls._set(cls.key("user", username), user)
+
+    @classmethod
+    def get_org_id(cls, org_name: str) -> Optional[int]:
+        return cls._get(cls.key("org_id", org_name))
+
+    @classmethod
+    def get_org_name(cls, org_id: int) -> Optional[str]:
+        return cls._get(cls.key("org_name", org_id))
+
+    @classmethod
+    def set_org(cls, org_name: str, org_id: int):
+        cls._set(cls.key("org_id", org_name), org_id)
+        cls._set(cls.key("org_name", org_id), org_name)
+
+    @classmethod
+    def set_org_name(cls, org_id: int, org_name: str):
+        cls._set(cls.key("org_name", org_id), org_name)
+
+    @classmethod
+    def get_org_users(cls, org_id: int) -> Set[str]:
+        return set(cls._get(cls.key("org_users", org_id)) or [])
+
+    @classmethod
+    def add_org_users(cls, org_id: int, usernames: Set[str]):
+        # 同一进程内按最新的集合覆盖，其他进程最多多做一次 org 成员校验
+        users = cls.get_org_users(org_id) | set(usernames)
+        cls._set(cls.key("org_users", org_id), sorted(users))
+
+    @classmethod
+    def is_provisioned(cls, kind: str, org_name: str, name: str, content: Any) -> bool:
+        """面板/数据源的定义与上次注入时一致，则无需再次注入。摘要只保存在共享缓存中，保证各进程看到的一致"""
+        return cache.get(cls.key(kind, org_name, name)) == content_hash(content)
+
+    @classmethod
+    def set_provisioned(cls, kind: str, org_name: str, name: str, content: Any):
+        cache.set(cls.key(kind, org_name, name), content_hash(content), PROVISION_STATE_TIMEOUT)
+
+    @classmethod
+    def clear_local(cls):
+        cls._local.clear()
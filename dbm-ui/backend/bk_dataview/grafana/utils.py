@@ -65,7 +65,10 @@ def requests_curl_log(resp, *args, **kwargs):
 
             curl_req += " -H '{k}: {v}'".format(k=key, v=value)
 
-    if resp.headers.get("Content-Type").startswith("application/json"):
+    # 流式请求不能在这里读取响应内容，否则会将整个响应读入内存
+    if kwargs.get("stream"):
+        resp_text = f"Stream...(Content-Length: {resp.headers.get('Content-Length', 'unknown')})"
+    elif resp.headers.get("Content-Type", "").startswith("application/json"):
         resp_text = resp.content
     else:
         resp_text = f"Bin...(total {len(resp.content)} Bytes)"
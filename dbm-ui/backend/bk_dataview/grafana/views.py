@@ -14,7 +14,7 @@ from urllib import parse
 
 import requests
 from django.conf import settings
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.utils.encoding import smart_str
 from django.utils.translation import gettext_lazy as _
@@ -35,6 +35,7 @@ from .constants import DEFAULT_ORG_ID, DEFAULT_ORG_NAME
 from .promsql import extract_condition_from_promql
 from .provisioning import Dashboard, Datasource
 from .settings import grafana_settings
+from .state import ProvisionState
 from .utils import requests_curl_log
 
 rpool = requests.Session()
@@ -42,12 +43,8 @@ rpool = requests.Session()
 logger = logging.getLogger(__name__)
 
 CACHE_HEADERS = ["Cache-Control", "Expires", "Pragma", "Last-Modified"]
-# 缓存配置
-_USER_CACHE = {}
-_ORG_CACHE = {}
-_ORG_CACHE_REVERSE = {}
-_ORG_DASHBOARDS_CACHE = {}
-_ORG_USERS = {}
+# 非 html 响应按块流式转发的块大小
+PROXY_STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class ForbiddenError(Exception):
@@ -121,7 +118,7 @@ class ProxyBaseView(View):
         logger.warning("perform_provisioning: %s", self.provisioning_classes)
         org_name = request.org_name
         # 默认-1, 和 grafana保持一致
-        org_id = _ORG_CACHE.get(org_name, -1)
+        org_id = ProvisionState.get_org_id(org_name) or -1
 
         for provisioning_cls in self.provisioning_classes:
             provisioning = provisioning_cls()
@@ -146,35 +143,33 @@ class ProxyBaseView(View):
 
     def provision_user(self, request, username: str):
         """注入用户"""
-        if username in _USER_CACHE:
-            return _USER_CACHE[username]
+        _user = ProvisionState.get_user(username)
+        if _user:
+            return _user
 
         resp = client.get_user_by_login_or_email(username)
         if resp.status_code == 200:
             _user = resp.json()
-            _USER_CACHE[username] = _user
+            ProvisionState.set_user(username, _user)
             return _user
 
         if resp.status_code == 404:
             resp = client.create_user(username)
             _user = resp.json()
-            _USER_CACHE[username] = _user
+            ProvisionState.set_user(username, _user)
             return _user
 
     def provision_org(self, org_name: str, username: str):
         """注入org"""
-        if org_name in _ORG_CACHE:
-            org_id = _ORG_CACHE[org_name]
-        else:
-            org_id = self._get_org_id(org_name)
+        org_id = ProvisionState.get_org_id(org_name) or self._get_org_id(org_name)
 
-        if username in _ORG_USERS.get(org_id, []):
+        if username in ProvisionState.get_org_users(org_id):
             return org_id
 
         resp = client.get_org_users(org_id)
-        _ORG_USERS[org_id] = set()
+        org_users = set()
         for i in resp.json():
-            _ORG_USERS[org_id].add(i["login"])
+            org_users.add(i["login"])
             if i["login"] == username:
                 break
         else:
@@ -183,16 +178,14 @@ class ProxyBaseView(View):
                 logger.error("add_user_to_org(%s, %s)", org_id, username, resp.content)
                 raise ForbiddenError()
 
-        _ORG_USERS[org_id].add(username)
-        _ORG_CACHE[org_name] = org_id
-        _ORG_CACHE_REVERSE[org_id] = org_name
+        org_users.add(username)
+        ProvisionState.add_org_users(org_id, org_users)
+        ProvisionState.set_org(org_name, org_id)
         return org_id
 
     def provision_dashboard(self, request, org_name: str, org_id: int, db: Dashboard):
-        """注入面板"""
-        _ORG_DASHBOARDS_CACHE.setdefault(org_name, {})
-
-        if db.title in _ORG_DASHBOARDS_CACHE[org_name]:
+        """注入面板，面板定义未变化时跳过"""
+        if ProvisionState.is_provisioned("dashboard", org_name, db.title, db.dashboard):
             return
 
         resp = client.update_dashboard(org_id, 0, db.dashboard)
@@ -226,7 +219,7 @@ class ProxyBaseView(View):
                     cluster_type=cluster_type,
                     view=view,
                 )
-            _ORG_DASHBOARDS_CACHE[org_name][db.title] = resp.json()
+            ProvisionState.set_provisioned("dashboard", org_name, db.title, db.dashboard)
             # logger.info("provision dashboard success, %s", resp)
         else:
             logger.info("provision dashboard error, %s", resp.content)
@@ -249,8 +242,9 @@ class ProxyBaseView(View):
         """
         根据org_id获取org_name
         """
-        if org_id in _ORG_CACHE_REVERSE:
-            return _ORG_CACHE_REVERSE[org_id]
+        org_name = ProvisionState.get_org_name(org_id)
+        if org_name:
+            return org_name
 
         resp = client.get_organization_by_id(org_id)
         if resp.status_code != 200:
@@ -261,7 +255,7 @@ class ProxyBaseView(View):
             raise Http404
 
         _org = resp.json()
-        _ORG_CACHE_REVERSE[org_id] = _org["name"]
+        ProvisionState.set_org_name(org_id, _org["name"])
         return _org["name"]
 
     def get_request_headers(self, request):
@@ -270,7 +264,7 @@ class ProxyBaseView(View):
             "X-WEBAUTH-USER": request.user.username,
         }
 
-        org_id = _ORG_CACHE.get(request.org_name)
+        org_id = ProvisionState.get_org_id(request.org_name)
         if org_id:
             headers["X-Grafana-Org-Id"] = str(org_id)
         return headers
@@ -331,13 +325,26 @@ class ProxyBaseView(View):
 
         return proxy_response
 
+    @staticmethod
+    def stream_content(proxy_response):
+        """按块转发上游响应，转发结束或客户端断开时关闭上游连接"""
+        try:
+            yield from proxy_response.iter_content(chunk_size=PROXY_STREAM_CHUNK_SIZE)
+        finally:
+            proxy_response.close()
+
     def get_django_response(self, proxy_response):
-        """"""
+        """html 需要注入代码，读取全部内容；其他响应(查询结果、静态资源等)直接流式转发"""
         content_type = proxy_response.headers.get("Content-Type", "")
 
-        content = self.update_response(proxy_response, proxy_response.content)
+        if "text/html" in content_type:
+            content = self.update_response(proxy_response, proxy_response.content)
+            response = HttpResponse(content, status=proxy_response.status_code, content_type=content_type)
+        else:
+            response = StreamingHttpResponse(
+                self.stream_content(proxy_response), status=proxy_response.status_code, content_type=content_type
+            )
 
-        response = HttpResponse(content, status=proxy_response.status_code, content_type=content_type)
         for header in CACHE_HEADERS:
             value = proxy_response.headers.get(header)
             if value:
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections, models
+
+from backend import env
+from backend.utils.local import local
+
+logger = logging.getLogger("root")
+
+REPLICA_DB_ALIAS = "replica_db"
+
+
+class ReplicaHealthChecker:
+    """
+    从库健康检查，结果在进程内缓存 REPLICA_DB_CHECK_INTERVAL 秒
+    从库不可连接，复制中断或者延迟超过 REPLICA_DB_MAX_LAG 时认为不可用
+    """
+
+    _available: bool = False
+    _checked_at: float = 0
+
+    @classmethod
+    def get_replica_lag(cls) -> float:
+        connection = connections[REPLICA_DB_ALIAS]
+        with connection.cursor() as cursor:
+            # 非 mysql 的从库(如单元测试使用的 sqlite)不存在复制延迟
+            if connection.vendor != "mysql":
+                cursor.execute("SELECT 1")
+                return 0
+
+            cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+            if not row:
+                return 0
+            columns = [col[0] for col in cursor.description]
+            lag = dict(zip(columns, row)).get("Seconds_Behind_Master")
+        # 复制线程中断时延迟为 NULL
+        return float("inf") if lag is None else lag
+
+    @classmethod
+    def check(cls) -> bool:
+        try:
+            lag = cls.get_replica_lag()
+        except DatabaseError as err:
+            logger.warning(f"replica db is unavailable, fallback to primary: {err}")
+            return False
+
+        if lag > env.REPLICA_DB_MAX_LAG:
+            logger.warning(f"replica db lag {lag}s exceeds {env.REPLICA_DB_MAX_LAG}s, fallback to primary")
+            return False
+        return True
+
+    @classmethod
+    def is_available(cls) -> bool:
+        now = time.monotonic()
+        if now - cls._checked_at >= env.REPLICA_DB_CHECK_INTERVAL:
+            cls._available, cls._checked_at = cls.check(), now
+        return cls._available
+
+    @classmethod
+    def reset(cls):
+        cls._available, cls._checked_at = False, 0
+
+
+def replica_enabled() -> bool:
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def use_replica(request) -> bool:
+    """当前请求是否可以查询从库"""
+    if not request or not getattr(request, "use_replica", False):
+        return False
+    # 请求内发生过写入(包括 select_for_update)，后续查询固定在主库，避免读不到刚写入的数据
+    if getattr(request, "pinned_to_primary", False):
+        return False
+    return ReplicaHealthChecker.is_available()
+
+
+class ReplicaRouter:
+    """
+    只读从库路由，只对标记了从库查询的请求生效。
+    未命中时返回 None，交给后续的路由处理
+    """
+
+    # 有独立数据库的 app 不走从库
+    exclude_app_labels = {"db_report"}
+
+    def db_for_read(self, model: models.Model, **hints):
+        if not replica_enabled() or model._meta.app_label in self.exclude_app_labels:
+            return None
+        if use_replica(local.request):
+            return REPLICA_DB_ALIAS
+        return None
+
+    def db_for_write(self, model: models.Model, **hints):
+        request = local.request
+        if request and model._meta.app_label not in self.exclude_app_labels:
+            request.pinned_to_primary = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 从库与主库数据一致，允许两者查询出的对象互相关联
+        dbs = {obj1._state.db, obj2._state.db}
+        if dbs <= {"default", REPLICA_DB_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
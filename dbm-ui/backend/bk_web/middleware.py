@@ -72,6 +72,20 @@ class RequestProviderMiddleware:
         return response
 
 
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    从库路由中间件
+    视图的 replica_actions 包含当前动作时，标记该请求的查询可以路由到从库，具体路由见 ReplicaRouter
+    """
+
+    def process_view(self, request, view, args, kwargs):
+        view_cls = getattr(view, "cls", None)
+        actions = getattr(view, "actions", None) or {}
+        action = actions.get(request.method.lower())
+        request.use_replica = bool(action and action in getattr(view_cls, "replica_actions", []))
+        return None
+
+
 class DBMLoginRequiredMiddleware(LoginRequiredMiddleware):
     """DBM自定义的登录中间件，主要用于增加额外的鉴权格式"""
 
@@ -37,6 +37,8 @@ class GenericMixin:
     action_permission_map: Dict[Union[Tuple[str], str], List[permissions.BasePermission]] = {}
     # ⚠️为了避免权限泄露，希望默认权限是永假来兜底，所以请定义好每个视图的权限类
     default_permission_class: List[permissions.BasePermission] = [RejectPermission()]
+    # 允许查询只读从库的动作，仅适用于不依赖本请求写入结果的只读接口
+    replica_actions: List[str] = []
 
     @staticmethod
     def get_request_data(request, **kwargs) -> Dict[str, Any]:
@@ -12,7 +12,7 @@ specific language governing permissions and limitations under the License.
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, Dict, List
 
 from backend import env
 from backend.components import BKLogApi
@@ -22,9 +22,52 @@ from backend.utils.time import datetime2str
 logger = logging.getLogger("root")
 
 
+# 日志分页查询的排序字段，search_after 依赖这些字段唯一确定一条日志的位置
+BKLOG_SORT_FIELDS = ["dtEventTimeStamp", "gseIndex", "iterationIndex"]
+# 全量查询时的单页条数
+BKLOG_QUERY_PAGE_SIZE = 1000
+# 全量查询时默认最多返回的条数，超过则截断
+BKLOG_QUERY_MAX_SIZE = 50000
+
+
 class BKLogHandler(object):
     """封装bklog查询的通用函数"""
 
+    @classmethod
+    def _search(
+        cls,
+        collector: str,
+        start_time: datetime,
+        end_time: datetime,
+        query_string: str,
+        size: int,
+        sorting_rule: str,
+        search_after: List = None,
+    ) -> List[Dict]:
+        """调用日志平台的esquery_search，返回原始的hits"""
+        params = {
+            "indices": f"{env.DBA_APP_BK_BIZ_ID}_bklog.{collector}",
+            "start_time": datetime2str(start_time),
+            "end_time": datetime2str(end_time),
+            "query_string": query_string,
+            "start": 0,
+            "size": size,
+            "sort_list": [[field, sorting_rule] for field in BKLOG_SORT_FIELDS],
+        }
+        if search_after:
+            params["search_after"] = search_after
+
+        resp = BKLogApi.esquery_search(params, use_admin=True)
+        return resp["hits"]["hits"]
+
+    @staticmethod
+    def _format_hits(hits: List[Dict]) -> List[Dict]:
+        logs = []
+        for hit in hits:
+            raw_log = json.loads(hit["_source"]["log"])
+            logs.append({pascal_to_snake(key): value for key, value in raw_log.items()})
+        return logs
+
     @classmethod
     def query_logs(
         cls,
@@ -44,25 +87,55 @@ class BKLogHandler(object):
         @param size: 返回条数
         @param sorting_rule: 排序规则，默认是 asc升序； desc倒序
         """
-        resp = BKLogApi.esquery_search(
-            {
-                "indices": f"{env.DBA_APP_BK_BIZ_ID}_bklog.{collector}",
-                "start_time": datetime2str(start_time),
-                "end_time": datetime2str(end_time),
-                "query_string": query_string,
-                "start": 0,
-                "size": size,
-                "sort_list": [
-                    ["dtEventTimeStamp", sorting_rule],
-                    ["gseIndex", sorting_rule],
-                    ["iterationIndex", sorting_rule],
-                ],
-            },
-            use_admin=True,
-        )
-        backup_logs = []
-        for hit in resp["hits"]["hits"]:
-            raw_log = json.loads(hit["_source"]["log"])
-            backup_logs.append({pascal_to_snake(key): value for key, value in raw_log.items()})
+        hits = cls._search(collector, start_time, end_time, query_string, size, sorting_rule)
+        return cls._format_hits(hits)
+
+    @classmethod
+    def query_all_logs(
+        cls,
+        collector: str,
+        start_time: datetime,
+        end_time: datetime,
+        query_string="*",
+        sorting_rule: str = "asc",
+        page_size: int = BKLOG_QUERY_PAGE_SIZE,
+        max_size: int = BKLOG_QUERY_MAX_SIZE,
+        search_after: List = None,
+    ) -> Dict[str, Any]:
+        """
+        按照排序字段的search_after分页，获取对应采集项的全部日志
+        @param collector: 采集项名称
+        @param start_time: 开始时间
+        @param end_time: 结束时间
+        @param query_string: 过滤条件
+        @param sorting_rule: 排序规则，默认是 asc升序； desc倒序
+        @param page_size: 单页条数
+        @param max_size: 最多返回条数，命中日志超过该值时截断，并置truncated为True
+        @param search_after: 从该排序值之后开始查询，用于接着上次截断的位置继续拉取
+        返回的search_after为最后一条日志的排序值
+        """
+        logs: List[Dict] = []
+        truncated = False
+        while True:
+            # 多取一条，用于判断达到上限时是否仍有剩余日志
+            size = min(page_size, max_size - len(logs) + 1)
+            hits = cls._search(collector, start_time, end_time, query_string, size, sorting_rule, search_after)
+            if len(logs) + len(hits) > max_size:
+                hits, truncated = hits[: max_size - len(logs)], True
+
+            logs.extend(cls._format_hits(hits))
+            if hits:
+                # 优先使用ES返回的排序值，否则从日志源数据中获取
+                last_hit = hits[-1]
+                search_after = last_hit.get("sort") or [last_hit["_source"].get(field) for field in BKLOG_SORT_FIELDS]
+            if truncated or len(hits) < size:
+                break
 
-        return backup_logs
+        if truncated:
+            logger.warning(
+                "query_all_logs truncated: collector=%s, query_string=%s, max_size=%s",
+                collector,
+                query_string,
+                max_size,
+            )
+        return {"logs": logs, "truncated": truncated, "search_after": search_after}
@@ -124,6 +124,11 @@ class _CCApi(BaseApi):
             cache_time=60,
             description=_("查询云区域"),
         )
+        self.resource_watch = self.generate_data_api(
+            method="POST",
+            url="resource_watch/",
+            description=_("监听资源变化事件"),
+        )
         self.list_host_total_mainline_topo = self.generate_data_api(
             method="POST",
             url="list_host_total_mainline_topo/",
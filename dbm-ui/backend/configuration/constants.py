@@ -119,6 +119,10 @@ class SystemSettingsEnum(str, StructuredEnum):
     ITSM_REMARK_KEY = EnumField("ITSM_REMARK_KEY", _("ITSM备注key"))
     # SYNC_META 同步元数据
     SYNC_TENDBHA_CLUSTERS = EnumField("SYNC_TENDBHA_CLUSTERS", _("同步TenDBHA集群列表"))
+    REPORT_RETENTION = EnumField("REPORT_RETENTION", _("巡检报告明细保留策略"))
+    DBHA_EVENT_SYNC_STATE = EnumField("DBHA_EVENT_SYNC_STATE", _("DBHA切换事件的同步进度"))
+    EXPIRE_TICKET_CLEAR_SUMMARY = EnumField("EXPIRE_TICKET_CLEAR_SUMMARY", _("过期单据清理的运行记录"))
+    BACKUP_CATALOG_SYNC_STATE = EnumField("BACKUP_CATALOG_SYNC_STATE", _("备份目录的同步水位和覆盖起点"))
 
 
 class BizSettingsEnum(str, StructuredEnum):
@@ -206,6 +210,10 @@ AFFINITY_VALUE = []
 # 默认具备迁移权限的人员
 DBM_DEFAULT_MIGRATE_USER = ["admin"]
 
+# 默认的巡检报告明细保留策略: 按报告模型名配置，未配置的使用default。mode: delete(删除)/archive(归档到制品库后删除)
+# days为0表示不清理明细，默认不清理，需由管理员按需配置保留天数
+REPORT_RETENTION_VALUE = {"default": {"days": 0, "mode": "archive"}}
+
 DEFAULT_SETTINGS = [
     # [key, 类型，初始值, 描述]
     [SystemSettingsEnum.BKM_DBM_TOKEN.value, "str", "", _("监控数据源token")],
@@ -220,6 +228,7 @@ DEFAULT_SETTINGS = [
     [SystemSettingsEnum.SYSTEM_MSG_TYPE, "list", ["weixin", "mail"], _("系统消息通知方式")],
     [SystemSettingsEnum.PADDING_PROXY_CLUSTER_LIST, "list", [], _("补全proxy的集群域名列表")],
     [SystemSettingsEnum.VIRTUAL_USERS, "list", [], _("平台调用的虚拟账户列表")],
+    [SystemSettingsEnum.REPORT_RETENTION, "dict", REPORT_RETENTION_VALUE, _("巡检报告明细保留策略")],
 ]
 
 # 环境配置项 是否支持DNS解析 pulsar flow used
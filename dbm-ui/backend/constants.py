@@ -75,3 +75,5 @@ class CommonHostDBMeta:
 
 # 集群状态数据缓存key
 CACHE_CLUSTER_STATS = "cluster_stats"
+# dbmon 心跳缺失状态缓存key
+CACHE_DBMON_HEARTBEAT_MISSING = "dbmon_heartbeat_missing"
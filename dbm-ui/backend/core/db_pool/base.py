@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from backend.core.db_pool.pool import ConnectionPool, get_pool
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+    """
+    使用连接池的 mysql 后端，ENGINE 配置为 backend.core.db_pool。
+    连接关闭时归还连接池，由连接池决定复用还是断开
+    """
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return get_pool(self.alias, self.settings_dict.get("POOL"))
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # 事务中关闭的连接仍被当前 wrapper 引用(closed_in_transaction)，不能交给其他请求复用
+        with self.wrap_database_errors:
+            self.pool.release(self.connection, discard=self.in_atomic_block)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Tuple
+
+from django.db import OperationalError
+
+logger = logging.getLogger("root")
+
+# 连接池默认配置，可通过 DATABASES 的 POOL 覆盖
+DEFAULT_POOL_OPTIONS = {
+    # 最大连接数(使用中 + 空闲)
+    "MAX_SIZE": 20,
+    # 连接池耗尽时等待空闲连接的超时时间(秒)
+    "CHECKOUT_TIMEOUT": 10,
+    # 空闲超过该时间的连接不再复用(秒)，需小于数据库的 wait_timeout
+    "MAX_IDLE_TIME": 300,
+    # 取出连接时是否检查连接可用
+    "PRE_PING": True,
+}
+# 连接池指标的打印间隔(秒)
+POOL_STATS_LOG_INTERVAL = 300
+
+
+@dataclass
+class PoolStats:
+    created: int = 0
+    discarded: int = 0
+    checkouts: int = 0
+    ping_failures: int = 0
+    timeouts: int = 0
+    reclaimed: int = 0
+    wait_seconds: float = 0
+
+
+class ConnectionPool:
+    """
+    有界的数据库连接池。
+    使用 threading 的锁和队列实现，gevent monkey patch 后对协程同样安全。
+    每个取出的连接占用一个信号量，空闲连接为空时才新建连接，所以总连接数不会超过 MAX_SIZE。
+    取出的连接会记录持有线程，线程退出后仍未归还的连接在连接池耗尽时回收，避免信号量泄漏
+    """
+
+    def __init__(self, alias: str, options: Dict = None):
+        options = {**DEFAULT_POOL_OPTIONS, **(options or {})}
+        self.alias = alias
+        self.max_size = options["MAX_SIZE"]
+        self.checkout_timeout = options["CHECKOUT_TIMEOUT"]
+        self.max_idle_time = options["MAX_IDLE_TIME"]
+        self.pre_ping = options["PRE_PING"]
+
+        self.stats = PoolStats()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        # 取出中的连接: id(conn) -> (conn, 持有线程的弱引用)
+        self._checkouts: Dict[int, Tuple[Any, weakref.ref]] = {}
+        self._logged_at = time.monotonic()
+
+    @staticmethod
+    def is_usable(conn) -> bool:
+        try:
+            conn.ping()
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    @staticmethod
+    def close_connection(conn):
+        try:
+            conn.close()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    def acquire(self, connect: Callable[[], Any]):
+        """取出一个连接，没有空闲连接时通过 connect 新建"""
+        start = time.monotonic()
+        # 连接池耗尽时先回收已退出线程未归还的连接，再等待其他线程归还
+        if not self._slots.acquire(blocking=False):
+            self._reclaim_dead_checkouts()
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                with self._lock:
+                    self.stats.timeouts += 1
+                raise OperationalError(
+                    f"database pool [{self.alias}] exhausted, no connection available in {self.checkout_timeout}s"
+                )
+
+        try:
+            conn = self._get_idle()
+            created = conn is None
+            if created:
+                conn = connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checkouts[id(conn)] = (conn, weakref.ref(threading.current_thread()))
+            self.stats.created += int(created)
+            self.stats.checkouts += 1
+            self.stats.wait_seconds += time.monotonic() - start
+        return conn
+
+    def _reclaim_dead_checkouts(self):
+        """回收持有线程已退出的连接，连接中可能残留未完成的事务，直接关闭"""
+        with self._lock:
+            dead_conns = []
+            for conn_id, (conn, owner_ref) in list(self._checkouts.items()):
+                owner = owner_ref()
+                if owner is None or not owner.is_alive():
+                    dead_conns.append(self._checkouts.pop(conn_id)[0])
+            self.stats.reclaimed += len(dead_conns)
+
+        for conn in dead_conns:
+            self._discard(conn)
+            self._slots.release()
+        if dead_conns:
+            logger.warning(f"database pool [{self.alias}] reclaimed {len(dead_conns)} connections of exited threads")
+
+    def _get_idle(self):
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+
+            if time.monotonic() - released_at > self.max_idle_time:
+                self._discard(conn)
+                continue
+            if self.pre_ping and not self.is_usable(conn):
+                with self._lock:
+                    self.stats.ping_failures += 1
+                self._discard(conn)
+                continue
+            return conn
+
+    def _discard(self, conn):
+        self.close_connection(conn)
+        with self._lock:
+            self.stats.discarded += 1
+
+    def release(self, conn, discard: bool = False):
+        """归还连接，未提交的事务会被回滚，无法回滚的连接直接关闭"""
+        with self._lock:
+            checked_out = self._checkouts.pop(id(conn), None) is not None
+        if not checked_out:
+            # 已被回收的连接不再占用信号量，只需关闭
+            self.close_connection(conn)
+            return
+
+        try:
+            if not discard:
+                try:
+                    conn.rollback()
+                except Exception:  # pylint: disable=broad-except
+                    discard = True
+
+            if discard:
+                self._discard(conn)
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+            self._log_stats()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "alias": self.alias,
+                "in_use": len(self._checkouts),
+                "idle": self._idle.qsize(),
+                **asdict(self.stats),
+            }
+
+    def _log_stats(self):
+        now = time.monotonic()
+        if now - self._logged_at < POOL_STATS_LOG_INTERVAL:
+            return
+        self._logged_at = now
+        logger.info(f"database pool stats: {self.get_stats()}")
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn, __ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+
+# 连接池按(进程, 数据库别名)隔离，避免 fork 后的子进程复用父进程的连接
+_pools: Dict[Tuple[int, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, options: Dict = None) -> ConnectionPool:
+    key = (os.getpid(), alias)
+    if key not in _pools:
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(alias, options)
+    return _pools[key]
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    pid = os.getpid()
+    return {alias: pool.get_stats() for (pool_pid, alias), pool in _pools.items() if pool_pid == pid}
@@ -9,4 +9,4 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
-from .handlers import NotifyAdapter, send_msg
+from .handlers import NotifyAdapter, NotifyOutboxDispatcher, send_msg
@@ -29,3 +29,13 @@ class MsgType(str, StructuredEnum):
 DEFAULT_BIZ_NOTIFY_CONFIG = {
     status: {MsgType.RTX.value: True, MsgType.MAIL.value: True} for status in TicketStatus.get_values()
 }
+
+# 通知最大发送次数，超过后标记为发送失败
+NOTIFY_MAX_SEND_TIMES = 5
+# 通知重试退避基数和上限(秒)，第n次重试间隔为 min(基数 * 2^(n-1), 上限)
+NOTIFY_RETRY_BACKOFF = 30
+NOTIFY_RETRY_MAX_BACKOFF = 60 * 60
+# 单次投递最多认领的通知数，按计划发送时间先后认领，剩余的通知在下次投递时处理
+NOTIFY_DISPATCH_BATCH_SIZE = 500
+# 通知去重窗口(秒)，窗口内相同(单据, 阶段, 渠道, 接收人)的通知只发送一次
+NOTIFY_DEDUP_WINDOW = 10 * 60
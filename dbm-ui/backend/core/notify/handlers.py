@@ -8,10 +8,15 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import datetime
 import logging
 import textwrap
+from collections import defaultdict
+from typing import Dict, List
 
 from celery import shared_task
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 from jinja2 import Environment
 
@@ -20,14 +25,22 @@ from backend.components import CmsiApi
 from backend.components.bkchat.client import BkChatApi
 from backend.configuration.constants import BizSettingsEnum
 from backend.configuration.models import BizSettings
-from backend.core.notify.constants import DEFAULT_BIZ_NOTIFY_CONFIG, MsgType
+from backend.core.notify.constants import (
+    DEFAULT_BIZ_NOTIFY_CONFIG,
+    NOTIFY_DEDUP_WINDOW,
+    NOTIFY_DISPATCH_BATCH_SIZE,
+    NOTIFY_MAX_SEND_TIMES,
+    NOTIFY_RETRY_BACKOFF,
+    NOTIFY_RETRY_MAX_BACKOFF,
+    MsgType,
+)
 from backend.core.notify.exceptions import NotifyBaseException
 from backend.core.notify.template import FAILED_TEMPLATE, FINISHED_TEMPLATE, TERMINATE_TEMPLATE, TODO_TEMPLATE
 from backend.db_meta.models import AppCache
 from backend.exceptions import ApiResultError
 from backend.ticket.builders import BuilderFactory
-from backend.ticket.constants import TicketStatus, TicketType, TodoStatus
-from backend.ticket.models import Flow, Ticket
+from backend.ticket.constants import NotifyOutboxStatus, TicketStatus, TicketType, TodoStatus
+from backend.ticket.models import Flow, NotifyOutbox, Ticket
 from backend.ticket.todos import ActionType
 from backend.utils.cache import func_cache_decorator
 
@@ -258,7 +271,8 @@ class NotifyAdapter:
 
     def get_notify_class(self, msg_type: str):
         # 根据通知类型获取通知类，以及通知所需的上下文
-        if msg_type in [MsgType.WECOM_ROBOT, MsgType.RTX] and env.BKCHAT_APIGW_DOMAIN:
+        notify_class = get_notify_class(msg_type)
+        if notify_class == BkChatHandler:
             context = {"ticket": self.ticket, "phase": self.phase, "receivers": self.get_receivers()}
             return BkChatHandler, context
         else:
@@ -338,17 +352,177 @@ class NotifyAdapter:
                 logger.warning(_("通知类{}不支持该类型{}的消息发送").format(notify_class, msg_type))
                 continue
 
-            # 获取通知内容，发送通知
+            # 获取通知内容，写入通知发件箱
             title, content = self.render_msg_template(msg_type)
 
             # 如果是群机器人通知，则接受者为群ID
             if msg_type == MsgType.WECOM_ROBOT:
                 self.receivers = send_msg_config.get(MsgType.WECOM_ROBOT.value, [])
 
-            try:
-                notify_class(title, content, self.receivers).send_msg(msg_type, context=context)
-            except (ApiResultError, Exception) as e:
-                logger.error(_("[{}]消息发送失败，错误信息: {}").format(MsgType.get_choice_label(msg_type), e))
+            self.add_to_outbox(msg_type, title, content, context)
+
+        # 未开启合并通知时立即投递，投递失败的通知由周期任务按退避时间重试
+        if not env.NOTIFY_DIGEST_WINDOW:
+            NotifyOutboxDispatcher.dispatch(ticket_id=self.ticket.id)
+
+    def add_to_outbox(self, msg_type: str, title: str, content: str, context: Dict):
+        """将通知写入发件箱，相同(单据, 阶段, 渠道, 接收人)在待发送或去重窗口内已发送则忽略"""
+        now = timezone.now()
+        receivers = [receiver for receiver in self.receivers if receiver]
+        duplicated_receivers = NotifyOutbox.objects.filter(
+            Q(status=NotifyOutboxStatus.PENDING)
+            | Q(
+                status=NotifyOutboxStatus.SUCCEEDED, sent_at__gte=now - datetime.timedelta(seconds=NOTIFY_DEDUP_WINDOW)
+            ),
+            ticket=self.ticket,
+            phase=self.phase,
+            msg_type=msg_type,
+            receiver__in=receivers,
+        ).values_list("receiver", flat=True)
+        duplicated_receivers = set(duplicated_receivers)
+
+        # bkchat 通知需要额外记录@的通知人
+        context = {"receivers": context["receivers"]} if context else {}
+        send_at = now + datetime.timedelta(seconds=env.NOTIFY_DIGEST_WINDOW)
+        outboxes = [
+            NotifyOutbox(
+                creator=self.ticket.creator,
+                updater=self.ticket.creator,
+                ticket=self.ticket,
+                phase=self.phase,
+                msg_type=msg_type,
+                receiver=receiver,
+                title=title,
+                content=content,
+                context=context,
+                send_at=send_at,
+            )
+            for receiver in receivers
+            if receiver not in duplicated_receivers
+        ]
+        NotifyOutbox.objects.bulk_create(outboxes)
+
+
+def get_notify_class(msg_type: str):
+    """根据通知类型获取通知类"""
+    if msg_type in [MsgType.WECOM_ROBOT, MsgType.RTX] and env.BKCHAT_APIGW_DOMAIN:
+        return BkChatHandler
+    return CmsiHandler
+
+
+class NotifyOutboxDispatcher:
+    """
+    通知发件箱投递
+    - 先以发送次数做乐观锁认领通知，并预先设置下次重试时间，投递进程异常退出也能被重试
+    - 相同内容的通知合并接收人一起发送；开启合并通知时，同一接收人的多条cmsi通知合并为一条摘要
+    """
+
+    @staticmethod
+    def get_retry_backoff(send_times: int) -> int:
+        return min(NOTIFY_RETRY_BACKOFF * 2 ** (send_times - 1), NOTIFY_RETRY_MAX_BACKOFF)
+
+    @classmethod
+    def claim(cls, ticket_id: int = None) -> List[NotifyOutbox]:
+        """认领到期的待发送通知，按计划发送时间先后每次最多认领一批"""
+        now = timezone.now()
+        outboxes = NotifyOutbox.objects.select_related("ticket").filter(
+            status=NotifyOutboxStatus.PENDING, send_at__lte=now
+        )
+        if ticket_id:
+            outboxes = outboxes.filter(ticket_id=ticket_id)
+        outboxes = outboxes.order_by("send_at", "id")[:NOTIFY_DISPATCH_BATCH_SIZE]
+
+        claimed_outboxes: List[NotifyOutbox] = []
+        for outbox in outboxes:
+            send_at = now + datetime.timedelta(seconds=cls.get_retry_backoff(outbox.send_times + 1))
+            claimed = NotifyOutbox.objects.filter(id=outbox.id, send_times=outbox.send_times).update(
+                send_times=F("send_times") + 1, send_at=send_at
+            )
+            if claimed:
+                outbox.send_times += 1
+                claimed_outboxes.append(outbox)
+        return claimed_outboxes
+
+    @classmethod
+    def group(cls, outboxes: List[NotifyOutbox]) -> List[List[NotifyOutbox]]:
+        """将通知分组，每组只发送一次"""
+        digest_outboxes: Dict[tuple, List[NotifyOutbox]] = defaultdict(list)
+        content_outboxes: Dict[tuple, List[NotifyOutbox]] = defaultdict(list)
+        for outbox in outboxes:
+            if env.NOTIFY_DIGEST_WINDOW and get_notify_class(outbox.msg_type) == CmsiHandler:
+                digest_outboxes[(outbox.msg_type, outbox.receiver)].append(outbox)
+            else:
+                content_outboxes[
+                    (outbox.ticket_id, outbox.phase, outbox.msg_type, outbox.title, outbox.content)
+                ].append(outbox)
+
+        # 只有一条通知的接收人无需合并摘要，按内容与其他接收人一起发送
+        groups: List[List[NotifyOutbox]] = []
+        for receiver_outboxes in digest_outboxes.values():
+            if len(receiver_outboxes) > 1:
+                groups.append(receiver_outboxes)
+                continue
+            outbox = receiver_outboxes[0]
+            content_outboxes[(outbox.ticket_id, outbox.phase, outbox.msg_type, outbox.title, outbox.content)].append(
+                outbox
+            )
+        groups.extend(content_outboxes.values())
+        return groups
+
+    @classmethod
+    def render_digest(cls, outboxes: List[NotifyOutbox]):
+        """渲染摘要通知的标题和内容"""
+        title = _("「DBM」：您有{count}条单据通知").format(count=len(outboxes))
+        content = "\n".join(
+            _("{ticket_type}单据「{ticket_id}」{status}，详情: {url}").format(
+                ticket_type=TicketType.get_choice_label(outbox.ticket.ticket_type),
+                ticket_id=outbox.ticket_id,
+                status=TicketStatus.get_choice_label(outbox.phase),
+                url=outbox.ticket.url,
+            )
+            for outbox in outboxes
+        )
+        return title, content
+
+    @classmethod
+    def send(cls, outboxes: List[NotifyOutbox]):
+        outbox = outboxes[0]
+        notify_class = get_notify_class(outbox.msg_type)
+        receivers = list(dict.fromkeys([outbox.receiver for outbox in outboxes]))
+        # 同一接收人的多条单据通知合并为摘要，否则为相同内容的通知
+        if len({(item.ticket_id, item.phase) for item in outboxes}) > 1:
+            title, content = cls.render_digest(outboxes)
+        else:
+            title, content = outbox.title, outbox.content
+
+        context = {}
+        if notify_class == BkChatHandler:
+            context = {
+                "ticket": outbox.ticket,
+                "phase": outbox.phase,
+                "receivers": outbox.context.get("receivers", []),
+            }
+
+        outbox_ids = [outbox.id for outbox in outboxes]
+        try:
+            notify_class(title, content, receivers).send_msg(outbox.msg_type, context=context)
+        except (ApiResultError, Exception) as e:
+            logger.error(_("[{}]消息发送失败，错误信息: {}").format(MsgType.get_choice_label(outbox.msg_type), e))
+            # 超过最大发送次数则标记失败，否则等待认领时设置的重试时间
+            NotifyOutbox.objects.filter(id__in=outbox_ids).update(error=str(e))
+            NotifyOutbox.objects.filter(id__in=outbox_ids, send_times__gte=NOTIFY_MAX_SEND_TIMES).update(
+                status=NotifyOutboxStatus.FAILED
+            )
+        else:
+            NotifyOutbox.objects.filter(id__in=outbox_ids).update(
+                status=NotifyOutboxStatus.SUCCEEDED, sent_at=timezone.now(), error=""
+            )
+
+    @classmethod
+    def dispatch(cls, ticket_id: int = None):
+        """投递到期的通知，ticket_id 为空时投递全部单据的通知"""
+        for outboxes in cls.group(cls.claim(ticket_id)):
+            cls.send(outboxes)
 
 
 @shared_task
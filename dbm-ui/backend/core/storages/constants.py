@@ -84,3 +84,14 @@ class FileCredentialType(StructuredEnum):
     ACCESS_KEY_SECRET_KEY = EnumField("ACCESS_KEY_SECRET_KEY", "AppID+SecretKey")
     PASSWORD = EnumField("PASSWORD", _("单一密码"))
     USERNAME_PASSWORD = EnumField("USERNAME_PASSWORD", _("用户名+密码"))
+
+
+# 批量获取文件内容时，单个文件和全部文件返回内容的上限，超出的部分截断，只提供下载链接
+FETCH_FILE_CONTENT_MAX_SIZE = 2 * 1024 * 1024
+FETCH_FILE_CONTENT_TOTAL_MAX_SIZE = 10 * 1024 * 1024
+# 制品库打包下载的压缩包在内存中缓存的上限，超出后写入临时文件
+BATCH_DOWNLOAD_SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+# 制品库打包下载的压缩包大小上限，超出后不再解压，只提供下载链接
+BATCH_DOWNLOAD_MAX_SIZE = 1024 * 1024 * 1024
+# 流式下载的块大小
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
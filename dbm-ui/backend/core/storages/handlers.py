@@ -10,14 +10,17 @@ specific language governing permissions and limitations under the License.
 """
 
 import io
+import tempfile
 import zipfile
-from typing import Any, Dict, List
+from contextlib import closing
+from typing import IO, Any, Dict, List, Optional, Tuple
 
 from bkstorages.exceptions import RequestError as BKStorageError
 from django.http import StreamingHttpResponse
 from rest_framework.status import HTTP_200_OK
 
 from backend import env
+from backend.core.storages import constants
 from backend.core.storages.storage import CustomBKRepoStorage, get_storage
 from backend.exceptions import ApiRequestError, ApiResultError
 
@@ -38,36 +41,96 @@ class StorageHandler(object):
 
         return response
 
+    @staticmethod
+    def read_limited(stream: IO[bytes], limit: int) -> Tuple[bytes, bool]:
+        """读取至多 limit 字节，返回内容以及是否被截断"""
+        content = stream.read(limit + 1)
+        return content[:limit], len(content) > limit
+
+    def build_file_content(self, path: str, stream: IO[bytes], limit: int, size: int = None) -> Dict[str, Any]:
+        content, truncated = self.read_limited(stream, limit)
+        return {
+            "path": path,
+            "content": content.decode("utf-8", errors="replace"),
+            "url": self.storage.url(path),
+            "size": size,
+            "truncated": truncated,
+        }
+
+    def build_truncated_contents(self, file_path_list: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {"path": path, "content": "", "url": self.storage.url(path), "size": None, "truncated": True}
+            for path in file_path_list
+        ]
+
+    def spool_download(self, resp) -> Optional[IO[bytes]]:
+        """将下载内容按块写入临时文件(小文件留在内存中)，超出 BATCH_DOWNLOAD_MAX_SIZE 时返回 None"""
+        spool = tempfile.SpooledTemporaryFile(max_size=constants.BATCH_DOWNLOAD_SPOOL_MAX_MEMORY)
+        total_size = 0
+        with closing(resp):
+            for chunk in resp.iter_content(chunk_size=constants.DOWNLOAD_CHUNK_SIZE):
+                total_size += len(chunk)
+                if total_size > constants.BATCH_DOWNLOAD_MAX_SIZE:
+                    spool.close()
+                    return None
+                spool.write(chunk)
+        spool.seek(0)
+        return spool
+
+    def fetch_local_file_content(self, file_path_list: List[str]) -> List[Dict[str, Any]]:
+        """本地文件系统直接按文件读取"""
+        file_content_list: List[Dict[str, Any]] = []
+        remain = constants.FETCH_FILE_CONTENT_TOTAL_MAX_SIZE
+        for file_path in file_path_list:
+            limit = min(constants.FETCH_FILE_CONTENT_MAX_SIZE, remain)
+            size = self.storage.size(file_path)
+            with self.storage.open(file_path, "rb") as stream:
+                file_content_list.append(self.build_file_content(file_path, stream, limit, size))
+            remain -= min(size, limit)
+        return file_content_list
+
     def batch_fetch_file_content(self, file_path_list: List[str]) -> List[Dict[str, Any]]:
         """
-        批量获取文件内容
-        TODO: 是否需要限制文件大小，比如文件太大就不支持提供文件内容，只提供url下载链接
+        批量获取文件内容，流式下载和解压，不会将整个文件读入内存。
+        单个文件的内容不超过 FETCH_FILE_CONTENT_MAX_SIZE，全部文件的内容不超过 FETCH_FILE_CONTENT_TOTAL_MAX_SIZE，
+        超出的文件返回截断后的内容(truncated=True)，完整内容通过 url 下载
         :param file_path_list: 文件列表
         """
+        if self.storage.storage_type == constants.StorageType.FILE_SYSTEM.value:
+            return self.fetch_local_file_content(file_path_list)
 
-        file_content_list: List[Dict[str, Any]] = []
         resp = self.validate_response(self.storage.client.batch_download(file_path_list))
-        zip_content = resp.content
 
         # 如果文件只有一个，则返回的是文件本身
         if len(file_path_list) == 1:
-            file_path = file_path_list[0]
-            # encoding = chardet.detect(zip_content[:100])["encoding"]
-            zip_content = zip_content.decode("utf-8", errors="replace")
-            return [{"path": file_path, "content": zip_content, "url": self.storage.url(file_path)}]
+            limit, content = constants.FETCH_FILE_CONTENT_MAX_SIZE, bytearray()
+            # 只读取预览需要的部分，读够后关闭连接
+            with closing(resp):
+                for chunk in resp.iter_content(chunk_size=constants.DOWNLOAD_CHUNK_SIZE):
+                    content += chunk
+                    if len(content) > limit:
+                        break
+            size = int(resp.headers["Content-Length"]) if "Content-Length" in resp.headers else None
+            return [self.build_file_content(file_path_list[0], io.BytesIO(content), limit, size)]
 
         # 如果是有多个文件，则制品库会打包文件，返回一个zip流
-        file_stream = io.BytesIO(zip_content)
-        unzip_files = zipfile.ZipFile(file=file_stream)
-        for index, unzip_file_name in enumerate(unzip_files.namelist()):
-            # 注意，这里解压缩的文件名和原路径会有差异(好像少一个层级)
-            file_content_list.append(
-                {
-                    "path": unzip_file_name,
-                    "content": unzip_files.read(unzip_file_name).decode("utf-8", errors="replace"),
-                    "url": self.storage.url(unzip_file_name),
-                }
-            )
+        spool = self.spool_download(resp)
+        if spool is None:
+            return self.build_truncated_contents(file_path_list)
+
+        file_content_list: List[Dict[str, Any]] = []
+        remain = constants.FETCH_FILE_CONTENT_TOTAL_MAX_SIZE
+        with spool, zipfile.ZipFile(file=spool) as unzip_files:
+            for zip_info in unzip_files.infolist():
+                if zip_info.is_dir():
+                    continue
+                # 注意，这里解压缩的文件名和原路径会有差异(好像少一个层级)
+                limit = min(constants.FETCH_FILE_CONTENT_MAX_SIZE, remain)
+                with unzip_files.open(zip_info) as stream:
+                    file_content_list.append(
+                        self.build_file_content(zip_info.filename, stream, limit, zip_info.file_size)
+                    )
+                remain -= min(zip_info.file_size, limit)
 
         return file_content_list
 
@@ -78,7 +141,7 @@ class StorageHandler(object):
         """
         resp = self.storage.batch_download(file_path_list)
         resp = StreamingHttpResponse(
-            resp.iter_content(),
+            resp.iter_content(chunk_size=constants.DOWNLOAD_CHUNK_SIZE),
             content_type="application/octet‑stream",
         )
         resp["Content-Disposition"] = 'attachment; filename="download.tar.gz"'
@@ -11,4 +11,18 @@ specific language governing permissions and limitations under the License.
 
 from django.utils.translation import ugettext_lazy as _
 
+from blue_krill.data_types.enum import EnumField, StructuredEnum
+
 SWAGGER_TAG = _("污点池")
+
+# 污点池主机自动重试回收的最大次数
+DIRTY_MACHINE_RECYCLE_MAX_RETRIES = 3
+
+
+class DirtyMachineRecycleStatus(str, StructuredEnum):
+    """污点池主机回收状态"""
+
+    DIRTY = EnumField("DIRTY", _("待处理"))
+    TRANSFERRED = EnumField("TRANSFERRED", _("已转移待回收模块"))
+    RESOURCE_REMOVED = EnumField("RESOURCE_REMOVED", _("已从资源池移除"))
+    FAILED = EnumField("FAILED", _("回收失败"))
@@ -13,18 +13,23 @@ import logging
 from collections import defaultdict
 from typing import Any, Dict, List
 
+from django.db.models import Count
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 
 from backend import env
 from backend.components import CCApi
 from backend.components.dbresource.client import DBResourceApi
+from backend.components.exception import DataAPIException
 from backend.configuration.constants import SystemSettingsEnum
 from backend.configuration.models import SystemSettings
+from backend.db_dirty.constants import DIRTY_MACHINE_RECYCLE_MAX_RETRIES, DirtyMachineRecycleStatus
 from backend.db_dirty.models import DirtyMachine
 from backend.db_meta.models import AppCache
 from backend.db_services.ipchooser.constants import IDLE_HOST_MODULE
 from backend.db_services.ipchooser.handlers.topo_handler import TopoHandler
 from backend.db_services.ipchooser.query.resource import ResourceQueryHelper
+from backend.exceptions import ApiRequestError
 from backend.flow.consts import FAILED_STATES
 from backend.flow.utils.cc_manage import CcManage
 from backend.ticket.builders import BuilderFactory
@@ -41,23 +46,132 @@ class DBDirtyMachineHandler(object):
     """
 
     @classmethod
-    def transfer_dirty_machines(cls, bk_host_ids: List[int]):
+    def _recycle_biz_hosts(cls, bk_biz_id: int, dirty_machines: List[DirtyMachine]):
+        """
+        将同业务的污点主机转移到待回收模块，批量转移失败时逐台重试，定位失败的主机
+        @param bk_biz_id: 业务ID
+        @param dirty_machines: 污点主机列表
+        """
+        cc_manage = CcManage(int(bk_biz_id), "")
+        try:
+            cc_manage.recycle_host([machine.bk_host_id for machine in dirty_machines])
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning(_("【污点池】业务{}主机批量转移待回收失败，将逐台重试: {}").format(bk_biz_id, e))
+        else:
+            for machine in dirty_machines:
+                machine.recycle_status, machine.recycle_message = DirtyMachineRecycleStatus.TRANSFERRED, ""
+            return
+
+        for machine in dirty_machines:
+            try:
+                cc_manage.recycle_host([machine.bk_host_id])
+            except Exception as e:  # pylint: disable=broad-except
+                machine.recycle_status = DirtyMachineRecycleStatus.FAILED
+                machine.recycle_message = _("转移待回收模块失败: {}").format(e)
+                machine.recycle_retries += 1
+            else:
+                machine.recycle_status, machine.recycle_message = DirtyMachineRecycleStatus.TRANSFERRED, ""
+
+    @classmethod
+    def transfer_dirty_machines(cls, bk_host_ids: List[int]) -> List[Dict[str, Any]]:
         """
         将污点主机转移待回收模块，并从资源池移除
+        每台主机记录所处的回收阶段，失败的主机保留在污点池中，重复调用会从上次的阶段幂等重试
         @param bk_host_ids: 主机列表
         """
-        # 将主机移动到待回收模块
-        dirty_machines = DirtyMachine.objects.filter(bk_host_id__in=bk_host_ids)
-        bk_biz_id__host_ids = defaultdict(list)
+        dirty_machines = list(DirtyMachine.objects.filter(bk_host_id__in=bk_host_ids))
+
+        # 将未转移的主机移动到待回收模块
+        bk_biz_id__machines: Dict[int, List[DirtyMachine]] = defaultdict(list)
         for machine in dirty_machines:
-            bk_biz_id__host_ids[machine.bk_biz_id].append(machine.bk_host_id)
+            if machine.recycle_status != DirtyMachineRecycleStatus.TRANSFERRED:
+                bk_biz_id__machines[machine.bk_biz_id].append(machine)
+
+        for bk_biz_id, machines in bk_biz_id__machines.items():
+            cls._recycle_biz_hosts(bk_biz_id, machines)
+
+        # 将已转移的主机从资源池移除(忽略接口返回的错误，因为机器可能不来自资源池，仅网络类异常视为失败)
+        transferred_machines = [m for m in dirty_machines if m.recycle_status == DirtyMachineRecycleStatus.TRANSFERRED]
+        if transferred_machines:
+            try:
+                DBResourceApi.resource_delete(
+                    params={"bk_host_ids": [m.bk_host_id for m in transferred_machines]}, raise_exception=False
+                )
+            except (ApiRequestError, DataAPIException) as e:
+                for machine in transferred_machines:
+                    machine.recycle_message = _("资源池移除失败: {}").format(e)
+                    machine.recycle_retries += 1
+            else:
+                for machine in transferred_machines:
+                    machine.recycle_status = DirtyMachineRecycleStatus.RESOURCE_REMOVED
+
+        # 回收完成的主机移出污点池，其余主机回写回收状态等待重试
+        removed_host_ids, stuck_machines = [], []
+        for machine in dirty_machines:
+            if machine.recycle_status == DirtyMachineRecycleStatus.RESOURCE_REMOVED:
+                removed_host_ids.append(machine.bk_host_id)
+            else:
+                machine.update_at = timezone.now()
+                stuck_machines.append(machine)
+
+        DirtyMachine.objects.filter(bk_host_id__in=removed_host_ids).delete()
+        DirtyMachine.objects.bulk_update(
+            stuck_machines, fields=["recycle_status", "recycle_message", "recycle_retries", "update_at"]
+        )
 
-        for bk_biz_id, bk_host_ids in bk_biz_id__host_ids.items():
-            CcManage(int(bk_biz_id), "").recycle_host(bk_host_ids)
+        return [
+            {
+                "bk_host_id": machine.bk_host_id,
+                "ip": machine.ip,
+                "bk_biz_id": machine.bk_biz_id,
+                "recycle_status": machine.recycle_status,
+                "recycle_message": machine.recycle_message,
+            }
+            for machine in dirty_machines
+        ]
+
+    @classmethod
+    def retry_stuck_dirty_machines(cls):
+        """重试回收中途失败的污点主机，超过最大重试次数的主机需人工处理"""
+        bk_host_ids = list(
+            DirtyMachine.objects.filter(
+                recycle_status__in=[DirtyMachineRecycleStatus.TRANSFERRED, DirtyMachineRecycleStatus.FAILED],
+                recycle_retries__lt=DIRTY_MACHINE_RECYCLE_MAX_RETRIES,
+            ).values_list("bk_host_id", flat=True)
+        )
+        if not bk_host_ids:
+            return []
+        return cls.transfer_dirty_machines(bk_host_ids)
+
+    @classmethod
+    def recycle_summary(cls) -> Dict[str, Any]:
+        """
+        污点池回收概览：各回收状态的主机数量，以及卡在回收中途的主机
+        """
+        status__count = dict(
+            DirtyMachine.objects.values_list("recycle_status").annotate(count=Count("bk_host_id")).order_by()
+        )
+        stuck_machines = DirtyMachine.objects.filter(
+            recycle_status__in=[DirtyMachineRecycleStatus.TRANSFERRED, DirtyMachineRecycleStatus.FAILED]
+        ).order_by("update_at")
 
-        # 删除污点池记录，并从资源池移除(忽略删除错误，因为机器可能不来自资源池)
-        dirty_machines.delete()
-        DBResourceApi.resource_delete(params={"bk_host_ids": bk_host_ids}, raise_exception=False)
+        return {
+            "status_count": {
+                status: status__count.get(status, 0) for status in DirtyMachineRecycleStatus.get_values()
+            },
+            "stuck_hosts": [
+                {
+                    "bk_host_id": machine.bk_host_id,
+                    "ip": machine.ip,
+                    "bk_biz_id": machine.bk_biz_id,
+                    "recycle_status": machine.recycle_status,
+                    "recycle_message": machine.recycle_message,
+                    "recycle_retries": machine.recycle_retries,
+                    "update_at": machine.update_at,
+                }
+                for machine in stuck_machines
+            ],
+        }
 
     @classmethod
     def query_dirty_machine_records(cls, bk_host_ids: List[int]):
@@ -131,6 +245,8 @@ class DBDirtyMachineHandler(object):
                 "ticket_type_display": dirty.ticket.get_ticket_type_display(),
                 "task_id": dirty.flow.flow_obj_id,
                 "operator": dirty.ticket.creator,
+                "recycle_status": dirty.recycle_status,
+                "recycle_message": dirty.recycle_message,
                 "is_dirty": True,
             }
 
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("db_dirty", "0002_alter_dirtymachine_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dirtymachine",
+            name="recycle_status",
+            field=models.CharField(
+                choices=[
+                    ("DIRTY", "待处理"),
+                    ("TRANSFERRED", "已转移待回收模块"),
+                    ("RESOURCE_REMOVED", "已从资源池移除"),
+                    ("FAILED", "回收失败"),
+                ],
+                default="DIRTY",
+                help_text="回收状态",
+                max_length=32,
+            ),
+        ),
+        migrations.AddField(
+            model_name="dirtymachine",
+            name="recycle_message",
+            field=models.TextField(blank=True, default="", help_text="回收失败信息"),
+        ),
+        migrations.AddField(
+            model_name="dirtymachine",
+            name="recycle_retries",
+            field=models.IntegerField(default=0, help_text="回收重试次数"),
+        ),
+    ]
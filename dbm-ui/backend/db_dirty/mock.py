@@ -21,5 +21,22 @@ DIRTY_MACHINE_LIST = [
         "ticket_type": "REDIS_CLUSTER_APPLY",
         "ticket_id": 1,
         "task_id": "",
+        "recycle_status": "DIRTY",
+        "recycle_message": "",
     }
 ]
+
+DIRTY_MACHINE_RECYCLE_SUMMARY = {
+    "status_count": {"DIRTY": 10, "TRANSFERRED": 1, "RESOURCE_REMOVED": 0, "FAILED": 1},
+    "stuck_hosts": [
+        {
+            "bk_host_id": 5,
+            "ip": "127.0.0.5",
+            "bk_biz_id": 3,
+            "recycle_status": "FAILED",
+            "recycle_message": "转移待回收模块失败: xxx",
+            "recycle_retries": 1,
+            "update_at": "2024-06-21T12:00:00+08:00",
+        }
+    ],
+}
@@ -12,8 +12,9 @@ specific language governing permissions and limitations under the License.
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
-from backend.bk_web.constants import LEN_MIDDLE
+from backend.bk_web.constants import LEN_MIDDLE, LEN_SHORT
 from backend.bk_web.models import AuditedModel
+from backend.db_dirty.constants import DirtyMachineRecycleStatus
 from backend.ticket.models import Flow, Ticket
 
 
@@ -28,6 +29,14 @@ class DirtyMachine(AuditedModel):
     ip = models.CharField(max_length=LEN_MIDDLE, help_text=_("主机IP"))
     flow = models.ForeignKey(Flow, on_delete=models.CASCADE, help_text=_("关联任务"))
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, help_text=_("关联单据"))
+    recycle_status = models.CharField(
+        max_length=LEN_SHORT,
+        choices=DirtyMachineRecycleStatus.get_choices(),
+        default=DirtyMachineRecycleStatus.DIRTY,
+        help_text=_("回收状态"),
+    )
+    recycle_message = models.TextField(default="", blank=True, help_text=_("回收失败信息"))
+    recycle_retries = models.IntegerField(default=0, help_text=_("回收重试次数"))
 
     class Meta:
         verbose_name = verbose_name_plural = _("污点池机器(DirtyMachine)")
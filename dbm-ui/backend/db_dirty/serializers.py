@@ -12,7 +12,7 @@ specific language governing permissions and limitations under the License.
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
-from backend.db_dirty.mock import DIRTY_MACHINE_LIST
+from backend.db_dirty.mock import DIRTY_MACHINE_LIST, DIRTY_MACHINE_RECYCLE_SUMMARY
 from backend.ticket.constants import TicketType
 
 
@@ -42,5 +42,10 @@ class TransferDirtyMachineSerializer(serializers.Serializer):
     bk_host_ids = serializers.ListField(child=serializers.IntegerField(), help_text=_("待转移的主机ID列表"))
 
 
+class DirtyMachineRecycleSummaryResponseSerializer(serializers.Serializer):
+    class Meta:
+        swagger_schema_fields = {"example": DIRTY_MACHINE_RECYCLE_SUMMARY}
+
+
 class DeleteDirtyMachineSerializer(serializers.Serializer):
     bk_host_ids = serializers.ListField(child=serializers.IntegerField(), help_text=_("待删除的污点池记录主机ID"))
@@ -24,6 +24,7 @@ from backend.db_dirty.handlers import DBDirtyMachineHandler
 from backend.db_dirty.models import DirtyMachine
 from backend.db_dirty.serializers import (
     DeleteDirtyMachineSerializer,
+    DirtyMachineRecycleSummaryResponseSerializer,
     QueryDirtyMachineResponseSerializer,
     QueryDirtyMachineSerializer,
     TransferDirtyMachineSerializer,
@@ -92,8 +93,16 @@ class DBDirtyMachineViewSet(viewsets.SystemViewSet):
     )
     def transfer_dirty_machines(self, request):
         bk_host_ids = self.params_validate(self.get_serializer_class())["bk_host_ids"]
-        DBDirtyMachineHandler.transfer_dirty_machines(bk_host_ids)
-        return Response()
+        return Response(DBDirtyMachineHandler.transfer_dirty_machines(bk_host_ids))
+
+    @common_swagger_auto_schema(
+        operation_summary=_("查询污点池回收概览"),
+        responses={status.HTTP_200_OK: DirtyMachineRecycleSummaryResponseSerializer()},
+        tags=[SWAGGER_TAG],
+    )
+    @action(detail=False, methods=["GET"], url_path="recycle_summary")
+    def recycle_summary(self, request):
+        return Response(DBDirtyMachineHandler.recycle_summary())
 
     @common_swagger_auto_schema(
         operation_summary=_("删除污点池记录"),
@@ -8,3 +8,34 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from django.utils.translation import ugettext_lazy as _
+
+from blue_krill.data_types.enum import EnumField, StructuredEnum
+
+SWAGGER_TAG = _("DBHA事件")
+
+# 每次同步最多拉取的批次，避免首次同步长时间占用周期任务。
+# HADB按uid倒序分页，超过批次上限时只同步最新的事件，更早的事件不再补齐
+DBHA_EVENT_SYNC_ROUNDS = 10
+# 每批拉取的切换事件数
+DBHA_EVENT_SYNC_PAGE_SIZE = 500
+# 未结束的切换事件在该时间内会被重新拉取以更新状态(秒)
+DBHA_UNFINISHED_EVENT_LOOKBACK = 24 * 60 * 60
+# 每次同步日志的最大事件数
+DBHA_LOG_SYNC_LIMIT = 200
+
+
+class SwitchResult(str, StructuredEnum):
+    SUCCESS = EnumField("success", _("切换成功"))
+    FAILED = EnumField("failed", _("切换失败"))
+
+
+class AnalysisDimension(str, StructuredEnum):
+    CLUSTER_TYPE = EnumField("cluster_type", _("集群类型"))
+    BIZ = EnumField("bk_biz_id", _("业务"))
+
+
+class AnalysisInterval(str, StructuredEnum):
+    DAY = EnumField("day", _("天"))
+    WEEK = EnumField("week", _("周"))
+    MONTH = EnumField("month", _("月"))
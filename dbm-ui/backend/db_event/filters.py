@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from django.utils.translation import ugettext_lazy as _
+from django_filters import rest_framework as filters
+
+from backend.db_event.models import DBHASwitchEvent
+
+
+class DBHASwitchEventFilter(filters.FilterSet):
+    app = filters.NumberFilter(field_name="bk_biz_id", label=_("业务ID"))
+    cluster = filters.CharFilter(field_name="cluster", lookup_expr="icontains", label=_("集群域名"))
+    cluster_type = filters.CharFilter(field_name="cluster_type", label=_("集群类型"))
+    db_role = filters.CharFilter(field_name="db_role", label=_("实例角色"))
+    ip = filters.CharFilter(field_name="ip", method="filter_ip", label=_("实例IP"))
+    switch_result = filters.CharFilter(field_name="switch_result", label=_("切换结果"))
+    switch_start_time = filters.DateTimeFilter(field_name="switch_start_time", lookup_expr="gte", label=_("开始时间"))
+    switch_finished_time = filters.DateTimeFilter(field_name="switch_start_time", lookup_expr="lte", label=_("结束时间"))
+
+    def filter_ip(self, queryset, name, value):
+        return queryset.filter(ip__in=value.split(","))
+
+    class Meta:
+        model = DBHASwitchEvent
+        fields = ["app", "cluster", "cluster_type", "db_role", "ip", "switch_result"]
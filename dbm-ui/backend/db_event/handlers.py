@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import datetime
+import logging
+from typing import Dict, List, Optional
+
+from django.db.models import Avg, Count, Max, Q
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from backend.components.hadb.client import HADBApi
+from backend.configuration.constants import SystemSettingsEnum
+from backend.configuration.models import SystemSettings
+from backend.db_event.constants import (
+    DBHA_EVENT_SYNC_PAGE_SIZE,
+    DBHA_EVENT_SYNC_ROUNDS,
+    DBHA_LOG_SYNC_LIMIT,
+    DBHA_UNFINISHED_EVENT_LOOKBACK,
+    AnalysisDimension,
+    AnalysisInterval,
+    SwitchResult,
+)
+from backend.db_event.models import DBHASwitchEvent, DBHASwitchLog
+from backend.db_meta.models import Cluster
+
+logger = logging.getLogger("root")
+
+# 切换事件中可被更新的字段
+SWITCH_EVENT_UPDATE_FIELDS = [
+    "bk_biz_id",
+    "bk_cloud_id",
+    "cluster",
+    "cluster_id",
+    "cluster_type",
+    "ip",
+    "port",
+    "slave_ip",
+    "slave_port",
+    "db_type",
+    "db_role",
+    "idc",
+    "status",
+    "switch_result",
+    "confirm_result",
+    "remark",
+    "switch_start_time",
+    "switch_finished_time",
+    "confirm_check_time",
+    "recover_seconds",
+]
+
+
+def parse_switch_time(value: str) -> Optional[datetime.datetime]:
+    """解析 HADB 返回的时间，零值时间视为空"""
+    if not value:
+        return None
+    try:
+        time = parse_datetime(value)
+    except ValueError:
+        return None
+    if not time or time.year <= 1:
+        return None
+    return time if timezone.is_aware(time) else timezone.make_aware(time)
+
+
+def to_int(value, default=0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class DBHAEventHandler:
+    """DBHA切换事件的同步与统计"""
+
+    @classmethod
+    def get_sync_state(cls) -> Dict[str, int]:
+        """
+        获取增量同步进度：cursor 为已完整同步的最大事件ID，offset 为本轮同步已拉取到的分页偏移，
+        max_uid 为本轮同步已拉取的最大事件ID。未记录进度时从本地已同步的最大事件ID开始
+        """
+        state = SystemSettings.get_setting_value(key=SystemSettingsEnum.DBHA_EVENT_SYNC_STATE.value, default={})
+        if not state:
+            max_uid = DBHASwitchEvent.objects.aggregate(max_uid=Max("uid"))["max_uid"] or 0
+            state = {"cursor": max_uid, "offset": 0, "max_uid": max_uid}
+        return state
+
+    @classmethod
+    def save_sync_state(cls, cursor: int, offset: int, max_uid: int):
+        SystemSettings.insert_setting_value(
+            key=SystemSettingsEnum.DBHA_EVENT_SYNC_STATE.value,
+            value={"cursor": cursor, "offset": offset, "max_uid": max_uid},
+            value_type="dict",
+        )
+
+    @classmethod
+    def query_switch_queue(cls, uid: int, offset: int) -> List[Dict]:
+        """查询 uid 不小于查询值的切换事件，HADB 按 uid 倒序分页返回"""
+        return HADBApi.switch_queue(
+            params={
+                "name": "query_switch_queue_by_uid",
+                "query_args": {"uid": uid},
+                "page_args": {"limit": DBHA_EVENT_SYNC_PAGE_SIZE, "offset": offset},
+            }
+        )
+
+    @classmethod
+    def build_switch_event(cls, switch: Dict, clusters: Dict[str, Dict]) -> DBHASwitchEvent:
+        cluster = clusters.get(switch.get("cluster"), {})
+        switch_start_time = parse_switch_time(switch.get("switch_start_time"))
+        switch_finished_time = parse_switch_time(switch.get("switch_finished_time"))
+        recover_seconds = None
+        if switch_start_time and switch_finished_time:
+            recover_seconds = max(int((switch_finished_time - switch_start_time).total_seconds()), 0)
+
+        return DBHASwitchEvent(
+            uid=int(switch["uid"]),
+            bk_biz_id=to_int(switch.get("app")),
+            bk_cloud_id=to_int(switch.get("cloud_id", switch.get("cloud"))),
+            cluster=switch.get("cluster") or "",
+            cluster_id=cluster.get("id", 0),
+            cluster_type=cluster.get("cluster_type") or switch.get("db_type") or "",
+            ip=switch.get("ip") or "",
+            port=to_int(switch.get("port")),
+            slave_ip=switch.get("slave_ip") or "",
+            slave_port=to_int(switch.get("slave_port")),
+            db_type=switch.get("db_type") or "",
+            db_role=switch.get("db_role") or "",
+            idc=str(switch.get("idc_id") or ""),
+            status=switch.get("status") or "",
+            switch_result=switch.get("switch_result") or "",
+            confirm_result=switch.get("confirm_result") or "",
+            remark=switch.get("remark") or "",
+            switch_start_time=switch_start_time,
+            switch_finished_time=switch_finished_time,
+            confirm_check_time=parse_switch_time(switch.get("confirm_check_time")),
+            recover_seconds=recover_seconds,
+        )
+
+    @classmethod
+    def save_switch_events(cls, switch_queues: List[Dict]):
+        """新增或更新切换事件"""
+        domains = {switch.get("cluster") for switch in switch_queues}
+        clusters = {
+            cluster["immute_domain"]: cluster
+            for cluster in Cluster.objects.filter(immute_domain__in=domains).values(
+                "immute_domain", "cluster_type", "id"
+            )
+        }
+        events = {event.uid: event for event in [cls.build_switch_event(s, clusters) for s in switch_queues]}
+        exist_events = DBHASwitchEvent.objects.in_bulk(list(events.keys()), field_name="uid")
+
+        created_events, updated_events = [], []
+        for uid, event in events.items():
+            if uid not in exist_events:
+                created_events.append(event)
+                continue
+            event.id = exist_events[uid].id
+            updated_events.append(event)
+
+        DBHASwitchEvent.objects.bulk_create(created_events)
+        DBHASwitchEvent.objects.bulk_update(updated_events, fields=SWITCH_EVENT_UPDATE_FIELDS, batch_size=500)
+
+    @classmethod
+    def sync_switch_events(cls):
+        """
+        从 HADB 增量同步切换事件：HADB 返回 uid 不小于查询值的事件并按 uid 倒序分页，
+        每次最多拉取固定页数，未拉取完的分页偏移记录在同步进度中，下次从该偏移继续，
+        拉取到最后一页后才推进游标，保证游标之后的事件不会被跳过
+        """
+        state = cls.get_sync_state()
+        cursor, offset, max_uid = state["cursor"], state["offset"], state["max_uid"]
+        for __ in range(DBHA_EVENT_SYNC_ROUNDS):
+            switch_queues = cls.query_switch_queue(cursor + 1, offset)
+            if switch_queues:
+                cls.save_switch_events(switch_queues)
+                max_uid = max(max_uid, *[int(switch["uid"]) for switch in switch_queues])
+                logger.info(f"sync dbha switch events after {cursor}, offset: {offset}, count: {len(switch_queues)}")
+            # 同步期间新增的事件会使分页后移，继续拉取时最多重复拉取部分事件，不会遗漏
+            offset += DBHA_EVENT_SYNC_PAGE_SIZE
+            if len(switch_queues) < DBHA_EVENT_SYNC_PAGE_SIZE:
+                cls.save_sync_state(cursor=max_uid, offset=0, max_uid=max_uid)
+                break
+        else:
+            cls.save_sync_state(cursor=cursor, offset=offset, max_uid=max_uid)
+            logger.warning(
+                f"sync dbha switch events after {cursor} reach the limit of {DBHA_EVENT_SYNC_ROUNDS} pages, "
+                f"continue from offset {offset} next time"
+            )
+
+        cls.refresh_unfinished_events()
+
+    @classmethod
+    def refresh_unfinished_events(cls):
+        """重新拉取本地近期未结束的切换事件，更新其状态"""
+        lookback = timezone.now() - datetime.timedelta(seconds=DBHA_UNFINISHED_EVENT_LOOKBACK)
+        unfinished_uids = set(
+            DBHASwitchEvent.objects.filter(
+                switch_finished_time__isnull=True, switch_start_time__gte=lookback
+            ).values_list("uid", flat=True)
+        )
+        if not unfinished_uids:
+            return
+
+        min_uid = min(unfinished_uids)
+        for page in range(DBHA_EVENT_SYNC_ROUNDS):
+            switch_queues = cls.query_switch_queue(min_uid, page * DBHA_EVENT_SYNC_PAGE_SIZE)
+            refreshed = [switch for switch in switch_queues if int(switch["uid"]) in unfinished_uids]
+            if refreshed:
+                cls.save_switch_events(refreshed)
+                unfinished_uids -= {int(switch["uid"]) for switch in refreshed}
+            if not unfinished_uids or len(switch_queues) < DBHA_EVENT_SYNC_PAGE_SIZE:
+                return
+
+        logger.warning(f"refresh unfinished dbha switch events reach the limit, remain: {sorted(unfinished_uids)}")
+
+    @classmethod
+    def fetch_switch_logs(cls, sw_id: int) -> List[Dict]:
+        return HADBApi.switch_logs(
+            params={"name": "query_switch_log", "query_args": {"sw_id": sw_id}},
+            raw=False,
+        )
+
+    @classmethod
+    def sync_switch_logs(cls):
+        """同步已结束切换事件的日志，结束后的日志不再变化，只需同步一次"""
+        events = DBHASwitchEvent.objects.filter(logs_synced=False, switch_finished_time__isnull=False).order_by("uid")
+        for event in events[:DBHA_LOG_SYNC_LIMIT]:
+            try:
+                switch_logs = [
+                    DBHASwitchLog(
+                        uid=int(log["uid"]),
+                        sw_id=event.uid,
+                        ip=log.get("ip") or "",
+                        result=log.get("result") or "",
+                        comment=log.get("comment") or "",
+                        datetime=parse_switch_time(log.get("datetime")),
+                    )
+                    for log in cls.fetch_switch_logs(event.uid)
+                ]
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error(f"sync dbha switch logs of {event.uid} failed: {e}")
+                continue
+
+            DBHASwitchLog.objects.bulk_create(switch_logs, ignore_conflicts=True)
+            DBHASwitchEvent.objects.filter(id=event.id).update(logs_synced=True)
+
+    @classmethod
+    def get_switch_logs(cls, sw_id: int) -> List[Dict]:
+        """获取切换日志，已同步则读本地，未同步(如切换中)则实时查询"""
+        if DBHASwitchEvent.objects.filter(uid=sw_id, logs_synced=True).exists():
+            logs = DBHASwitchLog.objects.filter(sw_id=sw_id).order_by("uid")
+            return [
+                {
+                    "timestamp": log.datetime.timestamp() * 1000 if log.datetime else 0,
+                    "levelname": log.result,
+                    "message": f"[dbha]: {log.comment}",
+                }
+                for log in logs
+            ]
+
+        switch_logs = []
+        for log in cls.fetch_switch_logs(sw_id):
+            log_time = parse_switch_time(log["datetime"])
+            switch_logs.append(
+                {
+                    "timestamp": log_time.timestamp() * 1000 if log_time else 0,
+                    "levelname": log.get("result"),
+                    "message": f"[dbha]: {log['comment']}",
+                }
+            )
+        return switch_logs
+
+    @classmethod
+    def analysis(
+        cls,
+        start_time: datetime.datetime,
+        end_time: datetime.datetime,
+        dimension: str = AnalysisDimension.CLUSTER_TYPE,
+        interval: str = AnalysisInterval.DAY,
+        bk_biz_id: int = None,
+    ) -> List[Dict]:
+        """按维度和时间间隔统计切换次数、成功率和平均恢复耗时"""
+        trunc_func = {
+            AnalysisInterval.DAY: TruncDay,
+            AnalysisInterval.WEEK: TruncWeek,
+            AnalysisInterval.MONTH: TruncMonth,
+        }[interval]
+        events = DBHASwitchEvent.objects.filter(switch_start_time__gte=start_time, switch_start_time__lt=end_time)
+        if bk_biz_id:
+            events = events.filter(bk_biz_id=bk_biz_id)
+
+        stats = (
+            events.annotate(time=trunc_func("switch_start_time"))
+            .values("time", dimension)
+            .annotate(
+                switch_count=Count("id"),
+                success_count=Count("id", filter=Q(switch_result=SwitchResult.SUCCESS)),
+                mttr=Avg("recover_seconds"),
+            )
+            .order_by("time", dimension)
+        )
+        return [
+            {
+                "time": stat["time"],
+                dimension: stat[dimension],
+                "switch_count": stat["switch_count"],
+                "success_count": stat["success_count"],
+                "success_rate": round(stat["success_count"] / stat["switch_count"], 4),
+                "mttr": round(stat["mttr"], 2) if stat["mttr"] is not None else None,
+            }
+            for stat in stats
+        ]
@@ -0,0 +1,78 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DBHASwitchEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("uid", models.BigIntegerField(unique=True, verbose_name="切换事件ID")),
+                ("bk_biz_id", models.IntegerField(default=0, verbose_name="业务ID")),
+                ("bk_cloud_id", models.IntegerField(default=0, verbose_name="云区域ID")),
+                ("cluster", models.CharField(default="", max_length=255, verbose_name="集群域名")),
+                ("cluster_id", models.IntegerField(default=0, verbose_name="集群ID")),
+                ("cluster_type", models.CharField(default="", max_length=32, verbose_name="集群类型")),
+                ("ip", models.CharField(default="", max_length=32, verbose_name="实例IP")),
+                ("port", models.IntegerField(default=0, verbose_name="实例端口")),
+                ("slave_ip", models.CharField(default="", max_length=32, verbose_name="Slave IP")),
+                ("slave_port", models.IntegerField(default=0, verbose_name="Slave端口")),
+                ("db_type", models.CharField(default="", max_length=64, verbose_name="实例类型")),
+                ("db_role", models.CharField(default="", max_length=64, verbose_name="实例角色")),
+                ("idc", models.CharField(default="", max_length=64, verbose_name="机房")),
+                ("status", models.CharField(default="", max_length=64, verbose_name="切换状态")),
+                ("switch_result", models.CharField(default="", max_length=128, verbose_name="切换结果")),
+                ("confirm_result", models.TextField(default="", verbose_name="切换原因")),
+                ("remark", models.TextField(default="", verbose_name="备注")),
+                ("switch_start_time", models.DateTimeField(null=True, verbose_name="切换开始时间")),
+                ("switch_finished_time", models.DateTimeField(null=True, verbose_name="切换结束时间")),
+                ("confirm_check_time", models.DateTimeField(null=True, verbose_name="检测结束时间")),
+                ("recover_seconds", models.IntegerField(null=True, verbose_name="恢复耗时(秒)")),
+                ("logs_synced", models.BooleanField(default=False, verbose_name="日志是否已同步")),
+                ("update_at", models.DateTimeField(auto_now=True, verbose_name="同步时间")),
+            ],
+            options={
+                "verbose_name": "DBHA切换事件(DBHASwitchEvent)",
+                "verbose_name_plural": "DBHA切换事件(DBHASwitchEvent)",
+            },
+        ),
+        migrations.CreateModel(
+            name="DBHASwitchLog",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("uid", models.BigIntegerField(unique=True, verbose_name="日志ID")),
+                ("sw_id", models.BigIntegerField(db_index=True, verbose_name="切换事件ID")),
+                ("ip", models.CharField(default="", max_length=32, verbose_name="实例IP")),
+                ("result", models.CharField(default="", max_length=64, verbose_name="日志级别")),
+                ("comment", models.TextField(default="", verbose_name="日志内容")),
+                ("datetime", models.DateTimeField(null=True, verbose_name="日志时间")),
+            ],
+            options={
+                "verbose_name": "DBHA切换日志(DBHASwitchLog)",
+                "verbose_name_plural": "DBHA切换日志(DBHASwitchLog)",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="dbhaswitchevent",
+            index=models.Index(fields=["bk_biz_id", "switch_start_time"], name="db_event_db_bk_biz__2e1ce2_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dbhaswitchevent",
+            index=models.Index(fields=["cluster_type", "switch_start_time"], name="db_event_db_cluster_90773d_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dbhaswitchevent",
+            index=models.Index(fields=["cluster"], name="db_event_db_cluster_e9a38d_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dbhaswitchevent",
+            index=models.Index(fields=["db_role"], name="db_event_db_db_role_4707b1_idx"),
+        ),
+    ]
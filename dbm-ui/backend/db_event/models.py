@@ -8,3 +8,58 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from backend.bk_web.constants import LEN_LONG, LEN_MIDDLE, LEN_NORMAL, LEN_SHORT
+
+
+class DBHASwitchEvent(models.Model):
+    """DBHA切换事件，由周期任务从 HADB 增量同步"""
+
+    uid = models.BigIntegerField(_("切换事件ID"), unique=True)
+    bk_biz_id = models.IntegerField(_("业务ID"), default=0)
+    bk_cloud_id = models.IntegerField(_("云区域ID"), default=0)
+    cluster = models.CharField(_("集群域名"), max_length=LEN_LONG, default="")
+    cluster_id = models.IntegerField(_("集群ID"), default=0)
+    cluster_type = models.CharField(_("集群类型"), max_length=LEN_SHORT, default="")
+    ip = models.CharField(_("实例IP"), max_length=LEN_SHORT, default="")
+    port = models.IntegerField(_("实例端口"), default=0)
+    slave_ip = models.CharField(_("Slave IP"), max_length=LEN_SHORT, default="")
+    slave_port = models.IntegerField(_("Slave端口"), default=0)
+    db_type = models.CharField(_("实例类型"), max_length=LEN_NORMAL, default="")
+    db_role = models.CharField(_("实例角色"), max_length=LEN_NORMAL, default="")
+    idc = models.CharField(_("机房"), max_length=LEN_NORMAL, default="")
+    status = models.CharField(_("切换状态"), max_length=LEN_NORMAL, default="")
+    switch_result = models.CharField(_("切换结果"), max_length=LEN_MIDDLE, default="")
+    confirm_result = models.TextField(_("切换原因"), default="")
+    remark = models.TextField(_("备注"), default="")
+    switch_start_time = models.DateTimeField(_("切换开始时间"), null=True)
+    switch_finished_time = models.DateTimeField(_("切换结束时间"), null=True)
+    confirm_check_time = models.DateTimeField(_("检测结束时间"), null=True)
+    recover_seconds = models.IntegerField(_("恢复耗时(秒)"), null=True)
+    logs_synced = models.BooleanField(_("日志是否已同步"), default=False)
+    update_at = models.DateTimeField(_("同步时间"), auto_now=True)
+
+    class Meta:
+        verbose_name = verbose_name_plural = _("DBHA切换事件(DBHASwitchEvent)")
+        indexes = [
+            models.Index(fields=["bk_biz_id", "switch_start_time"]),
+            models.Index(fields=["cluster_type", "switch_start_time"]),
+            models.Index(fields=["cluster"]),
+            models.Index(fields=["db_role"]),
+        ]
+
+
+class DBHASwitchLog(models.Model):
+    """DBHA切换事件日志"""
+
+    uid = models.BigIntegerField(_("日志ID"), unique=True)
+    sw_id = models.BigIntegerField(_("切换事件ID"), db_index=True)
+    ip = models.CharField(_("实例IP"), max_length=LEN_SHORT, default="")
+    result = models.CharField(_("日志级别"), max_length=LEN_NORMAL, default="")
+    comment = models.TextField(_("日志内容"), default="")
+    datetime = models.DateTimeField(_("日志时间"), null=True)
+
+    class Meta:
+        verbose_name = verbose_name_plural = _("DBHA切换日志(DBHASwitchLog)")
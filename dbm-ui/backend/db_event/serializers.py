@@ -12,6 +12,9 @@ specific language governing permissions and limitations under the License.
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from backend.db_event.constants import AnalysisDimension, AnalysisInterval
+from backend.db_event.models import DBHASwitchEvent
+
 
 class QueryDetailSerializer(serializers.Serializer):
     """查询dbha事件详情"""
@@ -59,14 +62,56 @@ class QueryListSerializer(serializers.Serializer):
     """查询dbha事件列表"""
 
     app = serializers.IntegerField(help_text=_("业务ID"), required=False)
-    # ip = serializers.IPAddressField(help_text=_("实例IP"))
-    # domain_name = serializers.CharField(max_length=255, help_text=_("集群"))
-    # db_type = serializers.CharField(max_length=255, help_text=_("实例类型"))
-    # db_role = serializers.CharField(max_length=255, help_text=_("实例角色"))
+    cluster = serializers.CharField(help_text=_("集群域名"), required=False)
+    cluster_type = serializers.CharField(help_text=_("集群类型"), required=False)
+    db_role = serializers.CharField(help_text=_("实例角色"), required=False)
+    ip = serializers.CharField(help_text=_("实例IP(多个以逗号分隔)"), required=False)
+    switch_result = serializers.CharField(help_text=_("切换结果"), required=False)
     switch_start_time = serializers.DateTimeField(help_text=_("开始时间"), required=False)
     switch_finished_time = serializers.DateTimeField(help_text=_("结束时间"), required=False)
 
 
+class SwitchEventSerializer(serializers.ModelSerializer):
+    """dbha事件，字段与 HADB 切换队列保持一致"""
+
+    app = serializers.SerializerMethodField(help_text=_("业务ID"))
+    cloud = serializers.SerializerMethodField(help_text=_("云区域ID"))
+    bk_biz_name = serializers.SerializerMethodField(help_text=_("业务名"))
+    cluster_info = serializers.SerializerMethodField(help_text=_("集群信息"))
+
+    def get_app(self, obj):
+        return str(obj.bk_biz_id)
+
+    def get_cloud(self, obj):
+        return str(obj.bk_cloud_id)
+
+    def get_bk_biz_name(self, obj):
+        return self.context.get("id_to_name", {}).get(obj.bk_biz_id)
+
+    def get_cluster_info(self, obj):
+        if not obj.cluster_id:
+            return {}
+        return {"id": obj.cluster_id, "cluster_type": obj.cluster_type, "immute_domain": obj.cluster}
+
+    class Meta:
+        model = DBHASwitchEvent
+        exclude = ["id", "logs_synced", "update_at"]
+
+
+class AnalysisSerializer(serializers.Serializer):
+    """dbha事件统计"""
+
+    app = serializers.IntegerField(help_text=_("业务ID，为空时统计全部业务"), required=False)
+    start_time = serializers.DateTimeField(help_text=_("开始时间"))
+    end_time = serializers.DateTimeField(help_text=_("结束时间"))
+    dimension = serializers.ChoiceField(
+        help_text=_("统计维度"), choices=AnalysisDimension.get_choices(), default=AnalysisDimension.CLUSTER_TYPE
+    )
+    interval = serializers.ChoiceField(
+        help_text=_("统计间隔"), choices=AnalysisInterval.get_choices(), default=AnalysisInterval.DAY
+    )
+
+
 class ListSerializer(serializers.Serializer):
     """dbha事件列表"""
 
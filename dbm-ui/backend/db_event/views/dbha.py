@@ -8,27 +8,39 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from datetime import datetime
-
 from django.utils.translation import ugettext as _
+from django_filters import rest_framework
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from backend.bk_web import viewsets
+from backend.bk_web.pagination import AuditedLimitOffsetPagination
 from backend.bk_web.swagger import common_swagger_auto_schema
-from backend.components.hadb.client import HADBApi
-from backend.db_event.serializers import QueryDetailSerializer, QueryListSerializer
-from backend.db_meta.models import AppCache, Cluster
+from backend.db_event.constants import SWAGGER_TAG
+from backend.db_event.filters import DBHASwitchEventFilter
+from backend.db_event.handlers import DBHAEventHandler
+from backend.db_event.models import DBHASwitchEvent
+from backend.db_event.serializers import (
+    AnalysisSerializer,
+    QueryDetailSerializer,
+    QueryListSerializer,
+    SwitchEventSerializer,
+)
+from backend.db_meta.models import AppCache
 from backend.iam_app.dataclass import ResourceEnum
 from backend.iam_app.dataclass.actions import ActionEnum
 from backend.iam_app.handlers.drf_perm.base import ResourceActionPermission, get_request_key_id
 from backend.iam_app.handlers.permission import Permission
 
-SWAGGER_TAG = _("DBHA事件")
-
 
 class DBHAEventViewSet(viewsets.SystemViewSet):
+    pagination_class = None
+    filter_class = None
+
     def get_action_permission_map(self):
+        # 不指定业务的统计需要全局权限
+        if self.action == "analysis" and not get_request_key_id(self.request, "app"):
+            return {("analysis",): [ResourceActionPermission([ActionEnum.GLOBAL_MANAGE])]}
         return {("cat",): []}
 
     def get_default_permission_class(self):
@@ -48,39 +60,22 @@ class DBHAEventViewSet(viewsets.SystemViewSet):
         actions=[ActionEnum.DBHA_SWITCH_EVENT_VIEW],
         resource_meta=ResourceEnum.BUSINESS,
     )
-    @action(methods=["GET"], detail=False, serializer_class=QueryListSerializer, pagination_class=None)
+    @action(
+        methods=["GET"],
+        detail=False,
+        serializer_class=QueryListSerializer,
+        pagination_class=AuditedLimitOffsetPagination,
+        filter_class=DBHASwitchEventFilter,
+        filter_backends=(rest_framework.DjangoFilterBackend,),
+        queryset=DBHASwitchEvent.objects.all(),
+    )
     def ls(self, request):
-        validated_data = self.params_validate(self.get_serializer_class())
-
-        switch_start_time = validated_data.get("switch_start_time", None)
-        if switch_start_time:
-            validated_data["switch_start_time"] = switch_start_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-        switch_finished_time = validated_data.get("switch_finished_time", None)
-        if switch_finished_time:
-            validated_data["switch_finished_time"] = switch_finished_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        # dbha要求app为str
-        if "app" in validated_data:
-            validated_data["app"] = str(validated_data["app"])
-
-        switch_queues = HADBApi.switch_queue(params={"name": "query_switch_queue", "query_args": validated_data})
-
-        # fill bk_biz_name
-        id_to_name = AppCache.id_to_name()
-        cluster_domains = {switch["cluster"] for switch in switch_queues}
-        clusters = {
-            cluster["immute_domain"]: cluster
-            for cluster in Cluster.objects.filter(immute_domain__in=cluster_domains).values(
-                "immute_domain", "cluster_type", "id"
-            )
-        }
-        # fill cluster
-        for switch in switch_queues:
-            switch["bk_biz_id"] = int(switch["app"])
-            switch["bk_biz_name"] = id_to_name.get(switch["bk_biz_id"])
-            switch.update(cluster_info=clusters.get(switch["cluster"], {}))
-
-        return Response(switch_queues)
+        # 切换事件由周期任务从 HADB 增量同步到本地，这里直接查询本地表
+        switch_events = self.filter_queryset(self.get_queryset()).order_by("-uid")
+        page_switch_events = self.paginate_queryset(switch_events)
+        context = {"id_to_name": AppCache.id_to_name()}
+        data = SwitchEventSerializer(page_switch_events, many=True, context=context).data
+        return self.paginator.get_paginated_response(data=data)
 
     @common_swagger_auto_schema(
         operation_summary=_("DBHA切换事件详情（日志）"),
@@ -90,22 +85,22 @@ class DBHAEventViewSet(viewsets.SystemViewSet):
     @action(methods=["GET"], detail=False, serializer_class=QueryDetailSerializer, pagination_class=None)
     def cat(self, request):
         validated_data = self.params_validate(self.get_serializer_class())
-        logs = HADBApi.switch_logs(
-            params={"name": "query_switch_log", "query_args": {"sw_id": validated_data["sw_id"]}},
-            raw=False,
-        )
+        return Response(DBHAEventHandler.get_switch_logs(validated_data["sw_id"]))
 
-        # 格式化时间戳
-        switch_logs = []
-        for log in logs:
-            # "%Y-%m-%dT%H:%M:%S+08:00"
-            log_time = datetime.strptime(log["datetime"][:-6], "%Y-%m-%dT%H:%M:%S")
-            switch_logs.append(
-                {
-                    "timestamp": datetime.timestamp(log_time) * 1000,
-                    "levelname": log.get("result"),
-                    "message": f"[dbha]: {log['comment']}",
-                }
+    @common_swagger_auto_schema(
+        operation_summary=_("DBHA切换事件统计(切换次数/成功率/平均恢复耗时)"),
+        query_serializer=AnalysisSerializer,
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["GET"], detail=False, serializer_class=AnalysisSerializer, pagination_class=None)
+    def analysis(self, request):
+        validated_data = self.params_validate(self.get_serializer_class())
+        return Response(
+            DBHAEventHandler.analysis(
+                start_time=validated_data["start_time"],
+                end_time=validated_data["end_time"],
+                dimension=validated_data["dimension"],
+                interval=validated_data["interval"],
+                bk_biz_id=validated_data.get("app"),
             )
-
-        return Response(switch_logs)
+        )
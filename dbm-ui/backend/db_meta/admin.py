@@ -9,6 +9,7 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 from django.contrib import admin
+from django.utils.translation import ugettext_lazy as _
 from dynamic_raw_id.admin import DynamicRawIDMixin
 
 from . import models
@@ -19,6 +20,14 @@ class AppCacheAdmin(admin.ModelAdmin):
     list_display = ("bk_biz_id", "bk_biz_name", "db_app_abbr")
     list_filter = ("bk_biz_name",)
     search_fields = ("bk_biz_id", "bk_biz_name", "db_app_abbr")
+    actions = ["force_refresh_cmdb_cache"]
+
+    @admin.action(description=_("强制全量刷新CMDB业务和云区域缓存"))
+    def force_refresh_cmdb_cache(self, request, queryset):
+        from backend.db_services.cmdb.cache import CMDBCacheHandler
+
+        results = CMDBCacheHandler.sync_all(force=True)
+        self.message_user(request, _("刷新结果: {}，缓存新鲜度: {}").format(results, CMDBCacheHandler.get_freshness()))
 
 
 @admin.register(models.city_map.LogicalCity)
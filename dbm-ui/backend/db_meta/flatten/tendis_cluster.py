@@ -30,6 +30,8 @@ def tendis_cluster(clusters: QuerySet) -> List[Dict]:
             "nosqlstoragesetdtl_set",
             "proxyinstance_set__machine",
             "storageinstance_set__machine",
+            "nosqlstoragesetdtl_set__instance__machine",
+            "nosqlstoragesetdtl_set__instance__as_ejector__receiver__machine",
         )
     )
 
@@ -54,7 +56,8 @@ def tendis_cluster(clusters: QuerySet) -> List[Dict]:
             or cluster.cluster_type == ClusterType.TendisTwemproxyTendisplusIns
             or cluster.cluster_type == ClusterType.TwemproxyTendisSSDInstance
         ):
-            for seg_obj in cluster.nosqlstoragesetdtl_set.all().order_by("seg_range"):
+            # 在预取结果上排序，避免 order_by 重新查询
+            for seg_obj in sorted(cluster.nosqlstoragesetdtl_set.all(), key=lambda seg: seg.seg_range):
                 master_instance_set.append(
                     "{}{}{} {}".format(
                         seg_obj.instance.machine.ip, IP_PORT_DIVIDER, seg_obj.instance.port, seg_obj.seg_range
@@ -62,7 +65,7 @@ def tendis_cluster(clusters: QuerySet) -> List[Dict]:
                 )
                 master_ips[seg_obj.instance.machine.ip] += 1
 
-                slave = seg_obj.instance.as_ejector.get().receiver
+                slave = seg_obj.instance.as_ejector.all()[0].receiver
                 slave_instance_set.append(
                     "{}{}{} {}".format(slave.machine.ip, IP_PORT_DIVIDER, slave.port, seg_obj.seg_range)
                 )
@@ -134,24 +134,30 @@ class Cluster(AuditedModel):
         """
         处理当前的动作是否和集群正在运行的动作存在执行互斥
         """
+        exclusive_messages, blockers = [], []
         for cluster_id in cluster_ids:
             exclusive_infos = cls.is_exclusive(cluster_id, ticket_type, **kwargs)
             if not exclusive_infos:
                 continue
 
-            # 存在互斥操作，则抛出错误让用户后续重试该inner flow
-            exclusive_infos = [
+            exclusive_tickets = [
                 (
                     f'{TicketType.get_choice_label(info["exclusive_ticket"].ticket_type)}'
                     f'(ticket_id:{info["exclusive_ticket"].id})'
                 )
                 for info in exclusive_infos
             ]
-            raise ClusterExclusiveOperateException(
+            exclusive_messages.append(
                 _("当前操作「{}」与集群(id:{})的操作「{}」存在执行互斥").format(
-                    TicketType.get_choice_label(ticket_type), cluster_id, ",".join(exclusive_infos)
+                    TicketType.get_choice_label(ticket_type), cluster_id, ",".join(exclusive_tickets)
                 )
             )
+            # 记录阻塞当前操作的具体flow，用于阻塞释放后唤醒
+            blockers.extend([{"cluster_id": cluster_id, "flow_id": info["flow_id"]} for info in exclusive_infos])
+
+        # 存在互斥操作，则抛出错误让用户后续重试该inner flow
+        if exclusive_messages:
+            raise ClusterExclusiveOperateException("; ".join(exclusive_messages), data=blockers)
 
     def can_access(self) -> (bool, str):
         # 判断集群的状态是否正常
@@ -20,6 +20,9 @@ DB_MONITOR_TPLS_DIR = os.path.join(settings.BASE_DIR, "backend/db_monitor/tpls")
 TPLS_COLLECT_DIR = os.path.join(DB_MONITOR_TPLS_DIR, "collect")
 TPLS_ALARM_DIR = os.path.join(DB_MONITOR_TPLS_DIR, "alarm")
 
+# 平台策略同步到监控的最大并发数
+SYNC_POLICY_CONCURRENCY = 5
+
 SWAGGER_TAG = "db_monitor"
 
 
@@ -78,6 +81,16 @@ class PolicyStatus(str, StructuredEnum):
     TARGET_INVALID = EnumField("target_invalid", _("监控目标已失效"))
 
 
+class PolicySyncStatus(str, StructuredEnum):
+    """平台策略同步结果"""
+
+    CREATED = EnumField("created", _("新建"))
+    UPDATED = EnumField("updated", _("更新"))
+    UNCHANGED = EnumField("unchanged", _("未变更"))
+    DELETED = EnumField("deleted", _("删除"))
+    FAILED = EnumField("failed", _("失败"))
+
+
 class OperatorEnum(str, StructuredEnum):
     """比较操作符"""
 
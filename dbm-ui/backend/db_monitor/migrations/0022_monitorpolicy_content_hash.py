@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("db_monitor", "0021_dutyrule_biz_config"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="monitorpolicy",
+            name="content_hash",
+            field=models.CharField(default="", max_length=32, verbose_name="策略模板内容摘要"),
+        ),
+    ]
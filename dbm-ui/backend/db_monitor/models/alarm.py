@@ -13,10 +13,11 @@ import datetime
 import json
 import logging
 import os
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List
 
-from django.db import models
+from django.db import connections, models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -35,17 +36,18 @@ from backend.db_monitor.constants import (
     BK_MONITOR_SAVE_USER_GROUP_TEMPLATE,
     DEFAULT_ALERT_NOTICE,
     PLAT_PRIORITY,
+    SYNC_POLICY_CONCURRENCY,
     TARGET_LEVEL_TO_PRIORITY,
     TPLS_ALARM_DIR,
     AlertSourceEnum,
     DutyRuleCategory,
     PolicyStatus,
+    PolicySyncStatus,
     TargetLevel,
     TargetPriority,
 )
 from backend.db_monitor.exceptions import (
     BkMonitorDeleteAlarmException,
-    BkMonitorSaveAlarmException,
     BuiltInNotAllowDeleteException,
     DutyRuleSaveException,
 )
@@ -58,6 +60,7 @@ from backend.db_monitor.utils import (
 )
 from backend.db_services.cmdb.biz import list_cc_obj_user
 from backend.exceptions import ApiError
+from backend.utils.md5 import count_md5
 
 __all__ = ["NoticeGroup", "AlertRule", "RuleTemplate", "DispatchGroup", "MonitorPolicy", "DutyRule"]
 
@@ -663,6 +666,8 @@ class MonitorPolicy(AuditedModel):
 
     # 支持版本管理
     version = models.IntegerField(verbose_name=_("版本"), default=0)
+    # 平台策略模板的内容摘要，模板未变更时跳过同步
+    content_hash = models.CharField(verbose_name=_("策略模板内容摘要"), max_length=LEN_SHORT, default="")
 
     alert_source = models.CharField(
         verbose_name=_("告警数据来源"),
@@ -1056,23 +1061,16 @@ class MonitorPolicy(AuditedModel):
         )
 
     @classmethod
-    def sync_plat_monitor_policy(cls, action_id=None, db_type=None, force=False):
-        if action_id is None:
-            action_id = get_dbm_autofix_action_id()
+    def load_plat_policy_templates(cls, action_id=None, db_type=None) -> List[Dict]:
+        """读取平台策略模板，并补充平台策略的通用配置"""
         skip_dir = "v1"
-        now = datetime.datetime.now(timezone.utc)
-        logger.warning("[sync_plat_monitor_policy] sync bkm alarm policy start: %s", now)
-
-        # 逐个json导入，本地+远程
-        updated_policies = 0
+        templates = []
         for root, dirs, files in os.walk(TPLS_ALARM_DIR):
             if skip_dir in dirs:
                 dirs.remove(skip_dir)
 
             for alarm_tpl in files:
-
                 with open(os.path.join(root, alarm_tpl), "r", encoding="utf-8") as f:
-                    logger.info("[sync_plat_monitor_policy] start sync bkm alarm tpl: %s " % alarm_tpl)
                     try:
                         template_dict = json.loads(f.read())
                         # 监控API不支持传入额外的字段
@@ -1082,81 +1080,131 @@ class MonitorPolicy(AuditedModel):
                         logger.error("[sync_plat_monitor_policy] load template failed: %s", alarm_tpl)
                         continue
 
-                    # 如指定db_type，只同步指定db_type的策略(跳过非指定db_type的策略)
-                    if db_type is not None and template_dict.get("db_type") != db_type:
-                        continue
-
-                    deleted = template_dict.pop("deleted", False)
-
-                    if not template_dict.get("details"):
-                        logger.error(("[sync_plat_monitor_policy] template %s has no details" % alarm_tpl))
-                        continue
-
-                    # patch template
-                    labels = list(set(template_dict["details"]["labels"]))
-                    template_dict["details"]["labels"] = labels
-                    template_dict["details"]["name"] = policy_name
-                    template_dict["details"]["priority"] = TargetPriority.PLATFORM.value
-                    # 平台策略仅开启基于分派通知
-                    template_dict["details"]["notice"]["options"]["assign_mode"] = ["by_rule"]
-                    for label in labels:
-                        if label.startswith("NEED_AUTOFIX") and action_id is not None:
-                            template_dict["details"]["actions"] = [
-                                {
-                                    "config_id": action_id,
-                                    "signal": ["abnormal"],
-                                    "user_groups": [],
-                                    "options": {
-                                        "converge_config": {
-                                            "is_enabled": False,
-                                            "converge_func": "skip_when_success",
-                                            "timedelta": 60,
-                                            "count": 1,
-                                        }
-                                    },
-                                }
-                            ]
+                # 如指定db_type，只同步指定db_type的策略(跳过非指定db_type的策略)
+                if db_type is not None and template_dict.get("db_type") != db_type:
+                    continue
 
-                    policy = MonitorPolicy(**template_dict)
+                if not template_dict.get("details"):
+                    logger.error(("[sync_plat_monitor_policy] template %s has no details" % alarm_tpl))
+                    continue
 
-                policy_name = policy.name
-                logger.info("[sync_plat_monitor_policy] start sync bkm alarm policy: %s " % policy_name)
-                try:
-                    synced_policy = MonitorPolicy.objects.get(bk_biz_id=policy.bk_biz_id, name=policy_name)
+                # patch template
+                labels = sorted(set(template_dict["details"]["labels"]))
+                template_dict["details"]["labels"] = labels
+                template_dict["details"]["name"] = policy_name
+                template_dict["details"]["priority"] = TargetPriority.PLATFORM.value
+                # 平台策略仅开启基于分派通知
+                template_dict["details"]["notice"]["options"]["assign_mode"] = ["by_rule"]
+                for label in labels:
+                    if label.startswith("NEED_AUTOFIX") and action_id is not None:
+                        template_dict["details"]["actions"] = [
+                            {
+                                "config_id": action_id,
+                                "signal": ["abnormal"],
+                                "user_groups": [],
+                                "options": {
+                                    "converge_config": {
+                                        "is_enabled": False,
+                                        "converge_func": "skip_when_success",
+                                        "timedelta": 60,
+                                        "count": 1,
+                                    }
+                                },
+                            }
+                        ]
+                templates.append(template_dict)
+
+        return templates
 
-                    if deleted:
-                        logger.info("[sync_plat_monitor_policy] delete old alarm: %s " % policy_name)
-                        synced_policy.delete()
-                        continue
+    @classmethod
+    def sync_plat_monitor_policy(cls, action_id=None, db_type=None, force=False, concurrency=SYNC_POLICY_CONCURRENCY):
+        """
+        同步平台告警策略：
+        1. 按补充后的模板内容计算摘要，与已同步策略的摘要一致则跳过
+        2. 有变更的策略并发推送到监控，并发数受 concurrency 限制
+        返回逐个策略的同步结果: {policy_name: {"status": PolicySyncStatus, "message": ""}}
+        """
+        if action_id is None:
+            action_id = get_dbm_autofix_action_id()
+        now = datetime.datetime.now(timezone.utc)
+        logger.warning("[sync_plat_monitor_policy] sync bkm alarm policy start: %s", now)
 
-                    if synced_policy.version >= policy.version and not force:
-                        logger.info("[sync_plat_monitor_policy] skip same version alarm: %s " % policy_name)
-                        continue
+        templates = cls.load_plat_policy_templates(action_id=action_id, db_type=db_type)
+        synced_policies = {
+            (policy.bk_biz_id, policy.name): policy
+            for policy in MonitorPolicy.objects.filter(name__in=[template["name"] for template in templates])
+        }
 
-                    for keeped_field in MonitorPolicy.KEEPED_FIELDS:
-                        setattr(policy, keeped_field, getattr(synced_policy, keeped_field))
+        report: Dict[str, Dict[str, str]] = {}
+        # 待推送到监控的操作: [(policy_name, 同步结果, 操作函数)]
+        sync_tasks = []
+        for template_dict in templates:
+            deleted = template_dict.pop("deleted", False)
+            content_hash = count_md5(json.dumps(template_dict, sort_keys=True))
+            policy = MonitorPolicy(**template_dict, content_hash=content_hash)
+            policy_name = policy.name
+            synced_policy = synced_policies.get((policy.bk_biz_id, policy_name))
+
+            if deleted:
+                if synced_policy:
+                    logger.info("[sync_plat_monitor_policy] delete old alarm: %s " % policy_name)
+                    sync_tasks.append((policy_name, PolicySyncStatus.DELETED, synced_policy.delete))
+                continue
 
-                    policy.details["id"] = synced_policy.monitor_policy_id
-                    logger.info("[sync_plat_monitor_policy] update bkm alarm policy: %s " % policy_name)
-                except MonitorPolicy.DoesNotExist:
-                    logger.info("[sync_plat_monitor_policy] create bkm alarm policy: %s " % policy_name)
+            if synced_policy is None:
+                logger.info("[sync_plat_monitor_policy] create bkm alarm policy: %s " % policy_name)
+                sync_tasks.append((policy_name, PolicySyncStatus.CREATED, policy.sync_from_template))
+                continue
 
-                try:
-                    # fetch targets/test_rules/notify_rules/notify_groups from parent details
-                    for attr, value in policy.parse_details().items():
-                        setattr(policy, attr, value)
+            # 历史策略没有摘要，退化为按版本比较，并补齐摘要
+            if synced_policy.content_hash:
+                unchanged = synced_policy.content_hash == content_hash
+            else:
+                unchanged = synced_policy.version >= policy.version
+            if unchanged and not force:
+                if not synced_policy.content_hash:
+                    MonitorPolicy.objects.filter(id=synced_policy.id).update(content_hash=content_hash)
+                report[policy_name] = {"status": PolicySyncStatus.UNCHANGED.value, "message": ""}
+                continue
 
-                    policy.save()
-                    updated_policies += 1
-                    logger.error("[sync_plat_monitor_policy] save bkm alarm policy success: %s", policy_name)
-                except BkMonitorSaveAlarmException as e:
-                    logger.error("[sync_plat_monitor_policy] save bkm alarm policy failed: %s, %s ", policy_name, e)
+            for keeped_field in MonitorPolicy.KEEPED_FIELDS:
+                setattr(policy, keeped_field, getattr(synced_policy, keeped_field))
+            policy.details["id"] = synced_policy.monitor_policy_id
+            logger.info("[sync_plat_monitor_policy] update bkm alarm policy: %s " % policy_name)
+            sync_tasks.append((policy_name, PolicySyncStatus.UPDATED, policy.sync_from_template))
 
+        def _sync(policy_name, status, sync_func):
+            try:
+                sync_func()
+                logger.info("[sync_plat_monitor_policy] %s bkm alarm policy success: %s", status, policy_name)
+                return policy_name, {"status": status.value, "message": ""}
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("[sync_plat_monitor_policy] %s bkm alarm policy failed: %s, %s", status, policy_name, e)
+                return policy_name, {"status": PolicySyncStatus.FAILED.value, "message": str(e)}
+            finally:
+                # 线程内的数据库连接不会被自动回收
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [executor.submit(_sync, *task) for task in sync_tasks]
+            for future in as_completed(futures):
+                policy_name, result = future.result()
+                report[policy_name] = result
+
+        status_counter = Counter(result["status"] for result in report.values())
         logger.warning(
-            "[sync_plat_monitor_policy] finish sync bkm alarm policy end: %s, update_cnt: %s",
+            "[sync_plat_monitor_policy] finish sync bkm alarm policy end: %s, result: %s",
             datetime.datetime.now(timezone.utc) - now,
-            updated_policies,
+            dict(status_counter),
         )
+        return report
+
+    def sync_from_template(self):
+        """从策略模板中提取参数后保存并同步到监控"""
+        # fetch targets/test_rules/notify_rules/notify_groups from parent details
+        for attr, value in self.parse_details().items():
+            setattr(self, attr, value)
+        self.save()
 
     @staticmethod
     def bkm_search_event(
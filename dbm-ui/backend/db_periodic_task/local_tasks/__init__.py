@@ -9,18 +9,22 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+from backend.db_periodic_task.local_tasks.backup_catalog import *
 from backend.db_periodic_task.local_tasks.check_checksum import *
 from backend.db_periodic_task.local_tasks.check_expired_job_users import *
 from backend.db_periodic_task.local_tasks.db_meta import *
 from backend.db_periodic_task.local_tasks.db_monitor import *
 from backend.db_periodic_task.local_tasks.db_proxy import *
+from backend.db_periodic_task.local_tasks.dbha_event import *
 from backend.db_periodic_task.local_tasks.dbmon_heartbeat import *
+from backend.db_periodic_task.local_tasks.dirty_machine import *
 from backend.db_periodic_task.local_tasks.mysql_backup import *
 from backend.db_periodic_task.local_tasks.mysql_check_partition import *
 from backend.db_periodic_task.local_tasks.randomize_password import *
 from backend.db_periodic_task.local_tasks.redis_autofix import *
 from backend.db_periodic_task.local_tasks.redis_backup import *
 from backend.db_periodic_task.local_tasks.redis_clusternodes_update import *
+from backend.db_periodic_task.local_tasks.report_retention import *
 from backend.db_periodic_task.local_tasks.sqlserver import *
 from backend.db_periodic_task.local_tasks.ticket import *
 from backend.db_periodic_task.models import DBPeriodicTask
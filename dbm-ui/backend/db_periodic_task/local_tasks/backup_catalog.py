@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+
+from celery.schedules import crontab
+
+from backend.db_periodic_task.local_tasks import register_periodic_task
+from backend.db_services.backup_catalog.constants import BackupCollector
+from backend.db_services.backup_catalog.handlers import BackupCatalogHandler
+
+logger = logging.getLogger("celery")
+
+
+@register_periodic_task(run_every=crontab(minute="*/10"))
+def sync_backup_catalog():
+    # 从备份结果日志增量同步备份目录，各采集项互不影响
+    for collector in BackupCollector.get_values():
+        try:
+            synced_count = BackupCatalogHandler.sync_catalog(collector)
+            logger.info("sync_backup_catalog: collector=%s, synced=%s", collector, synced_count)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("sync_backup_catalog error: collector=%s, error=%s", collector, e)
+
+
+@register_periodic_task(run_every=crontab(minute=0, hour=4))
+def purge_backup_catalog():
+    # 清理过期的备份目录
+    BackupCatalogHandler.purge_catalog()
@@ -196,6 +196,10 @@ QUERY_TEMPLATE = {
         (avg_over_time(custom:dbm_report_channel:redis_dbmon_heart_beat{
             {cluster_domain="{cluster_domain}",%s}
         }[1m]))""",
+        # 按域名正则批量查询，%s 为 cluster_domain 的正则匹配项
+        "heartbeat_batch": """
+        avg by (target,bk_biz_id,app,bk_cloud_id, cluster_domain, cluster_type, instance_role)
+        (avg_over_time(custom:dbm_report_channel:redis_dbmon_heart_beat{cluster_domain=~"%s"}[1m]))""",
     },
 }
 
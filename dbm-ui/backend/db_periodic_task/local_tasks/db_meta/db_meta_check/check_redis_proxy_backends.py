@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import json
+import logging
+
+from django.utils.translation import ugettext_lazy as _
+
+from backend.db_meta.enums import ClusterPhase, ClusterType
+from backend.db_meta.models import Cluster
+from backend.db_report.enums import MetaCheckSubType
+from backend.db_report.models import MetaCheckReport
+from backend.flow.utils.redis.redis_proxy_util import check_clusters_proxy_backends
+
+logger = logging.getLogger("root")
+
+# 每批巡检的集群数
+CHECK_CLUSTER_BATCH_SIZE = 200
+
+
+def check_redis_proxy_backends():
+    _check_redis_proxy_backends()
+
+
+def _check_redis_proxy_backends():
+    """
+    全量巡检 twemproxy/predixy 集群各 proxy 的后端配置是否一致
+    不一致的 proxy 及其差异写入元数据检查报告
+    """
+    cluster_ids = list(
+        Cluster.objects.filter(
+            phase=ClusterPhase.ONLINE,
+            cluster_type__in=[
+                ClusterType.TendisTwemproxyRedisInstance,
+                ClusterType.TendisTwemproxyTendisplusIns,
+                ClusterType.TwemproxyTendisSSDInstance,
+                ClusterType.TendisPredixyRedisCluster,
+                ClusterType.TendisPredixyTendisplusCluster,
+            ],
+        ).values_list("id", flat=True)
+    )
+
+    inconsistent_cnt = 0
+    for index in range(0, len(cluster_ids), CHECK_CLUSTER_BATCH_SIZE):
+        batch_ids = cluster_ids[index : index + CHECK_CLUSTER_BATCH_SIZE]
+        clusters = {c.id: c for c in Cluster.objects.filter(id__in=batch_ids)}
+        reports = []
+        for result in check_clusters_proxy_backends(batch_ids):
+            if result["consistent"]:
+                continue
+            inconsistent_cnt += 1
+            c = clusters[result["cluster_id"]]
+            for proxy in result["inconsistent_proxies"]:
+                ip, port = proxy["proxy_addr"].split(":")
+                msg = _("集群{}的proxy:{}后端配置与其他proxy不一致，缺少:{}，多出:{}").format(
+                    c.immute_domain, proxy["proxy_addr"], json.dumps(proxy["missing"]), json.dumps(proxy["extra"])
+                )
+                reports.append(create_proxy_backends_report(c, msg, ip, int(port)))
+            for proxy in result["failed_proxies"]:
+                msg = _("集群{}的proxy:{}后端配置获取失败:{}").format(c.immute_domain, proxy["proxy_addr"], proxy["error"])
+                reports.append(create_proxy_backends_report(c, msg))
+        MetaCheckReport.objects.bulk_create(reports)
+
+    logger.info(
+        "check redis proxy backends finished, {}/{} clusters inconsistent".format(inconsistent_cnt, len(cluster_ids))
+    )
+
+
+def create_proxy_backends_report(c: Cluster, msg: str, ip: str = "none", port: int = 0) -> MetaCheckReport:
+    return MetaCheckReport(
+        bk_biz_id=c.bk_biz_id,
+        bk_cloud_id=c.bk_cloud_id,
+        ip=ip,
+        port=port,
+        cluster=c.immute_domain,
+        cluster_type=c.cluster_type,
+        status=False,
+        msg=msg,
+        subtype=MetaCheckSubType.ProxyBackendsInconsistent.value,
+    )
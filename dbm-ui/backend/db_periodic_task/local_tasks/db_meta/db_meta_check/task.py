@@ -18,6 +18,7 @@ from backend.db_periodic_task.local_tasks.register import register_periodic_task
 from backend.db_report.models import MetaCheckReport
 
 from .check_redis_instance import check_redis_instance
+from .check_redis_proxy_backends import check_redis_proxy_backends
 from .mysql_cluster_topo.tendbha import health_check
 from .sqlserver_cluster_topo.check import sqlserver_dbmeta_check
 
@@ -32,6 +33,14 @@ def db_meta_check_task():
     check_redis_instance()
 
 
+@register_periodic_task(run_every=crontab(minute=33, hour=3))
+def redis_proxy_backends_check_task():
+    """
+    巡检redis集群proxy后端配置一致性
+    """
+    check_redis_proxy_backends()
+
+
 @register_periodic_task(run_every=crontab(hour=2, minute=30))
 def tendbha_topo_daily_check():
     for c in Cluster.objects.filter(cluster_type=ClusterType.TenDBHA):
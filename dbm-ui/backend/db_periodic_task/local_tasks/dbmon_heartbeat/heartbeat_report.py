@@ -11,8 +11,11 @@ specific language governing permissions and limitations under the License.
 import copy
 import datetime
 import logging
+from collections import defaultdict
 from datetime import timedelta
+from typing import Dict, List, Set, Tuple
 
+from django.core.cache import cache
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import ugettext as _
@@ -21,27 +24,38 @@ from backend import env
 from backend.components import BKMonitorV3Api
 from backend.configuration.constants import DBType
 from backend.configuration.models.dba import DBAdministrator
-from backend.constants import IP_PORT_DIVIDER
+from backend.constants import CACHE_DBMON_HEARTBEAT_MISSING, IP_PORT_DIVIDER
 from backend.db_meta import api
 from backend.db_meta.enums import ClusterType
 from backend.db_meta.models import AppCache, Cluster
 from backend.db_periodic_task.local_tasks.db_meta.constants import QUERY_TEMPLATE, UNIFY_QUERY_PARAMS
+from backend.db_periodic_task.utils import TimeUnit
 from backend.db_report.enums import DbmonHeartbeatReportSubType
 from backend.db_report.models import DbmonHeartbeatReport
 from backend.db_services.redis.util import is_predixy_proxy_type, is_twemproxy_proxy_type
 
 logger = logging.getLogger("root")
 
+# 单次 unify_query 聚合查询的集群数
+HEARTBEAT_QUERY_BATCH_SIZE = 100
+# 单次查询返回的最大序列数，需要覆盖一批集群内的全部节点
+HEARTBEAT_QUERY_SLIMIT = 20000
+# 心跳缺失状态的保留时长，过期后缺失实例会被重新上报一次
+HEARTBEAT_STATE_TIMEOUT = 2 * TimeUnit.DAY
+
 
 def check_dbmon_heart_beat():
     _check_dbmon_heart_beat()
 
 
-def query_by_cluster_dimension(cluster_domain, cap_key="heartbeat", cluster_type="dbmon"):
-    logger.info("+===+++++=== cluster is: {} +++++===++++ ".format(cluster_domain))
+def query_by_cluster_domains(cluster_domains: List[str], cap_key="heartbeat_batch", cluster_type="dbmon"):
+    """
+    按 cluster_domain 聚合，一次查询多个集群的 dbmon 心跳
+    返回 {cluster_domain: 心跳正常的ip集合}，查询不到数据的集群不会出现在结果中
+    """
     query_template = QUERY_TEMPLATE.get(cluster_type)
     if not query_template:
-        logger.error("No query template for cluster type: %s,cluster name: %s", cluster_type, cluster_domain)
+        logger.error("No query template for cluster type: %s", cluster_type)
         return {}
     # now-5/15m ~ now
     end_time = datetime.datetime.now(timezone.utc)
@@ -50,28 +64,18 @@ def query_by_cluster_dimension(cluster_domain, cap_key="heartbeat", cluster_type
     params["bk_biz_id"] = env.DBA_APP_BK_BIZ_ID
     params["start_time"] = int(start_time.timestamp())
     params["end_time"] = int(end_time.timestamp())
-    # 设置要查询的 cluster_domain 变量
-    params["query_configs"][0]["promql"] = query_template[cap_key].format(cluster_domain=cluster_domain)
-    try:
-        series = BKMonitorV3Api.unify_query(params, use_admin=True)["series"]
-    except Exception as e:
-        logger.error(f"Error occurred while doing  BKMonitorV3Api.unify_query(: {e}")
-        raise NotImplementedError("{} get dbmon heartbeat failed from BKMonitorV3Api ".format(cluster_domain))
-
-    dbmon_heartbeat_data = []
+    params["slimit"] = HEARTBEAT_QUERY_SLIMIT
+    # 域名中的 . 需要在正则中转义，promql 字符串中的反斜杠还需要再转义一次
+    domain_regex = "|".join(domain.replace(".", "\\\\.") for domain in cluster_domains)
+    params["query_configs"][0]["promql"] = query_template[cap_key] % domain_regex
+    series = BKMonitorV3Api.unify_query(params, use_admin=True)["series"]
+
+    alive_ips = defaultdict(set)
     for item in series:
-        found = False
-        # 获取的五个点，如果有一个为1，则认为心跳上报正常，如果都不为1则，心跳异常
-        for value, time in item["datapoints"]:
-            if value == 1:
-                dbmon_heartbeat_data.append({"dimensions": item["dimensions"], "time": time, "value": value})
-                found = True
-                break
-        if not found:
-            dbmon_heartbeat_data.append(
-                {"dimensions": item["dimensions"], "time": item["datapoints"][-1][1], "value": None}
-            )
-    return dbmon_heartbeat_data
+        # 获取的几个点，如果有一个为1，则认为心跳上报正常，如果都不为1则，心跳异常
+        if any(value == 1 for value, __ in item["datapoints"]):
+            alive_ips[item["dimensions"]["cluster_domain"]].add(item["dimensions"]["target"])
+    return alive_ips
 
 
 def get_report_subtype_for_storage(cluster_type):
@@ -96,13 +100,64 @@ def get_report_subtype_for_proxy(cluster_type):
     return heart_beat_subtype
 
 
-def _check_dbmon_heart_beat():
+def get_missing_instances(cluster: Cluster, cluster_info: Dict, alive_ips: Set[str]) -> List[Tuple[str, str]]:
     """
-    获取dbmon心跳信息
+    对比元数据与心跳数据，返回缺失心跳的实例列表: [(instance, heart_beat_subtype)]
     """
+    cluster_nodes = set(cluster_info["redis_master_ips_set"])
+    cluster_nodes.update(cluster_info["redis_slave_ips_set"])
+    cluster_nodes.update(cluster_info["twemproxy_ips_set"])
+
+    missing_instances = []
+    for ip in cluster_nodes - alive_ips:
+        # 如果是后端存储节点，再区分cache ,ssd ,tendisplus
+        if ip in cluster_info["redis_master_ips_set"] or ip in cluster_info["redis_slave_ips_set"]:
+            heart_beat_subtype = get_report_subtype_for_storage(cluster.cluster_type)
+            # 获取端口范围：30000-30010
+            if ip in cluster_info["redis_master_ips_set"]:
+                redis_set = cluster_info["redis_master_set"]
+            else:
+                redis_set = cluster_info["redis_slave_set"]
+            port_ranges = []
+            # ssd 和cache 有segment，tendisplus没有
+            for item in redis_set:
+                if not item.startswith(f"{ip}{IP_PORT_DIVIDER}"):
+                    continue
+                if is_twemproxy_proxy_type(cluster.cluster_type):
+                    # 格式为 "ip:port range"
+                    ip_port, __ = item.split(" ")
+                    port_ranges.append(ip_port.split(IP_PORT_DIVIDER)[1])
+                elif cluster.cluster_type == ClusterType.TendisPredixyTendisplusCluster.value:
+                    # 格式为 "ip:port"
+                    port_ranges.append(item.split(IP_PORT_DIVIDER)[1])
+                else:
+                    raise NotImplementedError("Dbmon Not supported tendis type:{}".format(cluster.cluster_type))
+            if len(port_ranges) > 1:
+                port_range = f"{min(port_ranges)}-{max(port_ranges)}"
+            # tendisplus 后面线上是部署1个实例
+            elif len(port_ranges) == 1:
+                port_range = port_ranges[0]
+            else:
+                raise NotImplementedError(
+                    "Dbmon ip:{} not get port_ranges for cluster:{}".format(ip, cluster.immute_domain)
+                )
+            instance = "{} {}".format(ip, port_range)
+        # 如果是代理proxy，再区分是twemproxy还是predixy
+        else:
+            twemproxy_ports = cluster_info.get("twemproxy_ports", [])
+            instance = "{} {}".format(ip, twemproxy_ports[0])
+            heart_beat_subtype = get_report_subtype_for_proxy(cluster.cluster_type)
+        missing_instances.append((instance, heart_beat_subtype))
+    return missing_instances
+
+
+def _check_dbmon_heart_beat():
     """
-    删除时间大于60天的记录
+    获取dbmon心跳信息
+    集群按批聚合查询心跳，在本地与元数据对比得到缺失心跳的实例
+    缺失状态保存在缓存中，只上报状态的变化：新增的心跳超时实例、心跳恢复的实例
     """
+    # 删除时间大于60天的记录
     DbmonHeartbeatReport.objects.filter(create_at__lte=timezone.now() - timedelta(days=60)).delete()
 
     # 构建查询条件:tendisplus,ssd,cache,集群创建时间大于2小时，刚开始可能上报有延时，超时时间好像是2小时
@@ -111,100 +166,90 @@ def _check_dbmon_heart_beat():
         | Q(cluster_type=ClusterType.TwemproxyTendisSSDInstance)
         | Q(cluster_type=ClusterType.TendisTwemproxyRedisInstance)
     ) & Q(create_at__lt=timezone.now() - timedelta(hours=2))
-    # 遍历集群
-    for c in Cluster.objects.filter(query):
-        logger.info("+===+++++===  start check {} dbmon heartbeat +++++===++++ ".format(c.immute_domain))
-        logger.info("+===+++++===  cluster type is: {} +++++===++++ ".format(c.cluster_type))
-        # 初始化集群机器列表
-        cluster_nodes = []
+    clusters = list(
+        Cluster.objects.filter(query).only(
+            "id", "immute_domain", "cluster_type", "bk_biz_id", "bk_cloud_id", "creator"
+        )
+    )
+
+    # 上一轮的心跳缺失状态: {"cluster_domain#instance": 上报信息}
+    last_missing: Dict[str, Dict] = cache.get(CACHE_DBMON_HEARTBEAT_MISSING) or {}
+    current_missing: Dict[str, Dict] = {}
+    checked_domains: Set[str] = set()
+
+    for index in range(0, len(clusters), HEARTBEAT_QUERY_BATCH_SIZE):
+        batch_clusters = clusters[index : index + HEARTBEAT_QUERY_BATCH_SIZE]
+        batch_domains = [c.immute_domain for c in batch_clusters]
         try:
-            cluster_info = api.cluster.nosqlcomm.other.get_cluster_detail(c.id)[0]
-        except Exception as e:
-            logger.error(f"Error occurred while getting cluster_info: {e}")
-            raise NotImplementedError("{} get cluster_info failed".format(c.immute_domain))
-        cluster_nodes.extend(cluster_info["redis_master_ips_set"])
-        cluster_nodes.extend(cluster_info["redis_slave_ips_set"])
-        cluster_nodes.extend(cluster_info["twemproxy_ips_set"])
-        logger.info("+===+++++===  cluster all nodes  is: {} +++++===++++ ".format(cluster_nodes))
-        try:
-            # 通过bk_biz_id获取dba列表,业务没设置的话，用平台的配置
-            redis_dba = DBAdministrator().get_biz_db_type_admins(c.bk_biz_id, DBType.Redis)
-            app = AppCache.objects.get(bk_biz_id=c.bk_biz_id).db_app_abbr
-        except Exception as e:
-            logger.error(f"Error occurred while getting redis_dba and app: {e}")
-            raise NotImplementedError("{} get redis_dba and ap failed".format(c.immute_domain))
-
-        # 按集群查询
-        #   这样子可能结果为[],整个集群都没数据 dbmon_heartbeat_data:[]
-        #   也有可能部分ip没有数据
-        #   通过集合拿到缺失心跳的ip
-        dbmon_heartbeat_data = query_by_cluster_dimension(c.immute_domain)
-        # 缺失心跳的或者心跳为None的
-        missing_heartbeat_ips = set(cluster_nodes) - {
-            data["dimensions"]["target"] for data in dbmon_heartbeat_data if data["value"] == 1
-        }
-        logger.warning(_("+===+++++=== missing_heartbeat_ips 实例:{}  +++++===++++ ".format(missing_heartbeat_ips)))
-        for ip in missing_heartbeat_ips:
-            # 如果是后端存储节点，再区分cache ,ssd ,tendisplus
-            if ip in cluster_info["redis_master_ips_set"] or ip in cluster_info["redis_slave_ips_set"]:
-                heart_beat_subtype = get_report_subtype_for_storage(c.cluster_type)
-                # 获取端口范围：30000-30010
-                port_ranges = []
-                if ip in cluster_info["redis_master_ips_set"]:
-                    redis_set = cluster_info["redis_master_set"]
-                elif ip in cluster_info["redis_slave_ips_set"]:
-                    redis_set = cluster_info["redis_slave_set"]
-                else:
-                    raise NotImplementedError("Dbmon ip:{} not in cluster:{}".format(ip, c.immute_domain))
-                # ssd 和cache 有segment，tendisplus没有
-                for item in redis_set:
-                    if item.startswith(ip):
-                        if is_twemproxy_proxy_type(c.cluster_type):
-                            # 格式为 "ip:port range"
-                            ip_port, range = item.split(" ")
-                            ip, port = ip_port.split(IP_PORT_DIVIDER)
-                            port_ranges.append(port)
-                        elif c.cluster_type == ClusterType.TendisPredixyTendisplusCluster.value:
-                            # 格式为 "ip:port"
-                            ip, port = item.split(IP_PORT_DIVIDER)
-                            port_ranges.append(port)
-                        else:
-                            raise NotImplementedError("Dbmon Not supported tendis type:{}".format(c.cluster_type))
-                if len(port_ranges) > 1:
-                    start_port = min(port_ranges)
-                    end_port = max(port_ranges)
-                    port_range = f"{start_port}-{end_port}"
-                # tendisplus 后面线上是部署1个实例
-                elif len(port_ranges) == 1:
-                    port_range = port_ranges
-                else:
-                    raise NotImplementedError(
-                        "Dbmon ip:{} not get port_ranges for cluster:{}".format(ip, c.immute_domain)
-                    )
-                instance = "{} {}".format(ip, port_range)
-            # 如果是代理proxy，再区分是twemproxy还是predixy
-            elif ip in cluster_info["twemproxy_ips_set"]:
-                twemproxy_ports = cluster_info.get("twemproxy_ports", [])
-                instance = "{} {}".format(ip, twemproxy_ports[0])
-                heart_beat_subtype = get_report_subtype_for_proxy(c.cluster_type)
-            else:
-                raise NotImplementedError(" %s is not identified in Dbmon" % ip)
-            msg = _("实例 {} dbmon 心跳超时").format(instance)
+            cluster_infos = {
+                info["id"]: info
+                for info in api.cluster.nosqlcomm.other.get_clusters_details([c.id for c in batch_clusters])
+            }
+            alive_ips = query_by_cluster_domains(batch_domains)
+        except Exception as e:  # pylint: disable=broad-except
+            # 本批次查询失败时保留上一轮的状态，不做上报
+            logger.error("check dbmon heartbeat failed for clusters %s: %s", batch_domains, e)
+            continue
+
+        for c in batch_clusters:
             try:
-                # 心跳超时的时间点就用这条记录的创建时间代替了，这里对时间要求不严格
-                DbmonHeartbeatReport.objects.create(
-                    creator=c.creator,
-                    bk_biz_id=c.bk_biz_id,
-                    bk_cloud_id=c.bk_cloud_id,
-                    status=False,
-                    msg=msg,
-                    cluster_type=heart_beat_subtype,
-                    cluster=c.immute_domain,
-                    instance=instance,
-                    app=app,
-                    dba=redis_dba,
+                missing_instances = get_missing_instances(
+                    c, cluster_infos[c.id], alive_ips.get(c.immute_domain, set())
                 )
-                logger.warning(_("+===+++++=== 实例 {} dbmon 心跳超时  +++++===++++ ".format(instance)))
-            except Exception as e:
-                logger.error(f"Error occurred while inserting data: {e}")
-                raise NotImplementedError("{} insert data failed".format(c.immute_domain))
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("check dbmon heartbeat failed for cluster %s: %s", c.immute_domain, e)
+                continue
+
+            checked_domains.add(c.immute_domain)
+            for instance, heart_beat_subtype in missing_instances:
+                current_missing[f"{c.immute_domain}#{instance}"] = {
+                    "creator": c.creator,
+                    "bk_biz_id": c.bk_biz_id,
+                    "bk_cloud_id": c.bk_cloud_id,
+                    "cluster_type": heart_beat_subtype,
+                    "cluster": c.immute_domain,
+                    "instance": instance,
+                }
+
+    # 未成功检查的集群沿用上一轮的状态；已下架的集群直接丢弃
+    living_domains = {c.immute_domain for c in clusters}
+    for key, info in last_missing.items():
+        if info["cluster"] in living_domains and info["cluster"] not in checked_domains:
+            current_missing[key] = info
+
+    new_missing_keys = current_missing.keys() - last_missing.keys()
+    recovered_keys = {
+        key for key in last_missing.keys() - current_missing.keys() if last_missing[key]["cluster"] in checked_domains
+    }
+    logger.warning(
+        "dbmon heartbeat: %s missing, %s newly missing, %s recovered",
+        len(current_missing),
+        len(new_missing_keys),
+        len(recovered_keys),
+    )
+
+    # 业务名和dba只在有状态变化时才需要，按业务缓存
+    biz_infos: Dict[int, Dict] = {}
+    reports = [_build_report(current_missing[key], False, biz_infos) for key in new_missing_keys]
+    reports.extend(_build_report(last_missing[key], True, biz_infos) for key in recovered_keys)
+    # 心跳超时的时间点就用这条记录的创建时间代替了，这里对时间要求不严格
+    DbmonHeartbeatReport.objects.bulk_create(reports, batch_size=500)
+
+    cache.set(CACHE_DBMON_HEARTBEAT_MISSING, current_missing, timeout=HEARTBEAT_STATE_TIMEOUT)
+
+
+def _build_report(info: Dict, status: bool, biz_infos: Dict[int, Dict]) -> DbmonHeartbeatReport:
+    bk_biz_id = info["bk_biz_id"]
+    if bk_biz_id not in biz_infos:
+        # 通过bk_biz_id获取dba列表,业务没设置的话，用平台的配置
+        app = AppCache.objects.filter(bk_biz_id=bk_biz_id).first()
+        biz_infos[bk_biz_id] = {
+            "app": app.db_app_abbr if app else "",
+            "dba": DBAdministrator().get_biz_db_type_admins(bk_biz_id, DBType.Redis),
+        }
+
+    if status:
+        msg = _("实例 {} dbmon 心跳恢复").format(info["instance"])
+    else:
+        msg = _("实例 {} dbmon 心跳超时").format(info["instance"])
+    return DbmonHeartbeatReport(status=status, msg=msg, **biz_infos[bk_biz_id], **info)
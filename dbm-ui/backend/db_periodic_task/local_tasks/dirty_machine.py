@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+
+from celery.schedules import crontab
+
+from backend.db_dirty.handlers import DBDirtyMachineHandler
+from backend.db_periodic_task.local_tasks import register_periodic_task
+
+logger = logging.getLogger("celery")
+
+
+@register_periodic_task(run_every=crontab(minute=15))
+def retry_stuck_dirty_machines():
+    # 重试回收中途失败的污点池主机
+    outcomes = DBDirtyMachineHandler.retry_stuck_dirty_machines()
+    if outcomes:
+        logger.info("retry_stuck_dirty_machines: %s", outcomes)
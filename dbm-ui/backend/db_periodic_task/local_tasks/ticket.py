@@ -10,6 +10,7 @@ specific language governing permissions and limitations under the License.
 """
 from celery.schedules import crontab
 
+from backend.core.notify import NotifyOutboxDispatcher
 from backend.db_periodic_task.local_tasks import register_periodic_task
 from backend.db_services.taskflow import task as TaskFlow
 from backend.ticket.tasks.ticket_tasks import TicketTask
@@ -31,6 +32,17 @@ def clean_bamboo_engine_expired_data():
     TaskFlow.clean_bamboo_engine_expired_data()
 
 
+@register_periodic_task(run_every=crontab(minute="*/1"))
+def sync_itsm_approval_snapshot():
+    TicketTask.sync_itsm_approval_snapshot()
+
+
 @register_periodic_task(run_every=crontab(hour="*/1", minute=0))
 def auto_clear_expire_flow():
     TicketTask.auto_clear_expire_flow()
+
+
+@register_periodic_task(run_every=crontab(minute="*/1"))
+def auto_dispatch_notify_outbox():
+    # 投递合并窗口到期和待重试的通知
+    NotifyOutboxDispatcher.dispatch()
@@ -25,3 +25,14 @@ class ReportFieldFormat(str, StructuredEnum):
     STATUS = EnumField("status", _("状态渲染"))
     # 数据校验失败详情字段
     FAIL_SLAVE_INSTANCE = EnumField("fail_slave_instance", _("数据校验失败详情渲染"))
+
+
+class ReportRetentionMode(str, StructuredEnum):
+    DELETE = EnumField("delete", _("删除"))
+    ARCHIVE = EnumField("archive", _("归档后删除"))
+
+
+class ReportTrendGroupBy(str, StructuredEnum):
+    DATE = EnumField("date", _("日期"))
+    BIZ = EnumField("bk_biz_id", _("业务"))
+    CLUSTER_TYPE = EnumField("cluster_type", _("集群类型"))
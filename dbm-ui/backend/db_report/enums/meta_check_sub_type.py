@@ -19,3 +19,4 @@ class MetaCheckSubType(str, StructuredEnum):
     ClusterTopo = EnumField("cluster_topo", _("集群结构"))
     AloneInstance = EnumField("alone_instance", _("孤立的实例"))
     StatusAbnormal = EnumField("status_abnormal", _("不属于RUNNING状态"))
+    ProxyBackendsInconsistent = EnumField("proxy_backends_inconsistent", _("proxy后端配置不一致"))
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("db_report", "0009_sqlserverfullbackupinforeport_sqlserverlogbackupinforeport"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportDailySummary",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("report_type", models.CharField(help_text="报告类型(报告模型名)", max_length=64)),
+                ("subtype", models.CharField(default="", help_text="报告检查子项", max_length=64)),
+                ("date", models.DateField(help_text="巡检日期")),
+                ("bk_biz_id", models.IntegerField(default=0, help_text="业务的 cmdb id")),
+                ("cluster_type", models.CharField(default="", help_text="集群类型", max_length=64)),
+                ("total_count", models.IntegerField(default=0, help_text="巡检记录数")),
+                ("failed_count", models.IntegerField(default=0, help_text="异常记录数")),
+            ],
+            options={
+                "unique_together": {("report_type", "subtype", "date", "bk_biz_id", "cluster_type")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="reportdailysummary",
+            index=models.Index(fields=["report_type", "date"], name="db_report_r_report__b9fcb6_idx"),
+        ),
+    ]
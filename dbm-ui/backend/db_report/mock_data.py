@@ -113,6 +113,8 @@ DBMON_HEARTBEAT_CHECK_DATA = {
             "time": "",
             "cluster_type": "TWEMPROXY",
             "instance": "aa:bb",
+            "status": False,
+            "msg": "实例 aa:bb dbmon 心跳超时",
         }
     ],
     "name": "dbmon心跳报告",
@@ -13,6 +13,7 @@ from .dbmon_heartbeat_report import DbmonHeartbeatReport
 from .meta_check_report import MetaCheckReport
 from .mysqlbackup_check_report import MysqlBackupCheckReport
 from .redisbackup_check_report import RedisBackupCheckReport
+from .report_summary import ReportDailySummary
 from .sqlserver_check_report import (
     SqlserverCheckAppSettingReport,
     SqlserverCheckJobSyncReport,
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class ReportDailySummary(models.Model):
+    """
+    巡检报告按天汇总，明细数据过期清理后汇总数据仍长期保留，用于趋势统计
+    """
+
+    report_type = models.CharField(max_length=64, help_text=_("报告类型(报告模型名)"))
+    subtype = models.CharField(max_length=64, default="", help_text=_("报告检查子项"))
+    date = models.DateField(help_text=_("巡检日期"))
+    bk_biz_id = models.IntegerField(default=0, help_text=_("业务的 cmdb id"))
+    cluster_type = models.CharField(max_length=64, default="", help_text=_("集群类型"))
+    total_count = models.IntegerField(default=0, help_text=_("巡检记录数"))
+    failed_count = models.IntegerField(default=0, help_text=_("异常记录数"))
+
+    class Meta:
+        unique_together = ("report_type", "subtype", "date", "bk_biz_id", "cluster_type")
+        indexes = [models.Index(fields=["report_type", "date"])]
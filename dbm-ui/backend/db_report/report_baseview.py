@@ -8,10 +8,16 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from rest_framework import mixins
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import mixins, status
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
 from backend.bk_web.pagination import AuditedLimitOffsetPagination
+from backend.bk_web.swagger import common_swagger_auto_schema
+from backend.db_report.enums import SWAGGER_TAG
+from backend.db_report.report_retention import ReportRetentionHandler
+from backend.db_report.serializers.report_trend_serializer import ReportTrendResponseSerializer, ReportTrendSerializer
 from backend.iam_app.dataclass import ResourceEnum
 from backend.iam_app.dataclass.actions import ActionEnum
 from backend.iam_app.handlers.drf_perm.base import ResourceActionPermission, get_request_key_id
@@ -30,6 +36,8 @@ class ReportBaseViewSet(GenericViewSet, mixins.ListModelMixin):
 
     report_name = ""
     report_title = []
+    # 趋势统计的检查子项，为空时统计该报告的全部子项
+    trend_subtype = None
 
     @staticmethod
     def instance_getter(request, view):
@@ -46,3 +54,24 @@ class ReportBaseViewSet(GenericViewSet, mixins.ListModelMixin):
         response.data["title"] = self.report_title
 
         return response
+
+    @common_swagger_auto_schema(
+        operation_summary=_("巡检报告异常趋势"),
+        query_serializer=ReportTrendSerializer(),
+        responses={status.HTTP_200_OK: ReportTrendResponseSerializer()},
+        tags=[SWAGGER_TAG],
+    )
+    def trend(self, request, *args, **kwargs):
+        serializer = ReportTrendSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        trend = ReportRetentionHandler.query_trend(
+            report_type=self.queryset.model.__name__,
+            start_date=data["start_date"],
+            end_date=data["end_date"],
+            group_by=data["group_by"],
+            subtype=self.trend_subtype,
+            bk_biz_id=data["bk_biz_id"],
+            cluster_type=data.get("cluster_type"),
+        )
+        return Response(trend)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import datetime
+import gzip
+import json
+import logging
+from typing import Dict, List, Optional, Type
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from backend.configuration.constants import REPORT_RETENTION_VALUE, SystemSettingsEnum
+from backend.configuration.models import SystemSettings
+from backend.core.storages.storage import get_storage
+from backend.db_report.enums import ReportRetentionMode
+from backend.db_report.models import ReportDailySummary
+from backend.db_report.report_basemodel import BaseReportABS
+
+logger = logging.getLogger("root")
+
+# 报告所在的数据库
+REPORT_DB = "report_db"
+# 汇总时重新计算最近几天的数据，兼容延迟写入的巡检结果
+REPORT_ROLLUP_LOOKBACK_DAYS = 2
+# 每批清理的明细数，以及每次任务最多清理的批次
+REPORT_PURGE_CHUNK_SIZE = 1000
+REPORT_PURGE_MAX_CHUNKS = 100
+# 归档文件在制品库中的目录
+REPORT_ARCHIVE_PATH = "/db_report/archive"
+
+
+def get_report_models() -> List[Type[BaseReportABS]]:
+    """获取所有巡检报告模型"""
+    return [model for model in apps.get_app_config("db_report").get_models() if issubclass(model, BaseReportABS)]
+
+
+def day_start(date: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+class ReportRetentionHandler:
+    """巡检报告的按天汇总和过期明细清理"""
+
+    @classmethod
+    def get_summary_watermark(cls, report_type: str) -> Optional[datetime.date]:
+        """已汇总的最新日期"""
+        return ReportDailySummary.objects.filter(report_type=report_type).aggregate(date=Max("date"))["date"]
+
+    @classmethod
+    def rollup_report(cls, model: Type[BaseReportABS]):
+        """将报告明细按天、业务、集群类型(和检查子项)汇总，今天的数据未完整，不做汇总"""
+        report_type = model.__name__
+        today = timezone.localdate()
+        watermark = cls.get_summary_watermark(report_type)
+        # 从水位的下一天开始汇总，并回溯重算最近几天
+        start = None
+        if watermark:
+            start = min(
+                watermark + datetime.timedelta(days=1), today - datetime.timedelta(days=REPORT_ROLLUP_LOOKBACK_DAYS)
+            )
+
+        reports = model.objects.filter(create_at__lt=day_start(today))
+        if start:
+            reports = reports.filter(create_at__gte=day_start(start))
+
+        group_fields = ["bk_biz_id", "cluster_type"]
+        has_subtype = any(field.name == "subtype" for field in model._meta.get_fields())
+        if has_subtype:
+            group_fields.append("subtype")
+
+        stats = (
+            reports.annotate(date=TruncDate("create_at"))
+            .values("date", *group_fields)
+            .annotate(total_count=Count("id"), failed_count=Count("id", filter=Q(status=False)))
+            .order_by()
+        )
+        summaries = [
+            ReportDailySummary(
+                report_type=report_type,
+                subtype=stat.get("subtype") or "",
+                date=stat["date"],
+                bk_biz_id=stat["bk_biz_id"],
+                cluster_type=stat["cluster_type"] or "",
+                total_count=stat["total_count"],
+                failed_count=stat["failed_count"],
+            )
+            for stat in stats
+        ]
+
+        # 重新计算的日期先删除再写入，保证汇总幂等
+        with transaction.atomic(using=REPORT_DB):
+            old_summaries = ReportDailySummary.objects.filter(report_type=report_type, date__lt=today)
+            if start:
+                old_summaries = old_summaries.filter(date__gte=start)
+            old_summaries.delete()
+            ReportDailySummary.objects.bulk_create(summaries, batch_size=1000)
+
+    @classmethod
+    def get_retention_policy(cls, report_type: str) -> Dict:
+        policies = SystemSettings.get_setting_value(
+            SystemSettingsEnum.REPORT_RETENTION, default=REPORT_RETENTION_VALUE
+        )
+        return policies.get(report_type) or policies.get("default") or REPORT_RETENTION_VALUE["default"]
+
+    @classmethod
+    def archive_reports(cls, model: Type[BaseReportABS], report_ids: List[int]):
+        """将明细以 jsonl.gz 格式归档到制品库"""
+        rows = model.objects.filter(id__in=report_ids).order_by("id").values()
+        content = "\n".join(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) for row in rows)
+        file_name = f"{timezone.localdate()}-{report_ids[0]}-{report_ids[-1]}.jsonl.gz"
+        file_path = f"{REPORT_ARCHIVE_PATH}/{model.__name__}/{file_name}"
+        get_storage().save(file_path, ContentFile(gzip.compress(content.encode("utf-8"))))
+
+    @classmethod
+    def purge_report(cls, model: Type[BaseReportABS]) -> int:
+        """按保留策略分批清理过期明细，只清理已汇总的日期"""
+        report_type = model.__name__
+        watermark = cls.get_summary_watermark(report_type)
+        if not watermark:
+            return 0
+
+        policy = cls.get_retention_policy(report_type)
+        # 未配置保留天数时不清理明细
+        if not policy.get("days"):
+            return 0
+        # 未汇总的明细，以及汇总时需要回溯重算的明细都需要保留
+        today = timezone.localdate()
+        expire_date = min(
+            today - datetime.timedelta(days=policy["days"]),
+            today - datetime.timedelta(days=REPORT_ROLLUP_LOOKBACK_DAYS),
+            watermark + datetime.timedelta(days=1),
+        )
+        expire_reports = model.objects.filter(create_at__lt=day_start(expire_date)).order_by("id")
+
+        purged_count = 0
+        for __ in range(REPORT_PURGE_MAX_CHUNKS):
+            report_ids = list(expire_reports.values_list("id", flat=True)[:REPORT_PURGE_CHUNK_SIZE])
+            if not report_ids:
+                break
+            if policy.get("mode") == ReportRetentionMode.ARCHIVE:
+                cls.archive_reports(model, report_ids)
+            model.objects.filter(id__in=report_ids).delete()
+            purged_count += len(report_ids)
+
+        return purged_count
+
+    @classmethod
+    def rollup_and_purge(cls):
+        for model in get_report_models():
+            try:
+                cls.rollup_report(model)
+                purged_count = cls.purge_report(model)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error(f"rollup or purge report {model.__name__} failed: {e}")
+                continue
+            logger.info(f"rollup report {model.__name__} and purge {purged_count} expired rows")
+
+    @classmethod
+    def query_trend(
+        cls,
+        report_type: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        group_by: str,
+        subtype: str = None,
+        bk_biz_id: int = None,
+        cluster_type: str = None,
+    ) -> List[Dict]:
+        """从汇总数据查询异常数趋势"""
+        summaries = ReportDailySummary.objects.filter(
+            report_type=report_type, date__gte=start_date, date__lte=end_date
+        )
+        if subtype:
+            summaries = summaries.filter(subtype=subtype)
+        if bk_biz_id:
+            summaries = summaries.filter(bk_biz_id=bk_biz_id)
+        if cluster_type:
+            summaries = summaries.filter(cluster_type=cluster_type)
+
+        group_fields = list(dict.fromkeys(["date", group_by]))
+        return list(
+            summaries.values(*group_fields)
+            .annotate(total_count=Sum("total_count"), failed_count=Sum("failed_count"))
+            .order_by(*group_fields)
+        )
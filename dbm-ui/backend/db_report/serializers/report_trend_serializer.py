@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import datetime
+
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+
+from backend.db_report.enums import ReportTrendGroupBy
+
+# 趋势查询的默认天数和最大天数
+REPORT_TREND_DEFAULT_DAYS = 30
+REPORT_TREND_MAX_DAYS = 366
+
+
+class ReportTrendSerializer(serializers.Serializer):
+    bk_biz_id = serializers.IntegerField(help_text=_("业务ID"))
+    cluster_type = serializers.CharField(help_text=_("集群类型"), required=False)
+    start_date = serializers.DateField(help_text=_("开始日期"), required=False)
+    end_date = serializers.DateField(help_text=_("结束日期"), required=False)
+    group_by = serializers.ChoiceField(
+        help_text=_("分组维度"), choices=ReportTrendGroupBy.get_choices(), default=ReportTrendGroupBy.DATE.value
+    )
+
+    def validate(self, attrs):
+        attrs.setdefault("end_date", timezone.localdate())
+        attrs.setdefault("start_date", attrs["end_date"] - datetime.timedelta(days=REPORT_TREND_DEFAULT_DAYS - 1))
+        if attrs["start_date"] > attrs["end_date"]:
+            raise serializers.ValidationError(_("开始日期不能晚于结束日期"))
+        if (attrs["end_date"] - attrs["start_date"]).days >= REPORT_TREND_MAX_DAYS:
+            raise serializers.ValidationError(_("查询范围不能超过{}天").format(REPORT_TREND_MAX_DAYS))
+        return attrs
+
+
+class ReportTrendResponseSerializer(serializers.Serializer):
+    class Meta:
+        swagger_schema_fields = {
+            "example": [
+                {"date": "2024-01-01", "total_count": 100, "failed_count": 2},
+                {"date": "2024-01-02", "total_count": 100, "failed_count": 0},
+            ]
+        }
@@ -14,13 +14,31 @@ from backend.db_report import views
 
 urlpatterns = [
     url("^meta_check/instance_belong$", views.MetaCheckReportInstanceBelongViewSet.as_view({"get": "list"})),
+    url("^meta_check/instance_belong/trend$", views.MetaCheckReportInstanceBelongViewSet.as_view({"get": "trend"})),
     url("^checksum_check/report$", views.ChecksumCheckReportViewSet.as_view({"get": "list"})),
+    url("^checksum_check/report/trend$", views.ChecksumCheckReportViewSet.as_view({"get": "trend"})),
     url("^checksum_check/instance$", views.ChecksumInstanceViewSet.as_view({"get": "list"})),
     url("^mysql_check/full_backup$", views.MysqlFullBackupCheckReportViewSet.as_view({"get": "list"})),
+    url("^mysql_check/full_backup/trend$", views.MysqlFullBackupCheckReportViewSet.as_view({"get": "trend"})),
     url("^mysql_check/binlog_backup$", views.MysqlBinlogBackupCheckReportViewSet.as_view({"get": "list"})),
+    url("^mysql_check/binlog_backup/trend$", views.MysqlBinlogBackupCheckReportViewSet.as_view({"get": "trend"})),
     url("^redis_check/full_backup$", views.RedisFullBackupCheckReportViewSet.as_view({"get": "list"})),
+    url("^redis_check/full_backup/trend$", views.RedisFullBackupCheckReportViewSet.as_view({"get": "trend"})),
     url("^redis_check/binlog_backup$", views.RedisBinlogBackupCheckReportViewSet.as_view({"get": "list"})),
+    url("^redis_check/binlog_backup/trend$", views.RedisBinlogBackupCheckReportViewSet.as_view({"get": "trend"})),
     url("^dbmon/heartbeat$", views.DbmonHeatbeartCheckReportBaseViewSet.as_view({"get": "list"})),
+    url("^dbmon/heartbeat/trend$", views.DbmonHeatbeartCheckReportBaseViewSet.as_view({"get": "trend"})),
     url("^redis_meta_check/status_abnormal$", views.RedisStatusAbnormalCheckReportViewSet.as_view({"get": "list"})),
+    url(
+        "^redis_meta_check/status_abnormal/trend$",
+        views.RedisStatusAbnormalCheckReportViewSet.as_view({"get": "trend"}),
+    ),
     url("^redis_meta_check/alone_instance$", views.RedisAloneInstanceCheckReportViewSet.as_view({"get": "list"})),
+    url(
+        "^redis_meta_check/alone_instance/trend$", views.RedisAloneInstanceCheckReportViewSet.as_view({"get": "trend"})
+    ),
+    url("^redis_meta_check/proxy_backends$", views.RedisProxyBackendsCheckReportViewSet.as_view({"get": "list"})),
+    url(
+        "^redis_meta_check/proxy_backends/trend$", views.RedisProxyBackendsCheckReportViewSet.as_view({"get": "trend"})
+    ),
 ]
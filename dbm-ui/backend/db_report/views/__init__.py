@@ -13,5 +13,9 @@ from .checksum_instance_view import ChecksumInstanceViewSet
 from .dbmon_heartbeat_view import DbmonHeatbeartCheckReportBaseViewSet
 from .meta_check_view import MetaCheckReportInstanceBelongViewSet
 from .mysqlbackup_check_view import MysqlBinlogBackupCheckReportViewSet, MysqlFullBackupCheckReportViewSet
-from .redis_dbmeta_check_view import RedisAloneInstanceCheckReportViewSet, RedisStatusAbnormalCheckReportViewSet
+from .redis_dbmeta_check_view import (
+    RedisAloneInstanceCheckReportViewSet,
+    RedisProxyBackendsCheckReportViewSet,
+    RedisStatusAbnormalCheckReportViewSet,
+)
 from .redisbackup_check_view import RedisBinlogBackupCheckReportViewSet, RedisFullBackupCheckReportViewSet
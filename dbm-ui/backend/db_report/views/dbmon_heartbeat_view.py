@@ -27,7 +27,7 @@ logger = logging.getLogger("root")
 class DbmonHeartbeatCheckReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = DbmonHeartbeatReport
-        fields = ("bk_biz_id", "cluster", "cluster_type", "app", "dba", "instance", "create_at")
+        fields = ("bk_biz_id", "cluster", "cluster_type", "app", "dba", "instance", "status", "msg", "create_at")
         swagger_schema_fields = {"example": mock_data.DBMON_HEARTBEAT_CHECK_DATA}
 
 
@@ -73,9 +73,14 @@ class DbmonHeatbeartCheckReportBaseViewSet(ReportBaseViewSet):
             "display_name": _("实例节点信息"),
             "format": ReportFieldFormat.TEXT.value,
         },
+        {
+            "name": "status",
+            "display_name": _("心跳状态"),
+            "format": ReportFieldFormat.STATUS.value,
+        },
         {
             "name": "create_at",
-            "display_name": _("心跳超时时间"),
+            "display_name": _("状态变化时间"),
             "format": ReportFieldFormat.TEXT.value,
         },
     ]
@@ -87,6 +87,7 @@ class MysqlBackupCheckReportBaseViewSet(ReportBaseViewSet):
 
 class MysqlFullBackupCheckReportViewSet(MysqlBackupCheckReportBaseViewSet):
     queryset = MysqlBackupCheckReport.objects.filter(subtype=MysqlBackupCheckSubType.FullBackup.value)
+    trend_subtype = MysqlBackupCheckSubType.FullBackup.value
     serializer_class = MysqlBackupCheckReportSerializer
     report_name = _("MySQL 全备检查")
 
@@ -101,6 +102,7 @@ class MysqlFullBackupCheckReportViewSet(MysqlBackupCheckReportBaseViewSet):
 
 class MysqlBinlogBackupCheckReportViewSet(MysqlBackupCheckReportBaseViewSet):
     queryset = MysqlBackupCheckReport.objects.filter(subtype=MysqlBackupCheckSubType.BinlogSeq.value)
+    trend_subtype = MysqlBackupCheckSubType.BinlogSeq.value
     serializer_class = MysqlBackupCheckReportSerializer
     report_name = _("集群binlog检查")
 
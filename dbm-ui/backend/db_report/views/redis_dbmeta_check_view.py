@@ -86,6 +86,7 @@ class RedisDbmetaCheckReportBaseViewSet(ReportBaseViewSet):
 
 class RedisAloneInstanceCheckReportViewSet(RedisDbmetaCheckReportBaseViewSet):
     queryset = MetaCheckReport.objects.filter(subtype=MetaCheckSubType.AloneInstance.value)
+    trend_subtype = MetaCheckSubType.AloneInstance.value
     serializer_class = RedisDbmetaCheckReportSerializer
     report_name = _("孤立节点检查")
 
@@ -100,6 +101,7 @@ class RedisAloneInstanceCheckReportViewSet(RedisDbmetaCheckReportBaseViewSet):
 
 class RedisStatusAbnormalCheckReportViewSet(RedisDbmetaCheckReportBaseViewSet):
     queryset = MetaCheckReport.objects.filter(subtype=MetaCheckSubType.StatusAbnormal.value)
+    trend_subtype = MetaCheckSubType.StatusAbnormal.value
     serializer_class = RedisDbmetaCheckReportSerializer
     report_name = _("实例状态异常检查")
 
@@ -110,3 +112,18 @@ class RedisStatusAbnormalCheckReportViewSet(RedisDbmetaCheckReportBaseViewSet):
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+class RedisProxyBackendsCheckReportViewSet(RedisDbmetaCheckReportBaseViewSet):
+    queryset = MetaCheckReport.objects.filter(subtype=MetaCheckSubType.ProxyBackendsInconsistent.value)
+    trend_subtype = MetaCheckSubType.ProxyBackendsInconsistent.value
+    serializer_class = RedisDbmetaCheckReportSerializer
+    report_name = _("proxy后端一致性检查")
+
+    @common_swagger_auto_schema(
+        operation_summary=_("proxy后端一致性检查报告"),
+        responses={status.HTTP_200_OK: RedisDbmetaCheckReportSerializer()},
+        tags=[SWAGGER_TAG],
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
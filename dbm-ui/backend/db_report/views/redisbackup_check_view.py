@@ -91,6 +91,7 @@ class RedisBackupCheckReportBaseViewSet(ReportBaseViewSet):
 
 class RedisFullBackupCheckReportViewSet(RedisBackupCheckReportBaseViewSet):
     queryset = RedisBackupCheckReport.objects.filter(subtype=RedisBackupCheckSubType.FullBackup.value)
+    trend_subtype = RedisBackupCheckSubType.FullBackup.value
     serializer_class = RedisBackupCheckReportSerializer
     report_name = _("Redis 全备检查")
 
@@ -105,6 +106,7 @@ class RedisFullBackupCheckReportViewSet(RedisBackupCheckReportBaseViewSet):
 
 class RedisBinlogBackupCheckReportViewSet(RedisBackupCheckReportBaseViewSet):
     queryset = RedisBackupCheckReport.objects.filter(subtype=RedisBackupCheckSubType.BinlogBackup.value)
+    trend_subtype = RedisBackupCheckSubType.BinlogBackup.value
 
     serializer_class = RedisBackupCheckReportSerializer
     report_name = _("Redis集群binlog检查")
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.utils.translation import ugettext_lazy as _
+
+from blue_krill.data_types.enum import EnumField, StructuredEnum
+
+SWAGGER_TAG = _("备份目录")
+
+# 首次同步备份目录时回溯的天数
+BACKUP_CATALOG_INIT_DAYS = 7
+# 备份目录保留的天数，需覆盖各回档场景的最大查询范围
+BACKUP_CATALOG_RETENTION_DAYS = 15
+# 单次从日志平台同步的时间窗口(小时)
+BACKUP_CATALOG_SYNC_WINDOW_HOURS = 1
+# 同步时回退的重叠时间(分钟)，避免日志平台上报延迟导致遗漏，重复日志按log_uid去重
+BACKUP_CATALOG_SYNC_OVERLAP_MINUTES = 30
+# 单个同步窗口最多拉取的日志条数
+BACKUP_CATALOG_SYNC_MAX_SIZE = 100000
+# 同步窗口内日志超过上限时，窗口折半重试的最小窗口(分钟)
+BACKUP_CATALOG_SYNC_MIN_WINDOW_MINUTES = 1
+
+
+class BackupSegmentType(str, StructuredEnum):
+    FULL = EnumField("FULL", _("全量备份"))
+    INCR = EnumField("INCR", _("增量备份"))
+    BINLOG = EnumField("BINLOG", _("binlog"))
+
+
+class BackupCollector(str, StructuredEnum):
+    """备份结果日志的采集项"""
+
+    MYSQL_DBBACKUP = EnumField("mysql_dbbackup_result", _("MySQL备份结果"))
+    MYSQL_BINLOG = EnumField("mysql_binlog_result", _("MySQL binlog备份结果"))
+    MONGO_BACKUP = EnumField("mongo_backup_result", _("MongoDB备份结果"))
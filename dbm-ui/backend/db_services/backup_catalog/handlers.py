@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from dateutil.parser import parse as time_parse
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+
+from backend.components.bklog.handler import BKLogHandler
+from backend.configuration.constants import SystemSettingsEnum
+from backend.configuration.models import SystemSettings
+from backend.constants import DEFAULT_SYSTEM_USER
+from backend.db_services.backup_catalog.constants import (
+    BACKUP_CATALOG_INIT_DAYS,
+    BACKUP_CATALOG_RETENTION_DAYS,
+    BACKUP_CATALOG_SYNC_MAX_SIZE,
+    BACKUP_CATALOG_SYNC_MIN_WINDOW_MINUTES,
+    BACKUP_CATALOG_SYNC_OVERLAP_MINUTES,
+    BACKUP_CATALOG_SYNC_WINDOW_HOURS,
+    BackupCollector,
+    BackupSegmentType,
+)
+from backend.db_services.backup_catalog.models import BackupCatalog
+from backend.utils.md5 import count_md5
+
+logger = logging.getLogger("root")
+
+
+class BackupCatalogHandler(object):
+    """备份目录的同步与查询"""
+
+    # 采集项对应的备份日志解析函数
+    COLLECTOR_PARSERS = {
+        BackupCollector.MYSQL_DBBACKUP: "_parse_mysql_dbbackup",
+        BackupCollector.MYSQL_BINLOG: "_parse_mysql_binlog",
+        BackupCollector.MONGO_BACKUP: "_parse_mongo_backup",
+    }
+
+    @staticmethod
+    def _parse_time(value: Any) -> Optional[datetime]:
+        if not value:
+            return None
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        parsed = time_parse(str(value))
+        return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+    @classmethod
+    def _parse_mysql_dbbackup(cls, log: Dict) -> Dict:
+        return {
+            "segment_type": BackupSegmentType.FULL,
+            "shard_id": int(log.get("shard_value") or 0),
+            "instance": f"{log.get('backup_host')}:{log.get('backup_port')}",
+            "backup_id": log.get("backup_id", ""),
+            "start_time": cls._parse_time(log.get("backup_begin_time")),
+            "end_time": cls._parse_time(log.get("backup_consistent_time") or log.get("backup_end_time")),
+        }
+
+    @classmethod
+    def _parse_mysql_binlog(cls, log: Dict) -> Dict:
+        # binlog文件名的后缀即为文件序号，如binlog20000.000123
+        filename = log.get("filename", "")
+        suffix = filename.rsplit(".", 1)[-1]
+        return {
+            "segment_type": BackupSegmentType.BINLOG,
+            "instance": f"{log.get('host')}:{log.get('port')}",
+            "backup_id": filename,
+            "segment_index": int(suffix) if suffix.isdigit() else 0,
+            "start_time": cls._parse_time(log.get("start_time")),
+            "end_time": cls._parse_time(log.get("stop_time")),
+        }
+
+    @classmethod
+    def _parse_mongo_backup(cls, log: Dict) -> Dict:
+        # 增量备份通过pitr_fullname关联全备，pitr_binlog_index为增量备份在备份链中的序号
+        is_incr = log.get("pitr_file_type") == BackupSegmentType.INCR
+        return {
+            "segment_type": BackupSegmentType.INCR if is_incr else BackupSegmentType.FULL,
+            "set_name": log.get("set_name", ""),
+            "instance": f"{log.get('server_ip')}:{log.get('server_port')}",
+            "backup_id": log.get("pitr_fullname") or log.get("file_name", ""),
+            "segment_index": int(log.get("pitr_binlog_index") or 0),
+            "start_time": cls._parse_time(log.get("start_time")),
+            "end_time": cls._parse_time(log.get("pitr_last_pos")) or cls._parse_time(log.get("end_time")),
+        }
+
+    @staticmethod
+    def get_log_uid(log: Dict) -> str:
+        return count_md5(log)
+
+    @classmethod
+    def build_catalog(cls, collector: str, log: Dict) -> Optional[BackupCatalog]:
+        """将备份日志解析为备份目录记录，无法解析的日志忽略"""
+        try:
+            segment = getattr(cls, cls.COLLECTOR_PARSERS[collector])(log)
+            cluster_id = int(log.get("cluster_id") or 0)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("backup catalog parse log error: %s, log: %s", e, log)
+            return None
+
+        if not segment["end_time"]:
+            return None
+
+        return BackupCatalog(
+            log_uid=cls.get_log_uid(log),
+            collector=collector,
+            bk_biz_id=int(log.get("bk_biz_id") or 0),
+            cluster_id=cluster_id,
+            cluster_type=log.get("cluster_type", ""),
+            raw_log=log,
+            **segment,
+        )
+
+    @staticmethod
+    def _get_sync_state(collector: str) -> Dict[str, int]:
+        state = SystemSettings.get_setting_value(key=SystemSettingsEnum.BACKUP_CATALOG_SYNC_STATE, default={})
+        return state.get(collector) or {}
+
+    @staticmethod
+    def _update_sync_state(collector: str, watermark: datetime = None, coverage_start: datetime = None):
+        """
+        加锁更新采集项的同步状态，水位只前进不后退，避免并发的同步互相覆盖
+        @param collector: 采集项
+        @param watermark: 已同步到的时间点
+        @param coverage_start: 备份目录的覆盖起点
+        """
+        setting_key = SystemSettingsEnum.BACKUP_CATALOG_SYNC_STATE.value
+        SystemSettings.objects.get_or_create(
+            key=setting_key,
+            defaults={
+                "type": "dict",
+                "value": {},
+                "desc": SystemSettingsEnum.get_choice_label(setting_key),
+                "creator": DEFAULT_SYSTEM_USER,
+                "updater": DEFAULT_SYSTEM_USER,
+            },
+        )
+        with transaction.atomic():
+            setting = SystemSettings.objects.select_for_update().get(key=setting_key)
+            state = setting.value or {}
+            collector_state = state.setdefault(collector, {})
+            if watermark:
+                collector_state["watermark"] = max(int(watermark.timestamp()), collector_state.get("watermark", 0))
+            if coverage_start:
+                collector_state["coverage_start"] = int(coverage_start.timestamp())
+            setting.value = state
+            setting.save(update_fields=["value", "update_at"])
+
+    @classmethod
+    def get_watermark(cls, collector: str) -> Optional[datetime]:
+        """获取采集项已同步到的时间点"""
+        timestamp = cls._get_sync_state(collector).get("watermark")
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp else None
+
+    @classmethod
+    def get_coverage_start(cls, collector: str) -> Optional[datetime]:
+        """获取采集项备份目录的覆盖起点"""
+        timestamp = cls._get_sync_state(collector).get("coverage_start")
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp else None
+
+    @classmethod
+    def _save_catalogs(cls, collector: str, logs: List[Dict]) -> int:
+        catalogs = [catalog for catalog in [cls.build_catalog(collector, log) for log in logs] if catalog]
+        # 重叠窗口的日志按log_uid去重
+        BackupCatalog.objects.bulk_create(catalogs, ignore_conflicts=True, batch_size=500)
+        return len(catalogs)
+
+    @classmethod
+    def sync_catalog(cls, collector: str, now: datetime = None) -> int:
+        """
+        从日志平台增量同步备份目录，按时间窗口推进同步水位。
+        窗口内日志超过上限时折半窗口重试，最小窗口仍超限则在窗口内分页拉取，窗口内的日志全部写入后才推进水位
+        @param collector: 采集项
+        @param now: 同步截止时间
+        """
+        now = now or timezone.now()
+        watermark = cls.get_watermark(collector)
+        if watermark:
+            start_time = watermark - timedelta(minutes=BACKUP_CATALOG_SYNC_OVERLAP_MINUTES)
+        else:
+            start_time = now - timedelta(days=BACKUP_CATALOG_INIT_DAYS)
+            # 首次同步，备份目录从回溯的起点开始覆盖
+            cls._update_sync_state(collector, coverage_start=start_time)
+
+        max_window = timedelta(hours=BACKUP_CATALOG_SYNC_WINDOW_HOURS)
+        min_window = timedelta(minutes=BACKUP_CATALOG_SYNC_MIN_WINDOW_MINUTES)
+        window, synced_count = max_window, 0
+        while start_time < now:
+            end_time = min(start_time + window, now)
+            result = BKLogHandler.query_all_logs(
+                collector, start_time, end_time, max_size=BACKUP_CATALOG_SYNC_MAX_SIZE
+            )
+            if result["truncated"] and end_time - start_time > min_window:
+                window = max((end_time - start_time) / 2, min_window)
+                continue
+
+            synced_count += cls._save_catalogs(collector, result["logs"])
+            # 最小窗口仍超限时，从截断的位置继续分页拉取，直到窗口内的日志全部写入
+            while result["truncated"]:
+                logger.warning(
+                    "backup catalog sync truncated: collector=%s, window=[%s, %s], continue by search_after",
+                    collector,
+                    start_time,
+                    end_time,
+                )
+                result = BKLogHandler.query_all_logs(
+                    collector,
+                    start_time,
+                    end_time,
+                    max_size=BACKUP_CATALOG_SYNC_MAX_SIZE,
+                    search_after=result["search_after"],
+                )
+                synced_count += cls._save_catalogs(collector, result["logs"])
+
+            cls._update_sync_state(collector, watermark=end_time)
+            start_time, window = end_time, max_window
+
+        return synced_count
+
+    @classmethod
+    def purge_catalog(cls):
+        """清理超过保留时间的备份目录，同时推进各采集项的覆盖起点"""
+        expire_time = timezone.now() - timedelta(days=BACKUP_CATALOG_RETENTION_DAYS)
+        for collector in BackupCollector.get_values():
+            coverage_start = cls.get_coverage_start(collector)
+            if coverage_start and coverage_start < expire_time:
+                cls._update_sync_state(collector, coverage_start=expire_time)
+        return BackupCatalog.objects.filter(end_time__lt=expire_time).delete()
+
+    @classmethod
+    def _filter_by_end_time(
+        cls, collector: str, logs: List[Dict], start_time: datetime, end_time: datetime
+    ) -> List[Dict]:
+        """按备份结束时间过滤日志平台返回的日志，与备份目录的过滤口径保持一致，无法解析的日志保留"""
+        filtered_logs = []
+        for log in logs:
+            catalog = cls.build_catalog(collector, log)
+            if catalog and not start_time <= catalog.end_time <= end_time:
+                continue
+            filtered_logs.append(log)
+        return filtered_logs
+
+    @classmethod
+    def query_backup_logs(
+        cls, collector: str, start_time: datetime, end_time: datetime, query_string: str = "*", **filters
+    ) -> Dict[str, Any]:
+        """
+        查询备份日志：备份目录覆盖范围内的部分查询备份目录，覆盖起点之前和同步水位之后的部分由日志平台补齐。
+        注意：备份目录按备份结束时间(end_time)过滤，日志平台按日志上报时间过滤。由于上报时间不早于备份结束时间，
+        补齐时按上报时间查询后再按备份结束时间过滤，结果统一为备份结束时间落在[start_time, end_time]内的日志
+        @param collector: 采集项
+        @param start_time: 开始时间
+        @param end_time: 结束时间
+        @param query_string: 日志平台的过滤条件，需与filters等价
+        @param filters: 备份目录的过滤条件
+        """
+        watermark, coverage_start = cls.get_watermark(collector), cls.get_coverage_start(collector)
+        # 备份目录尚未覆盖查询范围，直接查询日志平台
+        if not watermark or not coverage_start or watermark <= start_time or coverage_start >= end_time:
+            result = BKLogHandler.query_all_logs(collector, start_time, end_time, query_string)
+            return {
+                "logs": cls._filter_by_end_time(collector, result["logs"], start_time, end_time),
+                "truncated": result["truncated"],
+            }
+
+        catalogs = BackupCatalog.objects.filter(
+            collector=collector, end_time__gte=start_time, end_time__lte=end_time, **filters
+        ).order_by("end_time")
+        log_uids, catalog_logs = set(), []
+        for log_uid, raw_log in catalogs.values_list("log_uid", "raw_log"):
+            log_uids.add(log_uid)
+            catalog_logs.append(raw_log)
+
+        # 日志平台补齐覆盖起点之前和同步水位之后的部分，与备份目录重复的日志去重
+        head_logs, tail_logs, truncated = [], [], False
+        if start_time < coverage_start:
+            result = BKLogHandler.query_all_logs(collector, start_time, coverage_start, query_string)
+            head_logs, truncated = result["logs"], truncated or result["truncated"]
+        tail_start_time = watermark - timedelta(minutes=BACKUP_CATALOG_SYNC_OVERLAP_MINUTES)
+        if end_time > tail_start_time:
+            result = BKLogHandler.query_all_logs(collector, tail_start_time, end_time, query_string)
+            tail_logs, truncated = result["logs"], truncated or result["truncated"]
+
+        def fill_logs(bklog_logs: List[Dict]) -> List[Dict]:
+            bklog_logs = [log for log in bklog_logs if cls.get_log_uid(log) not in log_uids]
+            return cls._filter_by_end_time(collector, bklog_logs, start_time, end_time)
+
+        return {"logs": fill_logs(head_logs) + catalog_logs + fill_logs(tail_logs), "truncated": truncated}
+
+    @classmethod
+    def query_chain_gaps(cls, cluster_ids: List[int], start_time: datetime, end_time: datetime) -> List[Dict]:
+        """
+        检查集群备份链的缺口：
+        1. 时间范围内没有全量备份
+        2. 增量分段(binlog按实例，MongoDB增备按副本集和所属全备)的序号不连续
+        @param cluster_ids: 集群ID列表
+        @param start_time: 开始时间
+        @param end_time: 结束时间
+        """
+        segments = BackupCatalog.objects.filter(
+            cluster_id__in=cluster_ids, end_time__gte=start_time, end_time__lte=end_time
+        ).values(
+            "cluster_id",
+            "segment_type",
+            "set_name",
+            "instance",
+            "backup_id",
+            "segment_index",
+            "start_time",
+            "end_time",
+        )
+        cluster__segments: Dict[int, List[Dict]] = defaultdict(list)
+        for segment in segments:
+            cluster__segments[segment["cluster_id"]].append(segment)
+
+        cluster_gaps: List[Dict] = []
+        for cluster_id in cluster_ids:
+            full_segments, stream__segments = [], defaultdict(dict)
+            for segment in cluster__segments[cluster_id]:
+                if segment["segment_type"] == BackupSegmentType.FULL:
+                    full_segments.append(segment)
+                    continue
+                if segment["segment_type"] == BackupSegmentType.BINLOG:
+                    stream = segment["instance"]
+                else:
+                    stream = f"{segment['set_name']}:{segment['backup_id']}"
+                # 同一分段可能被重复上报，按序号去重
+                stream__segments[(segment["segment_type"], stream)][segment["segment_index"]] = segment
+
+            gaps: List[Dict] = []
+            if not full_segments:
+                gaps.append(
+                    {
+                        "segment_type": BackupSegmentType.FULL,
+                        "stream": "",
+                        "start_time": start_time,
+                        "end_time": end_time,
+                        "missing_segments": 0,
+                        "message": _("时间范围内没有全量备份"),
+                    }
+                )
+
+            streams: List[Dict] = []
+            for (segment_type, stream), index__segment in stream__segments.items():
+                ordered_segments = [index__segment[index] for index in sorted(index__segment)]
+                for prev, curr in zip(ordered_segments, ordered_segments[1:]):
+                    if curr["segment_index"] - prev["segment_index"] <= 1:
+                        continue
+                    gaps.append(
+                        {
+                            "segment_type": segment_type,
+                            "stream": stream,
+                            "start_time": prev["end_time"],
+                            "end_time": curr["start_time"] or curr["end_time"],
+                            "missing_segments": curr["segment_index"] - prev["segment_index"] - 1,
+                            "message": _("分段序号{}~{}缺失").format(prev["segment_index"] + 1, curr["segment_index"] - 1),
+                        }
+                    )
+                streams.append(
+                    {
+                        "segment_type": segment_type,
+                        "stream": stream,
+                        "segment_count": len(ordered_segments),
+                        "coverage_end": max([segment["end_time"] for segment in ordered_segments]),
+                    }
+                )
+
+            cluster_gaps.append(
+                {
+                    "cluster_id": cluster_id,
+                    "full_backup_count": len(full_segments),
+                    "latest_full_backup_time": max([s["end_time"] for s in full_segments]) if full_segments else None,
+                    "streams": streams,
+                    "gaps": gaps,
+                    "is_complete": not gaps,
+                }
+            )
+
+        return cluster_gaps
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="BackupCatalog",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("creator", models.CharField(max_length=64, verbose_name="创建人")),
+                ("create_at", models.DateTimeField(auto_now_add=True, verbose_name="创建时间")),
+                ("updater", models.CharField(max_length=64, verbose_name="修改人")),
+                ("update_at", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+                ("log_uid", models.CharField(help_text="日志唯一标识(日志内容md5)", max_length=32, unique=True)),
+                (
+                    "collector",
+                    models.CharField(
+                        choices=[
+                            ("mysql_dbbackup_result", "MySQL备份结果"),
+                            ("mysql_binlog_result", "MySQL binlog备份结果"),
+                            ("mongo_backup_result", "MongoDB备份结果"),
+                        ],
+                        help_text="采集项",
+                        max_length=64,
+                    ),
+                ),
+                ("bk_biz_id", models.IntegerField(default=0, help_text="业务ID")),
+                ("cluster_id", models.IntegerField(default=0, help_text="集群ID")),
+                ("cluster_type", models.CharField(default="", help_text="集群类型", max_length=64)),
+                ("shard_id", models.IntegerField(default=0, help_text="分片ID(TenDBCluster)")),
+                ("set_name", models.CharField(default="", help_text="副本集名(MongoDB)", max_length=255)),
+                ("instance", models.CharField(default="", help_text="备份实例(ip:port)", max_length=64)),
+                (
+                    "segment_type",
+                    models.CharField(
+                        choices=[("FULL", "全量备份"), ("INCR", "增量备份"), ("BINLOG", "binlog")],
+                        help_text="备份分段类型",
+                        max_length=32,
+                    ),
+                ),
+                ("backup_id", models.CharField(default="", help_text="备份链标识", max_length=255)),
+                ("segment_index", models.IntegerField(default=0, help_text="分段在备份链中的序号")),
+                ("start_time", models.DateTimeField(help_text="分段开始时间", null=True)),
+                ("end_time", models.DateTimeField(help_text="分段结束(一致性)时间")),
+                ("raw_log", models.JSONField(default=dict, help_text="原始备份日志")),
+            ],
+            options={
+                "verbose_name": "备份目录(BackupCatalog)",
+                "verbose_name_plural": "备份目录(BackupCatalog)",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="backupcatalog",
+            index=models.Index(fields=["cluster_id", "segment_type", "end_time"], name="backup_catalog_cluster_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="backupcatalog",
+            index=models.Index(fields=["collector", "end_time"], name="backup_catalog_collector_idx"),
+        ),
+    ]
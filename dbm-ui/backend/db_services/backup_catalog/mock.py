@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+BACKUP_CHAIN_GAPS_DATA = [
+    {
+        "cluster_id": 1,
+        "full_backup_count": 2,
+        "latest_full_backup_time": "2024-01-31T03:00:00+08:00",
+        "streams": [
+            {
+                "segment_type": "BINLOG",
+                "stream": "127.0.0.1:20000",
+                "segment_count": 120,
+                "coverage_end": "2024-02-01T09:00:00+08:00",
+            }
+        ],
+        "gaps": [
+            {
+                "segment_type": "BINLOG",
+                "stream": "127.0.0.1:20000",
+                "start_time": "2024-01-31T12:00:00+08:00",
+                "end_time": "2024-01-31T12:30:00+08:00",
+                "missing_segments": 2,
+                "message": "分段序号101~102缺失",
+            }
+        ],
+        "is_complete": False,
+    }
+]
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from backend.bk_web.constants import LEN_LONG, LEN_NORMAL, LEN_SHORT
+from backend.bk_web.models import AuditedModel
+from backend.db_services.backup_catalog.constants import BackupCollector, BackupSegmentType
+
+
+class BackupCatalog(AuditedModel):
+    """
+    备份目录：从备份结果日志增量同步的全备/增备/binlog分段记录，用于定点回档的备份链查询
+    """
+
+    log_uid = models.CharField(max_length=LEN_SHORT, unique=True, help_text=_("日志唯一标识(日志内容md5)"))
+    collector = models.CharField(max_length=LEN_NORMAL, choices=BackupCollector.get_choices(), help_text=_("采集项"))
+    bk_biz_id = models.IntegerField(default=0, help_text=_("业务ID"))
+    cluster_id = models.IntegerField(default=0, help_text=_("集群ID"))
+    cluster_type = models.CharField(max_length=LEN_NORMAL, default="", help_text=_("集群类型"))
+    shard_id = models.IntegerField(default=0, help_text=_("分片ID(TenDBCluster)"))
+    set_name = models.CharField(max_length=LEN_LONG, default="", help_text=_("副本集名(MongoDB)"))
+    instance = models.CharField(max_length=LEN_NORMAL, default="", help_text=_("备份实例(ip:port)"))
+    segment_type = models.CharField(
+        max_length=LEN_SHORT, choices=BackupSegmentType.get_choices(), help_text=_("备份分段类型")
+    )
+    backup_id = models.CharField(max_length=LEN_LONG, default="", help_text=_("备份链标识"))
+    segment_index = models.IntegerField(default=0, help_text=_("分段在备份链中的序号"))
+    start_time = models.DateTimeField(null=True, help_text=_("分段开始时间"))
+    end_time = models.DateTimeField(help_text=_("分段结束(一致性)时间"))
+    raw_log = models.JSONField(default=dict, help_text=_("原始备份日志"))
+
+    class Meta:
+        verbose_name = verbose_name_plural = _("备份目录(BackupCatalog)")
+        indexes = [
+            models.Index(fields=["cluster_id", "segment_type", "end_time"], name="backup_catalog_cluster_idx"),
+            models.Index(fields=["collector", "end_time"], name="backup_catalog_collector_idx"),
+        ]
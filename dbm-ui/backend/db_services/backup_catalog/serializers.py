@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+
+from backend.db_services.backup_catalog import mock
+from backend.db_services.backup_catalog.constants import BACKUP_CATALOG_RETENTION_DAYS
+
+
+class BackupChainGapsSerializer(serializers.Serializer):
+    bk_biz_id = serializers.IntegerField(help_text=_("业务ID"))
+    cluster_ids = serializers.CharField(help_text=_("集群ID列表，以逗号分隔"))
+    days = serializers.IntegerField(
+        help_text=_("检查的天数"), required=False, default=7, min_value=1, max_value=BACKUP_CATALOG_RETENTION_DAYS
+    )
+
+    def validate(self, attrs):
+        attrs["cluster_ids"] = [int(cluster_id) for cluster_id in attrs["cluster_ids"].split(",") if cluster_id]
+        return attrs
+
+
+class BackupChainGapsResponseSerializer(serializers.Serializer):
+    class Meta:
+        swagger_schema_fields = {"example": mock.BACKUP_CHAIN_GAPS_DATA}
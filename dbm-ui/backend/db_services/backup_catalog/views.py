@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from backend.bk_web import viewsets
+from backend.bk_web.swagger import common_swagger_auto_schema
+from backend.db_meta.models import Cluster
+from backend.db_services.backup_catalog.constants import SWAGGER_TAG
+from backend.db_services.backup_catalog.handlers import BackupCatalogHandler
+from backend.db_services.backup_catalog.serializers import BackupChainGapsResponseSerializer, BackupChainGapsSerializer
+from backend.iam_app.handlers.drf_perm.base import DBManagePermission
+
+
+class BackupCatalogViewSet(viewsets.SystemViewSet):
+    action_permission_map = {}
+    default_permission_class = [DBManagePermission()]
+
+    @common_swagger_auto_schema(
+        operation_summary=_("查询集群备份链的缺口"),
+        query_serializer=BackupChainGapsSerializer(),
+        responses={status.HTTP_200_OK: BackupChainGapsResponseSerializer()},
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["GET"], detail=False, serializer_class=BackupChainGapsSerializer)
+    def gaps(self, request, *args, **kwargs):
+        validated_data = self.params_validate(self.get_serializer_class())
+        # 仅检查业务下的集群
+        cluster_ids = list(
+            Cluster.objects.filter(
+                bk_biz_id=validated_data["bk_biz_id"], id__in=validated_data["cluster_ids"]
+            ).values_list("id", flat=True)
+        )
+        end_time = timezone.now()
+        start_time = end_time - timedelta(days=validated_data["days"])
+        return Response(BackupCatalogHandler.query_chain_gaps(cluster_ids, start_time, end_time))
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from django.core.cache import cache
+
+from backend import env
+from backend.components import CCApi
+from backend.db_meta.models import AppCache
+from backend.db_services.cmdb.constants import (
+    CMDB_BIZ_PAGE_LIMIT,
+    CMDB_CACHE_KEY_PREFIX,
+    CMDB_CACHE_STALE_SECONDS,
+    CMDB_CLOUD_CACHE_TIME,
+    CMDB_FULL_SYNC_INTERVAL,
+    CMDB_WATCH_EVENT_TYPES,
+    CMDBCacheResource,
+    CMDBCacheSyncMode,
+)
+from backend.dbm_init.constants import CC_APP_ABBR_ATTR
+from backend.utils.batch_request import batch_request
+from backend.utils.time import timestamp2str
+
+logger = logging.getLogger("root")
+
+
+class CMDBCacheHandler:
+    """
+    CMDB业务和云区域缓存的增量维护
+    - 存在监听游标时，通过CMDB的资源变更事件增量更新缓存
+    - 没有游标、游标失效或到达全量比对周期时，拉取全量快照与缓存比对更新
+    """
+
+    REGEX_APP_ABBR = re.compile("^[A-Za-z0-9_-]+$")
+    APP_UPDATE_FIELDS = [CC_APP_ABBR_ATTR, "bk_biz_name", "time_zone", "bk_biz_maintainer"]
+    CLOUD_CACHE_KEY = f"{CMDB_CACHE_KEY_PREFIX}:cloud_area"
+
+    @classmethod
+    def get_state(cls, resource: str) -> Dict:
+        """获取资源的同步状态：监听游标、最近同步时间和同步方式"""
+        return cache.get(f"{CMDB_CACHE_KEY_PREFIX}:{resource}:state") or {}
+
+    @classmethod
+    def _update_state(cls, resource: str, **kwargs):
+        state = {**cls.get_state(resource), **kwargs}
+        cache.set(f"{CMDB_CACHE_KEY_PREFIX}:{resource}:state", state, timeout=None)
+
+    @staticmethod
+    def format_app_abbr(app_abbr):
+        return app_abbr.lower().replace(" ", "-").replace("_", "-")
+
+    @classmethod
+    def get_app_abbr(cls, biz):
+        """
+        获取 db_app_abbr，为空则尝试从业务模型的 bk_app_abbr 同步，并会写至自定义业务属性字段: db_app_abbr
+        """
+
+        bk_app_abbr = biz.get(env.BK_APP_ABBR, "")
+        db_app_abbr = biz.get(CC_APP_ABBR_ATTR, "")
+
+        # 简单清理 bk_app_abbr 中的非法字符
+        bk_app_abbr = cls.format_app_abbr(bk_app_abbr)
+        db_app_abbr = cls.format_app_abbr(db_app_abbr)
+
+        # 目标环境中存在 bk_app_abbr，则同步过来
+        if env.BK_APP_ABBR and env.BK_APP_ABBR != CC_APP_ABBR_ATTR:
+            # db_app_abbr 为空才同步，bk_app_abbr 只在create时插入，更新后，不能随便同步回来
+            if not db_app_abbr and db_app_abbr != bk_app_abbr and cls.REGEX_APP_ABBR.match(bk_app_abbr):
+                logger.warning("bulk_update_app_cache: set [%s]'s bk_app_abbr to [%s]", biz["bk_biz_id"], bk_app_abbr)
+                CCApi.update_business(
+                    {"bk_biz_id": biz["bk_biz_id"], "data": {"db_app_abbr": bk_app_abbr}}, use_admin=True
+                )
+                db_app_abbr = bk_app_abbr
+
+        return db_app_abbr
+
+    @classmethod
+    def diff_app_cache(cls, bizs: List[Dict]) -> Tuple[int, int]:
+        """将CMDB的业务信息与AppCache比对，创建缺失的业务并更新有变化的字段，返回创建和更新的数量"""
+        biz_map = {biz["bk_biz_id"]: biz for biz in bizs}
+        exists = set(AppCache.objects.filter(bk_biz_id__in=biz_map.keys()).values_list("bk_biz_id", flat=True))
+
+        # 整理需要批量创建的app
+        new_apps = [
+            AppCache(
+                bk_biz_id=bk_biz_id,
+                bk_biz_name=cc_app["bk_biz_name"],
+                time_zone=cc_app["time_zone"],
+                bk_biz_maintainer=cc_app["bk_biz_maintainer"],
+                db_app_abbr=cls.get_app_abbr(cc_app),
+            )
+            for bk_biz_id, cc_app in biz_map.items()
+            if bk_biz_id not in exists
+        ]
+
+        # 整理需要批量更新的app
+        update_apps = []
+        for app in AppCache.objects.filter(bk_biz_id__in=exists):
+            need_update = False
+            cc_app = biz_map[app.bk_biz_id]
+            for field in cls.APP_UPDATE_FIELDS:
+                old_value = getattr(app, field)
+                new_value = cc_app.get(field, "")
+
+                # 英文名需要清洗后使用
+                if field == CC_APP_ABBR_ATTR:
+                    new_value = cls.format_app_abbr(new_value)
+                    # 清理无效则不同步
+                    new_value = new_value if cls.REGEX_APP_ABBR.match(new_value) else ""
+
+                # 不为空且不一致才更新
+                if new_value and new_value != old_value:
+                    logger.info(
+                        "bulk_update_app_cache[%s]: field=%s: %s -> %s", app.bk_biz_id, field, old_value, new_value
+                    )
+                    setattr(app, field, new_value)
+                    need_update = True
+
+            if need_update:
+                update_apps.append(app)
+
+        AppCache.objects.bulk_create(new_apps)
+        AppCache.objects.bulk_update(update_apps, fields=cls.APP_UPDATE_FIELDS)
+        return len(new_apps), len(update_apps)
+
+    @classmethod
+    def full_sync_biz(cls) -> Dict[str, int]:
+        """分页拉取全量业务，与AppCache比对更新"""
+        total = CCApi.search_business({"page": {"start": 0, "limit": 1}}).get("count", 0)
+        create_cnt, update_cnt = 0, 0
+        for start in range(0, total, CMDB_BIZ_PAGE_LIMIT):
+            bizs = CCApi.search_business({"page": {"start": start, "limit": CMDB_BIZ_PAGE_LIMIT}}).get("info", [])
+            created, updated = cls.diff_app_cache(bizs)
+            create_cnt, update_cnt = create_cnt + created, update_cnt + updated
+        return {"create": create_cnt, "update": update_cnt, "delete": 0}
+
+    @classmethod
+    def full_sync_plat(cls) -> Dict[str, int]:
+        """拉取全量云区域，与缓存比对更新"""
+        clouds = batch_request(func=CCApi.search_cloud_area, params={}, get_data=lambda x: x["info"], use_admin=True)
+        cloud_id__cloud_info = {str(cloud["bk_cloud_id"]): cloud for cloud in clouds}
+        cached_clouds = cache.get(cls.CLOUD_CACHE_KEY) or {}
+        cache.set(cls.CLOUD_CACHE_KEY, cloud_id__cloud_info, CMDB_CLOUD_CACHE_TIME)
+
+        common_ids = cloud_id__cloud_info.keys() & cached_clouds.keys()
+        return {
+            "create": len(cloud_id__cloud_info.keys() - cached_clouds.keys()),
+            "update": len([i for i in common_ids if cloud_id__cloud_info[i] != cached_clouds[i]]),
+            "delete": len(cached_clouds.keys() - cloud_id__cloud_info.keys()),
+        }
+
+    @classmethod
+    def watch_events(cls, resource: str, state: Dict) -> Tuple[List[Dict], str]:
+        """从上次的游标(或全量同步的开始时间)监听资源变更事件，返回事件和最新游标"""
+        params = {"bk_resource": resource, "bk_event_types": CMDB_WATCH_EVENT_TYPES}
+        if state.get("cursor"):
+            params["bk_cursor"] = state["cursor"]
+        else:
+            params["bk_start_from"] = state["start_from"]
+
+        resp = CCApi.resource_watch(params, use_admin=True)
+        events = resp.get("bk_events") or []
+        # 没有监听到事件时，返回的事件只携带最新的游标
+        cursor = events[-1]["bk_cursor"] if events else state.get("cursor", "")
+        return (events if resp.get("bk_watched") else []), cursor
+
+    @classmethod
+    def apply_biz_events(cls, events: List[Dict]) -> Dict[str, int]:
+        # 同一业务只保留最后一次变更，删除(归档)的业务与全量同步保持一致，不清理缓存
+        latest_bizs = OrderedDict()
+        for event in events:
+            if event["bk_event_type"] != "delete":
+                latest_bizs[event["bk_detail"]["bk_biz_id"]] = event["bk_detail"]
+        created, updated = cls.diff_app_cache(list(latest_bizs.values()))
+        return {"create": created, "update": updated, "delete": 0}
+
+    @classmethod
+    def apply_plat_events(cls, events: List[Dict]) -> Dict[str, int]:
+        cloud_id__cloud_info = cache.get(cls.CLOUD_CACHE_KEY)
+        result = {"create": 0, "update": 0, "delete": 0}
+        for event in events:
+            cloud = event["bk_detail"]
+            cloud_id = str(cloud["bk_cloud_id"])
+            if event["bk_event_type"] == "delete":
+                result["delete"] += int(cloud_id__cloud_info.pop(cloud_id, None) is not None)
+            else:
+                result["update" if cloud_id in cloud_id__cloud_info else "create"] += 1
+                cloud_id__cloud_info[cloud_id] = cloud
+        # 无论是否有变更都写回缓存，为缓存续期
+        cache.set(cls.CLOUD_CACHE_KEY, cloud_id__cloud_info, CMDB_CLOUD_CACHE_TIME)
+        return result
+
+    @classmethod
+    def sync(cls, resource: str, force: bool = False) -> Dict:
+        """
+        同步资源缓存，优先监听增量事件，必要时回退为全量比对
+        @param resource: 资源类型，参考CMDBCacheResource
+        @param force: 是否强制全量比对
+        """
+        state, now = cls.get_state(resource), time.time()
+        need_full_sync = (
+            force
+            or not (state.get("cursor") or state.get("start_from"))
+            or now - state.get("full_synced_at", 0) > CMDB_FULL_SYNC_INTERVAL
+            # 云区域缓存已过期，无法在其基础上应用增量事件
+            or (resource == CMDBCacheResource.PLAT and cache.get(cls.CLOUD_CACHE_KEY) is None)
+        )
+
+        if not need_full_sync:
+            try:
+                events, cursor = cls.watch_events(resource, state)
+                apply_events = cls.apply_biz_events if resource == CMDBCacheResource.BIZ else cls.apply_plat_events
+                result = apply_events(events)
+                cls._update_state(resource, cursor=cursor, synced_at=now, mode=CMDBCacheSyncMode.WATCH)
+                return {"mode": CMDBCacheSyncMode.WATCH, **result}
+            except Exception as err:  # pylint: disable=broad-except
+                # 游标过期或不支持事件监听，回退为全量比对
+                logger.warning("sync cmdb cache [%s] by watch failed, fallback to full sync: %s", resource, err)
+
+        # 先记录开始时间，全量比对期间发生的变更由下一次监听补齐
+        start_from = int(now)
+        full_sync = cls.full_sync_biz if resource == CMDBCacheResource.BIZ else cls.full_sync_plat
+        result = full_sync()
+        cls._update_state(
+            resource,
+            cursor="",
+            start_from=start_from,
+            synced_at=now,
+            full_synced_at=now,
+            mode=CMDBCacheSyncMode.FULL,
+        )
+        return {"mode": CMDBCacheSyncMode.FULL, **result}
+
+    @classmethod
+    def sync_all(cls, force: bool = False) -> Dict[str, Dict]:
+        results = {}
+        for resource in CMDBCacheResource.get_values():
+            try:
+                results[resource] = cls.sync(resource, force)
+            except Exception as err:  # pylint: disable=broad-except
+                logger.exception("sync cmdb cache [%s] failed: %s", resource, err)
+                results[resource] = {"error": str(err)}
+        logger.info("sync cmdb cache results: %s", results)
+        return results
+
+    @classmethod
+    def get_cloud_areas(cls, get_cache: bool = True) -> Dict[str, Dict]:
+        """获取云区域信息，缓存不存在时全量拉取并回写"""
+        cloud_id__cloud_info = cache.get(cls.CLOUD_CACHE_KEY) if get_cache else None
+        if cloud_id__cloud_info is None:
+            cls.sync(CMDBCacheResource.PLAT, force=True)
+            cloud_id__cloud_info = cache.get(cls.CLOUD_CACHE_KEY)
+        return cloud_id__cloud_info
+
+    @classmethod
+    def get_freshness(cls) -> Dict[str, Dict]:
+        """获取各资源缓存的新鲜度"""
+        freshness, now = {}, time.time()
+        for resource in CMDBCacheResource.get_values():
+            state = cls.get_state(resource)
+            synced_at = state.get("synced_at")
+            lag_seconds = int(now - synced_at) if synced_at else None
+            freshness[resource] = {
+                "mode": state.get("mode"),
+                "synced_at": timestamp2str(synced_at) if synced_at else None,
+                "full_synced_at": timestamp2str(state["full_synced_at"]) if state.get("full_synced_at") else None,
+                "lag_seconds": lag_seconds,
+                "is_stale": lag_seconds is None or lag_seconds > CMDB_CACHE_STALE_SECONDS,
+            }
+        return freshness
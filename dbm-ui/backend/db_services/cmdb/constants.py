@@ -8,6 +8,36 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from django.utils.translation import ugettext_lazy as _
+
+from blue_krill.data_types.enum import EnumField, StructuredEnum
 
 MAX_DB_MODULE_LIMIT = 63
 MAX_DB_APP_ABBR_LIMIT = 63
+
+
+class CMDBCacheResource(str, StructuredEnum):
+    """增量维护的CMDB缓存资源，取值与CMDB事件监听的资源类型一致"""
+
+    BIZ = EnumField("biz", _("业务"))
+    PLAT = EnumField("plat", _("云区域"))
+
+
+class CMDBCacheSyncMode(str, StructuredEnum):
+    """CMDB缓存的同步方式"""
+
+    WATCH = EnumField("watch", _("事件监听"))
+    FULL = EnumField("full", _("全量比对"))
+
+
+CMDB_CACHE_KEY_PREFIX = "cmdb_cache"
+# 监听的CMDB事件类型
+CMDB_WATCH_EVENT_TYPES = ["create", "update", "delete"]
+# 全量拉取业务时的分页大小
+CMDB_BIZ_PAGE_LIMIT = 1000
+# 云区域缓存时间，每次同步都会续期，同步中断后缓存过期则回退为实时查询
+CMDB_CLOUD_CACHE_TIME = 60 * 60
+# 距离上次全量比对超过该时间，则执行一次全量比对，修正可能遗漏的事件
+CMDB_FULL_SYNC_INTERVAL = 60 * 60 * 24
+# 超过该时间未同步成功，则认为缓存已不新鲜
+CMDB_CACHE_STALE_SECONDS = 60 * 10
@@ -23,6 +23,7 @@ from ...iam_app.dataclass import ResourceEnum
 from ...iam_app.dataclass.actions import ActionEnum
 from ...iam_app.handlers.permission import Permission
 from . import biz, serializers
+from .cache import CMDBCacheHandler
 
 SWAGGER_TAG = "db_services/cmdb"
 
@@ -35,6 +36,7 @@ class CMDBViewSet(viewsets.SystemViewSet):
             "list_bizs",
             "list_modules",
             "list_cc_obj_user",
+            "get_cache_freshness",
         ): []
     }
     default_permission_class = [DBManagePermission()]
@@ -99,3 +101,11 @@ class CMDBViewSet(viewsets.SystemViewSet):
     @action(methods=["GET"], detail=True)
     def list_cc_obj_user(self, request, bk_biz_id):
         return Response(biz.list_cc_obj_user(bk_biz_id))
+
+    @common_swagger_auto_schema(
+        operation_summary=_("查询CMDB缓存新鲜度"),
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["GET"], detail=False)
+    def get_cache_freshness(self, request):
+        return Response(CMDBCacheHandler.get_freshness())
@@ -44,6 +44,15 @@ class ResourceViewSet(SystemViewSet):
     list_entry_slz = serializers.ListClusterEntriesSLZ
     # 分页
     pagination_class = ResourceLimitOffsetPagination
+    # 列表和导出查询走只读从库
+    replica_actions = [
+        "list",
+        "list_instances",
+        "list_cluster_entries",
+        "list_machines",
+        "export_cluster",
+        "export_instance",
+    ]
 
     # 给集群列表数据嵌入权限字段
     list_perm_actions = []
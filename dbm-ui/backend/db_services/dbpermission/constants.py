@@ -137,6 +137,15 @@ AUTHORIZE_KEY__EXCEL_FIELD_MAP = {
 # 授权数据过期时间
 AUTHORIZE_DATA_EXPIRE_TIME = 60 * 60 * 6
 
+# 按账号查询规则的账号数量上限，超过时一次拉取业务下全部规则
+AGGREGATE_RULES_BY_USER_LIMIT = 10
+
+# 权限查询结果的层级结构：(当前层的键，下一层的键)，最后一层为match_ips
+PRIVS_FORMAT_LEVELS = {
+    "privs_for_ip": [("ip", "dbs"), ("db", "domains"), ("immute_domain", "users"), ("user", "match_ips")],
+    "privs_for_cluster": [("immute_domain", "users"), ("user", "match_ips")],
+}
+
 # excel分隔符
 EXCEL_DIVIDER = ","
 
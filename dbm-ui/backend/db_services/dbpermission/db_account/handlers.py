@@ -9,9 +9,10 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import bisect
 import logging
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from django.utils.translation import ugettext as _
 from iam.resource.utils import FancyDict
@@ -19,7 +20,13 @@ from iam.resource.utils import FancyDict
 from backend.components.mysql_priv_manager.client import DBPrivManagerApi
 from backend.core.encrypt.constants import AsymmetricCipherConfigType
 from backend.core.encrypt.handlers import AsymmetricHandler
-from backend.db_services.dbpermission.constants import DPRIV_PARAMETER_MAP, AccountType, RuleActionType
+from backend.db_services.dbpermission.constants import (
+    AGGREGATE_RULES_BY_USER_LIMIT,
+    DPRIV_PARAMETER_MAP,
+    PRIVS_FORMAT_LEVELS,
+    AccountType,
+    RuleActionType,
+)
 from backend.db_services.dbpermission.db_account.dataclass import (
     AccountMeta,
     AccountPrivMeta,
@@ -32,6 +39,7 @@ from backend.db_services.mysql.open_area.models import TendbOpenAreaConfig
 from backend.db_services.mysql.permission.exceptions import DBPermissionBaseException
 from backend.ticket.constants import TicketStatus, TicketType
 from backend.ticket.models import Ticket
+from backend.utils.batch_request import request_multi_thread
 from backend.utils.excel import ExcelHandler
 
 logger = logging.getLogger("root")
@@ -268,115 +276,95 @@ class AccountHandler(object):
 
     @classmethod
     def aggregate_user_db_rules(
-        cls, bk_biz_id: int, account_type: AccountType, rule_key: str = "priv"
+        cls, bk_biz_id: int, account_type: AccountType, rule_key: str = "priv", users: List[str] = None
     ) -> Dict[str, Dict[str, Any]]:
-        """获得user和db对应的规则对象"""
-        account_rules = DBPrivManagerApi.list_account_rules({"bk_biz_id": bk_biz_id, "cluster_type": account_type})
+        """
+        获得user和db对应的规则对象
+        @param users: 只查询指定账号的规则，账号较少时按账号查询，避免拉取业务下全部规则
+        """
+        params = {"bk_biz_id": bk_biz_id, "cluster_type": account_type}
+        if users and len(set(users)) <= AGGREGATE_RULES_BY_USER_LIMIT:
+            account_rules = request_multi_thread(
+                DBPrivManagerApi.list_account_rules,
+                params_list=[{"params": {**params, "user": user}} for user in set(users)],
+                get_data=lambda x: x["items"],
+            )
+            account_rules = [rule for rules in account_rules for rule in rules]
+        else:
+            account_rules = DBPrivManagerApi.list_account_rules(params)["items"]
+
         # 按照user，accessdb进行聚合规则
         user_db__rules = defaultdict(dict)
-        for account_rule in account_rules["items"]:
+        for account_rule in account_rules:
             account, rules = account_rule["account"], account_rule["rules"]
+            # 按账号查询可能是模糊匹配，这里只保留指定的账号
+            if users and account["user"] not in users:
+                continue
             user_db__rules[account["user"]] = {rule["dbname"]: rule[rule_key] if rule_key else rule for rule in rules}
         return user_db__rules
 
-    def paginate_match_ips(self, data, privs_format, offset, limit):
-        # 收集所有的 match_ips，保留原数据的引用
-        if privs_format == "privs_for_ip":
-            all_match_ips = [
-                (ip, dbs, domain, user, match_ip)
-                for ip in data[privs_format]
-                for dbs in ip["dbs"]
-                for domain in dbs["domains"]
-                for user in domain["users"]
-                for match_ip in user["match_ips"]
-            ]
-        elif privs_format == "privs_for_cluster":
-            all_match_ips = [
-                (cluster, user, match_ip)
-                for cluster in data[privs_format]
-                for user in cluster["users"]
-                for match_ip in user["match_ips"]
-            ]
-
-        # 获取分页的 match_ips
-        paginated_match_ips = all_match_ips[offset : offset + limit]
-
-        # 创建新的数据结构来存储分页后的结果
-        paginated_data = {privs_format: []}
-
-        if privs_format == "privs_for_ip":
-            # 用于存储已经处理过的 IP, dbs, domain 和 user 的引用
-            ip_dbs_domain_user_map = {}
-
-            for ip, dbs, domain, user, match_ip in paginated_match_ips:
-                # 查找或创建新的 IP 条目
-                if ip["ip"] not in ip_dbs_domain_user_map:
-                    new_ip = {"ip": ip["ip"], "dbs": []}
-                    paginated_data[privs_format].append(new_ip)
-                    ip_dbs_domain_user_map[ip["ip"]] = {"ip": new_ip, "dbs": {}}
-                else:
-                    new_ip = ip_dbs_domain_user_map[ip["ip"]]["ip"]
-
-                # 查找或创建新的 dbs 条目
-                dbs_map = ip_dbs_domain_user_map[ip["ip"]]["dbs"]
-                if dbs["db"] not in dbs_map:
-                    new_dbs = {"db": dbs["db"], "domains": []}
-                    new_ip["dbs"].append(new_dbs)
-                    dbs_map[dbs["db"]] = {"dbs": new_dbs, "domains": {}}
-                else:
-                    new_dbs = dbs_map[dbs["db"]]["dbs"]
-
-                # 查找或创建新的 domain 条目
-                domain_map = dbs_map[dbs["db"]]["domains"]
-                if domain["immute_domain"] not in domain_map:
-                    new_domain = {"immute_domain": domain["immute_domain"], "users": []}
-                    new_dbs["domains"].append(new_domain)
-                    domain_map[domain["immute_domain"]] = {"domains": new_domain, "users": {}}
-                else:
-                    new_domain = domain_map[domain["immute_domain"]]["domains"]
-
-                # 查找或创建新的用户条目
-                user_map = domain_map[domain["immute_domain"]]["users"]
-                if user["user"] not in user_map:
-                    new_user = {"user": user["user"], "match_ips": []}
-                    new_domain["users"].append(new_user)
-                    user_map[user["user"]] = new_user
-                else:
-                    new_user = user_map[user["user"]]
-
-                # 添加匹配的 match_ip
-                new_user["match_ips"].append(match_ip)
-
-        elif privs_format == "privs_for_cluster":
-            # 用于存储已经处理过的集群和用户的引用
-            cluster_user_map = {}
-
-            for cluster, user, match_ip in paginated_match_ips:
-                # 查找或创建新的集群条目
-                if cluster["immute_domain"] not in cluster_user_map:
-                    new_cluster = {"immute_domain": cluster["immute_domain"], "users": []}
-                    paginated_data[privs_format].append(new_cluster)
-                    cluster_user_map[cluster["immute_domain"]] = {"cluster": new_cluster, "users": {}}
-                else:
-                    new_cluster = cluster_user_map[cluster["immute_domain"]]["cluster"]
-
-                # 查找或创建新的用户条目
-                user_map = cluster_user_map[cluster["immute_domain"]]["users"]
-                if user["user"] not in user_map:
-                    new_user = {"user": user["user"], "match_ips": []}
-                    new_cluster["users"].append(new_user)
-                    user_map[user["user"]] = new_user
-                else:
-                    new_user = user_map[user["user"]]
-
-                # 添加匹配的 match_ip
-                new_user["match_ips"].append(match_ip)
-
-        # 更新原数据
-        data[privs_format] = paginated_data[privs_format]
+    @staticmethod
+    def _count_match_ips(node: Dict, levels: List[Tuple[str, str]]) -> int:
+        """统计节点下的match_ip数量，不展开明细"""
+        __, children_key = levels[0]
+        if len(levels) == 1:
+            return len(node[children_key])
+        return sum(AccountHandler._count_match_ips(child, levels[1:]) for child in node[children_key])
+
+    @classmethod
+    def build_match_ips_index(cls, data: Dict, privs_format: str) -> List[int]:
+        """
+        构建顶层条目的match_ip前缀计数索引，index[i]表示第i个顶层条目之前的match_ip数量，最后一位为总数
+        """
+        levels = PRIVS_FORMAT_LEVELS[privs_format]
+        index = [0]
+        for node in data[privs_format]:
+            index.append(index[-1] + cls._count_match_ips(node, levels))
+        return index
+
+    @classmethod
+    def _slice_match_ips(cls, node: Dict, levels: List[Tuple[str, str]], skip: int, take: int):
+        """按match_ip跳过skip个并截取take个，返回截取后的节点和剩余的skip、take"""
+        key, children_key = levels[0]
+        if len(levels) == 1:
+            match_ips = node[children_key][skip : skip + take]
+            skip = max(skip - len(node[children_key]), 0)
+            paged_node = {key: node[key], children_key: match_ips} if match_ips else None
+            return paged_node, skip, take - len(match_ips)
+
+        children = []
+        for child in node[children_key]:
+            if take <= 0:
+                break
+            paged_child, skip, take = cls._slice_match_ips(child, levels[1:], skip, take)
+            if paged_child:
+                children.append(paged_child)
+        paged_node = {key: node[key], children_key: children} if children else None
+        return paged_node, skip, take
+
+    def paginate_match_ips(self, data, privs_format, offset, limit, index: List[int] = None):
+        """
+        以match_ip为粒度分页，根据前缀计数索引定位起始的顶层条目，只构造当前页的数据
+        @param index: 顶层条目的前缀计数索引，为空时现场构建
+        """
+        levels = PRIVS_FORMAT_LEVELS[privs_format]
+        index = index or self.build_match_ips_index(data, privs_format)
+
+        # 定位包含第offset个match_ip的顶层条目，之前的条目整体跳过
+        start = max(bisect.bisect_right(index, offset) - 1, 0)
+        skip, take = offset - index[start], limit
+
+        paginated_nodes = []
+        for node in data[privs_format][start:]:
+            if take <= 0:
+                break
+            paged_node, skip, take = self._slice_match_ips(node, levels, skip, take)
+            if paged_node:
+                paginated_nodes.append(paged_node)
 
         # 返回分页数据以及总 match_ips 的数量
-        return data, len(all_match_ips)
+        data[privs_format] = paginated_nodes
+        return data, index[-1]
 
     def get_account_privs(self, priv_filter: AccountPrivMeta) -> Dict:
         """获取权限信息"""
@@ -386,13 +374,17 @@ class AccountHandler(object):
         priv_meta["format"] = priv_meta.pop("format_type")
         offset = priv_meta.pop("offset")
         limit = priv_meta.pop("limit")
-        rules_list = DBPrivManagerApi.get_priv(priv_meta)
         privs_format = "privs_for_ip" if priv_meta["format"] == "ip" else "privs_for_cluster"
+
+        # 权限会被授权、规则变更、克隆等多处修改，查询结果不做缓存，每页按前缀计数索引只构造当前页的数据
+        rules_list = DBPrivManagerApi.get_priv(priv_meta)
         if not rules_list[privs_format]:
             return {"match_ips_count": 0, "results": rules_list}
+        # 下载数据不参与分页
+        rules_list.pop("download", None)
+
         # 分页
         paginated_data, total_match_ips_count = self.paginate_match_ips(rules_list, privs_format, offset, limit)
-        paginated_data.pop("download")
         return {"match_ips_count": total_match_ips_count, "results": paginated_data}
 
     def get_download_privs(self, priv_filter: AccountPrivMeta) -> Dict:
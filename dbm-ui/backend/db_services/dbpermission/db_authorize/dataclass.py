@@ -10,6 +10,7 @@ specific language governing permissions and limitations under the License.
 """
 
 import re
+from collections import defaultdict
 from dataclasses import asdict, dataclass
 from typing import Dict, List
 
@@ -53,15 +54,36 @@ class AuthorizeMeta:
         return cls(**init_data)
 
     @classmethod
-    def from_excel_data(cls, excel_data: Dict, cluster_type: str) -> "AuthorizeMeta":
-        """从权限excel数据解析为AuthorizeMeta, 每个集群类型自己实现"""
-        return cls(
+    def from_excel_data(
+        cls, excel_data: Dict, cluster_type: str, entry_cluster_map: Dict[str, List[int]] = None
+    ) -> "AuthorizeMeta":
+        """
+        从权限excel数据解析为AuthorizeMeta, 每个集群类型自己实现
+        @param entry_cluster_map: 预先查询的域名与集群的映射，批量解析时传入，避免逐行查询集群
+        """
+        target_instances = excel_data[AuthorizeExcelHeader.TARGET_INSTANCES].split(EXCEL_DIVIDER)
+        authorize = cls(
             user=excel_data[AuthorizeExcelHeader.USER],
             access_dbs=excel_data[AuthorizeExcelHeader.ACCESS_DBS].split(EXCEL_DIVIDER),
-            target_instances=excel_data[AuthorizeExcelHeader.TARGET_INSTANCES].split(EXCEL_DIVIDER),
+            target_instances=None if entry_cluster_map is not None else target_instances,
             source_ips=ExcelAuthorizeMeta.format_ip(excel_data.get(AuthorizeExcelHeader.SOURCE_IPS)),
             cluster_type=cluster_type,
         )
+        if entry_cluster_map is not None:
+            authorize.target_instances = target_instances
+            authorize.cluster_ids = [
+                cluster_id for entry in target_instances for cluster_id in entry_cluster_map.get(entry, [])
+            ]
+        return authorize
+
+    @staticmethod
+    def get_entry_cluster_map(entries: List[str]) -> Dict[str, List[int]]:
+        """批量查询域名与集群的映射"""
+        entry_cluster_map: Dict[str, List[int]] = defaultdict(list)
+        ens = ClusterEntry.objects.filter(cluster_entry_type=ClusterEntryType.DNS, entry__in=entries)
+        for entry, cluster_id in ens.values_list("entry", "cluster_id"):
+            entry_cluster_map[entry].append(cluster_id)
+        return entry_cluster_map
 
     @classmethod
     def serializer_record_data(cls, ticket_id: int) -> List[Dict]:
@@ -8,7 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Tuple, Union
 
 from django.conf import settings
@@ -20,7 +20,12 @@ from backend import env
 from backend.components import DBPrivManagerApi
 from backend.configuration.constants import DBType
 from backend.db_meta.enums import ClusterType
-from backend.db_services.dbpermission.constants import AUTHORIZE_DATA_EXPIRE_TIME, AccountType
+from backend.db_services.dbpermission.constants import (
+    AUTHORIZE_DATA_EXPIRE_TIME,
+    EXCEL_DIVIDER,
+    AccountType,
+    AuthorizeExcelHeader,
+)
 from backend.db_services.dbpermission.db_authorize.dataclass import AuthorizeMeta, ExcelAuthorizeMeta
 from backend.utils.cache import data_cache
 from backend.utils.excel import ExcelHandler
@@ -35,6 +40,8 @@ class AuthorizeHandler(object):
     authorize_meta: AuthorizeMeta = None
     excel_authorize_meta: ExcelAuthorizeMeta = None
     account_type: AccountType = None
+    # excel前置检查是否需要逐行并发执行，检查需要请求外部接口时开启
+    PRE_CHECK_CONCURRENT: bool = False
 
     def __init__(self, bk_biz_id: int, operator: str = None):
         """
@@ -87,6 +94,17 @@ class AuthorizeHandler(object):
             "task_index": task_index,
         }
 
+    def _load_pre_check_catalog(self, authorizes: List[AuthorizeMeta], **kwargs) -> Dict:
+        """
+        一次性加载excel前置检查需要的账号和规则数据，返回值会作为_pre_check_rules的参数
+        @param authorizes: excel解析后的授权数据
+        """
+        return kwargs
+
+    def _patch_authorize_data(self, authorize: AuthorizeMeta, authorize_data: Dict, **kwargs) -> Dict:
+        """补充返回给前端的授权数据，默认与检查数据一致"""
+        return authorize_data
+
     def pre_check_excel_rules(self, excel_authorize: ExcelAuthorizeMeta, **kwargs) -> Dict:
         """
         清洗excel数据并且把清洗后的excel返回
@@ -96,37 +114,42 @@ class AuthorizeHandler(object):
         """
 
         authorize_excel_data_list = excel_authorize.authorize_excel_data
-        # 并发请求数据校验接口，这里使用并发的原因是考虑有些pre-check需要请求IO接口
-        tasks = []
-        with ThreadPoolExecutor(max_workers=min(len(authorize_excel_data_list), settings.CONCURRENT_NUMBER)) as ex:
-            for index, excel_data in enumerate(authorize_excel_data_list):
-                # 解析excel行数据，然后执行pre_check
-                authorize = self.authorize_meta.from_excel_data(excel_data, cluster_type=excel_authorize.cluster_type)
-                tasks.append(ex.submit(self.pre_check_rules, authorize=authorize, task_index=index, **kwargs))
-
-        # 整理请求结果和错误信息
-        raw_authorize_data_list: List[Union[None, AuthorizeMeta]] = [
-            None for _ in range(len(authorize_excel_data_list))
+        # 批量解析excel行数据，集群域名统一查询
+        entries = [
+            entry
+            for excel_data in authorize_excel_data_list
+            for entry in excel_data[AuthorizeExcelHeader.TARGET_INSTANCES].split(EXCEL_DIVIDER)
         ]
-        to_cache_data_list: List[Dict[str, Any]] = [{} for _ in range(len(authorize_excel_data_list))]
-        to_delete_cache_uid_list: List[str] = []
-        pre_check: bool = True
+        entry_cluster_map = self.authorize_meta.get_entry_cluster_map(entries)
+        authorizes = [
+            self.authorize_meta.from_excel_data(
+                excel_data, cluster_type=excel_authorize.cluster_type, entry_cluster_map=entry_cluster_map
+            )
+            for excel_data in authorize_excel_data_list
+        ]
+        catalog = self._load_pre_check_catalog(authorizes, **kwargs)
 
-        for future in as_completed(tasks):
-            # 获取线程执行的授权结果
-            task_result = future.result()
-            uid, index = task_result["authorize_uid"], task_result["task_index"]
+        def pre_check_row(index):
+            return self._pre_check_rules(authorizes[index], **catalog)
 
-            # 将缓存数据取出放到excel缓存数据的切片中
-            data = cache.get(uid)[0]
-            pre_check &= task_result["pre_check"]
+        # 需要请求外部接口的前置检查逐行并发执行，其余的基于一次性加载的数据在内存中逐行校验
+        if self.PRE_CHECK_CONCURRENT and authorizes:
+            with ThreadPoolExecutor(max_workers=min(len(authorizes), settings.CONCURRENT_NUMBER)) as ex:
+                results = list(ex.map(pre_check_row, range(len(authorizes))))
+        else:
+            results = [pre_check_row(index) for index in range(len(authorizes))]
 
-            to_delete_cache_uid_list.append(uid)
-            to_cache_data_list[index] = data
-            raw_authorize_data_list[index] = task_result["authorize_data"]
+        # 整理校验结果和错误信息
+        raw_authorize_data_list: List[Union[None, Dict]] = [None for _ in range(len(authorizes))]
+        to_cache_data_list: List[Dict[str, Any]] = [{} for _ in range(len(authorizes))]
+        pre_check: bool = True
+        for index, (row_pre_check, message, authorize_data) in enumerate(results):
+            authorize_data.update({"message": message, "index": index})
+            pre_check &= row_pre_check
+            to_cache_data_list[index] = authorize_data
+            raw_authorize_data_list[index] = self._patch_authorize_data(authorizes[index], authorize_data, **catalog)
 
-        # 缓存excel授权数据，删除线程中pre_check产生的缓存，并返回校验结果
-        cache.delete_many(to_delete_cache_uid_list)
+        # 缓存excel授权数据，并返回校验结果
         authorize_uid = data_cache(key=None, data=to_cache_data_list, cache_time=AUTHORIZE_DATA_EXPIRE_TIME)
         db_type = ClusterType.cluster_type_to_db_type(excel_authorize.cluster_type)
         # 下载excel的url中，mysql和tendbcluster同用一个路由
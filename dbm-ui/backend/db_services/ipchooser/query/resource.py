@@ -22,7 +22,6 @@ from backend.bk_web.constants import CACHE_1D
 from backend.components import CCApi
 from backend.components.bknodeman.client import BKNodeManApi
 from backend.utils.batch_request import batch_request
-from backend.utils.cache import func_cache_decorator
 
 from .. import constants, exceptions, types
 from ..constants import IDLE_HOST_MODULE
@@ -473,15 +472,17 @@ class ResourceQueryHelper:
         return hosts
 
     @classmethod
-    @func_cache_decorator(cache_time=60 * 60)
-    def search_cc_cloud(cls, fields=None):
+    def search_cc_cloud(cls, fields=None, get_cache=False):
         """
         查询云区域信息
+        @param fields: 返回的字段，为空则返回全部字段
+        @param get_cache: 是否读取增量维护的云区域缓存
         """
+        from backend.db_services.cmdb.cache import CMDBCacheHandler
 
-        resp = batch_request(func=CCApi.search_cloud_area, params={}, get_data=lambda x: x["info"], use_admin=True)
         cloud_id__cloud_info = {
-            str(info["bk_cloud_id"]): {f: info[f] for f in fields} if fields else info for info in resp
+            cloud_id: {f: info[f] for f in fields} if fields else info
+            for cloud_id, info in CMDBCacheHandler.get_cloud_areas(get_cache=get_cache).items()
         }
         # 命名要求 default_area ---> Direct Mode
         cloud_id__cloud_info[str(0)]["bk_cloud_name"] = _("直连区域")
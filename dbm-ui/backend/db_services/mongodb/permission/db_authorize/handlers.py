@@ -14,7 +14,7 @@ from typing import Dict, List, Tuple
 from django.utils.translation import ugettext_lazy as _
 
 from backend.components.mysql_priv_manager.client import DBPrivManagerApi
-from backend.db_services.dbpermission.constants import AccountType, AuthorizeExcelHeader
+from backend.db_services.dbpermission.constants import AccountType
 from backend.db_services.dbpermission.db_account.handlers import AccountHandler
 from backend.db_services.dbpermission.db_authorize.dataclass import AuthorizeMeta, ExcelAuthorizeMeta
 from backend.db_services.dbpermission.db_authorize.handlers import AuthorizeHandler
@@ -80,7 +80,7 @@ class MongoDBAuthorizeHandler(AuthorizeHandler):
 
     def _get_user_rules_and_password_map(self, users: List[str]):
         """提前查询权限规则表和密码表"""
-        user_db__rules = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, AccountType.MONGODB)
+        user_db__rules = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, AccountType.MONGODB, users=users)
 
         params = {"bk_biz_id": self.bk_biz_id, "users": users, "cluster_type": AccountType.MONGODB.value}
         user_password_data = DBPrivManagerApi.get_account_include_password(params)["items"]
@@ -88,19 +88,17 @@ class MongoDBAuthorizeHandler(AuthorizeHandler):
 
         return user_db__rules, user_password_map
 
-    def pre_check_excel_rules(self, excel_authorize: ExcelAuthorizeMeta, **kwargs) -> Dict:
-        users = [d[AuthorizeExcelHeader.USER] for d in excel_authorize.authorize_excel_data]
+    def _load_pre_check_catalog(self, authorizes: List[MongoDBAuthorizeMeta], **kwargs) -> Dict:
+        users = list({authorize.user for authorize in authorizes})
         # 获取授权用户相关数据，缓存成字典减少重复请求
         user_db__rules, user_password_map = self._get_user_rules_and_password_map(users)
         user_info_map = self._get_user_info_map(self.account_type, self.bk_biz_id)
-        # 获取授权检查数据
-        return super().pre_check_excel_rules(
-            excel_authorize,
-            user_db__rules=user_db__rules,
-            user_info_map=user_info_map,
-            user__password=user_password_map,
-            **kwargs
-        )
+        return {
+            "user_db__rules": user_db__rules,
+            "user_info_map": user_info_map,
+            "user_password_map": user_password_map,
+            **kwargs,
+        }
 
     def multi_user_pre_check_rules(self, authorize: MongoDBAuthorizeMeta, **kwargs):
         """多个账号的前置校验，适合mongodb的授权"""
@@ -20,6 +20,8 @@ from backend.components.bklog.handler import BKLogHandler
 from backend.db_meta.enums import ClusterType
 from backend.db_meta.enums.comm import SystemTagEnum
 from backend.db_meta.models import Cluster
+from backend.db_services.backup_catalog.constants import BackupSegmentType
+from backend.db_services.backup_catalog.handlers import BackupCatalogHandler
 from backend.db_services.mongodb.restore.constants import BACKUP_LOG_RANGE_DAYS, PitrFillType
 from backend.exceptions import AppBaseException
 from backend.ticket.constants import TicketType
@@ -37,10 +39,27 @@ class MongoDBRestoreHandler(object):
         # self.cluster = Cluster.objects.get(id=cluster_id)
 
     @staticmethod
-    def _get_log_from_bklog(collector: str, start_time: datetime, end_time: datetime, query_string="*") -> List[Dict]:
-        return BKLogHandler.query_logs(collector, start_time, end_time, query_string)
+    def _get_log_from_bklog(
+        collector: str, start_time: datetime, end_time: datetime, query_string="*", **catalog_filters
+    ) -> List[Dict]:
+        # 指定了备份目录过滤条件时优先查询本地备份目录，否则分页获取日志平台的全部日志
+        if catalog_filters:
+            result = BackupCatalogHandler.query_backup_logs(
+                collector, start_time, end_time, query_string, **catalog_filters
+            )
+        else:
+            result = BKLogHandler.query_all_logs(collector, start_time, end_time, query_string)
+
+        # 日志被截断时无法确定最近的备份，不能基于部分日志继续回档
+        if result["truncated"]:
+            raise AppBaseException(
+                _("备份日志超过查询上限被截断，请缩小回档时间范围 query_string: {} from {} to {}").format(query_string, start_time, end_time)
+            )
+        return result["logs"]
 
-    def _query_latest_log_and_index(self, rollback_time: datetime, query_string: str, time_key: str, flag: int):
+    def _query_latest_log_and_index(
+        self, rollback_time: datetime, query_string: str, time_key: str, flag: int, **catalog_filters
+    ):
         """查询距离rollback_time最近的备份记录"""
         """ end_time 要获得rollback_time后的一个incr文件，这里多查一天，就比较稳了"""
         end_time = rollback_time + timedelta(days=1)
@@ -51,6 +70,7 @@ class MongoDBRestoreHandler(object):
             start_time=start_time,
             end_time=end_time,
             query_string=query_string,
+            **catalog_filters,
         )
         if not backup_logs:
             raise AppBaseException(
@@ -77,10 +97,18 @@ class MongoDBRestoreHandler(object):
         """
         # 获取距离回档时间最近的全备日志
         query_string = f"cluster_id: {self.cluster_id} AND pitr_file_type: {PitrFillType.FULL}"
+        catalog_filters = {"cluster_id": self.cluster_id}
         if set_name is not None:
             query_string += f" AND set_name: {set_name}"
+            catalog_filters.update(set_name=set_name)
         full_backup_logs, full_latest_index = self._query_latest_log_and_index(
-            rollback_time, query_string, time_key="pitr_last_pos", flag=1
+            rollback_time,
+            query_string,
+            time_key="pitr_last_pos",
+            flag=1,
+            segment_type=BackupSegmentType.FULL,
+            raw_log__pitr_file_type=PitrFillType.FULL,
+            **catalog_filters,
         )
         latest_full_backup_log = full_backup_logs[full_latest_index]
         logger.info("latest_full_backup_log {}".format(latest_full_backup_log))
@@ -93,7 +121,13 @@ class MongoDBRestoreHandler(object):
             query_string += f" AND set_name: {set_name}"
 
         incr_backup_logs, incr_latest_index = self._query_latest_log_and_index(
-            rollback_time, query_string, time_key="pitr_last_pos", flag=0
+            rollback_time,
+            query_string,
+            time_key="pitr_last_pos",
+            flag=0,
+            segment_type=BackupSegmentType.INCR,
+            backup_id=pitr_fullname,
+            **catalog_filters,
         )
         # 找到第一个大于等于rollback_time的增量备份ai, 此时a1, a2, ..., ai为合法的增量备份
         incr_backup_logs = incr_backup_logs[: incr_latest_index + 1]
@@ -203,6 +237,8 @@ class MongoDBRestoreHandler(object):
             start_time=start_time,
             end_time=end_time,
             query_string=f"cluster_type: {cluster_type} AND cluster_id: {cluster_id_query}",
+            cluster_type=cluster_type,
+            cluster_id__in=cluster_ids,
         )
 
         # 根据集群ID聚合备份记录
@@ -18,6 +18,8 @@ from django.utils.translation import ugettext as _
 from backend.components.bklog.handler import BKLogHandler
 from backend.db_meta.enums import ClusterType, InstanceInnerRole, InstanceStatus
 from backend.db_meta.models.cluster import Cluster
+from backend.db_services.backup_catalog.constants import BackupSegmentType
+from backend.db_services.backup_catalog.handlers import BackupCatalogHandler
 from backend.db_services.mysql.fixpoint_rollback.constants import (
     BACKUP_LOG_RANGE_DAYS,
     BACKUP_LOG_ROLLBACK_TIME_RANGE_DAYS,
@@ -62,8 +64,23 @@ class FixPointRollbackHandler:
         return "-1" not in task_ids
 
     @staticmethod
-    def _get_log_from_bklog(collector: str, start_time: datetime, end_time: datetime, query_string="*") -> List[Dict]:
-        return BKLogHandler.query_logs(collector, start_time, end_time, query_string)
+    def _get_log_from_bklog(
+        collector: str, start_time: datetime, end_time: datetime, query_string="*", **catalog_filters
+    ) -> List[Dict]:
+        # 指定了备份目录过滤条件时优先查询本地备份目录，否则分页获取日志平台的全部日志
+        if catalog_filters:
+            result = BackupCatalogHandler.query_backup_logs(
+                collector, start_time, end_time, query_string, **catalog_filters
+            )
+        else:
+            result = BKLogHandler.query_all_logs(collector, start_time, end_time, query_string)
+
+        # 日志被截断时无法确定最近的备份，不能基于部分日志继续回档
+        if result["truncated"]:
+            raise AppBaseException(
+                _("备份日志超过查询上限被截断，请缩小回档时间范围 query_string: {} from {} to {}").format(query_string, start_time, end_time)
+            )
+        return result["logs"]
 
     def aggregate_tendb_dbbackup_logs(self, backup_logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -254,6 +271,8 @@ class FixPointRollbackHandler:
             start_time=start_time,
             end_time=end_time,
             query_string=f'log: "cluster_id: \\"{self.cluster.id}\\""',
+            cluster_id=self.cluster.id,
+            segment_type=BackupSegmentType.FULL,
         )
 
         if self.cluster.cluster_type == ClusterType.TenDBCluster:
@@ -273,6 +292,8 @@ class FixPointRollbackHandler:
             start_time=end_time - timedelta(days=BACKUP_LOG_RANGE_DAYS),
             end_time=end_time,
             query_string=f'log: "cluster_id: \\"{self.cluster.id}\\""',
+            cluster_id=self.cluster.id,
+            segment_type=BackupSegmentType.FULL,
         )
         backup_instance_record: Dict[str, Any] = {}
 
@@ -335,6 +356,9 @@ class FixPointRollbackHandler:
             start_time=start_time - timedelta(minutes=minute_range),
             end_time=end_time + timedelta(minutes=minute_range),
             query_string=f"host: {host_ip} AND port: {port} AND cluster_id: {self.cluster.id}",
+            cluster_id=self.cluster.id,
+            segment_type=BackupSegmentType.BINLOG,
+            instance=f"{host_ip}:{port}",
         )
 
         if not binlogs:
@@ -48,14 +48,26 @@ class MySQLAuthorizeHandler(AuthorizeHandler):
     authorize_meta: AuthorizeMeta = MySQLAuthorizeMeta
     excel_authorize_meta: ExcelAuthorizeMeta = MySQLExcelAuthorizeMeta
 
-    def pre_check_excel_rules(self, excel_authorize: ExcelAuthorizeMeta, **kwargs) -> Dict:
-        """sqlserver的excel导入授权"""
-        account_type = ClusterType.cluster_type_to_db_type(excel_authorize.cluster_type)
+    # mysql的前置检查需要请求权限服务，excel授权逐行并发执行
+    PRE_CHECK_CONCURRENT: bool = True
+
+    def _load_pre_check_catalog(self, authorizes: List[AuthorizeMeta], **kwargs) -> Dict:
+        """mysql的excel导入授权，一次性查询账号和规则数据"""
+        if not authorizes:
+            return kwargs
+        account_type = ClusterType.cluster_type_to_db_type(authorizes[0].cluster_type)
         user_info_map = self._get_user_info_map(account_type, self.bk_biz_id)
-        user_db_map = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, account_type)
-        return super().pre_check_excel_rules(
-            excel_authorize, user_info_map=user_info_map, user_db_map=user_db_map, **kwargs
-        )
+        users = [authorize.user for authorize in authorizes]
+        user_db_map = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, account_type, users=users)
+        return {"user_info_map": user_info_map, "user_db_map": user_db_map, **kwargs}
+
+    def _patch_authorize_data(
+        self, authorize: AuthorizeMeta, authorize_data: Dict, user_db_map: Dict = None, **kwargs
+    ) -> Dict:
+        # 补充授权详情，mysql的授权数据和输入的authorize保持一致
+        user, access_dbs = authorize.user, authorize.access_dbs
+        privileges = [{"user": user, "access_db": db, "priv": user_db_map[user][db]} for db in access_dbs]
+        return {"account_id": authorize_data["account_id"], "privileges": privileges, **authorize.to_dict()}
 
     def pre_check_rules(self, authorize: AuthorizeMeta, task_index: int = None, **kwargs) -> Dict:
         # 如果没有user_info_map，则请求一次。
@@ -64,15 +76,14 @@ class MySQLAuthorizeHandler(AuthorizeHandler):
         if not kwargs.get("user_info_map"):
             kwargs["user_info_map"] = super()._get_user_info_map(account_type, self.bk_biz_id)
         if not kwargs.get("user_db_map"):
-            kwargs["user_db_map"] = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, account_type)
+            kwargs["user_db_map"] = AccountHandler.aggregate_user_db_rules(
+                self.bk_biz_id, account_type, users=[authorize.user]
+            )
 
         pre_check_data = super().pre_check_rules(authorize, task_index, **kwargs)
-        account_id = pre_check_data["authorize_data"]["account_id"]
-        # 补充授权详情
-        user, access_dbs, user_db_map = authorize.user, authorize.access_dbs, kwargs["user_db_map"]
-        privileges = [{"user": user, "access_db": db, "priv": user_db_map[user][db]} for db in access_dbs]
-        # mysql的授权数据和输入的authorize保持一致
-        pre_check_data["authorize_data"] = {"account_id": account_id, "privileges": privileges, **authorize.to_dict()}
+        pre_check_data["authorize_data"] = self._patch_authorize_data(
+            authorize, pre_check_data["authorize_data"], **kwargs
+        )
         return pre_check_data
 
     def _pre_check_rules(
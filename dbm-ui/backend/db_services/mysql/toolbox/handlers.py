@@ -8,26 +8,23 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-import re
+from collections import defaultdict
+from typing import Dict, List, Tuple
 
-from backend.configuration.constants import MYSQL8_VER_PARSE_NUM, DBType
+from django.utils.translation import ugettext as _
+
+from backend.components.db_remote_service.client import DRSApi
+from backend.constants import IP_PORT_DIVIDER
 from backend.db_meta.enums import InstanceRole
-from backend.db_meta.models import Cluster, StorageInstance
-from backend.db_package.models import Package
-from backend.flow.consts import MediumEnum
-from backend.flow.utils.mysql.mysql_version_parse import (
-    get_online_mysql_version,
-    major_version_parse,
-    tmysql_version_parse,
-)
+from backend.db_meta.models import StorageInstance
+from backend.db_services.mysql.remote_service.exceptions import RemoteServiceBaseException
+from backend.db_services.mysql.toolbox.version_index import MySQLPackageVersionIndex
+from backend.utils.batch_request import request_multi_thread
 
 
 class ToolboxHandler:
     """mysql工具箱查询接口封装"""
 
-    def __init__(self):
-        self.available_pkg_list = []
-
     #  select version()
     #  tmysql:  select version();==> 5.7.20-tmysql-3.4.2-log
     #  社区版本 mysql:> select version(); 8.0.32
@@ -37,131 +34,99 @@ class ToolboxHandler:
     # txsql pkg name: mysql-txsql-8.0.30-20230701-linux-x86_64.tar.gz
     # 社区版本 pkg name: mysql-8.0.32-linux-glibc2.12-x86_64.tar.xz
 
-    def query_higher_version_pkg_list(self, cluster_id: int, higher_major_version: bool, higher_all_version: bool):
-        cluster = Cluster.objects.filter(id=cluster_id).get()
-        instance = StorageInstance.objects.filter(
-            cluster=cluster,
-            instance_role__in=[InstanceRole.ORPHAN, InstanceRole.BACKEND_MASTER],
-        ).first()
-
-        all_pkg_list = Package.objects.filter(pkg_type=MediumEnum.MySQL, db_type=DBType.MySQL, enable=True).all()
-        refer_version = get_online_mysql_version(
-            ip=instance.machine.ip, port=instance.port, bk_cloud_id=cluster.bk_cloud_id
-        )
-
-        tmysql_re_pattern = r"tmysql-([\d]+).?([\d]+)?.?([\d]+)?"
-        txsql_re_pattern = r"([\d]+).?([\d]+)?.?([\d]+)?-txsql"
-        pkgname_txsql_re_pattern = r"txsql-([\d]+).?([\d]+)?.?([\d]+)?"
-        # 参考的集群是tmysql的介质
-        major_version_num, sub_version_num = major_version_parse(refer_version)
-        tmysql_sub_version_num = 0
-        refer_pkg_type = "mysql"
-
-        if re.search(tmysql_re_pattern, refer_version):
-            tmysql_sub_version_num = tmysql_version_parse(refer_version)
-            refer_pkg_type = "tmysql"
-        elif re.search(txsql_re_pattern, refer_version):
-            refer_pkg_type = "txsql"
-
-        for pkg in all_pkg_list:
-            pkg_major_vesion_num, pkg_sub_version_num = major_version_parse(pkg.name)
-            pkg_major_vesion_num = convert_mysql8_version_num(pkg_major_vesion_num)
-            if refer_pkg_type == "tmysql":
-                # tmysql 可用用mysql 官方社区版本的介质
-                if re.search(tmysql_re_pattern, pkg.name) or (not re.search(pkgname_txsql_re_pattern, pkg.name)):
-                    # higger_major_version：需要更高的主版本，无需比较子版本
-                    if higher_major_version:
-                        self.filter_available_packages(
-                            pkg,
-                            higher_major_version,
-                            higher_all_version,
-                            major_version_num,
-                            pkg_major_vesion_num,
-                            sub_version_num,
-                            pkg_sub_version_num,
-                        )
-                        continue
-                    else:
-                        if pkg_major_vesion_num == major_version_num:
-                            tmysql_pkg_sub_version_num = tmysql_version_parse(pkg.name)
-                            if tmysql_pkg_sub_version_num > tmysql_sub_version_num:
-                                self.available_pkg_list.append(pkg)
-                            if pkg_sub_version_num > sub_version_num:
-                                self.available_pkg_list.append(pkg)
-
-            elif refer_pkg_type == "txsql":
-                if re.search(pkgname_txsql_re_pattern, pkg.name):
-                    self.filter_available_packages(
-                        pkg,
-                        higher_major_version,
-                        higher_all_version,
-                        major_version_num,
-                        pkg_major_vesion_num,
-                        sub_version_num,
-                        pkg_sub_version_num,
-                    )
-
-            # 统一当做社区版本来处理
-            else:
-                if (not re.search(pkgname_txsql_re_pattern, pkg.name)) and (re.search(tmysql_re_pattern, pkg.name)):
-                    self.filter_available_packages(
-                        pkg,
-                        higher_major_version,
-                        higher_all_version,
-                        major_version_num,
-                        pkg_major_vesion_num,
-                        sub_version_num,
-                        pkg_sub_version_num,
-                    )
-
-        return [
+    @staticmethod
+    def batch_get_online_mysql_version(cluster_ids: List[int]) -> Tuple[Dict[int, str], Dict[int, str]]:
+        """
+        批量在线获取集群的mysql版本，同一云区域的实例合并为一次DRS查询，不同云区域并发查询
+        返回 (集群版本映射, 查询失败的集群错误信息映射)，单个集群或云区域查询失败不影响其他集群
+        """
+        instances = StorageInstance.objects.filter(
+            cluster__in=cluster_ids, instance_role__in=[InstanceRole.ORPHAN, InstanceRole.BACKEND_MASTER]
+        ).values("cluster__id", "cluster__bk_cloud_id", "machine__ip", "port")
+
+        # 每个集群只取一个实例查询版本
+        cloud__address_cluster_id_map: Dict[int, Dict[str, int]] = defaultdict(dict)
+        queried_cluster_ids = set()
+        for inst in instances:
+            if inst["cluster__id"] in queried_cluster_ids:
+                continue
+            queried_cluster_ids.add(inst["cluster__id"])
+            address = f"{inst['machine__ip']}{IP_PORT_DIVIDER}{inst['port']}"
+            cloud__address_cluster_id_map[inst["cluster__bk_cloud_id"]][address] = inst["cluster__id"]
+
+        cluster_id__error: Dict[int, str] = {
+            cluster_id: _("集群不存在或没有可查询版本的实例") for cluster_id in cluster_ids if cluster_id not in queried_cluster_ids
+        }
+
+        def rpc(params):
+            # 单个云区域的DRS请求异常时，记录错误并继续处理其他云区域
+            try:
+                return DRSApi.rpc(params), ""
+            except Exception as e:  # pylint: disable=broad-except
+                return [], str(e)
+
+        params_list = [
             {
-                "version": item.version,
-                "pkg_name": item.name,
-                "pkg_id": item.id,
+                "params": {
+                    "bk_cloud_id": bk_cloud_id,
+                    "addresses": list(address_cluster_id_map.keys()),
+                    "cmds": ["select @@version as version"],
+                    "force": False,
+                }
             }
-            for item in self.available_pkg_list
+            for bk_cloud_id, address_cluster_id_map in cloud__address_cluster_id_map.items()
         ]
+        cloud_rpc_results = request_multi_thread(
+            rpc, params_list, get_data=lambda x: (x[0]["params"]["bk_cloud_id"], *x[1]), in_order=True
+        )
 
-    def filter_available_packages(
-        self,
-        pkg: Package,
-        higher_major_version: bool,
-        higher_all_version: bool,
-        refer_version_num: int,
-        current_version_num: int,
-        refer_sub_version_num: int,
-        current_sub_version_num: int,
-    ):
+        cluster_id__version: Dict[int, str] = {}
+        for bk_cloud_id, rpc_results, request_error in cloud_rpc_results:
+            address_cluster_id_map = cloud__address_cluster_id_map[bk_cloud_id]
+            for rpc_result in rpc_results:
+                cluster_id = address_cluster_id_map.get(rpc_result["address"])
+                if cluster_id is None:
+                    continue
+                if rpc_result["error_msg"]:
+                    cluster_id__error[cluster_id] = _("DRS调用失败，错误信息: {}").format(rpc_result["error_msg"])
+                    continue
+                cluster_id__version[cluster_id] = rpc_result["cmd_results"][0]["table_data"][0].get("version")
+            # DRS没有返回结果的实例同样视为查询失败
+            for cluster_id in address_cluster_id_map.values():
+                if cluster_id not in cluster_id__version and cluster_id not in cluster_id__error:
+                    cluster_id__error[cluster_id] = _("DRS调用失败，错误信息: {}").format(request_error or _("无返回结果"))
+        return cluster_id__version, cluster_id__error
+
+    def batch_query_higher_version_pkg_list(
+        self, cluster_ids: List[int], higher_major_version: bool, higher_all_version: bool
+    ) -> Dict[str, List[Dict]]:
         """
-        根据包类型、版本号和是否要求更高主版本来过滤包列表
+        批量查询集群可用的升级包，按照集群当前版本分组，同一版本只计算一次
+        查询版本失败的集群在failed_clusters中返回错误信息
         """
-        if higher_major_version and just_cross_one_major_version(current_version_num, refer_version_num):
-            self.available_pkg_list.append(pkg)
-        else:
-            if (
-                (not higher_major_version)
-                and (current_version_num == refer_version_num)
-                and (current_sub_version_num > refer_sub_version_num)
-            ):
-                self.available_pkg_list.append(pkg)
-        # higher_all_version 表示需要获取大小版本都可以使用的包
-        if (
-            higher_all_version
-            and (current_version_num == refer_version_num)
-            and (current_sub_version_num > refer_sub_version_num)
-        ):
-            self.available_pkg_list.append(pkg)
-
-
-def convert_mysql8_version_num(major_version: int) -> int:
-    # MySQL的发行版本号并不连续 MySQL 5.5 5.6 5.7 8.0
-    # 为了方便比较将8.0 装换成 parse 之后的5.8的版本号来做比较
-    if major_version >= MYSQL8_VER_PARSE_NUM:
-        return 5008 * 1000 + major_version % 1000
-    return major_version
-
+        cluster_id__version, cluster_id__error = self.batch_get_online_mysql_version(cluster_ids)
+        version__cluster_ids: Dict[str, List[int]] = defaultdict(list)
+        for cluster_id in cluster_ids:
+            if cluster_id in cluster_id__version:
+                version__cluster_ids[cluster_id__version[cluster_id]].append(cluster_id)
+
+        # 介质版本索引只构建一次
+        pkg_version_index = MySQLPackageVersionIndex()
+        version_groups = [
+            {
+                "version": version,
+                "cluster_ids": version_cluster_ids,
+                "pkg_list": pkg_version_index.get_upgrade_targets(version, higher_major_version, higher_all_version),
+            }
+            for version, version_cluster_ids in version__cluster_ids.items()
+        ]
+        failed_clusters = [
+            {"cluster_id": cluster_id, "message": message} for cluster_id, message in cluster_id__error.items()
+        ]
+        return {"version_groups": version_groups, "failed_clusters": failed_clusters}
 
-def just_cross_one_major_version(current_version_num, refer_version_num) -> bool:
-    print(current_version_num // 1000 - refer_version_num // 1000)
-    return (current_version_num // 1000 - refer_version_num // 1000) == 1
+    def query_higher_version_pkg_list(self, cluster_id: int, higher_major_version: bool, higher_all_version: bool):
+        result = self.batch_query_higher_version_pkg_list([cluster_id], higher_major_version, higher_all_version)
+        if result["failed_clusters"]:
+            raise RemoteServiceBaseException(result["failed_clusters"][0]["message"])
+        return result["version_groups"][0]["pkg_list"]
@@ -26,6 +26,15 @@ class QueryPkgListByCompareVersionSerializer(serializers.Serializer):
         swagger_schema_fields = {"cluster_id": 123, "higher_major_version": False, "higher_all_version": False}
 
 
+class BatchQueryPkgListByCompareVersionSerializer(serializers.Serializer):
+    cluster_ids = serializers.ListField(help_text=_("集群ID列表"), child=serializers.IntegerField(), min_length=1)
+    higher_major_version = serializers.BooleanField(default=False)
+    higher_all_version = serializers.BooleanField(default=False)
+
+    class Meta:
+        swagger_schema_fields = {"cluster_ids": [123], "higher_major_version": False, "higher_all_version": False}
+
+
 class TendbhaTransferToOtherBizSerializer(serializers.Serializer):
     bk_biz_id = serializers.IntegerField(help_text=_("源业务ID"))
     target_biz_id = serializers.IntegerField(help_text=_("目标业务ID"))
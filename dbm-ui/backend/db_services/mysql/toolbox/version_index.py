@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple
+
+from backend.configuration.constants import MYSQL8_VER_PARSE_NUM, DBType
+from backend.db_package.models import Package
+from backend.flow.consts import MediumEnum
+from backend.flow.utils.mysql.mysql_version_parse import major_version_parse, tmysql_version_parse
+
+TMYSQL_RE = re.compile(r"tmysql-([\d]+).?([\d]+)?.?([\d]+)?")
+# 在线版本中的txsql标识，如 8.0.30-txsql
+TXSQL_VERSION_RE = re.compile(r"([\d]+).?([\d]+)?.?([\d]+)?-txsql")
+# 介质包名中的txsql标识，如 mysql-txsql-8.0.30-20230701-linux-x86_64.tar.gz
+TXSQL_PKG_NAME_RE = re.compile(r"txsql-([\d]+).?([\d]+)?.?([\d]+)?")
+
+PKG_TYPE_TMYSQL = "tmysql"
+PKG_TYPE_TXSQL = "txsql"
+PKG_TYPE_MYSQL = "mysql"
+
+# 各类型的集群可以使用的介质类型
+# - tmysql 可以使用 tmysql 和 mysql 官方社区版本的介质
+# - txsql 只能使用 txsql 的介质
+# - 社区版本统一使用 tmysql 的介质
+REFER_PKG_TYPE__CANDIDATE_PKG_TYPES = {
+    PKG_TYPE_TMYSQL: {PKG_TYPE_TMYSQL, PKG_TYPE_MYSQL},
+    PKG_TYPE_TXSQL: {PKG_TYPE_TXSQL},
+    PKG_TYPE_MYSQL: {PKG_TYPE_TMYSQL},
+}
+
+
+class MySQLVersion(NamedTuple):
+    """预解析的可比较版本"""
+
+    pkg_type: str
+    # 主版本号，8.0 已转换为 5.8 的版本号，保证主版本连续可比较
+    major: int
+    sub: int
+    tmysql_sub: int
+
+
+def convert_mysql8_version_num(major_version: int) -> int:
+    # MySQL的发行版本号并不连续 MySQL 5.5 5.6 5.7 8.0
+    # 为了方便比较将8.0 装换成 parse 之后的5.8的版本号来做比较
+    if major_version >= MYSQL8_VER_PARSE_NUM:
+        return 5008 * 1000 + major_version % 1000
+    return major_version
+
+
+def just_cross_one_major_version(current_version_num, refer_version_num) -> bool:
+    return (current_version_num // 1000 - refer_version_num // 1000) == 1
+
+
+@lru_cache(maxsize=4096)
+def parse_mysql_version(version: str, is_pkg_name: bool = False) -> MySQLVersion:
+    """
+    将在线版本(select version())或介质包名解析为可比较的版本
+    @param version: 在线版本或介质包名
+    @param is_pkg_name: 是否为介质包名，两者的txsql标识格式不同
+    """
+    major, sub = major_version_parse(version) or (0, "")
+    if TMYSQL_RE.search(version):
+        pkg_type = PKG_TYPE_TMYSQL
+    elif (TXSQL_PKG_NAME_RE if is_pkg_name else TXSQL_VERSION_RE).search(version):
+        pkg_type = PKG_TYPE_TXSQL
+    else:
+        pkg_type = PKG_TYPE_MYSQL
+    return MySQLVersion(pkg_type, convert_mysql8_version_num(major), int(sub or 0), tmysql_version_parse(version))
+
+
+class MySQLPackageVersionIndex:
+    """
+    MySQL介质包的版本索引：介质包版本只解析一次，并按主版本分组，
+    计算可升级版本时只需要扫描当前主版本和高一个主版本的介质
+    """
+
+    def __init__(self, packages: Iterable[Dict] = None):
+        if packages is None:
+            packages = Package.objects.filter(pkg_type=MediumEnum.MySQL, db_type=DBType.MySQL, enable=True).values(
+                "id", "name", "version"
+            )
+        # 保留介质原有的顺序，用于结果排序
+        self.major__entries: Dict[int, List] = defaultdict(list)
+        for order, pkg in enumerate(packages):
+            version = parse_mysql_version(pkg["name"], is_pkg_name=True)
+            self.major__entries[version.major].append((order, version, pkg))
+
+    @staticmethod
+    def is_upgrade_target(
+        refer: MySQLVersion, version: MySQLVersion, higher_major_version: bool, higher_all_version: bool
+    ) -> bool:
+        """判断介质版本是否为参考版本的可升级版本"""
+        same_major = version.major == refer.major
+        # tmysql 同主版本升级：tmysql 版本或子版本更高即可
+        if refer.pkg_type == PKG_TYPE_TMYSQL and not higher_major_version:
+            return same_major and (version.tmysql_sub > refer.tmysql_sub or version.sub > refer.sub)
+
+        # higher_major_version：需要更高的主版本，无需比较子版本
+        if higher_major_version and just_cross_one_major_version(version.major, refer.major):
+            return True
+        # higher_all_version 表示需要获取大小版本都可以使用的包
+        higher_sub_version = same_major and version.sub > refer.sub
+        return higher_sub_version and (not higher_major_version or higher_all_version)
+
+    def get_upgrade_targets(
+        self, refer_version: str, higher_major_version: bool, higher_all_version: bool
+    ) -> List[Dict]:
+        """获取在线版本可以升级的介质列表"""
+        refer = parse_mysql_version(refer_version)
+        candidate_pkg_types = REFER_PKG_TYPE__CANDIDATE_PKG_TYPES[refer.pkg_type]
+        # 可升级的介质只可能是当前主版本或者高一个主版本
+        targets = [
+            (order, pkg)
+            for major in (refer.major, refer.major + 1000)
+            for order, version, pkg in self.major__entries.get(major, [])
+            if version.pkg_type in candidate_pkg_types
+            and self.is_upgrade_target(refer, version, higher_major_version, higher_all_version)
+        ]
+        return [
+            {"version": pkg["version"], "pkg_name": pkg["name"], "pkg_id": pkg["id"]} for __, pkg in sorted(targets)
+        ]
@@ -24,6 +24,7 @@ from backend.db_meta.enums import ClusterEntryRole, ClusterEntryType, ClusterTyp
 from backend.db_meta.models import Cluster, ClusterEntry, DBModule
 from backend.db_services.mysql.toolbox.handlers import ToolboxHandler
 from backend.db_services.mysql.toolbox.serializers import (
+    BatchQueryPkgListByCompareVersionSerializer,
     QueryPkgListByCompareVersionSerializer,
     TendbhaAddSlaveDomainSerializer,
     TendbhaTransferToOtherBizSerializer,
@@ -60,6 +61,20 @@ class ToolboxViewSet(viewsets.SystemViewSet):
             ToolboxHandler().query_higher_version_pkg_list(cluster_id, higher_major_version, higher_all_version)
         )
 
+    @common_swagger_auto_schema(
+        operation_summary=_("批量查询 MySQL 可以用的升级包(按集群当前版本分组)"),
+        request_body=BatchQueryPkgListByCompareVersionSerializer(),
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["POST"], detail=False, serializer_class=BatchQueryPkgListByCompareVersionSerializer)
+    def batch_query_higher_version_pkg_list(self, request, **kwargs):
+        data = self.params_validate(self.get_serializer_class())
+        return Response(
+            ToolboxHandler().batch_query_higher_version_pkg_list(
+                data["cluster_ids"], data["higher_major_version"], data["higher_all_version"]
+            )
+        )
+
 
 class TendbHaSlaveInstanceAddDomainSet(viewsets.SystemViewSet):
     """
@@ -7,6 +7,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import re
 
 from django.utils.translation import ugettext_lazy as _
 
@@ -16,6 +17,9 @@ SWAGGER_TAG = _("分区管理")
 
 PARTITION_NO_EXECUTE_CODE = 51029  # 分区执行无需发起
 
+# 分区校验允许的库表名字符集(支持%/?/*通配)，拼接SQL前的兜底校验
+PARTITION_DB_TABLE_PATTERN = re.compile(r"^[-_a-zA-Z0-9*?%]{1,64}$")
+
 # 查询唯一索引的SQL语句
 QUERY_UNIQUE_FIELDS_SQL = (
     "select distinct table_schema, table_name, index_name, "
@@ -8,7 +8,7 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 from collections import defaultdict
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
 
 from django.forms import model_to_dict
 from django.utils.translation import ugettext as _
@@ -18,7 +18,11 @@ from backend.components.mysql_partition.client import DBPartitionApi
 from backend.db_meta.api.cluster.base.handler import ClusterHandler
 from backend.db_meta.enums import ClusterType
 from backend.db_meta.models import Cluster
-from backend.db_services.partition.constants import QUERY_DATABASE_FIELD_TYPE, QUERY_UNIQUE_FIELDS_SQL
+from backend.db_services.partition.constants import (
+    PARTITION_DB_TABLE_PATTERN,
+    QUERY_DATABASE_FIELD_TYPE,
+    QUERY_UNIQUE_FIELDS_SQL,
+)
 from backend.db_services.partition.exceptions import (
     DBPartitionCreateException,
     DBPartitionInternalServerError,
@@ -28,6 +32,7 @@ from backend.exceptions import ApiRequestError, ApiResultError
 from backend.ticket.constants import TicketType
 from backend.ticket.models import Ticket
 from backend.utils.batch_request import request_multi_thread
+from backend.utils.string import quote_sql_literal
 
 
 class PartitionHandler(object):
@@ -102,7 +107,7 @@ class PartitionHandler(object):
         if not create_data["auto_commit"]:
             return config__id_result
 
-        # 创建分区初始化单据(可能创建多个单据，一个单据对应一个分区策略)
+        # 创建分区初始化单据(该集群的分区策略合并到一个单据执行)
         ticket_list = cls.execute_partition(user, create_data["cluster_id"], config__id_result)
         return ticket_list
 
@@ -114,41 +119,161 @@ class PartitionHandler(object):
         @param cluster_id: 集群ID
         @param partition_objects: 分区执行数据
         """
-        # 获取分区单据的类型
-        cluster = Cluster.objects.get(id=cluster_id)
-        if cluster.cluster_type == ClusterType.TenDBCluster:
-            partition_ticket_type = TicketType.TENDBCLUSTER_PARTITION
-        else:
-            partition_ticket_type = TicketType.MYSQL_PARTITION
-
-        # 构造分区策略单据数据列表
-        partition_data_list: List[Dict] = [
-            {
-                "config_id": config_id,
-                "cluster_id": cluster_id,
-                "bk_cloud_id": cluster.bk_cloud_id,
-                "immute_domain": cluster.immute_domain,
-                "partition_objects": partition_object,
-            }
-            for config_id, partition_object in partition_objects.items()
-        ]
+        partitions = [{"cluster_id": cluster_id, "partition_objects": partition_objects}]
+        return cls.batch_execute_partition(user, partitions)
 
-        # 循环执行分区单据，这里一个分区策略对应一个单据
+    @classmethod
+    def batch_execute_partition(cls, user: str, partitions: List[Dict[str, Any]]):
+        """
+        批量执行分区策略，同业务同类型的分区策略合并到一个单据，由单据流程有限并发执行
+        @param user: 创建者
+        @param partitions: 分区执行数据列表，格式为[{"cluster_id": 1, "partition_objects": {config_id: [...]}}]
+        """
+        # 一次性查询涉及的集群，避免每个分区策略重复查询
+        cluster_ids = {partition["cluster_id"] for partition in partitions}
+        clusters = Cluster.objects.filter(id__in=cluster_ids).in_bulk()
+        if len(clusters) != len(cluster_ids):
+            missing_cluster_ids = cluster_ids - set(clusters.keys())
+            raise DBPartitionInternalServerError(_("集群{}不存在，无法执行分区").format(missing_cluster_ids))
+
+        # 按照(业务, 分区单据类型)聚合分区策略单据数据
+        biz_type__partition_infos: Dict[Tuple[int, str], List[Dict]] = defaultdict(list)
+        for partition in partitions:
+            cluster = clusters[partition["cluster_id"]]
+            if cluster.cluster_type == ClusterType.TenDBCluster:
+                partition_ticket_type = TicketType.TENDBCLUSTER_PARTITION
+            else:
+                partition_ticket_type = TicketType.MYSQL_PARTITION
+
+            biz_type__partition_infos[(cluster.bk_biz_id, partition_ticket_type)].extend(
+                [
+                    {
+                        "config_id": config_id,
+                        "cluster_id": cluster.id,
+                        "bk_cloud_id": cluster.bk_cloud_id,
+                        "immute_domain": cluster.immute_domain,
+                        "partition_objects": partition_object,
+                    }
+                    for config_id, partition_object in partition["partition_objects"].items()
+                ]
+            )
+
+        # 一个单据对应同业务同类型的多个分区策略，执行结果按照分区策略回写
         ticket_list: List[Dict] = []
-        for partition_data in partition_data_list:
-            # 创建分区单据
+        for (bk_biz_id, partition_ticket_type), partition_infos in biz_type__partition_infos.items():
             ticket = Ticket.create_ticket(
                 ticket_type=partition_ticket_type,
                 creator=user,
-                bk_biz_id=cluster.bk_biz_id,
+                bk_biz_id=bk_biz_id,
                 remark=_("分区单据执行"),
-                details={"infos": [partition_data]},
+                details={"infos": partition_infos},
                 auto_execute=True,
             )
-            ticket_list.append(model_to_dict(ticket))
+            ticket_list.append(
+                {**model_to_dict(ticket), "config_ids": [info["config_id"] for info in partition_infos]}
+            )
 
         return ticket_list
 
+    @staticmethod
+    def _build_table_filter(dblikes: List[str], tblikes: List[str]) -> Dict[str, str]:
+        """
+        构造information_schema的库表过滤条件。DRS不支持参数绑定，库表名需校验字符集并转义为SQL字面量
+        @param dblikes: 校验库名列表
+        @param tblikes: 校验表名列表
+        """
+        if not dblikes or not tblikes:
+            raise DBPartitionInvalidFieldException(_("校验的库表列表不能为空"))
+
+        for name in [*dblikes, *tblikes]:
+            if not PARTITION_DB_TABLE_PATTERN.match(name):
+                raise DBPartitionInvalidFieldException(_("库表名【{}】包含非法字符").format(name))
+
+        table_sts = "table_name in ({})".format(", ".join([quote_sql_literal(table) for table in tblikes]))
+        db_sts = " or ".join([f"table_schema like {quote_sql_literal(db)}" for db in dblikes])
+        return {"table_sts": f"({table_sts})", "db_sts": f"({db_sts})"}
+
+    @staticmethod
+    def _query_partition_field_info(bk_cloud_id: int, addresses: List[str], table_filter: Dict[str, str]):
+        """
+        批量查询实例的库表唯一索引和字段类型信息
+        @param bk_cloud_id: 云区域ID
+        @param addresses: 实例地址列表
+        @param table_filter: 库表过滤条件
+        """
+        unique_fields_sql = QUERY_UNIQUE_FIELDS_SQL.format(**table_filter)
+        fields_type_sql = QUERY_DATABASE_FIELD_TYPE.format(**table_filter)
+        try:
+            rpc_results = DRSApi.rpc(
+                {"bk_cloud_id": bk_cloud_id, "addresses": addresses, "cmds": [unique_fields_sql, fields_type_sql]}
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            # 单个云区域的DRS请求异常时，该云区域的实例都返回错误信息，不影响其他云区域的校验
+            return {address: {"error_msg": str(err)} for address in addresses}
+
+        address__field_info: Dict[str, Dict] = {}
+        for rpc_result in rpc_results:
+            if rpc_result["cmd_results"] is None:
+                address__field_info[rpc_result["address"]] = {"error_msg": rpc_result["error_msg"]}
+                continue
+
+            cmd__data = {res["cmd"]: res["table_data"] for res in rpc_result["cmd_results"]}
+            address__field_info[rpc_result["address"]] = {
+                "error_msg": "",
+                "index_data": cmd__data[unique_fields_sql],
+                "field_type_data": cmd__data[fields_type_sql],
+            }
+        return address__field_info
+
+    @staticmethod
+    def _analyze_partition_field(
+        index_data: List[Dict], field_type_data: List[Dict], partition_column: str, partition_column_type: str
+    ) -> List[Dict]:
+        """
+        逐表分析分区字段是否合理，返回每张表的校验结论
+        对字段索引的要求：
+        1. 如果存在主键，则分区字段必须是主键的一部分
+        2. 如果存在唯一键，则分区字段必须是所有唯一键的交集
+        对字段类型的要求：分区字段对应的原表字段类型相同
+        """
+        db_index_keys: Dict[str, Dict[str, Dict]] = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        for inx in index_data:
+            # DRS有些字段为大写，有些字段为小写，这里统一转为小写
+            inx = {k.lower(): v for k, v in inx.items()}
+            index_column_list = inx["column_list"].split(",")
+            if inx["index_name"] == "PRIMARY":
+                db_index_keys[inx["table_schema"]][inx["table_name"]]["primary"].extend(index_column_list)
+            else:
+                db_index_keys[inx["table_schema"]][inx["table_name"]]["unique"].append(index_column_list)
+
+        db_fields: Dict[str, Dict[str, Dict]] = defaultdict(lambda: defaultdict(dict))
+        for field in field_type_data:
+            field = {k.lower(): v for k, v in field.items()}
+            db_fields[field["table_schema"]][field["table_name"]][field["column_name"]] = field["column_type"]
+
+        table_verdicts: List[Dict] = []
+        for db, table_fields in db_fields.items():
+            for table, fields in table_fields.items():
+                index_keys = db_index_keys[db][table]
+                primary_keys, unique_keys_list = index_keys["primary"], index_keys["unique"]
+                column_type = fields.get(partition_column, "")
+                verdict = {
+                    "db": db,
+                    "table": table,
+                    "column_type": column_type,
+                    "primary_key_mismatch": bool(primary_keys) and partition_column not in primary_keys,
+                    "unique_key_mismatch": bool(unique_keys_list)
+                    and partition_column not in set(unique_keys_list[0]).intersection(*unique_keys_list[1:]),
+                    "type_mismatch": not column_type or partition_column_type not in column_type,
+                    "without_unique_key": not primary_keys and not unique_keys_list,
+                }
+                verdict["result"] = not (
+                    verdict["primary_key_mismatch"] or verdict["unique_key_mismatch"] or verdict["type_mismatch"]
+                )
+                table_verdicts.append(verdict)
+
+        return table_verdicts
+
     @classmethod
     def verify_partition_field(
         cls,
@@ -168,76 +293,97 @@ class PartitionHandler(object):
         @param partition_column: 分区字段
         @param partition_column_type: 分区字段类型
         """
-
-        def _verify_valid_index(_index_keys, _field):
-            # 不属于主键部分
-            primary_keys = _index_keys["primary"]
-            if primary_keys and not (_field in primary_keys):
-                return False
-
-            # 不属于唯一键交集
-            unique_keys_list = _index_keys["unique"]
-            if unique_keys_list and not (_field in set(unique_keys_list[0]).intersection(*unique_keys_list[1:])):
-                return False
-
-            return True
-
         # 获取集群的DRS查询地址，格式化库表过滤条件
         cluster = Cluster.objects.get(id=cluster_id)
         address = ClusterHandler.get_exact_handler(bk_biz_id=bk_biz_id, cluster_id=cluster_id).get_remote_address()
-
-        table_sts = "(" + " or ".join([f"table_name = '{table}'" for table in tblikes]) + ")"
-        db_sts = "(" + " or ".join([f"table_schema like '{db}'" for db in dblikes]) + ")"
-        unique_fields_sql = QUERY_UNIQUE_FIELDS_SQL.format(table_sts=table_sts, db_sts=db_sts)
-        fields_type_sql = QUERY_DATABASE_FIELD_TYPE.format(table_sts=table_sts, db_sts=db_sts)
+        table_filter = cls._build_table_filter(dblikes, tblikes)
 
         # 查询涉及的所有库表索引信息和字段类型信息
-        rpc_results = DRSApi.rpc(
-            {"bk_cloud_id": cluster.bk_cloud_id, "addresses": [address], "cmds": [unique_fields_sql, fields_type_sql]}
-        )
-        if rpc_results[0]["cmd_results"] is None:
-            raise DBPartitionInternalServerError(_("字段信息查询错误：{}").format(rpc_results[0]["error_msg"]))
-
-        cmd__data = {res["cmd"]: res["table_data"] for res in rpc_results[0]["cmd_results"]}
-        index_data, field_type_data = cmd__data[unique_fields_sql], cmd__data[fields_type_sql]
+        field_info = cls._query_partition_field_info(cluster.bk_cloud_id, [address], table_filter)[address]
+        if field_info["error_msg"]:
+            raise DBPartitionInternalServerError(_("字段信息查询错误：{}").format(field_info["error_msg"]))
 
         # 分区策略创建至少要保证能匹配存在的库表
-        if not field_type_data:
+        if not field_info["field_type_data"]:
             raise DBPartitionInvalidFieldException(_("【{}】【{}】当前库表模式匹配为空，请检查是否是合法库表").format(dblikes, tblikes))
 
-        # 对字段索引的要求：
-        # 1. 如果存在主键，则分区字段必须是主键的一部分
-        # 2. 如果存在唯一键，则分区字段必须是所有唯一键的交集
-        db_index_keys: Dict[str, Dict[str, Dict]] = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-        for inx in index_data:
-            # DRS有些字段为大写，有些字段为小写，这里统一转为小写
-            inx = {k.lower(): v for k, v in inx.items()}
-            index_column_list = inx["column_list"].split(",")
-            if inx["index_name"] == "PRIMARY":
-                db_index_keys[inx["table_schema"]][inx["table_name"]]["primary"].extend(index_column_list)
-            else:
-                db_index_keys[inx["table_schema"]][inx["table_name"]]["unique"].append(index_column_list)
+        table_verdicts = cls._analyze_partition_field(
+            field_info["index_data"], field_info["field_type_data"], partition_column, partition_column_type
+        )
+        for verdict in table_verdicts:
+            if verdict["primary_key_mismatch"] or verdict["unique_key_mismatch"]:
+                raise DBPartitionInvalidFieldException(
+                    _("【{}】【{}】分区字段{}不满足属于主键部分或唯一键交集的要求").format(verdict["db"], verdict["table"], partition_column)
+                )
+        for verdict in table_verdicts:
+            if verdict["type_mismatch"]:
+                raise DBPartitionInvalidFieldException(
+                    _("【{}】【{}】分区字段{}与该表对应的字段类型不匹配").format(verdict["db"], verdict["table"], partition_column)
+                )
 
-        for db, table_index_keys in db_index_keys.items():
-            for table, index_keys in table_index_keys.items():
-                if not _verify_valid_index(index_keys, partition_column):
-                    raise DBPartitionInvalidFieldException(
-                        _("【{}】【{}】分区字段{}不满足属于主键部分或唯一键交集的要求").format(db, table, partition_column)
-                    )
+        # 如果表没有主键 or 唯一键，需要提示用户分区执行会锁表
+        if not field_info["index_data"]:
+            return _("表没有主键或者唯一键，将表改造为分区表的过程中会锁表，会阻塞查询、删除、修改、添加、表结构变更等语句")
 
-        # 对字段类型的要求：分区字段对应的原表字段类型相同
-        db_fields: Dict[str, Dict[str, Dict]] = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-        for field in field_type_data:
-            field = {k.lower(): v for k, v in field.items()}
-            db_fields[field["table_schema"]][field["table_name"]][field["column_name"]] = field["column_type"]
+    @classmethod
+    def batch_verify_partition_field(
+        cls,
+        bk_biz_id: int,
+        cluster_ids: List[int],
+        dblikes: List[str],
+        tblikes: List[str],
+        partition_column: str,
+        partition_column_type: str,
+    ) -> List[Dict]:
+        """
+        批量校验多个集群的分区字段是否合理，按集群和表给出校验结论，不因单个失败而中断
+        @param bk_biz_id: 业务ID
+        @param cluster_ids: 集群ID列表
+        @param dblikes: 校验库名列表
+        @param tblikes: 校验表名列表
+        @param partition_column: 分区字段
+        @param partition_column_type: 分区字段类型
+        """
+        table_filter = cls._build_table_filter(dblikes, tblikes)
 
-        for db, table_fields in db_fields.items():
-            for table, fields in table_fields.items():
-                if partition_column not in fields or partition_column_type not in fields[partition_column]:
-                    raise DBPartitionInvalidFieldException(
-                        _("【{}】【{}】分区字段{}与该表对应的字段类型不匹配").format(db, table, partition_column)
+        # 按云区域聚合集群的DRS查询地址
+        cloud_addresses: Dict[int, List[str]] = defaultdict(list)
+        address_cluster_map: Dict[int, Dict[str, Cluster]] = defaultdict(dict)
+        for cluster_id in set(cluster_ids):
+            handler = ClusterHandler.get_exact_handler(bk_biz_id=bk_biz_id, cluster_id=cluster_id)
+            bk_cloud_id, address = handler.cluster.bk_cloud_id, handler.get_remote_address()
+            cloud_addresses[bk_cloud_id].append(address)
+            address_cluster_map[bk_cloud_id][address] = handler.cluster
+
+        # 各云区域并发查询库表索引信息和字段类型信息
+        params_list = [
+            {"bk_cloud_id": bk_cloud_id, "addresses": addresses, "table_filter": table_filter}
+            for bk_cloud_id, addresses in cloud_addresses.items()
+        ]
+        cloud_field_infos = request_multi_thread(
+            func=cls._query_partition_field_info,
+            params_list=params_list,
+            get_data=lambda x: (x[0]["bk_cloud_id"], x[1]),
+            in_order=True,
+        )
+
+        cluster_verdicts: List[Dict] = []
+        for bk_cloud_id, address__field_info in cloud_field_infos:
+            for address, cluster in address_cluster_map[bk_cloud_id].items():
+                verdict = {"cluster_id": cluster.id, "immute_domain": cluster.immute_domain, "tables": []}
+                field_info = address__field_info.get(address, {"error_msg": _("DRS未返回查询结果")})
+                if field_info["error_msg"]:
+                    verdict.update(result=False, message=_("字段信息查询错误：{}").format(field_info["error_msg"]))
+                elif not field_info["field_type_data"]:
+                    verdict.update(result=False, message=_("当前库表模式匹配为空，请检查是否是合法库表"))
+                else:
+                    tables = cls._analyze_partition_field(
+                        field_info["index_data"],
+                        field_info["field_type_data"],
+                        partition_column,
+                        partition_column_type,
                     )
+                    verdict.update(result=all([table["result"] for table in tables]), message="", tables=tables)
+                cluster_verdicts.append(verdict)
 
-        # 如果表没有主键 or 唯一键，需要提示用户分区执行会锁表
-        if not index_data:
-            return _("表没有主键或者唯一键，将表改造为分区表的过程中会锁表，会阻塞查询、删除、修改、添加、表结构变更等语句")
+        return cluster_verdicts
@@ -122,3 +122,31 @@ PARTITION_FIELD_VERIFY_DATA = {
     "message": "【kio123】【kio1】xxxxxx（8710002500）",
     "errors": None,
 }
+
+PARTITION_FIELD_BATCH_VERIFY_DATA = [
+    {
+        "cluster_id": 1,
+        "immute_domain": "tendbha.db.com",
+        "result": False,
+        "message": "",
+        "tables": [
+            {
+                "db": "kio123",
+                "table": "kio1",
+                "column_type": "varchar(32)",
+                "primary_key_mismatch": False,
+                "unique_key_mismatch": False,
+                "type_mismatch": True,
+                "without_unique_key": False,
+                "result": False,
+            }
+        ],
+    },
+    {
+        "cluster_id": 2,
+        "immute_domain": "tendbha2.db.com",
+        "result": False,
+        "message": "字段信息查询错误：connect timeout",
+        "tables": [],
+    },
+]
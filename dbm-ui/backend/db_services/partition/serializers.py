@@ -151,6 +151,19 @@ class PartitionRunSerializer(serializers.Serializer):
     )
 
 
+class PartitionBatchRunSerializer(serializers.Serializer):
+    partitions = serializers.ListField(help_text=_("分区执行数据列表"), child=PartitionRunSerializer(), min_length=1)
+
+    def validate(self, attrs):
+        # 批量执行的集群需属于同一种DB类型，以便统一鉴权
+        cluster_ids = {partition["cluster_id"] for partition in attrs["partitions"]}
+        cluster_types = set(Cluster.objects.filter(id__in=cluster_ids).values_list("cluster_type", flat=True))
+        db_types = {ClusterType.cluster_type_to_db_type(cluster_type) for cluster_type in cluster_types}
+        if len(db_types) > 1:
+            raise serializers.ValidationError(_("批量执行分区的集群需属于同一种DB类型"))
+        return attrs
+
+
 class PartitionColumnVerifySerializer(serializers.Serializer):
     cluster_id = serializers.IntegerField(help_text=_("云区域ID"))
     dblikes = serializers.ListField(help_text=_("匹配库列表(支持通配)"), child=DBTableField(db_field=True))
@@ -165,3 +178,17 @@ class PartitionColumnVerifySerializer(serializers.Serializer):
 class PartitionColumnVerifyResponseSerializer(serializers.Serializer):
     class Meta:
         swagger_schema_fields = {"example": mock.PARTITION_FIELD_VERIFY_DATA}
+
+
+class PartitionColumnBatchVerifySerializer(serializers.Serializer):
+    bk_biz_id = serializers.IntegerField(help_text=_("业务ID"))
+    cluster_ids = serializers.ListField(help_text=_("集群ID列表"), child=serializers.IntegerField(), min_length=1)
+    dblikes = serializers.ListField(help_text=_("匹配库列表(支持通配)"), child=DBTableField(db_field=True), min_length=1)
+    tblikes = serializers.ListField(help_text=_("匹配表列表(不支持通配)"), child=DBTableField(), min_length=1)
+    partition_column = serializers.CharField(help_text=_("分区字段"))
+    partition_column_type = serializers.CharField(help_text=_("分区字段类型"))
+
+
+class PartitionColumnBatchVerifyResponseSerializer(serializers.Serializer):
+    class Meta:
+        swagger_schema_fields = {"example": mock.PARTITION_FIELD_BATCH_VERIFY_DATA}
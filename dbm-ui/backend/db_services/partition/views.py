@@ -19,6 +19,9 @@ from backend.bk_web.swagger import common_swagger_auto_schema
 from backend.components.mysql_partition.client import DBPartitionApi
 from backend.db_meta.enums import ClusterType
 from backend.db_services.partition.serializers import (
+    PartitionBatchRunSerializer,
+    PartitionColumnBatchVerifyResponseSerializer,
+    PartitionColumnBatchVerifySerializer,
     PartitionColumnVerifyResponseSerializer,
     PartitionColumnVerifySerializer,
     PartitionCreateSerializer,
@@ -50,7 +53,9 @@ class DBPartitionViewSet(viewsets.AuditedModelViewSet):
 
     pagination_class = None
 
-    action_permission_map = {("list", "verify_partition_field"): [DBManagePermission()]}
+    action_permission_map = {
+        ("list", "verify_partition_field", "batch_verify_partition_field"): [DBManagePermission()]
+    }
     default_permission_class = [PartitionManagePermission()]
 
     @staticmethod
@@ -184,6 +189,16 @@ class DBPartitionViewSet(viewsets.AuditedModelViewSet):
         validated_data = self.params_validate(PartitionRunSerializer, representation=True)
         return Response(PartitionHandler.execute_partition(user=request.user.username, **validated_data))
 
+    @common_swagger_auto_schema(
+        operation_summary=_("分区策略批量执行"),
+        request_body=PartitionBatchRunSerializer(),
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["POST"], detail=False, serializer_class=PartitionBatchRunSerializer)
+    def batch_execute_partition(self, request, *args, **kwargs):
+        validated_data = self.params_validate(PartitionBatchRunSerializer, representation=True)
+        return Response(PartitionHandler.batch_execute_partition(user=request.user.username, **validated_data))
+
     @common_swagger_auto_schema(
         operation_summary=_("分区策略字段校验"),
         request_body=PartitionColumnVerifySerializer(),
@@ -196,3 +211,14 @@ class DBPartitionViewSet(viewsets.AuditedModelViewSet):
         cluster = Cluster.objects.get(id=validated_data["cluster_id"])
         validated_data.update(bk_biz_id=cluster.bk_biz_id)
         return Response(PartitionHandler.verify_partition_field(**validated_data))
+
+    @common_swagger_auto_schema(
+        operation_summary=_("分区策略字段批量校验"),
+        request_body=PartitionColumnBatchVerifySerializer(),
+        responses={status.HTTP_200_OK: PartitionColumnBatchVerifyResponseSerializer()},
+        tags=[SWAGGER_TAG],
+    )
+    @action(methods=["POST"], detail=False, serializer_class=PartitionColumnBatchVerifySerializer)
+    def batch_verify_partition_field(self, request, *args, **kwargs):
+        validated_data = self.params_validate(PartitionColumnBatchVerifySerializer, representation=True)
+        return Response(PartitionHandler.batch_verify_partition_field(**validated_data))
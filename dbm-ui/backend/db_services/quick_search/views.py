@@ -28,6 +28,7 @@ SWAGGER_TAG = [_("全局搜索")]
 class QuickSearchViewSet(viewsets.SystemViewSet):
     default_permission_class = []
     serializer_class = QuickSearchSerializer
+    replica_actions = ["search"]
 
     @common_swagger_auto_schema(
         operation_summary=_("[quick_search] 快速查询"),
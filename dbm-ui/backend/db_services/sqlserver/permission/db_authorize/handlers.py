@@ -8,7 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set, Tuple
 
 from django.utils.translation import ugettext_lazy as _
 
@@ -35,7 +35,12 @@ class SQLServerAuthorizeHandler(AuthorizeHandler):
     account_type: AccountType = AccountType.SQLServer
 
     def _pre_check_rules(
-        self, authorize: AuthorizeMeta, user_info_map: Dict = None, user_db__rules: Dict = None, **kwargs
+        self,
+        authorize: AuthorizeMeta,
+        user_info_map: Dict = None,
+        user_db__rules: Dict = None,
+        exist_cluster_ids: Set[int] = None,
+        **kwargs
     ) -> Tuple[bool, str, Dict]:
         """sqlserver前置检查"""
 
@@ -60,24 +65,33 @@ class SQLServerAuthorizeHandler(AuthorizeHandler):
                 return False, _("不存在{}-{}这样的规则模板").format(authorize.user, db), authorize_data
 
         # 校验集群是否存在，TODO: 是否校验集群是否可访问？
-        exist_cluster_ids = Cluster.objects.filter(id__in=authorize.cluster_ids).values_list("id", flat=True)
+        if exist_cluster_ids is None:
+            exist_cluster_ids = Cluster.objects.filter(id__in=authorize.cluster_ids).values_list("id", flat=True)
         not_exist_cluster_ids = set(authorize.cluster_ids) - set(exist_cluster_ids)
         if not_exist_cluster_ids:
             return False, _("不存在集群：{}").format(not_exist_cluster_ids), authorize_data
 
         return True, _("前置校验成功"), authorize_data
 
-    def pre_check_excel_rules(self, excel_authorize: ExcelAuthorizeMeta, **kwargs) -> Dict:
+    def _load_pre_check_catalog(self, authorizes: List[SQLServerDBAuthorizeMeta], **kwargs) -> Dict:
         """sqlserver的excel导入授权"""
-        user_db__rules = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, self.account_type)
+        users = [authorize.user for authorize in authorizes]
+        user_db__rules = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, self.account_type, users=users)
         user_info_map = self._get_user_info_map(self.account_type, self.bk_biz_id)
-        return super().pre_check_excel_rules(
-            excel_authorize, user_info_map=user_info_map, user_db__rules=user_db__rules, **kwargs
-        )
+        # 统一查询excel中涉及的集群，避免逐行查询
+        cluster_ids = {cluster_id for authorize in authorizes for cluster_id in authorize.cluster_ids}
+        exist_cluster_ids = set(Cluster.objects.filter(id__in=cluster_ids).values_list("id", flat=True))
+        return {
+            "user_info_map": user_info_map,
+            "user_db__rules": user_db__rules,
+            "exist_cluster_ids": exist_cluster_ids,
+            **kwargs,
+        }
 
     def multi_user_pre_check_rules(self, authorize: SQLServerDBAuthorizeMeta, **kwargs):
         """多个账号的前置检查，适合sqlserver的授权"""
-        user_db__rules = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, self.account_type)
+        users = [user["user"] for user in authorize.sqlserver_users]
+        user_db__rules = AccountHandler.aggregate_user_db_rules(self.bk_biz_id, self.account_type, users=users)
         user_info_map = self._get_user_info_map(self.account_type, self.bk_biz_id)
         authorize_check_result = self._multi_user_pre_check_rules(
             authorize, users_key="sqlserver_users", user_db__rules=user_db__rules, user_info_map=user_info_map
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from backend.configuration.constants import DBType
+from backend.db_meta.enums import ClusterEntryType, ClusterType
+from backend.db_meta.models import ClusterEntry
+from backend.db_services.dbpermission.constants import EXCEL_DIVIDER, AuthorizeExcelHeader
+from backend.db_services.dbpermission.db_account.handlers import AccountHandler
+from backend.db_services.mongodb.permission.db_authorize.handlers import MongoDBAuthorizeHandler
+from backend.db_services.mysql.permission.authorize.handlers import MySQLAuthorizeHandler
+from backend.db_services.sqlserver.permission.db_authorize.handlers import SQLServerAuthorizeHandler
+
+DB_TYPE__AUTHORIZE_HANDLER = {
+    DBType.MySQL: MySQLAuthorizeHandler,
+    DBType.TenDBCluster: MySQLAuthorizeHandler,
+    DBType.MongoDB: MongoDBAuthorizeHandler,
+    DBType.Sqlserver: SQLServerAuthorizeHandler,
+}
+
+
+class Command(BaseCommand):
+    help = "excel授权前置检查压测，对比逐行检查和批量检查的耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bk-biz-id", type=int, required=True, help="业务ID")
+        parser.add_argument("--cluster-type", required=True, help="集群类型")
+        parser.add_argument("--rows", type=int, default=5000, help="excel行数")
+        parser.add_argument("--source-ips", default="127.0.0.1", help="授权来源IP(逗号分割)")
+
+    @staticmethod
+    def build_excel_data(bk_biz_id, cluster_type, rows, source_ips):
+        """根据业务下已有的账号规则和集群域名，构造指定行数的excel数据"""
+        account_type = ClusterType.cluster_type_to_db_type(cluster_type)
+        user_db__rules = AccountHandler.aggregate_user_db_rules(bk_biz_id, account_type)
+        user_dbs = [(user, db) for user, db_rules in user_db__rules.items() for db in db_rules]
+        entries = list(
+            ClusterEntry.objects.filter(
+                cluster__bk_biz_id=bk_biz_id,
+                cluster__cluster_type=cluster_type,
+                cluster_entry_type=ClusterEntryType.DNS,
+            ).values_list("entry", flat=True)
+        )
+        if not user_dbs or not entries:
+            return []
+
+        combinations = itertools.cycle(itertools.product(user_dbs, entries))
+        return [
+            {
+                AuthorizeExcelHeader.USER: user,
+                AuthorizeExcelHeader.ACCESS_DBS: db,
+                AuthorizeExcelHeader.TARGET_INSTANCES: entry,
+                AuthorizeExcelHeader.SOURCE_IPS: source_ips.replace(",", EXCEL_DIVIDER),
+            }
+            for (user, db), entry in itertools.islice(combinations, rows)
+        ]
+
+    @staticmethod
+    def per_row_pre_check(handler, excel_authorize):
+        """逐行检查：每行独立解析和校验，并经过缓存中转，模拟改造前的执行方式"""
+        authorize_data_list = excel_authorize.authorize_excel_data
+        entry_cluster_map = handler.authorize_meta.get_entry_cluster_map(
+            [data[AuthorizeExcelHeader.TARGET_INSTANCES] for data in authorize_data_list]
+        )
+        authorizes = [
+            handler.authorize_meta.from_excel_data(data, excel_authorize.cluster_type, entry_cluster_map)
+            for data in authorize_data_list
+        ]
+        # 改造前账号和规则数据同样只加载一次，但集群需要逐行查询
+        catalog = handler._load_pre_check_catalog(authorizes)
+        catalog.pop("exist_cluster_ids", None)
+
+        def pre_check(index, excel_data):
+            authorize = handler.authorize_meta.from_excel_data(excel_data, cluster_type=excel_authorize.cluster_type)
+            result = handler.pre_check_rules(authorize, task_index=index, **catalog)
+            cache.get(result["authorize_uid"])
+            cache.delete(result["authorize_uid"])
+            return result
+
+        with ThreadPoolExecutor(max_workers=settings.CONCURRENT_NUMBER) as ex:
+            return list(ex.map(pre_check, range(len(authorize_data_list)), authorize_data_list))
+
+    def handle(self, *args, **options):
+        bk_biz_id, cluster_type = options["bk_biz_id"], options["cluster_type"]
+        handler_cls = DB_TYPE__AUTHORIZE_HANDLER[ClusterType.cluster_type_to_db_type(cluster_type)]
+        excel_data = self.build_excel_data(bk_biz_id, cluster_type, options["rows"], options["source_ips"])
+        if not excel_data:
+            self.stdout.write("no account rules or cluster entries found, skip benchmark")
+            return
+
+        excel_authorize = handler_cls.excel_authorize_meta(authorize_excel_data=excel_data, cluster_type=cluster_type)
+        handler = handler_cls(bk_biz_id=bk_biz_id, operator="admin")
+        for mode, func in [
+            ("per_row", lambda: self.per_row_pre_check(handler, excel_authorize)),
+            ("bulk", lambda: handler.pre_check_excel_rules(excel_authorize)),
+        ]:
+            start = time.monotonic()
+            func()
+            cost = time.monotonic() - start
+            self.stdout.write(
+                f"[{mode}] {len(excel_data)} rows, cost {cost:.2f}s, {cost / len(excel_data) * 1000:.2f}ms/row"
+            )
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from backend import env
+from backend.core.db_pool.pool import get_pool_stats
+
+BENCHMARK_ENGINES = {
+    "direct": "django.db.backends.mysql",
+    "pool": "backend.core.db_pool",
+}
+
+
+class Command(BaseCommand):
+    help = "数据库连接池压测，对比直连和连接池模式下新建的连接数和查询耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="压测的数据库别名")
+        parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+        parser.add_argument("--requests", type=int, default=20, help="每个并发执行的请求数")
+        parser.add_argument("--pool-size", type=int, default=env.DB_POOL_SIZE, help="连接池大小")
+
+    @staticmethod
+    def get_server_connections(alias) -> int:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Connections'")
+            return int(cursor.fetchone()[1])
+
+    @staticmethod
+    def simulate_requests(alias, requests):
+        # 模拟请求：每次请求执行一次查询，请求结束时关闭连接
+        latencies = []
+        for __ in range(requests):
+            start = time.monotonic()
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connections[alias].close()
+            latencies.append(time.monotonic() - start)
+        return latencies
+
+    def handle(self, *args, **options):
+        alias, concurrency, requests = options["database"], options["concurrency"], options["requests"]
+        base_settings = connections.databases[alias]
+
+        for mode, engine in BENCHMARK_ENGINES.items():
+            bench_alias = f"{alias}_{mode}_benchmark"
+            connections.databases[bench_alias] = {
+                **base_settings,
+                "ENGINE": engine,
+                "POOL": {"MAX_SIZE": options["pool_size"]},
+            }
+
+            before = self.get_server_connections(alias)
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [executor.submit(self.simulate_requests, bench_alias, requests) for __ in range(concurrency)]
+                latencies = sorted(latency for future in futures for latency in future.result())
+            opened = self.get_server_connections(alias) - before
+
+            avg = sum(latencies) / len(latencies) * 1000
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+            self.stdout.write(
+                f"[{mode}] {len(latencies)} requests, {opened} connections opened, avg {avg:.2f}ms, p99 {p99:.2f}ms"
+            )
+
+        self.stdout.write(f"pool stats: {get_pool_stats()}")
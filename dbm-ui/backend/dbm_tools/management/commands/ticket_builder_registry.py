@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.ticket.builders import BUILDER_REGISTRY_FILE, BuilderFactory
+
+# 统计启动耗时和内存峰值的脚本，分别在按需加载和全量加载的子进程中执行
+BENCHMARK_SCRIPT = """
+import resource, time
+t = time.time()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(round(time.time() - t, 3), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def import_builder_modules(root=settings.BASE_DIR):
+    """导入所有声明了单据构造器的模块，包括 ticket/builders 之外的模块"""
+    BuilderFactory.load_all_builders()
+    backend_dir = os.path.join(root, "backend")
+    for path, __, files in os.walk(backend_dir):
+        for name in files:
+            if not name.endswith(".py"):
+                continue
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                if "BuilderFactory.register(" not in f.read():
+                    continue
+            module = os.path.relpath(os.path.join(path, name[: -len(".py")]), root).replace(os.sep, ".")
+            importlib.import_module(module)
+
+
+class Command(BaseCommand):
+    help = "生成/校验单据构造器注册表，注册表用于按需导入单据构造器"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="仅校验注册表与代码中的构造器是否一致")
+        parser.add_argument("--benchmark", action="store_true", help="对比按需加载与全量加载的启动耗时和内存")
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            self.benchmark()
+            return
+
+        import_builder_modules()
+        if options["check"]:
+            diff = BuilderFactory.diff_registry()
+            if any(diff.values()):
+                raise CommandError(f"ticket builder registry is outdated: {diff}")
+            self.stdout.write("ticket builder registry is up to date")
+            return
+
+        with open(BUILDER_REGISTRY_FILE, "w", encoding="utf-8") as f:
+            json.dump(BuilderFactory.dump_registry(), f, indent=4, ensure_ascii=False)
+            f.write("\n")
+        self.stdout.write(f"dump {len(BuilderFactory.registry)} ticket builders to {BUILDER_REGISTRY_FILE}")
+
+    def benchmark(self):
+        for lazy_load in ["true", "false"]:
+            env = {**os.environ, "TICKET_BUILDER_LAZY_LOAD": lazy_load}
+            output = subprocess.check_output(
+                [sys.executable, "-c", BENCHMARK_SCRIPT], cwd=settings.BASE_DIR, env=env, text=True
+            )
+            cost, max_rss = output.strip().splitlines()[-1].split()
+            self.stdout.write(f"lazy_load={lazy_load}: startup {cost}s, max rss {max_rss}KB")
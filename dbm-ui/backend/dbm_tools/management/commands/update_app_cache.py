@@ -17,7 +17,7 @@ class Command(BaseCommand):
     help = "update app cache."
 
     def add_arguments(self, parser):
-        pass
+        parser.add_argument("--force", action="store_true", help="force a full snapshot diff")
 
     def handle(self, *args, **options):
-        bulk_update_app_cache()
+        bulk_update_app_cache(force=options["force"])
@@ -1,4 +1,6 @@
 import logging
+import random
+import time
 from typing import Callable, List, Tuple, Union  # noqa. flake8 #118
 
 from django.apps.config import AppConfig
@@ -24,6 +26,13 @@ else:
     _operror_types += (MySQLdb.OperationalError,)
 
 
+def get_retry_backoff(retries: int) -> float:
+    """exponential backoff with full jitter, so that workers do not reconnect all at once after a db blip"""
+    backoff = getattr(settings, "DBCONN_RETRY_BACKOFF", 0)
+    max_backoff = getattr(settings, "DBCONN_RETRY_MAX_BACKOFF", backoff)
+    return random.uniform(0, min(max_backoff, backoff * 2 ** (retries - 1)))
+
+
 def monkeypatch_django() -> None:
     def ensure_connection_with_retries(self: django_db_base.BaseDatabaseWrapper) -> None:
         self._max_dbconn_retry_times = getattr(settings, "MAX_DBCONN_RETRY_TIMES", 1)
@@ -57,6 +66,7 @@ def monkeypatch_django() -> None:
                             self.connection = None
                             del self._in_connecting
 
+                            time.sleep(get_retry_backoff(self._connection_retries))
                             # give libraries like 12factor-vault the chance to update the credentials
                             pre_reconnect.send(self.__class__, dbwrapper=self)
                             self.ensure_connection()
@@ -130,6 +130,19 @@ ENABLE_CLEAN_EXPIRED_BAMBOO_TASK = get_type_env(key="ENABLE_CLEAN_EXPIRED_BAMBOO
 ENABLE_CLEAN_EXPIRED_FLOW_INSTANCE = get_type_env(key="ENABLE_CLEAN_EXPIRED_FLOW_INSTANCE", _type=bool, default=False)
 BAMBOO_TASK_VALIDITY_DAY = get_type_env(key="BAMBOO_TASK_VALIDITY_DAY", _type=int, default=360)
 
+# 合并通知窗口(秒)，窗口内发给同一接收人的多条单据通知合并为一条摘要发送，为0时不合并
+NOTIFY_DIGEST_WINDOW = get_type_env(key="NOTIFY_DIGEST_WINDOW", _type=int, default=0)
+
+# 单据构造器按需加载，关闭后启动时导入全部构造器
+TICKET_BUILDER_LAZY_LOAD = get_type_env(key="TICKET_BUILDER_LAZY_LOAD", _type=bool, default=True)
+
+# 数据库连接池，开启后 default 和 report_db 的连接在请求结束时归还连接池复用
+DB_POOL_ENABLE = get_type_env(key="DB_POOL_ENABLE", _type=bool, default=False)
+# 每个进程、每个数据库的最大连接数
+DB_POOL_SIZE = get_type_env(key="DB_POOL_SIZE", _type=int, default=20)
+# 连接池耗尽时等待空闲连接的超时时间(秒)
+DB_POOL_CHECKOUT_TIMEOUT = get_type_env(key="DB_POOL_CHECKOUT_TIMEOUT", _type=int, default=10)
+
 # 是否在部署 MySQL 的时候安装 PERL
 YUM_INSTALL_PERL = get_type_env(key="YUM_INSTALL_PERL", _type=bool, default=False)
 
@@ -189,3 +202,8 @@ DEBUG_TOOL_BAR = get_type_env(key="DEBUG_TOOL_BAR", _type=bool, default=False)
 WINDOW_SSH_PORT = get_type_env(key="WINDOW_SSH_PORT", _type=int, default=22)
 # 本地测试人员优先使用的版本
 REPO_VERSION_FOR_DEV = get_type_env(key="REPO_VERSION_FOR_DEV", _type=str, default="")
+
+# 只读从库，配置 REPLICA_DB_HOST 后生效。从库复制延迟超过阈值(秒)时查询回退到主库
+REPLICA_DB_MAX_LAG = get_type_env(key="REPLICA_DB_MAX_LAG", _type=int, default=10)
+# 从库健康检查结果的缓存时间(秒)
+REPLICA_DB_CHECK_INTERVAL = get_type_env(key="REPLICA_DB_CHECK_INTERVAL", _type=int, default=10)
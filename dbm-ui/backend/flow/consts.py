@@ -81,6 +81,9 @@ MIN_SPIDER_SLAVE_COUNT = 1
 
 TDBCTL_USER = "spider"
 
+# 分区单据中并发执行的分区子流程上限，超出部分在各并发组内串行执行
+PARTITION_FLOW_MAX_CONCURRENCY = 10
+
 # 定义每个flow发起时的实例临时账号名称前缀
 DBM_MYSQL_JOB_TMP_USER_PREFIX = "J_"
 # 定义sqlserver专属的匹配临时账号的正则
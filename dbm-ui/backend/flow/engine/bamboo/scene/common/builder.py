@@ -174,7 +174,11 @@ class Builder(object):
             if isinstance(act_info, SubProcess):
                 acts.append(act_info)
                 continue
-            act = ServiceActivity(name=act_info["act_name"], component_code=act_info["act_component_code"])
+            act = ServiceActivity(
+                name=act_info["act_name"],
+                component_code=act_info["act_component_code"],
+                error_ignorable=act_info.get("error_ignorable", False),
+            )
             act_info["kwargs"].update({"root_id": self.root_id, "node_id": act.id, "node_name": act_info["act_name"]})
             act.component.inputs.kwargs = Var(type=Var.PLAIN, value=act_info["kwargs"])
             act.component.inputs.trans_data = Var(type=Var.SPLICE, value="${trans_data}")
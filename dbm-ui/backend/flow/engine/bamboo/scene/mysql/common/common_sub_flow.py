@@ -931,7 +931,8 @@ def authorize_sub_flow(root_id: str, uid: str, bk_biz_id: int, operator: str, ru
 
     # 获得用户规则字典
     db_type = ClusterType.cluster_type_to_db_type(rules_set[0]["cluster_type"])
-    user_db_rules_map = AccountHandler.aggregate_user_db_rules(bk_biz_id, db_type, rule_key="")
+    users = [authorize_data["user"] for authorize_data in rules_set]
+    user_db_rules_map = AccountHandler.aggregate_user_db_rules(bk_biz_id, db_type, rule_key="", users=users)
     # 构造授权并行网关流程
     act_lists = []
     for authorize_data in rules_set:
@@ -960,7 +961,8 @@ def authorize_sub_flow_v2(root_id: str, uid: str, bk_biz_id: int, operator: str,
 
     # 获得用户规则字典
     db_type = ClusterType.cluster_type_to_db_type(rules_set[0]["cluster_type"])
-    user_db_rules_map = AccountHandler.aggregate_user_db_rules(bk_biz_id, db_type, rule_key="")
+    users = [authorize_data["user"] for authorize_data in rules_set]
+    user_db_rules_map = AccountHandler.aggregate_user_db_rules(bk_biz_id, db_type, rule_key="", users=users)
     # 构造授权并行网关流程
     act_lists = []
     for authorize_data in rules_set:
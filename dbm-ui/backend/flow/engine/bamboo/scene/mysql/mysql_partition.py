@@ -4,13 +4,13 @@ import logging
 import os
 import time
 from dataclasses import asdict
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from django.utils.translation import ugettext as _
 
 from backend.configuration.constants import DBType
 from backend.core.consts import BK_PKG_INSTALL_PATH
-from backend.flow.consts import DBA_ROOT_USER, LONG_JOB_TIMEOUT
+from backend.flow.consts import DBA_ROOT_USER, LONG_JOB_TIMEOUT, PARTITION_FLOW_MAX_CONCURRENCY
 from backend.flow.engine.bamboo.scene.common.builder import Builder, SubBuilder
 from backend.flow.engine.bamboo.scene.common.get_file_list import GetFileList
 from backend.flow.plugins.components.collections.mysql.exec_actuator_script import ExecuteDBActuatorScriptComponent
@@ -25,6 +25,40 @@ logger = logging.getLogger("flow")
 BKREPO_PARTITION_PATH = "mysql/partition"
 
 
+def need_partition_lanes(sub_pipeline_count: int, max_concurrency: int = PARTITION_FLOW_MAX_CONCURRENCY) -> bool:
+    """子流程数超过最大并发数时，需要分到并发组内串行执行"""
+    return sub_pipeline_count > max_concurrency
+
+
+def add_bounded_parallel_sub_pipelines(
+    pipeline: Builder,
+    root_id: str,
+    data: Dict,
+    sub_pipelines: List,
+    max_concurrency: int = PARTITION_FLOW_MAX_CONCURRENCY,
+):
+    """
+    有限并发地加入分区子流程：子流程按轮询分到至多max_concurrency个并发组，组内串行，组间并行。
+    组内串行时单个分区配置的失败会阻塞后续配置，因此组内子流程的文件下发和执行节点需设置为忽略错误，失败由分区执行报告记录
+    @param pipeline: 主流程
+    @param root_id: 流程ID
+    @param data: 并发组子流程的上下文数据
+    @param sub_pipelines: 待执行的子流程列表
+    @param max_concurrency: 最大并发数
+    """
+    if not need_partition_lanes(len(sub_pipelines), max_concurrency):
+        pipeline.add_parallel_sub_pipeline(sub_flow_list=sub_pipelines)
+        return
+
+    lane_pipelines = []
+    for lane in range(max_concurrency):
+        lane_pipeline = SubBuilder(root_id=root_id, data=data)
+        for sub_pipeline in sub_pipelines[lane::max_concurrency]:
+            lane_pipeline.add_sub_pipeline(sub_pipeline)
+        lane_pipelines.append(lane_pipeline.build_sub_process(sub_name=_("分区任务并发组[{}]").format(lane + 1)))
+    pipeline.add_parallel_sub_pipeline(sub_flow_list=lane_pipelines)
+
+
 class MysqlPartitionFlow(object):
     """
     分区单据的流程引擎
@@ -73,7 +107,7 @@ class MysqlPartitionFlow(object):
 
     def mysql_partition_flow(self):
         """
-        每个分区配置一个子流程：
+        每个分区配置一个子流程，子流程有限并发执行，单个配置失败不影响其他配置：
         （1）检查表结构
         （2）获取分区变更的sql
         （3）dbactor执行分区指令
@@ -81,16 +115,20 @@ class MysqlPartitionFlow(object):
         mysql_partition_pipeline = Builder(root_id=self.root_id, data=self.data)
         sub_pipelines = []
         cron_date = {"cron_date": time.strftime("%Y%m%d", time.localtime())}
+        sub_data = copy.deepcopy(self.data)
+        sub_data.pop("infos")
+        # 只有分到并发组串行执行时，单个配置的失败才需要忽略，由最后的汇总节点判定单据结果
+        in_lane = need_partition_lanes(len(self.data["infos"]))
         for info in self.data["infos"]:
-            sub_data = copy.deepcopy(self.data)
-            sub_data.pop("infos")
             sub_pipeline = SubBuilder(root_id=self.root_id, data={**sub_data, **info, **cron_date})
             bk_cloud_id = info["bk_cloud_id"]
             ip, port = info["partition_objects"][0]["ip"], info["partition_objects"][0]["port"]
-            filename = "partition_sql_file_{}_{}_{}.json".format(ip, port, self.data["uid"])
+            # 同一单据内可能存在同实例的多个分区策略，文件名需带上config_id避免覆盖
+            filename = "partition_sql_file_{}_{}_{}_{}.json".format(ip, port, info["config_id"], self.data["uid"])
 
             sub_pipeline.add_act(
                 act_name=_("上传sql文件"),
+                error_ignorable=in_lane,
                 act_component_code=UploadFileServiceComponent.code,
                 kwargs=asdict(
                     UploadFile(
@@ -102,6 +140,7 @@ class MysqlPartitionFlow(object):
 
             sub_pipeline.add_act(
                 act_name=_("下发sql文件"),
+                error_ignorable=in_lane,
                 act_component_code=TransFileComponent.code,
                 kwargs=asdict(
                     DownloadMediaKwargs(
@@ -116,6 +155,7 @@ class MysqlPartitionFlow(object):
             )
             sub_pipeline.add_act(
                 act_name=_("下发actuator介质"),
+                error_ignorable=in_lane,
                 act_component_code=TransFileComponent.code,
                 kwargs=asdict(
                     DownloadMediaKwargs(
@@ -129,6 +169,7 @@ class MysqlPartitionFlow(object):
             cluster = {"ip": ip, "file_path": filename}
             sub_pipeline.add_act(
                 act_name=_("actuator执行partition"),
+                error_ignorable=in_lane,
                 act_component_code=ExecuteDBActuatorScriptComponent.code,
                 kwargs=asdict(
                     ExecActuatorKwargs(
@@ -146,12 +187,23 @@ class MysqlPartitionFlow(object):
             sub_pipeline.add_act(
                 act_name=_("生成分区执行报告"),
                 act_component_code=MysqlPartitionReportComponent.code,
-                kwargs={},
+                kwargs={"defer_failure": in_lane},
             )
 
             sub_pipelines.append(
                 sub_pipeline.build_sub_process(sub_name=_("cluster[{}]的分区任务").format(info["immute_domain"]))
             )
-        mysql_partition_pipeline.add_parallel_sub_pipeline(sub_flow_list=sub_pipelines)
+        add_bounded_parallel_sub_pipelines(
+            pipeline=mysql_partition_pipeline,
+            root_id=self.root_id,
+            data={**sub_data, **cron_date},
+            sub_pipelines=sub_pipelines,
+        )
+        if in_lane:
+            mysql_partition_pipeline.add_act(
+                act_name=_("汇总分区执行结果"),
+                act_component_code=MysqlPartitionReportComponent.code,
+                kwargs={"summary": True},
+            )
         logger.info(_("构建mysql partition流程成功"))
         mysql_partition_pipeline.run_pipeline(init_trans_data_class=MysqlPartitionContext())
@@ -14,6 +14,10 @@ from backend.core.consts import BK_PKG_INSTALL_PATH
 from backend.flow.consts import DBA_ROOT_USER, LONG_JOB_TIMEOUT
 from backend.flow.engine.bamboo.scene.common.builder import Builder, SubBuilder
 from backend.flow.engine.bamboo.scene.common.get_file_list import GetFileList
+from backend.flow.engine.bamboo.scene.mysql.mysql_partition import (
+    add_bounded_parallel_sub_pipelines,
+    need_partition_lanes,
+)
 from backend.flow.plugins.components.collections.mysql.exec_actuator_script import ExecuteDBActuatorScriptComponent
 from backend.flow.plugins.components.collections.mysql.mysql_partition_report import MysqlPartitionReportComponent
 from backend.flow.plugins.components.collections.mysql.trans_flies import TransFileComponent
@@ -77,7 +81,7 @@ class SpiderPartitionFlow(object):
 
     def spider_partition_flow(self):
         """
-        每个分区配置一个子流程：
+        每个分区配置一个子流程，子流程有限并发执行，单个配置失败不影响其他配置，最后统一录入分区日志：
         （1）检查表结构
         （2）获取分区变更的sql
         （3）dbactor执行分区指令
@@ -87,6 +91,8 @@ class SpiderPartitionFlow(object):
         cron_date = {"cron_date": time.strftime("%Y%m%d", time.localtime())}
         sub_data = copy.deepcopy(self.data)
         sub_data.pop("infos")
+        # 只有分到并发组串行执行时，单个配置的失败才需要忽略，由最后的录入分区日志节点判定单据结果
+        in_lane = need_partition_lanes(len(self.data["infos"]))
         for info in self.data["infos"]:
             sub_pipeline = SubBuilder(root_id=self.root_id, data={**sub_data, **info, **cron_date})
             bk_cloud_id = info["bk_cloud_id"]
@@ -101,9 +107,10 @@ class SpiderPartitionFlow(object):
                 ip_sqls[ip].append(partition_object)
             for ip in ip_sqls:
                 sqls = ip_sqls[ip]
-                filename = _("partition_sql_file_{}_{}.json".format(ip, self.data["uid"]))
+                filename = "partition_sql_file_{}_{}_{}.json".format(ip, info["config_id"], self.data["uid"])
                 upload_sql_file = dict()
                 upload_sql_file["act_name"] = _("{}: {}".format("上传sql文件", ip))
+                upload_sql_file["error_ignorable"] = in_lane
                 upload_sql_file["act_component_code"] = UploadFileServiceComponent.code
                 upload_sql_file["kwargs"] = asdict(
                     UploadFile(
@@ -115,6 +122,7 @@ class SpiderPartitionFlow(object):
 
                 sql_file_info = dict()
                 sql_file_info["act_name"] = _("{}: {}".format(_("下发sql文件"), ip))
+                sql_file_info["error_ignorable"] = in_lane
                 sql_file_info["act_component_code"] = TransFileComponent.code
                 sql_file_info["kwargs"] = asdict(
                     DownloadMediaKwargs(
@@ -130,6 +138,7 @@ class SpiderPartitionFlow(object):
 
                 download_actuator_info = dict()
                 download_actuator_info["act_name"] = _("{}: {}".format(_("下发dbactor文件"), ip))
+                download_actuator_info["error_ignorable"] = in_lane
                 download_actuator_info["act_component_code"] = TransFileComponent.code
                 download_actuator_info["kwargs"] = asdict(
                     DownloadMediaKwargs(
@@ -147,6 +156,7 @@ class SpiderPartitionFlow(object):
                 sub_sub_pipeline = SubBuilder(root_id=self.root_id, data={**sub_data, **info, **cron_date})
                 sub_sub_pipeline.add_act(
                     act_name=_("{}: {}".format(_("actuator执行partition"), ip)),
+                    error_ignorable=in_lane,
                     act_component_code=ExecuteDBActuatorScriptComponent.code,
                     kwargs=asdict(
                         ExecActuatorKwargs(
@@ -177,7 +187,12 @@ class SpiderPartitionFlow(object):
                 sub_pipeline.build_sub_process(sub_name=_("cluster[{}]的分区任务").format(info["immute_domain"]))
             )
 
-        partition_pipeline.add_parallel_sub_pipeline(sub_flow_list=sub_pipelines)
+        add_bounded_parallel_sub_pipelines(
+            pipeline=partition_pipeline,
+            root_id=self.root_id,
+            data={**sub_data, **cron_date},
+            sub_pipelines=sub_pipelines,
+        )
         sub_pipeline_callback = SubBuilder(root_id=self.root_id, data={**sub_data, **cron_date})
         sub_pipeline_callback.add_act(
             act_name=_("录入分区日志"),
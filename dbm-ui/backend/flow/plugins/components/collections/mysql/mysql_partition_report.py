@@ -29,38 +29,52 @@ class MySQLPartitionReportService(BaseService):
         trans_data = data.get_one_of_inputs("trans_data")
         kwargs = data.get_one_of_inputs("kwargs")
 
+        # 汇总节点：并发组内的分区配置失败时不阻塞后续配置，由最后的汇总节点统一判定单据结果
+        if kwargs.get("summary"):
+            return self._summary(global_data)
+
         log_para = []
         fail_list = []
         success_list = []
         configs = defaultdict(list)
-        if trans_data.partition_report:
-            if trans_data.partition_report["summaries"]:
-                summaries = trans_data.partition_report["summaries"]
-                for item in summaries:
-                    configs[item["config_id"]].append(item)
-                for config, logs in configs.items():
-                    log_status = "succeeded"
-                    err_msg = ""
-                    for log in logs:
-                        if log["status"] == "failed":
-                            log_status = "failed"
-                            err_msg = "{};{}".format(err_msg, log["msg"])
-                    err_msg = err_msg.strip(";")
-                    item = {
-                        "config_id": config,
-                        "check_info": err_msg,
-                        "status": log_status,
-                        "cron_date": global_data["cron_date"],
-                        "scheduler": global_data["created_by"],
-                    }
-                    log_para.append(item)
-                    if log_status == "succeeded":
-                        success_list.append(item)
-                    elif log_status == "failed":
-                        fail_list.append(item)
-                    else:
-                        self.log_error(_("不支持的状态类型: [{}]").format(log_status))
-                        return False
+        if not trans_data.partition_report:
+            # 上传/下发文件或actuator节点失败时没有执行报告，记录该分区配置执行失败
+            item = {
+                "config_id": global_data.get("config_id"),
+                "check_info": _("未生成分区执行报告，请检查文件下发和actuator执行节点"),
+                "status": "failed",
+                "cron_date": global_data["cron_date"],
+                "scheduler": global_data["created_by"],
+            }
+            log_para.append(item)
+            fail_list.append(item)
+        elif trans_data.partition_report["summaries"]:
+            summaries = trans_data.partition_report["summaries"]
+            for item in summaries:
+                configs[item["config_id"]].append(item)
+            for config, logs in configs.items():
+                log_status = "succeeded"
+                err_msg = ""
+                for log in logs:
+                    if log["status"] == "failed":
+                        log_status = "failed"
+                        err_msg = "{};{}".format(err_msg, log["msg"])
+                err_msg = err_msg.strip(";")
+                item = {
+                    "config_id": config,
+                    "check_info": err_msg,
+                    "status": log_status,
+                    "cron_date": global_data["cron_date"],
+                    "scheduler": global_data["created_by"],
+                }
+                log_para.append(item)
+                if log_status == "succeeded":
+                    success_list.append(item)
+                elif log_status == "failed":
+                    fail_list.append(item)
+                else:
+                    self.log_error(_("不支持的状态类型: [{}]").format(log_status))
+                    return False
 
         if log_para:
             if (
@@ -88,19 +102,40 @@ class MySQLPartitionReportService(BaseService):
                     else:
                         ip = global_data["ip"]
                     ticket = Ticket.objects.select_for_update().get(id=global_data["uid"])
+                    # 同一单据可能包含同一机器上的多个分区策略，按config_id+ip区分，避免执行日志相互覆盖
                     flags = ticket.details.get("log_list", {})
-                    flags.update({ip: log_para})
+                    flags.update({"{}:{}".format(global_data.get("config_id", ""), ip): log_para})
                     ticket.update_details(log_list=flags)
             else:
                 self.log_error(_("不支持的单据类型: [{}]").format(global_data["ticket_type"]))
                 return False
 
+        # 并发组内的分区配置串行执行并共享上下文，报告生成后清空，避免后续配置执行失败时重复上报
+        trans_data.partition_report = None
+        data.outputs["trans_data"] = trans_data
+
         self.print_log(fail_list, success_list)
         if fail_list and (
             global_data["ticket_type"] == TicketType.MYSQL_PARTITION
             or global_data["ticket_type"] == TicketType.MYSQL_PARTITION_CRON
         ):
+            if kwargs.get("defer_failure"):
+                # 并发组内串行执行：记录失败的配置后继续执行组内的后续配置
+                with atomic():
+                    ticket = Ticket.objects.select_for_update().get(id=global_data["uid"])
+                    failed_config_ids = ticket.details.get("partition_failed_config_ids", [])
+                    failed_config_ids.extend(item["config_id"] for item in fail_list)
+                    ticket.update_details(partition_failed_config_ids=failed_config_ids)
+                return True
+            return False
+        return True
+
+    def _summary(self, global_data) -> bool:
+        failed_config_ids = Ticket.objects.get(id=global_data["uid"]).details.get("partition_failed_config_ids", [])
+        if failed_config_ids:
+            self.log_error(_("执行失败的分区配置: {}").format(failed_config_ids))
             return False
+        self.log_info(_("全部分区配置执行成功"))
         return True
 
     def print_log(self, fail_list, success_list):
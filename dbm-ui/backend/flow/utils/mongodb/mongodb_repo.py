@@ -2,13 +2,23 @@ import re
 from abc import abstractmethod
 from typing import List, Union
 
+from django.db.models import Prefetch, QuerySet
 from rest_framework import serializers
 
 from backend.db_meta import request_validator
 from backend.db_meta.enums import machine_type
 from backend.db_meta.enums.cluster_type import ClusterType
 from backend.db_meta.enums.instance_role import InstanceRole
-from backend.db_meta.models import AppCache, Cluster, Machine, ProxyInstance, StorageInstance
+from backend.db_meta.models import (
+    AppCache,
+    Cluster,
+    ClusterEntry,
+    Machine,
+    NosqlStorageSetDtl,
+    ProxyInstance,
+    StorageInstance,
+    StorageInstanceTuple,
+)
 from backend.flow.consts import MongoDBClusterRole
 from backend.flow.utils.mongodb import mongodb_password
 from backend.ticket.constants import InstanceType
@@ -36,7 +46,9 @@ class MongoNode:
         meta_role = MongoDBClusterRole.Mongos.value if s.instance_role == InstanceType.PROXY.value else s.instance_role
         domain = None
         if with_domain:
-            domain = s.bind_entry.first().entry
+            # 使用 all() 以便命中 prefetch_related 的缓存，first() 会重新查询
+            entry = next(iter(s.bind_entry.all()), None)
+            domain = entry.entry if entry else None
         node = MongoNode(s.ip_port.split(":")[0], s.port, meta_role, s.machine.bk_cloud_id, s.machine_type, domain)
         return node
 
@@ -366,11 +378,35 @@ class MongoRepository:
         else:
             raise Exception("bad cluster_type {}".format(conf["cluster_type"]))
 
+    @staticmethod
+    def _prefetch_cluster_topo(queryset: QuerySet, with_domain: bool) -> QuerySet:
+        """
+        预取集群拓扑，无论集群数量多少，构建拓扑的查询次数都是固定的
+        """
+        storage_qs = StorageInstance.objects.select_related("machine")
+        proxy_qs = ProxyInstance.objects.select_related("machine")
+        if with_domain:
+            entry_qs = ClusterEntry.objects.order_by("id")
+            storage_qs = storage_qs.prefetch_related(Prefetch("bind_entry", queryset=entry_qs))
+            proxy_qs = proxy_qs.prefetch_related(Prefetch("bind_entry", queryset=entry_qs))
+
+        return queryset.prefetch_related(
+            Prefetch("storageinstance_set", queryset=storage_qs),
+            Prefetch("proxyinstance_set", queryset=proxy_qs),
+            Prefetch(
+                "nosqlstoragesetdtl_set", queryset=NosqlStorageSetDtl.objects.select_related("instance__machine")
+            ),
+            Prefetch(
+                "nosqlstoragesetdtl_set__instance__as_ejector",
+                queryset=StorageInstanceTuple.objects.select_related("receiver__machine").order_by("id"),
+            ),
+        )
+
     @classmethod
     def fetch_many_cluster(cls, with_domain: bool, **kwargs):
         # with_domain 是否: 获取复制集和mongos的域名，赋值在MongoNode的domain属性上
         rows: List[MongoDBCluster] = []
-        v = Cluster.objects.filter(**kwargs)
+        v = cls._prefetch_cluster_topo(Cluster.objects.filter(**kwargs), with_domain)
         for i in v:
             if i.cluster_type == ClusterType.MongoReplicaSet.value:
                 # MongoReplicaSet 只有一个Set
@@ -15,8 +15,9 @@ import json
 import logging.config
 import re
 from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Tuple, Union
 
+from django.db import connections
 from django.utils.translation import ugettext as _
 
 from backend.components import DBConfigApi, DRSApi
@@ -55,6 +56,11 @@ from backend.utils.string import base64_encode
 
 logger = logging.getLogger("flow")
 
+# 单次DRS请求携带的proxy数量
+PROXY_RPC_BATCH_SIZE = 20
+# 并发请求DRS的最大线程数
+PROXY_RPC_CONCURRENCY = 10
+
 
 class TwemproxyBackendItem:
     def __init__(self, addr: str, app: str, seg_start: int, seg_end: int, weight: int):
@@ -166,80 +172,178 @@ def decode_predixy_info_servers(info_str) -> List[PredixyInfoServer]:
     return rets
 
 
-def check_cluster_proxy_backends_consistent(cluster_id: int):
-    cluster: Cluster = None
-    try:
-        cluster = Cluster.objects.get(id=cluster_id)
-    except Cluster.DoesNotExist:
-        raise Exception("src_cluster {} does not exist".format(cluster_id))
+def get_twemproxy_backend_lines(result: str) -> List[str]:
+    """将 twemproxy get nosqlproxy servers 的结果按segment排序，用于对比"""
+    backends_ret, __ = decode_twemproxy_backends(result)
+    return [bck.string_without_app() for bck in sorted(backends_ret, key=lambda x: x.segment_start)]
 
-    passwd_ret = PayloadHandler.redis_get_password_by_cluster_id(cluster_id)
-    proxy_addrs = []
-    proxys_backend_md5 = []
+
+def get_predixy_backend_lines(result: str) -> List[str]:
+    """将 predixy info servers 的结果按server排序，并过滤掉已失败的后端，用于对比"""
+    backends_ret = decode_predixy_info_servers(result)
+    return [str(bck) for bck in sorted(backends_ret, key=lambda x: x.server) if bck.current_is_fail == 0]
+
+
+def batch_proxy_rpc(
+    rpc_func, addresses: List[str], params: dict, workers: int = PROXY_RPC_CONCURRENCY
+) -> Dict[str, Union[str, Exception]]:
+    """
+    将proxy按批拆分后并发请求DRS
+    返回 {address: result}，请求失败的地址对应的值为异常
+    """
+
+    def _rpc(batch_addresses: List[str]) -> Dict[str, Union[str, Exception]]:
+        results: Dict[str, Union[str, Exception]] = {
+            addr: Exception(_("DRS 未返回 {} 的执行结果").format(addr)) for addr in batch_addresses
+        }
+        try:
+            resp = rpc_func({**params, "addresses": batch_addresses})
+        except Exception as e:  # pylint: disable=broad-except
+            return {addr: e for addr in batch_addresses}
+        for ele in resp:
+            results[ele["address"]] = Exception(ele["error"]) if ele.get("error") else ele["result"]
+        return results
+
+    batches = [addresses[i : i + PROXY_RPC_BATCH_SIZE] for i in range(0, len(addresses), PROXY_RPC_BATCH_SIZE)]
+    rpc_results: Dict[str, Union[str, Exception]] = {}
+    if len(batches) <= 1 or workers <= 1:
+        for batch_addresses in batches:
+            rpc_results.update(_rpc(batch_addresses))
+        return rpc_results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+        for batch_result in executor.map(_rpc, batches):
+            rpc_results.update(batch_result)
+    return rpc_results
+
+
+def diff_cluster_proxy_backends(cluster: Cluster, workers: int = PROXY_RPC_CONCURRENCY) -> Dict[str, Any]:
+    """
+    获取集群所有proxy的后端配置并对比，以多数proxy一致的配置为基准，返回每个不一致proxy的差异:
+    {
+        "cluster_id": 1,
+        "immute_domain": "cache.test.db",
+        "consistent": False,
+        "proxy_count": 3,
+        "baseline_md5": "xxx",
+        "inconsistent_proxies": [{"proxy_addr": "1.1.1.1:50000", "backend_md5": "yyy", "missing": [], "extra": []}],
+        "failed_proxies": [{"proxy_addr": "1.1.1.2:50000", "error": "timeout"}],
+    }
+    """
+    # 查询地址 -> proxy地址，twemproxy 需要通过管理端口查询
+    query_addr_map: Dict[str, str] = {}
     if is_twemproxy_proxy_type(cluster.cluster_type):
-        # twemproxy 集群
         for proxy in cluster.proxyinstance_set.all():
-            proxy_addrs.append(proxy.machine.ip + ":" + str(proxy.port + DEFAULT_TWEMPROXY_ADMIN_PORT_EXTRA))
-        resp = DRSApi.twemproxy_rpc(
-            {
-                "addresses": proxy_addrs,
-                "db_num": DEFAULT_REDIS_DBNUM,
-                "password": "",
-                "command": "get nosqlproxy servers",
-                "bk_cloud_id": cluster.bk_cloud_id,
-            }
-        )
-        for ele in resp:
-            backends_ret, _ = decode_twemproxy_backends(ele["result"])
-            sorted_backends = sorted(backends_ret, key=lambda x: x.segment_start)
-            sorted_str = ""
-            for bck in sorted_backends:
-                sorted_str += bck.string_without_app() + "\n"
-            # 求sorted_str的md5值
-            md5 = hashlib.md5(sorted_str.encode("utf-8")).hexdigest()
-            proxys_backend_md5.append(
-                {
-                    "proxy_addr": ele["address"],
-                    "backend_md5": md5,
-                }
-            )
+            admin_addr = f"{proxy.machine.ip}{IP_PORT_DIVIDER}{proxy.port + DEFAULT_TWEMPROXY_ADMIN_PORT_EXTRA}"
+            query_addr_map[admin_addr] = proxy.ip_port
+        rpc_func, decode_func = DRSApi.twemproxy_rpc, get_twemproxy_backend_lines
+        params = {"db_num": DEFAULT_REDIS_DBNUM, "password": "", "command": "get nosqlproxy servers"}
     elif is_predixy_proxy_type(cluster.cluster_type):
-        # predixy 集群
         for proxy in cluster.proxyinstance_set.all():
-            proxy_addrs.append(proxy.machine.ip + ":" + str(proxy.port))
-        resp = DRSApi.redis_rpc(
+            query_addr_map[proxy.ip_port] = proxy.ip_port
+        passwd_ret = PayloadHandler.redis_get_password_by_cluster_id(cluster.id)
+        rpc_func, decode_func = DRSApi.redis_rpc, get_predixy_backend_lines
+        params = {
+            "db_num": DEFAULT_REDIS_DBNUM,
+            "password": passwd_ret.get("redis_proxy_password"),
+            "command": "info servers",
+        }
+    else:
+        raise NotImplementedError(_("集群类型 {} 不支持 proxy 后端一致性检查").format(cluster.cluster_type))
+
+    params["bk_cloud_id"] = cluster.bk_cloud_id
+    rpc_results = batch_proxy_rpc(rpc_func, list(query_addr_map.keys()), params, workers)
+
+    failed_proxies = []
+    proxy_backends: Dict[str, List[str]] = {}
+    for query_addr, proxy_addr in query_addr_map.items():
+        result = rpc_results.get(query_addr)
+        try:
+            if isinstance(result, Exception):
+                raise result
+            proxy_backends[proxy_addr] = decode_func(result)
+        except Exception as e:  # pylint: disable=broad-except
+            failed_proxies.append({"proxy_addr": proxy_addr, "error": str(e)})
+
+    # 按后端配置的md5分组，proxy数最多的一组作为基准
+    md5_groups: Dict[str, List[str]] = defaultdict(list)
+    proxy_md5s = {}
+    for proxy_addr, lines in proxy_backends.items():
+        proxy_md5s[proxy_addr] = hashlib.md5("".join(line + "\n" for line in lines).encode("utf-8")).hexdigest()
+        md5_groups[proxy_md5s[proxy_addr]].append(proxy_addr)
+    baseline_md5 = max(md5_groups, key=lambda md5: (len(md5_groups[md5]), md5)) if md5_groups else ""
+    baseline_lines = set(proxy_backends[md5_groups[baseline_md5][0]]) if baseline_md5 else set()
+
+    inconsistent_proxies = []
+    for proxy_addr, lines in proxy_backends.items():
+        if proxy_md5s[proxy_addr] == baseline_md5:
+            continue
+        inconsistent_proxies.append(
             {
-                "addresses": proxy_addrs,
-                "db_num": DEFAULT_REDIS_DBNUM,
-                "password": passwd_ret.get("redis_proxy_password"),
-                "command": "info servers",
-                "bk_cloud_id": cluster.bk_cloud_id,
+                "proxy_addr": proxy_addr,
+                "backend_md5": proxy_md5s[proxy_addr],
+                "missing": sorted(baseline_lines - set(lines)),
+                "extra": sorted(set(lines) - baseline_lines),
             }
         )
-        for ele in resp:
-            backends_ret: list[PredixyInfoServer] = decode_predixy_info_servers(ele["result"])
-            sorted_backends: list[PredixyInfoServer] = sorted(backends_ret, key=lambda x: x.server)
-            sorted_str = ""
-            for bck in sorted_backends:
-                if bck.current_is_fail == 0:
-                    sorted_str += bck.__str__() + "\n"
-            # 求sorted_str的md5值
-            md5 = hashlib.md5(sorted_str.encode("utf-8")).hexdigest()
-            proxys_backend_md5.append(
-                {
-                    "proxy_addr": ele["address"],
-                    "backend_md5": md5,
-                }
-            )
-    # 检查md5是否一致
-    sorted_md5 = sorted(proxys_backend_md5, key=lambda x: x["backend_md5"])
-    if sorted_md5[0]["backend_md5"] != sorted_md5[-1]["backend_md5"]:
-        logger.error(
-            "proxy[{}->{}] backends is not same".format(sorted_md5[0]["proxy_addr"], sorted_md5[-1]["proxy_addr"])
-        )
-        raise Exception(
-            "proxy[{}->{}] backends is not same".format(sorted_md5[0]["proxy_addr"], sorted_md5[-1]["proxy_addr"])
-        )
+
+    return {
+        "cluster_id": cluster.id,
+        "immute_domain": cluster.immute_domain,
+        "consistent": not inconsistent_proxies and not failed_proxies,
+        "proxy_count": len(query_addr_map),
+        "baseline_md5": baseline_md5,
+        "inconsistent_proxies": inconsistent_proxies,
+        "failed_proxies": failed_proxies,
+    }
+
+
+def check_clusters_proxy_backends(cluster_ids: List[int], workers: int = PROXY_RPC_CONCURRENCY) -> List[Dict]:
+    """
+    并发检查多个集群的proxy后端一致性，可用于全量巡检
+    集群间并发，单个集群内的DRS请求串行，总并发数不超过 workers
+    """
+    clusters = Cluster.objects.filter(id__in=cluster_ids).prefetch_related("proxyinstance_set__machine")
+
+    def _check(cluster: Cluster) -> Dict[str, Any]:
+        try:
+            return diff_cluster_proxy_backends(cluster, workers=1)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("check cluster {} proxy backends failed".format(cluster.immute_domain))
+            return {
+                "cluster_id": cluster.id,
+                "immute_domain": cluster.immute_domain,
+                "consistent": False,
+                "proxy_count": 0,
+                "baseline_md5": "",
+                "inconsistent_proxies": [],
+                "failed_proxies": [{"proxy_addr": "", "error": str(e)}],
+            }
+        finally:
+            connections.close_all()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        return list(executor.map(_check, clusters))
+
+
+def check_cluster_proxy_backends_consistent(cluster_id: int):
+    cluster: Cluster = None
+    try:
+        cluster = Cluster.objects.prefetch_related("proxyinstance_set__machine").get(id=cluster_id)
+    except Cluster.DoesNotExist:
+        raise Exception("src_cluster {} does not exist".format(cluster_id))
+
+    diff_result = diff_cluster_proxy_backends(cluster)
+    if diff_result["consistent"]:
+        return diff_result
+
+    msg = "cluster {} proxy backends is not same, inconsistent proxies: {}, failed proxies: {}".format(
+        cluster.immute_domain,
+        json.dumps(diff_result["inconsistent_proxies"]),
+        json.dumps(diff_result["failed_proxies"]),
+    )
+    logger.error(msg)
+    raise Exception(msg)
 
 
 def get_twemproxy_cluster_server_shards(bk_biz_id: int, cluster_id: int, other_to_master: dict) -> dict:
@@ -552,7 +656,12 @@ def get_online_twemproxy_version(ip: str, port: int, bk_cloud_id: int) -> str:
     )
     if not resp or len(resp) == 0:
         return ""
-    version_str = json.loads(resp[0]["result"])["version"]
+    return parse_twemproxy_version(resp[0]["result"])
+
+
+def parse_twemproxy_version(result: str) -> str:
+    """解析twemproxy stats结果中的版本信息"""
+    version_str = json.loads(result)["version"]
     version_str = "twemproxy-" + version_str.replace("rc-", "")
     version_str = version_str.replace("v0.", "v")
     return version_str
@@ -574,7 +683,12 @@ def get_online_predixy_version(ip: str, port: int, bk_cloud_id: int, proxy_passw
     )
     if not resp or len(resp) == 0:
         return ""
-    for line in resp[0]["result"].split("\n"):
+    return parse_predixy_version(resp[0]["result"])
+
+
+def parse_predixy_version(result: str) -> str:
+    """解析predixy info Proxy结果中的版本信息"""
+    for line in result.split("\n"):
         if line.startswith("Version:"):
             return "predixy-" + line.split(":")[1]
     return ""
@@ -612,18 +726,34 @@ def get_cluster_proxy_version(cluster_id: int) -> list:
     获取redis cluster proxy版本列表
     """
     cluster = Cluster.objects.get(id=cluster_id)
-    versions = set()
-    passwd_ret = PayloadHandler.redis_get_password_by_cluster_id(cluster_id)
+    running_proxies = cluster.proxyinstance_set.filter(status=InstanceStatus.RUNNING).select_related("machine")
+    params = {"db_num": DEFAULT_REDIS_DBNUM, "bk_cloud_id": cluster.bk_cloud_id}
     if is_predixy_proxy_type(cluster.cluster_type):
-        for proxy in cluster.proxyinstance_set.filter(status=InstanceStatus.RUNNING):
-            versions.add(
-                get_online_predixy_version(
-                    proxy.machine.ip, proxy.port, cluster.bk_cloud_id, passwd_ret.get("redis_proxy_password")
-                )
-            )
+        passwd_ret = PayloadHandler.redis_get_password_by_cluster_id(cluster_id)
+        params.update(password=passwd_ret.get("redis_proxy_password"), command="info Proxy")
+        addresses = [proxy.ip_port for proxy in running_proxies]
+        rpc_func, parse_func = DRSApi.redis_rpc, parse_predixy_version
     elif is_twemproxy_proxy_type(cluster.cluster_type):
-        for proxy in cluster.proxyinstance_set.filter(status=InstanceStatus.RUNNING):
-            versions.add(get_online_twemproxy_version(proxy.machine.ip, proxy.port, cluster.bk_cloud_id))
+        params.update(password="", command="stats")
+        addresses = [
+            f"{proxy.machine.ip}{IP_PORT_DIVIDER}{proxy.port + DEFAULT_TWEMPROXY_ADMIN_PORT_EXTRA}"
+            for proxy in running_proxies
+        ]
+        rpc_func, parse_func = DRSApi.twemproxy_rpc, parse_twemproxy_version
+    else:
+        return []
+
+    versions, failed_proxies = set(), []
+    for addr, result in batch_proxy_rpc(rpc_func, addresses, params).items():
+        if isinstance(result, Exception):
+            failed_proxies.append(f"{addr}: {result}")
+            continue
+        versions.add(parse_func(result))
+    # 有proxy获取版本失败时抛出异常，由版本升级预检查和工具箱接口将失败的proxy报告给用户
+    if failed_proxies:
+        raise Exception(
+            _("集群 {} 获取proxy版本失败: {}").format(cluster.immute_domain, "; ".join(sorted(failed_proxies)))
+        )
     return list(versions)
 
 
@@ -13,6 +13,8 @@ import operator
 from typing import List
 
 from django.db.models import Q
+from django.utils.translation import ugettext as _
+from rest_framework import serializers
 
 from backend.components.mysql_partition.client import DBPartitionApi
 from backend.db_meta.enums import ClusterType
@@ -110,6 +112,21 @@ class PartitionManagePermission(ResourceActionPermission):
             self.resource_meta = getattr(ResourceEnum, f"{db_type.upper()}")
             return [cluster.id]
 
+        elif view.action == "batch_execute_partition":
+            from backend.db_services.partition.serializers import PartitionBatchRunSerializer
+
+            # 鉴权先于视图执行，需先校验请求数据，非法请求返回校验错误而非服务异常
+            serializer = PartitionBatchRunSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            cluster_ids = list({partition["cluster_id"] for partition in serializer.validated_data["partitions"]})
+            cluster = Cluster.objects.filter(id__in=cluster_ids).first()
+            if not cluster:
+                raise serializers.ValidationError(_("集群{}不存在").format(cluster_ids))
+            db_type = convert(cluster.cluster_type)
+            self.actions = [getattr(ActionEnum, f"{db_type.upper()}_PARTITION")]
+            self.resource_meta = getattr(ResourceEnum, f"{db_type.upper()}")
+            return cluster_ids
+
 
 class ModifyClusterPasswordPermission(ResourceActionPermission):
     """
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory
+
+from backend.bk_dataview.grafana.provisioning import Dashboard
+from backend.bk_dataview.grafana.state import ProvisionState
+from backend.bk_dataview.grafana.views import ProxyView
+from backend.db_meta.enums import ClusterType
+from backend.db_monitor.models import Dashboard as MonitorDash
+
+pytestmark = pytest.mark.django_db
+
+
+class FakeProxyResponse:
+    def __init__(self, content: bytes, content_type: str):
+        self.status_code = 200
+        self.headers = {"Content-Type": content_type, "Cache-Control": "no-cache"}
+        self._content = content
+        self.closed = False
+        self.read_chunks = 0
+
+    @property
+    def content(self):
+        return self._content
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._content), chunk_size):
+            self.read_chunks += 1
+            yield self._content[i : i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def proxy_view():
+    view = ProxyView()
+    view.request = RequestFactory().get("/grafana/")
+    view.request.user = MagicMock(is_superuser=False)
+    return view
+
+
+@pytest.fixture(autouse=True)
+def shared_cache():
+    ProvisionState.clear_local()
+    with patch("backend.bk_dataview.grafana.state.cache", LocMemCache("grafana", {})):
+        yield
+    ProvisionState.clear_local()
+
+
+class TestGrafanaProxy:
+    def test_stream_non_html_response(self, proxy_view):
+        proxy_response = FakeProxyResponse(b"x" * (200 * 1024), "application/json")
+        response = proxy_view.get_django_response(proxy_response)
+        assert isinstance(response, StreamingHttpResponse)
+        assert response["Cache-Control"] == "no-cache"
+        # 响应内容在迭代时才从上游读取
+        assert proxy_response.read_chunks == 0
+
+        assert b"".join(response.streaming_content) == proxy_response.content
+        assert proxy_response.read_chunks > 1
+        assert proxy_response.closed
+
+    def test_inject_code_into_html(self, proxy_view):
+        proxy_response = FakeProxyResponse(b"<html><head></head></html>", "text/html; charset=utf-8")
+        with patch("backend.bk_dataview.grafana.views.grafana_settings") as grafana_settings:
+            grafana_settings.CODE_INJECTIONS = {"<head>": "<head><script>inject</script>"}
+            response = proxy_view.get_django_response(proxy_response)
+        assert response.content == b"<html><head><script>inject</script></head></html>"
+
+    def test_provision_dashboard_only_when_changed(self, proxy_view):
+        dashboard = Dashboard(title="mysql", dashboard={"title": "mysql", "tags": [ClusterType.TenDBHA.value]})
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = {"uid": "uid", "url": "/d/uid/mysql"}
+
+        with patch("backend.bk_dataview.grafana.views.client.update_dashboard", return_value=resp) as update:
+            proxy_view.provision_dashboard(proxy_view.request, "dbm", 1, dashboard)
+            # 重启或其他进程中，面板定义未变化时不再注入
+            ProvisionState.clear_local()
+            proxy_view.provision_dashboard(proxy_view.request, "dbm", 1, dashboard)
+            assert update.call_count == 1
+
+            dashboard.dashboard["panels"] = []
+            proxy_view.provision_dashboard(proxy_view.request, "dbm", 1, dashboard)
+            assert update.call_count == 2
+
+        assert MonitorDash.objects.get(cluster_type=ClusterType.TenDBHA.value, name="mysql").uid == "uid"
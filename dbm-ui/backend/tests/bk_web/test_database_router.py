@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.db import OperationalError
+from django.http import HttpRequest
+
+from backend.bk_web.database_router import REPLICA_DB_ALIAS, ReplicaHealthChecker
+from backend.bk_web.middleware import ReplicaRoutingMiddleware
+from backend.configuration.constants import SystemSettingsEnum
+from backend.configuration.models import SystemSettings
+from backend.db_report.models import ReportDailySummary
+from backend.utils.local import local
+
+pytestmark = pytest.mark.django_db(databases=["default", "replica_db", "report_db"])
+
+
+@pytest.fixture(autouse=True)
+def replica_request():
+    ReplicaHealthChecker.reset()
+    request = HttpRequest()
+    request.use_replica = True
+    local.request = request
+    yield request
+    local.release()
+
+
+class TestReplicaRouter:
+    def test_read_from_replica(self, replica_request):
+        assert SystemSettings.objects.all().db == REPLICA_DB_ALIAS
+        # 独立数据库的 app 不受从库路由影响
+        assert ReportDailySummary.objects.all().db == "report_db"
+
+        replica_request.use_replica = False
+        assert SystemSettings.objects.all().db == "default"
+
+    def test_pinned_to_primary_after_write(self, replica_request):
+        SystemSettings.insert_setting_value(key=SystemSettingsEnum.REPORT_RETENTION.value, value={}, value_type="dict")
+        assert replica_request.pinned_to_primary
+        assert SystemSettings.objects.filter(key=SystemSettingsEnum.REPORT_RETENTION.value).db == "default"
+
+    def test_fallback_to_primary(self):
+        with patch.object(ReplicaHealthChecker, "get_replica_lag", side_effect=OperationalError("connect failed")):
+            assert SystemSettings.objects.all().db == "default"
+
+        ReplicaHealthChecker.reset()
+        with patch.object(ReplicaHealthChecker, "get_replica_lag", return_value=3600):
+            assert SystemSettings.objects.all().db == "default"
+
+        # 健康检查结果有缓存，从库恢复后需要等待下一次检查
+        with patch.object(ReplicaHealthChecker, "get_replica_lag", return_value=0):
+            assert SystemSettings.objects.all().db == "default"
+            ReplicaHealthChecker.reset()
+            assert SystemSettings.objects.all().db == REPLICA_DB_ALIAS
+
+    def test_no_request_use_primary(self):
+        local.release()
+        assert SystemSettings.objects.all().db == "default"
+
+
+def test_replica_routing_middleware():
+    view = SimpleNamespace(cls=SimpleNamespace(replica_actions=["list"]), actions={"get": "list", "post": "create"})
+    middleware = ReplicaRoutingMiddleware(lambda request: None)
+
+    request = HttpRequest()
+    request.method = "GET"
+    middleware.process_view(request, view, (), {})
+    assert request.use_replica
+
+    request.method = "POST"
+    middleware.process_view(request, view, (), {})
+    assert not request.use_replica
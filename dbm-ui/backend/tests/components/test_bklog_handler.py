@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from backend.components.bklog.handler import BKLogHandler
+from backend.tests.mock_data.components.bklog import BKLogFakeESBackend
+
+END_TIME = datetime(2024, 1, 2)
+START_TIME = END_TIME - timedelta(days=1)
+
+
+class TestBKLogHandler:
+    def test_query_all_logs_paging(self):
+        backend = BKLogFakeESBackend(total=25)
+        with patch("backend.components.bklog.handler.BKLogApi", backend):
+            result = BKLogHandler.query_all_logs("mysql_backup_result", START_TIME, END_TIME, page_size=10)
+
+        assert not result["truncated"]
+        assert [log["backup_id"] for log in result["logs"]] == list(range(25))
+        # 3页数据，后续分页均带上一页最后一条的排序值
+        assert len(backend.calls) == 3
+        assert backend.calls[1]["search_after"] == backend.hits[9]["sort"]
+
+    def test_query_all_logs_truncated(self):
+        backend = BKLogFakeESBackend(total=25)
+        with patch("backend.components.bklog.handler.BKLogApi", backend):
+            result = BKLogHandler.query_all_logs(
+                "mysql_backup_result", START_TIME, END_TIME, page_size=10, max_size=15
+            )
+        assert result["truncated"]
+        assert [log["backup_id"] for log in result["logs"]] == list(range(15))
+
+        # 从截断的位置继续拉取剩余日志
+        with patch("backend.components.bklog.handler.BKLogApi", backend):
+            result = BKLogHandler.query_all_logs(
+                "mysql_backup_result", START_TIME, END_TIME, page_size=10, search_after=result["search_after"]
+            )
+        assert not result["truncated"]
+        assert [log["backup_id"] for log in result["logs"]] == list(range(15, 25))
+
+        # 命中数恰好等于上限时不算截断
+        backend = BKLogFakeESBackend(total=20)
+        with patch("backend.components.bklog.handler.BKLogApi", backend):
+            result = BKLogHandler.query_all_logs(
+                "mysql_backup_result", START_TIME, END_TIME, page_size=10, max_size=20
+            )
+        assert not result["truncated"]
+        assert len(result["logs"]) == 20
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from django.db import OperationalError
+
+from backend.core.db_pool.pool import ConnectionPool
+from backend.django_dbconn_retry.apps import get_retry_backoff
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self):
+        if not self.alive:
+            raise OperationalError("MySQL server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool:
+    def test_reuse_connection(self):
+        pool = ConnectionPool("default", {"MAX_SIZE": 2})
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+        assert conn.rollbacks == 1
+        assert pool.acquire(FakeConnection) is conn
+        assert pool.stats.created == 1
+
+    def test_discard_unusable_connection(self):
+        pool = ConnectionPool("default", {"MAX_SIZE": 2})
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+        conn.alive = False
+
+        new_conn = pool.acquire(FakeConnection)
+        assert new_conn is not conn and conn.closed
+        assert pool.stats.ping_failures == 1
+
+        # 事务中关闭的连接不归还连接池
+        pool.release(new_conn, discard=True)
+        assert new_conn.closed
+        assert pool.get_stats()["idle"] == 0
+
+    def test_discard_idle_timeout_connection(self):
+        pool = ConnectionPool("default", {"MAX_SIZE": 2, "MAX_IDLE_TIME": 60})
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+        with patch("backend.core.db_pool.pool.time.monotonic", return_value=time.monotonic() + 120):
+            assert pool.acquire(FakeConnection) is not conn
+        assert conn.closed
+
+    def test_bounded_pool(self):
+        pool = ConnectionPool("default", {"MAX_SIZE": 2, "CHECKOUT_TIMEOUT": 0.1})
+        conns = [pool.acquire(FakeConnection) for __ in range(2)]
+        with pytest.raises(OperationalError):
+            pool.acquire(FakeConnection)
+        assert pool.stats.timeouts == 1
+
+        # 其他线程归还连接后，等待中的请求可以取到连接
+        pool.checkout_timeout = 5
+        threading.Timer(0.1, pool.release, args=(conns[0],)).start()
+        assert pool.acquire(FakeConnection) is conns[0]
+        assert pool.get_stats()["in_use"] == 2
+        assert pool.stats.created == 2
+
+    def test_connect_failure_release_slot(self):
+        pool = ConnectionPool("default", {"MAX_SIZE": 1, "CHECKOUT_TIMEOUT": 0.1})
+
+        def broken_connect():
+            raise OperationalError("can't connect")
+
+        with pytest.raises(OperationalError):
+            pool.acquire(broken_connect)
+        assert pool.acquire(FakeConnection)
+
+    def test_reclaim_connection_of_exited_thread(self):
+        pool = ConnectionPool("default", {"MAX_SIZE": 1, "CHECKOUT_TIMEOUT": 0.1})
+        leaked = []
+        # 线程退出前没有归还连接
+        thread = threading.Thread(target=lambda: leaked.append(pool.acquire(FakeConnection)))
+        thread.start()
+        thread.join()
+
+        conn = pool.acquire(FakeConnection)
+        assert conn is not leaked[0] and leaked[0].closed
+        assert pool.stats.reclaimed == 1
+        assert pool.get_stats()["in_use"] == 1
+
+        # 已回收的连接再归还时不会多释放信号量
+        pool.release(leaked[0])
+        with pytest.raises(OperationalError):
+            pool.acquire(FakeConnection)
+        pool.release(conn)
+        assert pool.acquire(FakeConnection) is conn
+
+
+def test_retry_backoff(settings):
+    settings.DBCONN_RETRY_BACKOFF = 0.2
+    settings.DBCONN_RETRY_MAX_BACKOFF = 1
+    for retries, upper in [(1, 0.2), (2, 0.4), (3, 0.8), (10, 1)]:
+        assert all(0 <= get_retry_backoff(retries) <= upper for __ in range(20))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.core.storages import constants
+from backend.core.storages.handlers import StorageHandler
+from backend.core.storages.storage import AdminFileSystemStorage
+
+MB = 1024 * 1024
+
+
+class FakeDownloadResponse:
+    """从本地文件流式读取的制品库下载响应"""
+
+    status_code = 200
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.headers = {}
+        self.read_size = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        with open(self.file_path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                self.read_size += len(chunk)
+                yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def generate_file(path, size):
+    line = b"2024-01-01 00:00:00 [INFO] backup progress\n"
+    with open(path, "wb") as f:
+        f.write(line * (size // len(line) + 1))
+
+
+@pytest.fixture
+def bkrepo_storage():
+    storage = MagicMock(storage_type=constants.StorageType.BLUEKING_ARTIFACTORY.value)
+    storage.url.side_effect = lambda path: f"http://bkrepo.example.com/{path}"
+    return storage
+
+
+class TestBatchFetchFileContent:
+    def test_fetch_from_archive(self, tmp_path, bkrepo_storage):
+        archive = tmp_path / "download.zip"
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, size in [("small.log", 1024), ("big1.log", 6 * MB), ("big2.log", 6 * MB), ("big3.log", 6 * MB)]:
+                generate_file(tmp_path / name, size)
+                zf.write(tmp_path / name, arcname=name)
+        resp = FakeDownloadResponse(archive)
+        bkrepo_storage.client.batch_download.return_value = resp
+
+        contents = StorageHandler(bkrepo_storage).batch_fetch_file_content(
+            ["small.log", "big1.log", "big2.log", "big3.log"]
+        )
+        assert resp.closed
+        assert [(c["path"], c["truncated"]) for c in contents] == [
+            ("small.log", False),
+            ("big1.log", True),
+            ("big2.log", True),
+            ("big3.log", True),
+        ]
+        assert contents[1]["url"] == "http://bkrepo.example.com/big1.log"
+        assert contents[1]["size"] > 6 * MB
+        # 单个文件和全部文件的内容都不超过上限
+        sizes = [len(c["content"]) for c in contents]
+        assert max(sizes) == constants.FETCH_FILE_CONTENT_MAX_SIZE
+        assert sum(sizes) <= constants.FETCH_FILE_CONTENT_TOTAL_MAX_SIZE
+
+    def test_archive_exceed_max_size(self, tmp_path, bkrepo_storage):
+        archive = tmp_path / "download.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a.log", "a" * MB)
+            zf.writestr("b.log", "b" * MB)
+        bkrepo_storage.client.batch_download.return_value = FakeDownloadResponse(archive)
+
+        with patch.object(constants, "BATCH_DOWNLOAD_MAX_SIZE", MB):
+            contents = StorageHandler(bkrepo_storage).batch_fetch_file_content(["a.log", "b.log"])
+        assert all(c["truncated"] and not c["content"] and c["url"] for c in contents)
+
+    def test_fetch_single_file(self, tmp_path, bkrepo_storage):
+        generate_file(tmp_path / "big.log", 50 * MB)
+        resp = FakeDownloadResponse(tmp_path / "big.log")
+        bkrepo_storage.client.batch_download.return_value = resp
+
+        content = StorageHandler(bkrepo_storage).batch_fetch_file_content(["big.log"])[0]
+        assert content["truncated"] and len(content["content"]) == constants.FETCH_FILE_CONTENT_MAX_SIZE
+        # 只下载预览需要的部分
+        assert resp.read_size < constants.FETCH_FILE_CONTENT_MAX_SIZE + 2 * constants.DOWNLOAD_CHUNK_SIZE
+        assert resp.closed
+
+    def test_fetch_from_local_storage(self, tmp_path):
+        generate_file(tmp_path / "small.log", 1024)
+        generate_file(tmp_path / "big.log", 3 * MB)
+        storage = AdminFileSystemStorage(location=str(tmp_path), base_url="/media/")
+
+        contents = StorageHandler(storage).batch_fetch_file_content(["small.log", "big.log"])
+        assert [(c["truncated"], c["url"]) for c in contents] == [
+            (False, "/media/small.log"),
+            (True, "/media/big.log"),
+        ]
+        assert contents[0]["content"].startswith("2024-01-01")
+        assert len(contents[1]["content"]) == constants.FETCH_FILE_CONTENT_MAX_SIZE
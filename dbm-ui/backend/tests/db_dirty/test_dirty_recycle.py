@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from backend.db_dirty.constants import DirtyMachineRecycleStatus
+from backend.db_dirty.handlers import DBDirtyMachineHandler
+from backend.db_dirty.models import DirtyMachine
+from backend.exceptions import ApiRequestError
+from backend.ticket.models import Flow, Ticket
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def dirty_machines():
+    ticket = Ticket.objects.create(id=1, bk_biz_id=1)
+    flow = Flow.objects.create(ticket=ticket, flow_type="INNER_FLOW", flow_obj_id="1001")
+    for bk_host_id in [1, 2, 3]:
+        DirtyMachine.objects.create(
+            bk_biz_id=1, bk_host_id=bk_host_id, ip=f"127.0.0.{bk_host_id}", ticket=ticket, flow=flow
+        )
+    yield
+
+
+class TestDirtyMachineRecycle:
+    @patch("backend.db_dirty.handlers.DBResourceApi")
+    @patch("backend.db_dirty.handlers.CcManage")
+    def test_transfer_track_per_host(self, cc_manage_mock, resource_api_mock, dirty_machines):
+        # 批量转移失败，逐台重试时主机2仍然失败
+        def recycle_host(bk_host_ids):
+            if len(bk_host_ids) > 1 or bk_host_ids == [2]:
+                raise Exception("cc error")
+
+        cc_manage_mock.return_value.recycle_host.side_effect = recycle_host
+        outcomes = DBDirtyMachineHandler.transfer_dirty_machines([1, 2, 3])
+
+        host__status = {outcome["bk_host_id"]: outcome["recycle_status"] for outcome in outcomes}
+        assert host__status == {
+            1: DirtyMachineRecycleStatus.RESOURCE_REMOVED,
+            2: DirtyMachineRecycleStatus.FAILED,
+            3: DirtyMachineRecycleStatus.RESOURCE_REMOVED,
+        }
+        resource_api_mock.resource_delete.assert_called_once_with(
+            params={"bk_host_ids": [1, 3]}, raise_exception=False
+        )
+        assert list(DirtyMachine.objects.values_list("bk_host_id", flat=True)) == [2]
+        assert DirtyMachine.objects.get(bk_host_id=2).recycle_retries == 1
+
+        summary = DBDirtyMachineHandler.recycle_summary()
+        assert summary["status_count"][DirtyMachineRecycleStatus.FAILED] == 1
+        assert [host["bk_host_id"] for host in summary["stuck_hosts"]] == [2]
+
+    @patch("backend.db_dirty.handlers.DBResourceApi")
+    @patch("backend.db_dirty.handlers.CcManage")
+    def test_retry_from_transferred(self, cc_manage_mock, resource_api_mock, dirty_machines):
+        # 资源池移除失败的主机停留在已转移阶段，重试时不再重复转移模块
+        resource_api_mock.resource_delete.side_effect = ApiRequestError()
+        DBDirtyMachineHandler.transfer_dirty_machines([1])
+        assert DirtyMachine.objects.get(bk_host_id=1).recycle_status == DirtyMachineRecycleStatus.TRANSFERRED
+
+        cc_manage_mock.reset_mock()
+        resource_api_mock.resource_delete.side_effect = None
+        DBDirtyMachineHandler.retry_stuck_dirty_machines()
+        cc_manage_mock.return_value.recycle_host.assert_not_called()
+        assert not DirtyMachine.objects.filter(bk_host_id=1).exists()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import datetime
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from backend.db_event.constants import AnalysisDimension
+from backend.db_event.handlers import DBHAEventHandler
+from backend.db_event.models import DBHASwitchEvent, DBHASwitchLog
+
+pytestmark = pytest.mark.django_db
+
+
+def make_switch(uid, start, finished="", result="", app="1"):
+    return {
+        "uid": uid,
+        "app": app,
+        "cloud_id": 0,
+        "cluster": f"cluster{uid}.db",
+        "ip": "127.0.0.1",
+        "port": 20000,
+        "db_type": "tendbha",
+        "db_role": "backend",
+        "switch_start_time": start,
+        "switch_finished_time": finished,
+        "switch_result": result,
+        "idc_id": 1,
+    }
+
+
+class FakeHADBApi:
+    """返回 uid 不小于查询值的切换事件，并按 uid 倒序分页的 HADB"""
+
+    switches = []
+    queries = []
+
+    @classmethod
+    def switch_queue(cls, params):
+        uid, page = params["query_args"]["uid"], params["page_args"]
+        cls.queries.append((uid, page["offset"]))
+        switches = sorted([switch for switch in cls.switches if switch["uid"] >= uid], key=lambda x: -x["uid"])
+        return switches[page["offset"] : page["offset"] + page["limit"]]
+
+    @classmethod
+    def switch_logs(cls, params, raw=False):
+        sw_id = params["query_args"]["sw_id"]
+        return [{"uid": sw_id * 10 + i, "ip": "127.0.0.1", "result": "info", "comment": f"step{i}"} for i in range(2)]
+
+
+@pytest.fixture(autouse=True)
+def fake_hadb():
+    FakeHADBApi.switches, FakeHADBApi.queries = [], []
+    with patch("backend.db_event.handlers.HADBApi", FakeHADBApi):
+        yield
+
+
+class TestDBHAEvent:
+    def test_incremental_sync(self):
+        now = timezone.now()
+        start = (now - datetime.timedelta(minutes=10)).isoformat()
+        finished = (now - datetime.timedelta(minutes=9)).isoformat()
+        FakeHADBApi.switches = [make_switch(1, start, finished, "success"), make_switch(2, start)]
+
+        DBHAEventHandler.sync_switch_events()
+        assert DBHASwitchEvent.objects.count() == 2
+        assert DBHASwitchEvent.objects.get(uid=1).recover_seconds == 60
+        assert DBHASwitchEvent.objects.get(uid=1).idc == "1"
+
+        # 未结束的事件会被重新拉取并更新
+        FakeHADBApi.switches[1] = make_switch(2, start, finished, "failed")
+        FakeHADBApi.switches.append(make_switch(3, start, finished, "success"))
+        DBHAEventHandler.sync_switch_events()
+        assert FakeHADBApi.queries[-1] == (2, 0)
+        assert DBHASwitchEvent.objects.count() == 3
+        assert DBHASwitchEvent.objects.get(uid=2).switch_result == "failed"
+
+        # 已结束事件的日志只同步一次，之后从本地读取
+        DBHAEventHandler.sync_switch_logs()
+        assert DBHASwitchLog.objects.count() == 6
+        assert not DBHASwitchEvent.objects.filter(logs_synced=False).exists()
+        with patch.object(FakeHADBApi, "switch_logs", side_effect=Exception("should not call")):
+            logs = DBHAEventHandler.get_switch_logs(1)
+        assert [log["message"] for log in logs] == ["[dbha]: step0", "[dbha]: step1"]
+
+    @patch("backend.db_event.handlers.DBHA_EVENT_SYNC_PAGE_SIZE", 2)
+    def test_sync_by_page(self):
+        now = timezone.now()
+        start = (now - datetime.timedelta(minutes=10)).isoformat()
+        finished = (now - datetime.timedelta(minutes=9)).isoformat()
+        FakeHADBApi.switches = [make_switch(uid, start, finished, "success") for uid in range(1, 6)]
+        DBHAEventHandler.sync_switch_events()
+        assert FakeHADBApi.queries == [(1, 0), (1, 2), (1, 4)]
+        assert DBHASwitchEvent.objects.count() == 5
+
+        # 游标事件不会被重复拉取
+        FakeHADBApi.queries = []
+        DBHAEventHandler.sync_switch_events()
+        assert FakeHADBApi.queries == [(6, 0)]
+
+    @patch("backend.db_event.handlers.DBHA_EVENT_SYNC_ROUNDS", 2)
+    @patch("backend.db_event.handlers.DBHA_EVENT_SYNC_PAGE_SIZE", 2)
+    def test_sync_bounded_by_rounds(self):
+        now = timezone.now()
+        start = (now - datetime.timedelta(minutes=10)).isoformat()
+        finished = (now - datetime.timedelta(minutes=9)).isoformat()
+        FakeHADBApi.switches = [make_switch(uid, start, finished, "success") for uid in range(1, 11)]
+        DBHAEventHandler.sync_switch_events()
+        # 首次同步只拉取最新的事件，游标不推进
+        assert list(DBHASwitchEvent.objects.order_by("uid").values_list("uid", flat=True)) == [7, 8, 9, 10]
+
+        # 同步期间新增的事件使分页后移，之后从记录的偏移继续拉取，不会跳过更早的事件
+        FakeHADBApi.switches.append(make_switch(11, start, finished, "success"))
+        DBHAEventHandler.sync_switch_events()
+        DBHAEventHandler.sync_switch_events()
+        assert DBHASwitchEvent.objects.filter(uid__lte=10).count() == 10
+
+        # 拉取完成后游标推进到已拉取的最大事件，未拉取的新事件在下次同步
+        FakeHADBApi.queries = []
+        DBHAEventHandler.sync_switch_events()
+        assert FakeHADBApi.queries[0] == (11, 0)
+        assert DBHASwitchEvent.objects.filter(uid=11).exists()
+
+    @patch("backend.db_event.handlers.DBHA_EVENT_SYNC_PAGE_SIZE", 2)
+    def test_refresh_unfinished_events(self):
+        now = timezone.now()
+        start = (now - datetime.timedelta(minutes=10)).isoformat()
+        finished = (now - datetime.timedelta(minutes=9)).isoformat()
+        FakeHADBApi.switches = [make_switch(1, start)] + [
+            make_switch(uid, start, finished, "success") for uid in range(2, 6)
+        ]
+        DBHAEventHandler.sync_switch_events()
+
+        # 未结束的事件不在增量拉取的范围内，也会被重新拉取并更新
+        FakeHADBApi.switches[0] = make_switch(1, start, finished, "failed")
+        DBHAEventHandler.sync_switch_events()
+        assert DBHASwitchEvent.objects.get(uid=1).switch_result == "failed"
+
+    def test_analysis(self):
+        now = timezone.now()
+        start = (now - datetime.timedelta(minutes=10)).isoformat()
+        FakeHADBApi.switches = [
+            make_switch(1, start, (now - datetime.timedelta(minutes=9)).isoformat(), "success", app="1"),
+            make_switch(2, start, (now - datetime.timedelta(minutes=7)).isoformat(), "failed", app="1"),
+            make_switch(3, start, (now - datetime.timedelta(minutes=8)).isoformat(), "success", app="2"),
+        ]
+        DBHAEventHandler.sync_switch_events()
+
+        stats = DBHAEventHandler.analysis(
+            start_time=now - datetime.timedelta(days=1), end_time=now, dimension=AnalysisDimension.BIZ
+        )
+        stats = {stat["bk_biz_id"]: stat for stat in stats}
+        assert stats[1]["switch_count"] == 2
+        assert stats[1]["success_rate"] == 0.5
+        assert stats[1]["mttr"] == 120
+        assert stats[2]["switch_count"] == 1
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import ipaddress
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.db_meta.enums import AccessLayer, ClusterType, InstanceRole, MachineType
+from backend.db_meta.flatten.tendis_cluster import tendis_cluster
+from backend.db_meta.models import BKCity, Cluster, Machine, NosqlStorageSetDtl, StorageInstance, StorageInstanceTuple
+from backend.tests.mock_data import constant
+
+pytestmark = pytest.mark.django_db
+
+SEGMENT_COUNT = 4
+
+
+def create_machine(ip: str) -> Machine:
+    return Machine.objects.create(
+        ip=ip,
+        bk_biz_id=constant.BK_BIZ_ID,
+        machine_type=MachineType.TENDISCACHE.value,
+        bk_city=BKCity.objects.first(),
+        access_layer=AccessLayer.STORAGE,
+        bk_host_id=int(ipaddress.IPv4Address(ip)),
+    )
+
+
+def create_twemproxy_cluster(cluster_id: int, segment_count: int) -> Cluster:
+    """创建一个 twemproxy 集群，每个分片一对主从，主从分别部署在两台机器上"""
+    cluster = Cluster.objects.create(
+        id=cluster_id,
+        bk_biz_id=constant.BK_BIZ_ID,
+        name=f"cache{cluster_id}",
+        immute_domain=f"cache{cluster_id}.test.db",
+        cluster_type=ClusterType.TendisTwemproxyRedisInstance.value,
+    )
+    master_machine = create_machine(f"127.0.{cluster_id}.1")
+    slave_machine = create_machine(f"127.0.{cluster_id}.2")
+    for index in range(segment_count):
+        port = 30000 + index
+        master = StorageInstance.objects.create(
+            machine=master_machine, port=port, instance_role=InstanceRole.REDIS_MASTER.value
+        )
+        slave = StorageInstance.objects.create(
+            machine=slave_machine, port=port, instance_role=InstanceRole.REDIS_SLAVE.value
+        )
+        master.cluster.add(cluster)
+        slave.cluster.add(cluster)
+        StorageInstanceTuple.objects.create(ejector=master, receiver=slave)
+        NosqlStorageSetDtl.objects.create(
+            bk_biz_id=constant.BK_BIZ_ID, instance=master, cluster=cluster, seg_range=f"{index}-{index}"
+        )
+    return cluster
+
+
+def count_flatten_queries(cluster_ids) -> int:
+    with CaptureQueriesContext(connection) as ctx:
+        tendis_cluster(Cluster.objects.filter(id__in=cluster_ids))
+    return len(ctx.captured_queries)
+
+
+class TestTendisClusterFlatten:
+    def test_twemproxy_segments(self, create_city):
+        cluster = create_twemproxy_cluster(1, SEGMENT_COUNT)
+        [detail] = tendis_cluster(Cluster.objects.filter(id=cluster.id))
+
+        assert detail["redis_master_ips_set"] == ["127.0.1.1"]
+        assert detail["redis_slave_ips_set"] == ["127.0.1.2"]
+        # 主从按分片范围一一对应
+        assert detail["redis_master_set"] == [f"127.0.1.1:{30000 + i} {i}-{i}" for i in range(SEGMENT_COUNT)]
+        assert detail["redis_slave_set"] == [f"127.0.1.2:{30000 + i} {i}-{i}" for i in range(SEGMENT_COUNT)]
+
+    def test_queries_not_grow_with_segments(self, create_city):
+        create_twemproxy_cluster(1, 1)
+        create_twemproxy_cluster(2, SEGMENT_COUNT)
+        create_twemproxy_cluster(3, SEGMENT_COUNT)
+
+        # 查询次数与集群数、分片数无关
+        assert count_flatten_queries([1]) == count_flatten_queries([1, 2, 3])
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from backend.db_monitor.constants import PolicySyncStatus
+from backend.db_monitor.exceptions import BkMonitorSaveAlarmException
+from backend.db_monitor.models import MonitorPolicy
+
+# 策略推送在线程池中执行，需要真实提交事务才能被其他连接看到
+pytestmark = pytest.mark.django_db(transaction=True)
+
+MOCK_BKM_DBM_REPORT = {"event": {"data_id": 1}, "metric": {"data_id": 2}}
+
+
+class FakeMonitorApi:
+    """模拟监控策略接口：记录推送过的策略，可指定失败的策略"""
+
+    def __init__(self, fail_names=None):
+        self.fail_names = set(fail_names or [])
+        self.saved = []
+        self.deleted = []
+        self._next_id = 1000
+        self._lock = threading.Lock()
+
+    def save(self, params):
+        with self._lock:
+            if params["name"] in self.fail_names:
+                raise BkMonitorSaveAlarmException(message="mocked failure")
+            self.saved.append(params["name"])
+            if not params.get("id"):
+                self._next_id += 1
+                params = {**params, "id": self._next_id}
+            return params
+
+    def delete(self, monitor_policy_id):
+        with self._lock:
+            self.deleted.append(monitor_policy_id)
+
+
+def make_template(name, version=1, deleted=False, threshold=90):
+    template = {
+        "bk_biz_id": 0,
+        "name": name,
+        "db_type": "mysql",
+        "version": version,
+        "details": {
+            "name": name,
+            "labels": ["DBM", "DBM_MYSQL"],
+            "items": [
+                {
+                    "query_configs": [{"alias": "a", "agg_condition": []}],
+                    "algorithms": [
+                        {
+                            "type": "Threshold",
+                            "level": 1,
+                            "config": [[{"method": "gte", "threshold": threshold}]],
+                            "unit_prefix": "%",
+                        }
+                    ],
+                }
+            ],
+            "notice": {"signal": ["abnormal"], "user_groups": [], "options": {"assign_mode": ["by_rule"]}},
+        },
+    }
+    if deleted:
+        template["deleted"] = True
+    return template
+
+
+@pytest.fixture
+def tpls_dir(tmp_path):
+    def write_templates(*templates):
+        for template in templates:
+            (tmp_path / f"{template['name']}.json").write_text(json.dumps(template), encoding="utf-8")
+        return tmp_path
+
+    return write_templates
+
+
+def sync(tpls_dir, fake_api, **kwargs):
+    with patch("backend.db_monitor.models.alarm.TPLS_ALARM_DIR", str(tpls_dir)), patch(
+        "backend.db_monitor.models.alarm.bkm_save_alarm_strategy", fake_api.save
+    ), patch("backend.db_monitor.models.alarm.bkm_delete_alarm_strategy", fake_api.delete), patch(
+        "backend.db_monitor.models.alarm.SystemSettings.get_setting_value", return_value=MOCK_BKM_DBM_REPORT
+    ):
+        return MonitorPolicy.sync_plat_monitor_policy(action_id=1, **kwargs)
+
+
+class TestSyncPlatMonitorPolicy:
+    def test_create_then_skip_unchanged(self, tpls_dir):
+        tpls = tpls_dir(make_template("policy_a"), make_template("policy_b"))
+        fake_api = FakeMonitorApi()
+
+        report = sync(tpls, fake_api)
+        assert {name: r["status"] for name, r in report.items()} == {
+            "policy_a": PolicySyncStatus.CREATED,
+            "policy_b": PolicySyncStatus.CREATED,
+        }
+        assert sorted(fake_api.saved) == ["policy_a", "policy_b"]
+        assert MonitorPolicy.objects.exclude(content_hash="").count() == 2
+
+        # 模板未变更，不再推送到监控
+        fake_api = FakeMonitorApi()
+        report = sync(tpls, fake_api)
+        assert {r["status"] for r in report.values()} == {PolicySyncStatus.UNCHANGED}
+        assert fake_api.saved == []
+
+        # 强制同步会推送全部策略
+        report = sync(tpls, fake_api, force=True)
+        assert {r["status"] for r in report.values()} == {PolicySyncStatus.UPDATED}
+        assert sorted(fake_api.saved) == ["policy_a", "policy_b"]
+
+    def test_update_changed_only(self, tpls_dir):
+        tpls = tpls_dir(make_template("policy_a"), make_template("policy_b"))
+        sync(tpls, FakeMonitorApi())
+        monitor_policy_id = MonitorPolicy.objects.get(name="policy_a").monitor_policy_id
+
+        # 内容变更但版本号未变化，也需要更新
+        tpls = tpls_dir(make_template("policy_a", threshold=80))
+        fake_api = FakeMonitorApi()
+        report = sync(tpls, fake_api, concurrency=1)
+        assert report["policy_a"]["status"] == PolicySyncStatus.UPDATED
+        assert report["policy_b"]["status"] == PolicySyncStatus.UNCHANGED
+        assert fake_api.saved == ["policy_a"]
+
+        policy = MonitorPolicy.objects.get(name="policy_a")
+        assert policy.monitor_policy_id == monitor_policy_id
+        assert policy.test_rules[0]["config"] == [[{"method": "gte", "threshold": 80}]]
+
+    def test_failed_and_deleted(self, tpls_dir):
+        tpls = tpls_dir(make_template("policy_a"), make_template("policy_b"))
+        sync(tpls, FakeMonitorApi())
+        old_hash = MonitorPolicy.objects.get(name="policy_b").content_hash
+
+        tpls = tpls_dir(make_template("policy_a", deleted=True), make_template("policy_b", threshold=70))
+        fake_api = FakeMonitorApi(fail_names=["policy_b"])
+        report = sync(tpls, fake_api)
+        assert report["policy_a"]["status"] == PolicySyncStatus.DELETED
+        assert report["policy_b"]["status"] == PolicySyncStatus.FAILED
+        assert report["policy_b"]["message"]
+        assert len(fake_api.deleted) == 1
+        assert not MonitorPolicy.objects.filter(name="policy_a").exists()
+        # 推送失败的策略保留原摘要，下次同步会重试
+        assert MonitorPolicy.objects.get(name="policy_b").content_hash == old_hash
+
+    def test_legacy_policy_without_hash(self, tpls_dir):
+        tpls = tpls_dir(make_template("policy_a", version=2))
+        sync(tpls, FakeMonitorApi())
+        MonitorPolicy.objects.filter(name="policy_a").update(content_hash="")
+
+        # 历史策略按版本比较，版本未升级时跳过并补齐摘要
+        fake_api = FakeMonitorApi()
+        report = sync(tpls, fake_api)
+        assert report["policy_a"]["status"] == PolicySyncStatus.UNCHANGED
+        assert fake_api.saved == []
+        assert MonitorPolicy.objects.get(name="policy_a").content_hash
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.db_meta.enums import ClusterType
+from backend.db_periodic_task.local_tasks.dbmon_heartbeat import heartbeat_report
+from backend.db_report.models import DbmonHeartbeatReport
+
+pytestmark = pytest.mark.django_db
+
+REPORT_PATH = "backend.db_periodic_task.local_tasks.dbmon_heartbeat.heartbeat_report"
+
+
+class FakeCache:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+
+def mock_cluster(index: int):
+    return MagicMock(
+        id=index,
+        immute_domain=f"cache{index}.test.db",
+        cluster_type=ClusterType.TendisPredixyTendisplusCluster.value,
+        bk_biz_id=1,
+        bk_cloud_id=0,
+        creator="admin",
+    )
+
+
+def mock_cluster_info(index: int):
+    master_ip, slave_ip, proxy_ip = f"1.1.{index}.1", f"1.1.{index}.2", f"1.1.{index}.3"
+    return {
+        "id": index,
+        "redis_master_ips_set": {master_ip},
+        "redis_slave_ips_set": {slave_ip},
+        "twemproxy_ips_set": {proxy_ip},
+        "redis_master_set": [f"{master_ip}:30000"],
+        "redis_slave_set": [f"{slave_ip}:30000"],
+        "twemproxy_ports": [50000],
+    }
+
+
+class TestCheckDbmonHeartbeat:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.clusters = [mock_cluster(1), mock_cluster(2)]
+        self.alive_ips = {
+            cluster.immute_domain: {f"1.1.{cluster.id}.{i}" for i in range(1, 4)} for cluster in self.clusters
+        }
+        self.promqls = []
+        self.cache = FakeCache()
+
+        def unify_query(params, use_admin):
+            promql = params["query_configs"][0]["promql"]
+            self.promqls.append(promql)
+            series = []
+            for domain, ips in self.alive_ips.items():
+                if domain.replace(".", "\\\\.") not in promql:
+                    continue
+                series.extend(
+                    {"dimensions": {"cluster_domain": domain, "target": ip}, "datapoints": [[0, 1], [1, 2]]}
+                    for ip in ips
+                )
+            return {"series": series}
+
+        cluster_infos = {cluster.id: mock_cluster_info(cluster.id) for cluster in self.clusters}
+        with patch(f"{REPORT_PATH}.HEARTBEAT_QUERY_BATCH_SIZE", 1), patch(f"{REPORT_PATH}.cache", self.cache), patch(
+            f"{REPORT_PATH}.Cluster.objects.filter"
+        ) as cluster_filter, patch(
+            f"{REPORT_PATH}.api.cluster.nosqlcomm.other.get_clusters_details",
+            side_effect=lambda ids: [cluster_infos[cluster_id] for cluster_id in ids],
+        ), patch(
+            f"{REPORT_PATH}.BKMonitorV3Api.unify_query", side_effect=unify_query
+        ), patch(
+            f"{REPORT_PATH}.AppCache.objects.filter"
+        ) as app_filter, patch(
+            f"{REPORT_PATH}.DBAdministrator"
+        ) as dba:
+            cluster_filter.return_value.only.return_value = self.clusters
+            app_filter.return_value.first.return_value = MagicMock(db_app_abbr="test")
+            dba.return_value.get_biz_db_type_admins.return_value = ["admin"]
+            yield
+
+    def check(self):
+        self.promqls.clear()
+        heartbeat_report.check_dbmon_heart_beat()
+        return list(DbmonHeartbeatReport.objects.order_by("id").values("cluster", "instance", "status"))
+
+    def test_query_by_batch(self):
+        self.check()
+        # 每批集群聚合为一次查询，域名中的 . 被转义
+        assert len(self.promqls) == 2
+        assert 'cluster_domain=~"cache1\\\\.test\\\\.db"' in self.promqls[0]
+        assert 'cluster_domain=~"cache2\\\\.test\\\\.db"' in self.promqls[1]
+
+    def test_heartbeat_state_transitions(self):
+        missing_key = "cache1.test.db#1.1.1.2 30000"
+
+        # 心跳正常：不写记录，缓存为空
+        assert self.check() == []
+        assert self.cache.get(heartbeat_report.CACHE_DBMON_HEARTBEAT_MISSING) == {}
+
+        # 正常 -> 超时：写入一条超时记录，缓存中记录缺失实例
+        self.alive_ips["cache1.test.db"].discard("1.1.1.2")
+        timeout_row = {"cluster": "cache1.test.db", "instance": "1.1.1.2 30000", "status": False}
+        assert self.check() == [timeout_row]
+        assert list(self.cache.get(heartbeat_report.CACHE_DBMON_HEARTBEAT_MISSING)) == [missing_key]
+
+        # 状态不变：不重复上报，缓存保持不变
+        assert self.check() == [timeout_row]
+        assert list(self.cache.get(heartbeat_report.CACHE_DBMON_HEARTBEAT_MISSING)) == [missing_key]
+
+        # 超时 -> 恢复：写入一条恢复记录，缓存清空
+        self.alive_ips["cache1.test.db"].add("1.1.1.2")
+        recovered_row = {**timeout_row, "status": True}
+        assert self.check() == [timeout_row, recovered_row]
+        assert self.cache.get(heartbeat_report.CACHE_DBMON_HEARTBEAT_MISSING) == {}
+
+    def test_keep_state_when_query_failed(self):
+        self.alive_ips["cache1.test.db"].discard("1.1.1.2")
+        self.check()
+
+        # 查询失败的集群沿用上一轮状态，既不重复上报超时，也不误报恢复
+        with patch(f"{REPORT_PATH}.BKMonitorV3Api.unify_query", side_effect=Exception("timeout")):
+            assert len(self.check()) == 1
+        missing = self.cache.get(heartbeat_report.CACHE_DBMON_HEARTBEAT_MISSING)
+        assert list(missing) == ["cache1.test.db#1.1.1.2 30000"]
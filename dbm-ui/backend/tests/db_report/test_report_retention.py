@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import datetime
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from backend.configuration.constants import SystemSettingsEnum
+from backend.configuration.models import SystemSettings
+from backend.db_meta.enums import ClusterType
+from backend.db_report.enums import MysqlBackupCheckSubType, ReportRetentionMode, ReportTrendGroupBy
+from backend.db_report.models import MysqlBackupCheckReport, ReportDailySummary
+from backend.db_report.report_retention import ReportRetentionHandler
+
+pytestmark = pytest.mark.django_db(databases=["default", "report_db"])
+
+
+def create_reports(days_ago, count, failed=0, bk_biz_id=1, subtype=MysqlBackupCheckSubType.FullBackup.value):
+    create_at = timezone.now() - datetime.timedelta(days=days_ago)
+    reports = MysqlBackupCheckReport.objects.bulk_create(
+        [
+            MysqlBackupCheckReport(
+                bk_biz_id=bk_biz_id,
+                cluster=f"cluster{i}.db",
+                cluster_type=ClusterType.TenDBHA,
+                subtype=subtype,
+                status=i >= failed,
+            )
+            for i in range(count)
+        ]
+    )
+    MysqlBackupCheckReport.objects.filter(id__in=[report.id for report in reports]).update(create_at=create_at)
+
+
+def set_retention(days, mode=ReportRetentionMode.DELETE.value):
+    SystemSettings.insert_setting_value(
+        key=SystemSettingsEnum.REPORT_RETENTION.value,
+        value={"default": {"days": days, "mode": mode}},
+        value_type="dict",
+    )
+
+
+class TestReportRetention:
+    def test_rollup_report(self):
+        create_reports(days_ago=2, count=3, failed=1)
+        create_reports(days_ago=1, count=2, failed=2)
+        create_reports(days_ago=1, count=1, subtype=MysqlBackupCheckSubType.BinlogSeq.value)
+        # 今天的巡检尚未结束，不参与汇总
+        create_reports(days_ago=0, count=5)
+
+        ReportRetentionHandler.rollup_report(MysqlBackupCheckReport)
+        summaries = ReportDailySummary.objects.filter(report_type="MysqlBackupCheckReport").order_by("date", "subtype")
+        assert [(s.subtype, s.total_count, s.failed_count) for s in summaries] == [
+            (MysqlBackupCheckSubType.FullBackup.value, 3, 1),
+            (MysqlBackupCheckSubType.BinlogSeq.value, 1, 0),
+            (MysqlBackupCheckSubType.FullBackup.value, 2, 2),
+        ]
+
+        # 重复汇总结果不变
+        ReportRetentionHandler.rollup_report(MysqlBackupCheckReport)
+        assert ReportDailySummary.objects.filter(report_type="MysqlBackupCheckReport").count() == 3
+
+    def test_no_purge_by_default(self):
+        create_reports(days_ago=200, count=2)
+        ReportRetentionHandler.rollup_report(MysqlBackupCheckReport)
+
+        # 管理员未配置保留天数时，不清理任何明细
+        assert ReportRetentionHandler.purge_report(MysqlBackupCheckReport) == 0
+        assert MysqlBackupCheckReport.objects.count() == 2
+
+    def test_purge_after_rollup(self):
+        set_retention(days=10)
+        create_reports(days_ago=30, count=3, failed=1)
+        create_reports(days_ago=2, count=2)
+
+        # 未汇总前不清理明细
+        assert ReportRetentionHandler.purge_report(MysqlBackupCheckReport) == 0
+
+        ReportRetentionHandler.rollup_report(MysqlBackupCheckReport)
+        with patch("backend.db_report.report_retention.REPORT_PURGE_CHUNK_SIZE", 2):
+            assert ReportRetentionHandler.purge_report(MysqlBackupCheckReport) == 3
+        assert MysqlBackupCheckReport.objects.count() == 2
+
+        # 明细清理后，汇总数据依然可用于趋势统计
+        today = timezone.localdate()
+        trend = ReportRetentionHandler.query_trend(
+            report_type="MysqlBackupCheckReport",
+            start_date=today - datetime.timedelta(days=60),
+            end_date=today,
+            group_by=ReportTrendGroupBy.BIZ.value,
+            subtype=MysqlBackupCheckSubType.FullBackup.value,
+        )
+        assert trend == [
+            {"date": today - datetime.timedelta(days=30), "bk_biz_id": 1, "total_count": 3, "failed_count": 1},
+            {"date": today - datetime.timedelta(days=2), "bk_biz_id": 1, "total_count": 2, "failed_count": 0},
+        ]
+
+    def test_archive_before_purge(self):
+        set_retention(days=10, mode=ReportRetentionMode.ARCHIVE.value)
+        create_reports(days_ago=30, count=2)
+        ReportRetentionHandler.rollup_report(MysqlBackupCheckReport)
+
+        with patch("backend.db_report.report_retention.get_storage") as get_storage:
+            get_storage.return_value.save.side_effect = Exception("storage unavailable")
+            ReportRetentionHandler.rollup_and_purge()
+        # 归档失败时不能删除明细
+        assert MysqlBackupCheckReport.objects.count() == 2
+
+        with patch("backend.db_report.report_retention.get_storage") as get_storage:
+            assert ReportRetentionHandler.purge_report(MysqlBackupCheckReport) == 2
+        assert get_storage.return_value.save.call_count == 1
+        assert MysqlBackupCheckReport.objects.count() == 0
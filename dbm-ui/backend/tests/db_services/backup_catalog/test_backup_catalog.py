@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from backend.db_services.backup_catalog.constants import BackupCollector, BackupSegmentType
+from backend.db_services.backup_catalog.handlers import BackupCatalogHandler
+from backend.db_services.backup_catalog.models import BackupCatalog
+
+pytestmark = pytest.mark.django_db
+
+NOW = datetime(2024, 2, 1, 12, tzinfo=timezone.utc)
+
+
+def mock_binlog(index: int, port: int = 20000):
+    start_time = NOW - timedelta(hours=10) + timedelta(minutes=10 * index)
+    return {
+        "cluster_id": 1,
+        "bk_biz_id": 3,
+        "host": "127.0.0.1",
+        "port": port,
+        "filename": f"binlog{port}.{index:06d}",
+        "start_time": start_time.isoformat(),
+        "stop_time": (start_time + timedelta(minutes=10)).isoformat(),
+        "task_id": str(index),
+    }
+
+
+def mock_full_backup(backup_id: str):
+    return {
+        "cluster_id": 1,
+        "bk_biz_id": 3,
+        "backup_id": backup_id,
+        "backup_host": "127.0.0.1",
+        "backup_port": 20000,
+        "backup_begin_time": (NOW - timedelta(hours=12)).isoformat(),
+        "backup_consistent_time": (NOW - timedelta(hours=11)).isoformat(),
+        "is_full_backup": True,
+    }
+
+
+class TestBackupCatalogHandler:
+    def test_sync_catalog_dedup(self):
+        logs = [mock_full_backup("backup-1"), mock_full_backup("backup-1")]
+        with patch(
+            "backend.db_services.backup_catalog.handlers.BKLogHandler.query_all_logs",
+            return_value={"logs": logs, "truncated": False},
+        ) as query_mock:
+            BackupCatalogHandler.sync_catalog(BackupCollector.MYSQL_DBBACKUP, now=NOW)
+            # 重复同步按日志内容去重
+            BackupCatalogHandler.sync_catalog(BackupCollector.MYSQL_DBBACKUP, now=NOW + timedelta(minutes=10))
+
+        assert BackupCatalog.objects.count() == 1
+        catalog = BackupCatalog.objects.get()
+        assert catalog.segment_type == BackupSegmentType.FULL
+        assert catalog.end_time == NOW - timedelta(hours=11)
+        assert BackupCatalogHandler.get_watermark(BackupCollector.MYSQL_DBBACKUP) == NOW + timedelta(minutes=10)
+        # 二次同步只回退重叠时间，不再全量回溯
+        assert query_mock.call_args_list[-1].args[1] == NOW - timedelta(minutes=30)
+
+    def test_query_chain_gaps(self):
+        catalogs = [BackupCatalogHandler.build_catalog(BackupCollector.MYSQL_DBBACKUP, mock_full_backup("b1"))]
+        catalogs += [
+            BackupCatalogHandler.build_catalog(BackupCollector.MYSQL_BINLOG, mock_binlog(index))
+            for index in [1, 2, 5, 6]
+        ]
+        BackupCatalog.objects.bulk_create(catalogs)
+
+        cluster_gaps = BackupCatalogHandler.query_chain_gaps([1, 2], NOW - timedelta(days=1), NOW)
+        gaps = cluster_gaps[0]["gaps"]
+        assert len(gaps) == 1
+        assert gaps[0]["stream"] == "127.0.0.1:20000" and gaps[0]["missing_segments"] == 2
+        assert not cluster_gaps[0]["is_complete"]
+        # 没有任何备份的集群缺少全备
+        assert cluster_gaps[1]["gaps"][0]["segment_type"] == BackupSegmentType.FULL
+
+    def test_query_backup_logs_with_tail(self):
+        BackupCatalog.objects.bulk_create(
+            [BackupCatalogHandler.build_catalog(BackupCollector.MYSQL_BINLOG, mock_binlog(index)) for index in [1, 2]]
+        )
+        watermark = NOW - timedelta(hours=1)
+        with patch(
+            "backend.db_services.backup_catalog.handlers.BKLogHandler.query_all_logs",
+            return_value={"logs": [], "truncated": False},
+        ):
+            BackupCatalogHandler.sync_catalog(BackupCollector.MYSQL_BINLOG, now=watermark)
+
+        # 水位之后的日志由日志平台补齐，与目录中重复的日志去重
+        tail_logs = [mock_binlog(2), mock_binlog(3)]
+        with patch(
+            "backend.db_services.backup_catalog.handlers.BKLogHandler.query_all_logs",
+            return_value={"logs": tail_logs, "truncated": False},
+        ):
+            logs = BackupCatalogHandler.query_backup_logs(
+                BackupCollector.MYSQL_BINLOG, NOW - timedelta(days=1), NOW, cluster_id=1, instance="127.0.0.1:20000"
+            )["logs"]
+        assert [log["filename"] for log in logs] == ["binlog20000.000001", "binlog20000.000002", "binlog20000.000003"]
+
+    def test_sync_catalog_split_truncated_window(self):
+        def query_all_logs(collector, start_time, end_time, **kwargs):
+            # 超过半小时的窗口日志超限
+            if end_time - start_time > timedelta(minutes=30):
+                return {"logs": [], "truncated": True}
+            return {"logs": [mock_full_backup(f"backup-{start_time.timestamp()}")], "truncated": False}
+
+        with patch(
+            "backend.db_services.backup_catalog.handlers.BKLogHandler.query_all_logs", side_effect=query_all_logs
+        ):
+            BackupCatalogHandler.sync_catalog(BackupCollector.MYSQL_DBBACKUP, now=NOW)
+        assert BackupCatalogHandler.get_watermark(BackupCollector.MYSQL_DBBACKUP) == NOW
+        assert BackupCatalog.objects.count() == 7 * 24 * 2
+
+    def test_sync_catalog_page_truncated_min_window(self):
+        # 同步窗口[NOW - 1h, NOW]即为最小窗口
+        BackupCatalogHandler._update_sync_state(BackupCollector.MYSQL_DBBACKUP, watermark=NOW - timedelta(minutes=30))
+
+        def query_all_logs(collector, start_time, end_time, search_after=None, **kwargs):
+            # 最小窗口内的日志仍超限，需要按search_after分两页拉取
+            if not search_after:
+                return {"logs": [mock_full_backup("backup-1")], "truncated": True, "search_after": [1]}
+            return {"logs": [mock_full_backup("backup-2")], "truncated": False, "search_after": [2]}
+
+        with patch("backend.db_services.backup_catalog.handlers.BACKUP_CATALOG_SYNC_MIN_WINDOW_MINUTES", 60), patch(
+            "backend.db_services.backup_catalog.handlers.BKLogHandler.query_all_logs", side_effect=query_all_logs
+        ) as query_mock:
+            assert BackupCatalogHandler.sync_catalog(BackupCollector.MYSQL_DBBACKUP, now=NOW) == 2
+        assert query_mock.call_count == 2
+        assert query_mock.call_args.kwargs["search_after"] == [1]
+        # 窗口内的日志全部拉取后才推进水位
+        assert BackupCatalogHandler.get_watermark(BackupCollector.MYSQL_DBBACKUP) == NOW
+        assert BackupCatalog.objects.count() == 2
+
+    def test_watermark_not_move_backward(self):
+        BackupCatalogHandler._update_sync_state(BackupCollector.MYSQL_BINLOG, watermark=NOW)
+        # 并发的同步写入较早的水位时，不会覆盖已推进的水位
+        BackupCatalogHandler._update_sync_state(BackupCollector.MYSQL_BINLOG, watermark=NOW - timedelta(hours=1))
+        BackupCatalogHandler._update_sync_state(BackupCollector.MYSQL_DBBACKUP, watermark=NOW - timedelta(hours=2))
+        assert BackupCatalogHandler.get_watermark(BackupCollector.MYSQL_BINLOG) == NOW
+        assert BackupCatalogHandler.get_watermark(BackupCollector.MYSQL_DBBACKUP) == NOW - timedelta(hours=2)
+
+    def test_query_backup_logs_before_coverage(self):
+        with patch(
+            "backend.db_services.backup_catalog.handlers.BKLogHandler.query_all_logs",
+            return_value={"logs": [], "truncated": False},
+        ):
+            BackupCatalogHandler.sync_catalog(BackupCollector.MYSQL_BINLOG, now=NOW - timedelta(hours=8))
+        coverage_start = BackupCatalogHandler.get_coverage_start(BackupCollector.MYSQL_BINLOG)
+        assert coverage_start == NOW - timedelta(hours=8) - timedelta(days=7)
+
+        # 覆盖起点之前的部分由日志平台补齐，并按备份结束时间过滤
+        start_time = coverage_start - timedelta(days=1)
+        head_log = mock_binlog(1)
+        head_log["stop_time"] = (coverage_start - timedelta(hours=1)).isoformat()
+        out_of_range_log = mock_binlog(2)
+        out_of_range_log["stop_time"] = (start_time - timedelta(hours=1)).isoformat()
+        with patch(
+            "backend.db_services.backup_catalog.handlers.BKLogHandler.query_all_logs",
+            return_value={"logs": [head_log, out_of_range_log], "truncated": False},
+        ) as query_mock:
+            result = BackupCatalogHandler.query_backup_logs(
+                BackupCollector.MYSQL_BINLOG, start_time, NOW - timedelta(days=1), cluster_id=1
+            )
+        assert query_mock.call_args.args[1:3] == (start_time, coverage_start)
+        assert [log["filename"] for log in result["logs"]] == [head_log["filename"]]
+        assert not result["truncated"]
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import copy
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from backend.components.exception import DataAPIException
+from backend.db_meta.models import AppCache
+from backend.db_services.cmdb.cache import CMDBCacheHandler
+from backend.db_services.cmdb.constants import CMDB_CACHE_KEY_PREFIX, CMDBCacheResource, CMDBCacheSyncMode
+
+pytestmark = pytest.mark.django_db
+
+
+class FakeCMDB:
+    """模拟CMDB：维护业务和云区域数据，每次变更产生一个带游标的事件"""
+
+    ID_FIELDS = {CMDBCacheResource.BIZ: "bk_biz_id", CMDBCacheResource.PLAT: "bk_cloud_id"}
+
+    def __init__(self, bizs, clouds):
+        self.resources = {
+            CMDBCacheResource.BIZ: {biz["bk_biz_id"]: biz for biz in bizs},
+            CMDBCacheResource.PLAT: {cloud["bk_cloud_id"]: cloud for cloud in clouds},
+        }
+        self.events = {CMDBCacheResource.BIZ: [], CMDBCacheResource.PLAT: []}
+        self.cursor_expired = False
+        self.full_fetch_count = 0
+
+    def emit(self, resource, event_type, detail):
+        detail_id = detail[self.ID_FIELDS[resource]]
+        if event_type == "delete":
+            self.resources[resource].pop(detail_id, None)
+        else:
+            self.resources[resource][detail_id] = detail
+        cursor = f"{resource}-{len(self.events[resource]) + 1}"
+        self.events[resource].append(
+            {"bk_cursor": cursor, "bk_resource": resource, "bk_event_type": event_type, "bk_detail": detail}
+        )
+
+    def resource_watch(self, params, *args, **kwargs):
+        if self.cursor_expired:
+            raise DataAPIException("watch cursor is expired")
+        events = self.events[params["bk_resource"]]
+        start = [e["bk_cursor"] for e in events].index(params["bk_cursor"]) + 1 if params.get("bk_cursor") else 0
+        if start >= len(events):
+            # 没有新事件时只返回最新游标
+            last_cursor = events[-1]["bk_cursor"] if events else ""
+            return {"bk_watched": False, "bk_events": [{"bk_cursor": last_cursor}]}
+        return {"bk_watched": True, "bk_events": copy.deepcopy(events[start:])}
+
+    def search_business(self, params=None, *args, **kwargs):
+        bizs = list(self.resources[CMDBCacheResource.BIZ].values())
+        page = (params or {}).get("page", {"start": 0, "limit": len(bizs)})
+        if page["limit"] > 1:
+            self.full_fetch_count += 1
+        return {"count": len(bizs), "info": copy.deepcopy(bizs[page["start"] : page["start"] + page["limit"]])}
+
+    def search_cloud_area(self, *args, **kwargs):
+        clouds = list(self.resources[CMDBCacheResource.PLAT].values())
+        return {"count": len(clouds), "info": copy.deepcopy(clouds)}
+
+    def update_business(self, *args, **kwargs):
+        return {}
+
+
+def make_biz(bk_biz_id, bk_biz_name):
+    return {
+        "bk_biz_id": bk_biz_id,
+        "bk_biz_name": bk_biz_name,
+        "time_zone": "Asia/Shanghai",
+        "bk_biz_maintainer": "admin",
+    }
+
+
+@pytest.fixture
+def fake_cmdb():
+    for resource in CMDBCacheResource.get_values():
+        cache.delete(f"{CMDB_CACHE_KEY_PREFIX}:{resource}:state")
+    cache.delete(CMDBCacheHandler.CLOUD_CACHE_KEY)
+
+    cmdb = FakeCMDB(
+        bizs=[make_biz(1001, "biz-a"), make_biz(1002, "biz-b")],
+        clouds=[{"bk_cloud_id": 0, "bk_cloud_name": "default area"}, {"bk_cloud_id": 1, "bk_cloud_name": "cloud-1"}],
+    )
+    with patch("backend.db_services.cmdb.cache.CCApi", cmdb):
+        yield cmdb
+
+
+class TestCMDBCacheHandler:
+    def test_full_sync_then_watch(self, fake_cmdb):
+        # 首次同步没有游标，执行全量比对
+        results = CMDBCacheHandler.sync_all()
+        assert results[CMDBCacheResource.BIZ]["mode"] == CMDBCacheSyncMode.FULL
+        assert results[CMDBCacheResource.BIZ]["create"] == 2
+        assert set(AppCache.objects.values_list("bk_biz_id", flat=True)) >= {1001, 1002}
+        full_fetch_count = fake_cmdb.full_fetch_count
+
+        # 后续变更通过事件增量同步，不再全量拉取
+        fake_cmdb.emit(CMDBCacheResource.BIZ, "update", make_biz(1001, "biz-a-renamed"))
+        fake_cmdb.emit(CMDBCacheResource.BIZ, "create", make_biz(1003, "biz-c"))
+        fake_cmdb.emit(CMDBCacheResource.PLAT, "create", {"bk_cloud_id": 2, "bk_cloud_name": "cloud-2"})
+        fake_cmdb.emit(CMDBCacheResource.PLAT, "delete", {"bk_cloud_id": 1, "bk_cloud_name": "cloud-1"})
+        results = CMDBCacheHandler.sync_all()
+
+        assert results[CMDBCacheResource.BIZ] == {
+            "mode": CMDBCacheSyncMode.WATCH,
+            "create": 1,
+            "update": 1,
+            "delete": 0,
+        }
+        assert results[CMDBCacheResource.PLAT] == {
+            "mode": CMDBCacheSyncMode.WATCH,
+            "create": 1,
+            "update": 0,
+            "delete": 1,
+        }
+        assert fake_cmdb.full_fetch_count == full_fetch_count
+        assert AppCache.objects.get(bk_biz_id=1001).bk_biz_name == "biz-a-renamed"
+        assert set(CMDBCacheHandler.get_cloud_areas().keys()) == {"0", "2"}
+
+        # 没有新事件时，游标保持不变
+        results = CMDBCacheHandler.sync_all()
+        assert results[CMDBCacheResource.BIZ] == {
+            "mode": CMDBCacheSyncMode.WATCH,
+            "create": 0,
+            "update": 0,
+            "delete": 0,
+        }
+        assert CMDBCacheHandler.get_state(CMDBCacheResource.BIZ)["cursor"] == "biz-2"
+
+    def test_fallback_to_full_sync(self, fake_cmdb):
+        CMDBCacheHandler.sync_all()
+        fake_cmdb.emit(CMDBCacheResource.BIZ, "update", make_biz(1002, "biz-b-renamed"))
+
+        # 游标失效时回退为全量比对，变更同样能够同步
+        fake_cmdb.cursor_expired = True
+        result = CMDBCacheHandler.sync(CMDBCacheResource.BIZ)
+        assert result["mode"] == CMDBCacheSyncMode.FULL
+        assert AppCache.objects.get(bk_biz_id=1002).bk_biz_name == "biz-b-renamed"
+
+    def test_force_refresh_and_freshness(self, fake_cmdb):
+        freshness = CMDBCacheHandler.get_freshness()
+        assert all(info["is_stale"] for info in freshness.values())
+
+        CMDBCacheHandler.sync_all()
+        results = CMDBCacheHandler.sync_all(force=True)
+        assert all(result["mode"] == CMDBCacheSyncMode.FULL for result in results.values())
+
+        freshness = CMDBCacheHandler.get_freshness()
+        assert not any(info["is_stale"] for info in freshness.values())
+        assert freshness[CMDBCacheResource.PLAT]["mode"] == CMDBCacheSyncMode.FULL
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from backend.db_services.mysql.fixpoint_rollback.handlers import FixPointRollbackHandler
+from backend.exceptions import AppBaseException
+
+END_TIME = datetime(2024, 2, 1, tzinfo=timezone.utc)
+START_TIME = END_TIME - timedelta(days=1)
+
+
+class TestFixPointRollbackHandler:
+    @patch("backend.db_services.mysql.fixpoint_rollback.handlers.BKLogHandler.query_all_logs")
+    def test_get_log_from_bklog(self, query_all_logs):
+        query_all_logs.return_value = {"logs": [{"backup_id": "1"}], "truncated": False}
+        logs = FixPointRollbackHandler._get_log_from_bklog("mysql_backup_result", START_TIME, END_TIME)
+        assert logs == [{"backup_id": "1"}]
+
+        # 日志被截断时不能基于部分日志回档
+        query_all_logs.return_value = {"logs": [{"backup_id": "1"}], "truncated": True}
+        with pytest.raises(AppBaseException):
+            FixPointRollbackHandler._get_log_from_bklog("mysql_backup_result", START_TIME, END_TIME)
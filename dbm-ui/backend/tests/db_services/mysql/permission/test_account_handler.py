@@ -85,3 +85,39 @@ class TestAccountHandler:
         check_result = DBPasswordHandler.verify_password_strength(password, DBPrivSecurityType.MYSQL_PASSWORD)
         is_strength = check_result["is_strength"]
         assert is_strength
+
+    @pytest.mark.parametrize("offset,limit", [(0, 2), (1, 3), (3, 10), (0, 100), (5, 1)])
+    def test_paginate_match_ips(self, offset, limit):
+        privs = {
+            "privs_for_cluster": [
+                {
+                    "immute_domain": f"db{d}.test.db",
+                    "users": [
+                        {"user": f"user{u}", "match_ips": [{"match_ip": f"127.0.{d}.{u}{i}"} for i in range(u + 1)]}
+                        for u in range(2)
+                    ],
+                }
+                for d in range(2)
+            ]
+        }
+        # 逐级展开全部match_ip作为对照
+        match_ips = [
+            match_ip["match_ip"]
+            for node in privs["privs_for_cluster"]
+            for user in node["users"]
+            for match_ip in user["match_ips"]
+        ]
+        handler = MySQLAccountHandler(bk_biz_id=1, account_type=AccountType.MYSQL)
+        assert handler.build_match_ips_index(privs, "privs_for_cluster") == [0, 3, 6]
+
+        data, count = handler.paginate_match_ips({**privs}, "privs_for_cluster", offset, limit)
+        paged_ips = [
+            match_ip["match_ip"]
+            for node in data["privs_for_cluster"]
+            for user in node["users"]
+            for match_ip in user["match_ips"]
+        ]
+        assert count == len(match_ips)
+        assert paged_ips == match_ips[offset : offset + limit]
+        # 分页不修改原始数据
+        assert len(privs["privs_for_cluster"]) == 2
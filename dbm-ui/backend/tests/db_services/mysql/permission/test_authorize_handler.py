@@ -67,6 +67,22 @@ class TestAuthorizeHandler:
         authorize_data_list = self.handler.pre_check_excel_rules(excel_authorize)
         assert authorize_data_list["pre_check"] is True
 
+    @patch("backend.db_services.dbpermission.db_account.handlers.DBPrivManagerApi", DBPrivManagerApiMock)
+    @patch("backend.db_services.dbpermission.db_authorize.handlers.DBPrivManagerApi", DBPrivManagerApiMock)
+    @patch("backend.db_services.mysql.permission.authorize.handlers.DBPrivManagerApi", DBPrivManagerApiMock)
+    @patch("backend.db_services.dbpermission.db_authorize.dataclass.ClusterEntry")
+    def test_pre_check_excel_rules_in_bulk(self, mocked_cluster_entry, query_fixture):
+        data_dict__list = EXCEL_DATA_DICT__LIST * 100
+        excel_bytes = save_virtual_workbook(ExcelHandler.serialize(data_dict__list, headers=AUTHORIZE_EXCEL_HEADER))
+        excel_authorize = MySQLExcelAuthorizeMeta(cluster_type=ClusterType.TenDBHA)
+        excel_authorize.authorize_excel_data = ExcelHandler.paser(io.BytesIO(excel_bytes))
+
+        authorize_data_list = self.handler.pre_check_excel_rules(excel_authorize)["authorize_data_list"]
+        # 集群域名只统一查询一次，且校验结果和excel行一一对应
+        assert mocked_cluster_entry.objects.filter.call_count == 1
+        assert len(authorize_data_list) == len(data_dict__list)
+        assert all(data["user"] == AUTHORIZE_DATA["user"] for data in authorize_data_list)
+
     @patch("backend.db_services.mysql.permission.authorize.handlers.GcsApi", GcsApiMock)
     @patch("backend.db_services.mysql.permission.authorize.handlers.ScrApi", ScrApiMock)
     @patch("backend.db_services.dbpermission.db_account.handlers.DBPrivManagerApi", DBPrivManagerApiMock)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.db_services.mysql.remote_service.exceptions import RemoteServiceBaseException
+from backend.db_services.mysql.toolbox.handlers import ToolboxHandler
+
+HANDLER_PATH = "backend.db_services.mysql.toolbox.handlers"
+
+INSTANCES = [
+    {"cluster__id": 1, "cluster__bk_cloud_id": 0, "machine__ip": "1.1.1.1", "port": 3306},
+    {"cluster__id": 2, "cluster__bk_cloud_id": 0, "machine__ip": "1.1.1.2", "port": 3306},
+    {"cluster__id": 3, "cluster__bk_cloud_id": 0, "machine__ip": "1.1.1.3", "port": 3306},
+    {"cluster__id": 4, "cluster__bk_cloud_id": 1, "machine__ip": "2.2.2.1", "port": 3306},
+]
+
+
+def fake_rpc(params):
+    """云区域1请求异常，1.1.1.2 返回错误，1.1.1.3 没有返回结果"""
+    if params["bk_cloud_id"] == 1:
+        raise Exception("drs timeout")
+    return [
+        {"address": "1.1.1.1:3306", "error_msg": "", "cmd_results": [{"table_data": [{"version": "5.7.20"}]}]},
+        {"address": "1.1.1.2:3306", "error_msg": "access denied", "cmd_results": []},
+    ]
+
+
+@patch(f"{HANDLER_PATH}.MySQLPackageVersionIndex", MagicMock())
+@patch(f"{HANDLER_PATH}.DRSApi.rpc", side_effect=fake_rpc)
+@patch(f"{HANDLER_PATH}.StorageInstance.objects.filter")
+class TestToolboxHandler:
+    def test_batch_query_partial_failed(self, mock_filter, __):
+        mock_filter.return_value.values.return_value = INSTANCES
+        result = ToolboxHandler().batch_query_higher_version_pkg_list([1, 2, 3, 4, 5], False, False)
+
+        assert [group["cluster_ids"] for group in result["version_groups"]] == [[1]]
+        # 每个失败的集群都单独返回错误信息，不影响其他集群
+        failed = {item["cluster_id"]: item["message"] for item in result["failed_clusters"]}
+        assert sorted(failed) == [2, 3, 4, 5]
+        assert "access denied" in failed[2]
+        assert "drs timeout" in failed[4]
+
+    def test_query_single_failed(self, mock_filter, __):
+        mock_filter.return_value.values.return_value = INSTANCES[1:2]
+        with pytest.raises(RemoteServiceBaseException):
+            ToolboxHandler().query_higher_version_pkg_list(2, False, False)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import pytest
+
+from backend.db_services.mysql.toolbox.version_index import (
+    PKG_TYPE_TMYSQL,
+    PKG_TYPE_TXSQL,
+    MySQLPackageVersionIndex,
+    parse_mysql_version,
+)
+
+PACKAGES = [
+    {"id": 1, "name": "mysql-5.7.20-linux-x86_64-tmysql-3.3-gcs.tar.gz", "version": "MySQL-5.7"},
+    {"id": 2, "name": "mysql-5.7.20-linux-x86_64-tmysql-3.4.2-gcs.tar.gz", "version": "MySQL-5.7"},
+    {"id": 3, "name": "mysql-5.7.40-linux-glibc2.12-x86_64.tar.gz", "version": "MySQL-5.7"},
+    {"id": 4, "name": "mysql-8.0.30-linux-x86_64-tmysql-4.1-gcs.tar.gz", "version": "MySQL-8.0"},
+    {"id": 5, "name": "mysql-txsql-8.0.30-20230701-linux-x86_64.tar.gz", "version": "MySQL-8.0"},
+    {"id": 6, "name": "mysql-txsql-8.0.32-20240101-linux-x86_64.tar.gz", "version": "MySQL-8.0"},
+    {"id": 7, "name": "mysql-5.6.24-linux-x86_64-tmysql-2.1.5-gcs.tar.gz", "version": "MySQL-5.6"},
+]
+
+
+class TestMySQLPackageVersionIndex:
+    def test_parse_version(self):
+        version = parse_mysql_version("5.7.20-tmysql-3.4.2-log")
+        assert version.pkg_type == PKG_TYPE_TMYSQL
+        assert (version.major, version.sub) == (5007000, 20)
+        # 8.0 转换为 5.8 参与比较，与介质包保持一致
+        txsql_version = parse_mysql_version("8.0.30-txsql")
+        assert txsql_version.pkg_type == PKG_TYPE_TXSQL
+        assert txsql_version == parse_mysql_version(PACKAGES[4]["name"], is_pkg_name=True)
+        # 子版本按数字比较
+        assert parse_mysql_version("5.7.9").sub < parse_mysql_version("5.7.10").sub
+
+    @pytest.mark.parametrize(
+        "refer_version,higher_major_version,higher_all_version,pkg_ids",
+        [
+            # tmysql 同主版本：tmysql 版本或子版本更高
+            ("5.7.20-tmysql-3.3-log", False, False, [2, 3]),
+            # tmysql 升级主版本：只允许升一个主版本
+            ("5.7.20-tmysql-3.3-log", True, False, [4]),
+            ("5.6.24-tmysql-2.1.5-log", True, False, [1, 2, 3]),
+            # txsql 只能使用 txsql 介质
+            ("8.0.30-txsql", False, False, [6]),
+            # 社区版本使用 tmysql 介质
+            ("5.7.10", False, False, [1, 2]),
+            ("5.7.10", True, True, [1, 2, 4]),
+        ],
+    )
+    def test_get_upgrade_targets(self, refer_version, higher_major_version, higher_all_version, pkg_ids):
+        index = MySQLPackageVersionIndex(packages=PACKAGES)
+        targets = index.get_upgrade_targets(refer_version, higher_major_version, higher_all_version)
+        assert [target["pkg_id"] for target in targets] == pkg_ids
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.db_meta.enums import ClusterType
+from backend.db_meta.models import Cluster
+from backend.db_services.partition.exceptions import DBPartitionInternalServerError, DBPartitionInvalidFieldException
+from backend.db_services.partition.handlers import PartitionHandler
+from backend.tests.mock_data import constant
+from backend.ticket.constants import TicketType
+from backend.ticket.models import Ticket
+from backend.utils.string import quote_sql_literal
+
+pytestmark = pytest.mark.django_db
+
+
+class TestPartitionHandler:
+    @patch.object(Ticket, "create_ticket")
+    def test_batch_execute_partition_group_by_biz(self, create_ticket_mock, init_cluster):
+        other_cluster = Cluster.objects.create(
+            bk_biz_id=constant.BK_BIZ_ID,
+            name="partition-other",
+            db_module_id=constant.DB_MODULE_ID,
+            immute_domain="partition-other.db",
+            cluster_type=ClusterType.TenDBHA.value,
+        )
+        create_ticket_mock.return_value = Ticket(id=1, bk_biz_id=constant.BK_BIZ_ID)
+        partitions = [
+            {"cluster_id": init_cluster.id, "partition_objects": {1: [], 2: []}},
+            {"cluster_id": other_cluster.id, "partition_objects": {3: []}},
+        ]
+
+        ticket_list = PartitionHandler.batch_execute_partition("admin", partitions)
+
+        # 同业务同类型的分区策略合并为一个单据
+        create_ticket_mock.assert_called_once()
+        kwargs = create_ticket_mock.call_args.kwargs
+        assert kwargs["ticket_type"] == TicketType.MYSQL_PARTITION
+        assert [info["config_id"] for info in kwargs["details"]["infos"]] == [1, 2, 3]
+        assert ticket_list[0]["config_ids"] == [1, 2, 3]
+
+    def test_batch_execute_partition_missing_cluster(self):
+        with pytest.raises(DBPartitionInternalServerError):
+            PartitionHandler.batch_execute_partition("admin", [{"cluster_id": 404, "partition_objects": {1: []}}])
+
+    def test_build_table_filter_escape_and_reject(self):
+        table_filter = PartitionHandler._build_table_filter(["db%"], ["tb1", "tb2"])
+        assert table_filter["table_sts"] == "(table_name in ('tb1', 'tb2'))"
+        assert table_filter["db_sts"] == "(table_schema like 'db%')"
+
+        with pytest.raises(DBPartitionInvalidFieldException):
+            PartitionHandler._build_table_filter(["db1' or '1'='1"], ["tb1"])
+        assert quote_sql_literal("a'b\\c") == "'a\\'b\\\\c'"
+
+    def test_analyze_partition_field_verdicts(self):
+        index_data = [
+            {"TABLE_SCHEMA": "db1", "TABLE_NAME": "tb1", "INDEX_NAME": "PRIMARY", "COLUMN_LIST": "id,ctime"},
+            {"TABLE_SCHEMA": "db1", "TABLE_NAME": "tb2", "INDEX_NAME": "PRIMARY", "COLUMN_LIST": "id"},
+        ]
+        field_type_data = [
+            {"table_schema": "db1", "table_name": "tb1", "column_name": "ctime", "column_type": "datetime"},
+            {"table_schema": "db1", "table_name": "tb2", "column_name": "ctime", "column_type": "datetime"},
+            {"table_schema": "db1", "table_name": "tb3", "column_name": "ctime", "column_type": "int(11)"},
+        ]
+        verdicts = PartitionHandler._analyze_partition_field(index_data, field_type_data, "ctime", "datetime")
+        table__verdict = {verdict["table"]: verdict for verdict in verdicts}
+
+        assert table__verdict["tb1"]["result"]
+        assert table__verdict["tb2"]["primary_key_mismatch"] and not table__verdict["tb2"]["result"]
+        assert table__verdict["tb3"]["type_mismatch"] and table__verdict["tb3"]["without_unique_key"]
+
+    @patch("backend.db_services.partition.handlers.ClusterHandler.get_exact_handler")
+    @patch("backend.db_services.partition.handlers.DRSApi.rpc")
+    def test_batch_verify_partition_field_cloud_failed(self, rpc_mock, get_handler_mock):
+        clusters = {
+            1: Cluster(id=1, bk_cloud_id=0, immute_domain="tb1.db"),
+            2: Cluster(id=2, bk_cloud_id=1, immute_domain="tb2.db"),
+        }
+        get_handler_mock.side_effect = lambda bk_biz_id, cluster_id: MagicMock(
+            cluster=clusters[cluster_id], get_remote_address=lambda: f"1.1.1.{cluster_id}:3306"
+        )
+
+        def rpc(params):
+            # 云区域1的DRS请求超时
+            if params["bk_cloud_id"] == 1:
+                raise Exception("drs timeout")
+            return [
+                {
+                    "address": "1.1.1.1:3306",
+                    "error_msg": "",
+                    "cmd_results": [{"cmd": cmd, "table_data": []} for cmd in params["cmds"]],
+                }
+            ]
+
+        rpc_mock.side_effect = rpc
+        verdicts = PartitionHandler.batch_verify_partition_field(
+            constant.BK_BIZ_ID, [1, 2], ["db1"], ["tb1"], "ctime", "datetime"
+        )
+        cluster__verdict = {verdict["cluster_id"]: verdict for verdict in verdicts}
+
+        # 云区域1的集群返回错误信息，云区域0的集群正常给出结论
+        assert not cluster__verdict[2]["result"] and "drs timeout" in cluster__verdict[2]["message"]
+        assert "drs timeout" not in cluster__verdict[1]["message"]
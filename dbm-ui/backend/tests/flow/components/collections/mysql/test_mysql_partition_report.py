@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.flow.plugins.components.collections.mysql.mysql_partition_report import MySQLPartitionReportService
+from backend.flow.utils.mysql.mysql_context_dataclass import MysqlPartitionContext
+from backend.ticket.constants import TicketStatus, TicketType
+from backend.ticket.models import Ticket
+
+pytestmark = pytest.mark.django_db
+
+REPORT_PATH = "backend.flow.plugins.components.collections.mysql.mysql_partition_report"
+
+
+def create_ticket():
+    return Ticket.objects.create(
+        bk_biz_id=1, creator="admin", ticket_type=TicketType.MYSQL_PARTITION, status=TicketStatus.RUNNING
+    )
+
+
+def execute_report(ticket, kwargs, partition_report=None):
+    global_data = {
+        "uid": ticket.id,
+        "config_id": 1,
+        "ticket_type": TicketType.MYSQL_PARTITION,
+        "cron_date": "20260101",
+        "created_by": "admin",
+    }
+    inputs = {
+        "global_data": global_data,
+        "trans_data": MysqlPartitionContext(partition_report=partition_report),
+        "kwargs": kwargs,
+    }
+    data = MagicMock(outputs={})
+    data.get_one_of_inputs.side_effect = inputs.get
+    return MySQLPartitionReportService()._execute(data, None)
+
+
+@patch(f"{REPORT_PATH}.DBPartitionApi.create_log")
+class TestMySQLPartitionReport:
+    def test_missing_report_logged_as_failed(self, create_log):
+        # 文件下发或actuator节点失败时没有执行报告，记录失败日志并使节点失败
+        assert not execute_report(create_ticket(), {})
+        [log] = create_log.call_args.args[0]["logs"]
+        assert log["config_id"] == 1
+        assert log["status"] == "failed"
+
+    def test_defer_failure_in_lane(self, create_log):
+        ticket = create_ticket()
+        failed_report = {"summaries": [{"config_id": 1, "status": "failed", "msg": "lock wait timeout"}]}
+        succeeded_report = {"summaries": [{"config_id": 2, "status": "succeeded", "msg": ""}]}
+
+        # 并发组内的失败配置不阻塞后续配置，由汇总节点判定结果
+        assert execute_report(ticket, {"defer_failure": True}, failed_report)
+        assert execute_report(ticket, {"defer_failure": True}, succeeded_report)
+        assert not execute_report(ticket, {"summary": True})
+
+        ticket.refresh_from_db()
+        assert ticket.details["partition_failed_config_ids"] == [1]
+
+    def test_summary_all_succeeded(self, __):
+        assert execute_report(create_ticket(), {"summary": True})
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock, patch
+
+from backend.flow.engine.bamboo.scene.mysql.mysql_partition import (
+    add_bounded_parallel_sub_pipelines,
+    need_partition_lanes,
+)
+
+
+class FakeSubBuilder:
+    def __init__(self, root_id, data):
+        self.sub_pipelines = []
+
+    def add_sub_pipeline(self, sub_flow):
+        self.sub_pipelines.append(sub_flow)
+
+    def build_sub_process(self, sub_name):
+        return self.sub_pipelines
+
+
+class TestPartitionLanes:
+    def test_parallel_without_lanes(self):
+        pipeline = MagicMock()
+        add_bounded_parallel_sub_pipelines(pipeline, "root", {}, ["p1", "p2"], max_concurrency=3)
+        pipeline.add_parallel_sub_pipeline.assert_called_once_with(sub_flow_list=["p1", "p2"])
+
+    @patch("backend.flow.engine.bamboo.scene.mysql.mysql_partition.SubBuilder", FakeSubBuilder)
+    def test_round_robin_lanes(self):
+        pipeline = MagicMock()
+        sub_pipelines = [f"p{index}" for index in range(7)]
+        add_bounded_parallel_sub_pipelines(pipeline, "root", {}, sub_pipelines, max_concurrency=3)
+
+        # 子流程轮询分到3个并发组，组内保持原有顺序
+        lanes = pipeline.add_parallel_sub_pipeline.call_args.kwargs["sub_flow_list"]
+        assert lanes == [["p0", "p3", "p6"], ["p1", "p4"], ["p2", "p5"]]
+
+    def test_need_partition_lanes(self):
+        # 未超过最大并发数时直接并发执行，失败的节点不需要忽略
+        assert not need_partition_lanes(3, max_concurrency=3)
+        assert need_partition_lanes(4, max_concurrency=3)
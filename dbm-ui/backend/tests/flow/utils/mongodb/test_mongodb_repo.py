@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import itertools
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.db_meta.enums import ClusterEntryRole, ClusterEntryType, ClusterType, InstanceRole, MachineType
+from backend.db_meta.models import (
+    BKCity,
+    Cluster,
+    ClusterEntry,
+    Machine,
+    NosqlStorageSetDtl,
+    ProxyInstance,
+    StorageInstance,
+    StorageInstanceTuple,
+)
+from backend.flow.consts import MongoDBClusterRole
+from backend.flow.utils.mongodb.mongodb_repo import MongoRepository, ReplicaSetCluster, ShardedCluster
+from backend.tests.mock_data import constant
+
+pytestmark = pytest.mark.django_db
+
+MEMBER_ROLES = [InstanceRole.MONGO_M1, InstanceRole.MONGO_M2, InstanceRole.MONGO_BACKUP]
+_host_ids = itertools.count(1)
+
+
+def create_machine(machine_type):
+    host_id = next(_host_ids)
+    return Machine.objects.create(
+        ip=f"127.0.{host_id // 256}.{host_id % 256}",
+        bk_biz_id=constant.BK_BIZ_ID,
+        machine_type=machine_type,
+        bk_city=BKCity.objects.first(),
+        bk_host_id=host_id,
+    )
+
+
+def create_storage(cluster, machine_type, role, port=27017):
+    storage = StorageInstance.objects.create(
+        machine=create_machine(machine_type),
+        port=port,
+        bk_biz_id=constant.BK_BIZ_ID,
+        machine_type=machine_type,
+        instance_role=role,
+        cluster_type=cluster.cluster_type,
+    )
+    storage.cluster.add(cluster)
+    return storage
+
+
+def create_replica_set(cluster, machine_type, set_name):
+    """创建一组 m1 -> [m2, backup] 的副本集成员，返回 m1"""
+    members = [create_storage(cluster, machine_type, role) for role in MEMBER_ROLES]
+    for receiver in members[1:]:
+        StorageInstanceTuple.objects.create(ejector=members[0], receiver=receiver)
+    NosqlStorageSetDtl.objects.create(
+        bk_biz_id=constant.BK_BIZ_ID, instance=members[0], cluster=cluster, seg_range=set_name
+    )
+    return members
+
+
+def create_entry(cluster, instances):
+    entry = ClusterEntry.objects.create(
+        cluster=cluster,
+        cluster_entry_type=ClusterEntryType.DNS.value,
+        entry=cluster.immute_domain,
+        role=ClusterEntryRole.MASTER_ENTRY,
+    )
+    for instance in instances:
+        instance.bind_entry.add(entry)
+
+
+def create_replica_set_cluster(index):
+    cluster = Cluster.objects.create(
+        bk_biz_id=constant.BK_BIZ_ID,
+        name=f"rs{index}",
+        immute_domain=f"rs{index}.test.db",
+        cluster_type=ClusterType.MongoReplicaSet.value,
+        major_version="4.2",
+    )
+    members = create_replica_set(cluster, MachineType.MONGODB.value, cluster.name)
+    create_entry(cluster, members)
+    return cluster
+
+
+def create_sharded_cluster(index, shard_num=2, mongos_num=2):
+    cluster = Cluster.objects.create(
+        bk_biz_id=constant.BK_BIZ_ID,
+        name=f"shard{index}",
+        immute_domain=f"shard{index}.test.db",
+        cluster_type=ClusterType.MongoShardedCluster.value,
+        major_version="4.2",
+    )
+    create_replica_set(cluster, MachineType.MONOG_CONFIG.value, f"{cluster.name}-conf")
+    for shard in range(shard_num):
+        create_replica_set(cluster, MachineType.MONGODB.value, f"{cluster.name}-s{shard}")
+
+    mongos = []
+    for __ in range(mongos_num):
+        proxy = ProxyInstance.objects.create(
+            machine=create_machine(MachineType.MONGOS.value),
+            port=27021,
+            bk_biz_id=constant.BK_BIZ_ID,
+            machine_type=MachineType.MONGOS.value,
+            cluster_type=cluster.cluster_type,
+        )
+        proxy.cluster.add(cluster)
+        mongos.append(proxy)
+    create_entry(cluster, mongos)
+    return cluster
+
+
+def count_fetch_queries(cluster_ids, with_domain):
+    """返回构建并遍历集群拓扑的查询次数"""
+    with CaptureQueriesContext(connection) as ctx:
+        clusters = MongoRepository.fetch_many_cluster(with_domain, id__in=cluster_ids)
+        for cluster in clusters:
+            cluster.__json__()
+    return len(ctx.captured_queries), clusters
+
+
+class TestMongoRepositoryFetch:
+    @pytest.mark.parametrize("with_domain", [False, True])
+    def test_replica_set_query_count(self, create_city, with_domain):
+        small = [create_replica_set_cluster(0).id]
+        large = small + [create_replica_set_cluster(i).id for i in range(1, 6)]
+
+        small_queries, __ = count_fetch_queries(small, with_domain)
+        large_queries, clusters = count_fetch_queries(large, with_domain)
+        assert small_queries == large_queries
+
+        assert len(clusters) == 6
+        for cluster in clusters:
+            assert isinstance(cluster, ReplicaSetCluster)
+            assert cluster.shard.set_type == MongoDBClusterRole.Replicaset.value
+            assert len(cluster.shard.members) == 3
+            assert cluster.get_connect_node().domain == (cluster.immute_domain if with_domain else None)
+
+    @pytest.mark.parametrize("with_domain", [False, True])
+    def test_sharded_cluster_query_count(self, create_city, with_domain):
+        small = [create_sharded_cluster(0).id]
+        large = small + [create_sharded_cluster(i, shard_num=3).id for i in range(1, 5)]
+
+        small_queries, __ = count_fetch_queries(small, with_domain)
+        large_queries, clusters = count_fetch_queries(large, with_domain)
+        assert small_queries == large_queries
+
+        clusters = {cluster.name: cluster for cluster in clusters}
+        assert len(clusters) == 5
+        first = clusters["shard0"]
+        assert isinstance(first, ShardedCluster)
+        assert len(first.get_mongos()) == 2
+        assert len(first.get_shards()) == 2
+        assert len(clusters["shard1"].get_shards()) == 3
+        assert first.get_config().set_type == MongoDBClusterRole.ConfigSvr.value
+        assert [m.role for m in first.get_config().members] == [role.value for role in MEMBER_ROLES]
+        for mongos in first.get_mongos():
+            assert mongos.role == MongoDBClusterRole.Mongos.value
+            assert mongos.domain == (first.immute_domain if with_domain else None)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.db_meta.enums import ClusterType
+from backend.flow.utils.redis import redis_proxy_util
+from backend.flow.utils.redis.redis_proxy_util import (
+    batch_proxy_rpc,
+    check_clusters_proxy_backends,
+    diff_cluster_proxy_backends,
+    get_cluster_proxy_version,
+)
+
+UTIL_PATH = "backend.flow.utils.redis.redis_proxy_util"
+
+
+def mock_proxy(ip_port: str):
+    ip, port = ip_port.split(":")
+    return MagicMock(ip_port=ip_port, port=int(port), machine=MagicMock(ip=ip))
+
+
+def mock_cluster(cluster_id: int, proxies, cluster_type=ClusterType.TendisPredixyTendisplusCluster):
+    cluster = MagicMock(id=cluster_id, immute_domain=f"cache{cluster_id}.test.db", cluster_type=cluster_type)
+    cluster.bk_cloud_id = 0
+    cluster.proxyinstance_set.all.return_value = proxies
+    cluster.proxyinstance_set.filter.return_value.select_related.return_value = proxies
+    return cluster
+
+
+def fake_rpc(results):
+    """按地址返回结果的DRS，结果为异常时返回错误信息，结果为None时不返回该地址"""
+
+    def _rpc(params):
+        resp = []
+        for addr in params["addresses"]:
+            result = results.get(addr)
+            if isinstance(result, Exception):
+                resp.append({"address": addr, "result": "", "error": str(result)})
+            elif result is not None:
+                resp.append({"address": addr, "result": result, "error": ""})
+        return resp
+
+    return MagicMock(side_effect=_rpc)
+
+
+class TestRedisProxyUtil:
+    @patch(f"{UTIL_PATH}.PROXY_RPC_BATCH_SIZE", 2)
+    def test_batch_proxy_rpc(self):
+        addresses = [f"1.1.1.{i}:50000" for i in range(5)]
+        results = {addr: f"ok{i}" for i, addr in enumerate(addresses)}
+        results[addresses[1]], results[addresses[2]] = Exception("timeout"), None
+        rpc_func = fake_rpc(results)
+
+        rpc_results = batch_proxy_rpc(rpc_func, addresses, {"command": "stats"}, workers=2)
+        # 按批拆分请求，每批最多2个地址
+        assert sorted(len(call.args[0]["addresses"]) for call in rpc_func.call_args_list) == [1, 2, 2]
+        assert rpc_results[addresses[0]] == "ok0"
+        assert str(rpc_results[addresses[1]]) == "timeout"
+        # DRS未返回的地址视为失败
+        assert isinstance(rpc_results[addresses[2]], Exception)
+
+    @patch(f"{UTIL_PATH}.PROXY_RPC_BATCH_SIZE", 2)
+    def test_batch_proxy_rpc_request_failed(self):
+        rpc_func = MagicMock(
+            side_effect=[[{"address": "a", "result": "ok"}, {"address": "b", "result": "ok"}], Exception("down")]
+        )
+        rpc_results = batch_proxy_rpc(rpc_func, ["a", "b", "c"], {}, workers=1)
+        assert rpc_results["a"] == rpc_results["b"] == "ok"
+        assert str(rpc_results["c"]) == "down"
+
+    @patch(f"{UTIL_PATH}.PayloadHandler.redis_get_password_by_cluster_id", return_value={"redis_proxy_password": ""})
+    @patch(f"{UTIL_PATH}.get_predixy_backend_lines", lambda result: result.split(","))
+    def test_diff_cluster_proxy_backends(self, __):
+        proxies = [mock_proxy(f"1.1.1.{i}:50000") for i in range(4)]
+        results = {
+            proxies[0].ip_port: "s1,s2",
+            proxies[1].ip_port: "s1,s2",
+            proxies[2].ip_port: "s1,s3",
+            proxies[3].ip_port: Exception("timeout"),
+        }
+        with patch(f"{UTIL_PATH}.DRSApi.redis_rpc", fake_rpc(results)):
+            diff_result = diff_cluster_proxy_backends(mock_cluster(1, proxies))
+
+        # 多数proxy一致的配置为基准，不一致和请求失败的proxy分别返回
+        assert not diff_result["consistent"]
+        assert diff_result["proxy_count"] == 4
+        assert diff_result["inconsistent_proxies"] == [
+            {
+                "proxy_addr": proxies[2].ip_port,
+                "backend_md5": diff_result["inconsistent_proxies"][0]["backend_md5"],
+                "missing": ["s2"],
+                "extra": ["s3"],
+            }
+        ]
+        assert diff_result["failed_proxies"] == [{"proxy_addr": proxies[3].ip_port, "error": "timeout"}]
+
+    @patch(f"{UTIL_PATH}.connections")
+    def test_check_clusters_proxy_backends(self, __):
+        clusters = [mock_cluster(1, []), mock_cluster(2, [])]
+
+        def diff(cluster, workers):
+            if cluster.id == 2:
+                raise Exception("no password")
+            return {"cluster_id": cluster.id, "consistent": True}
+
+        with patch(f"{UTIL_PATH}.Cluster.objects.filter") as cluster_filter, patch.object(
+            redis_proxy_util, "diff_cluster_proxy_backends", side_effect=diff
+        ):
+            cluster_filter.return_value.prefetch_related.return_value = clusters
+            results = check_clusters_proxy_backends([1, 2], workers=2)
+
+        # 单个集群检查异常不影响其他集群
+        assert results[0] == {"cluster_id": 1, "consistent": True}
+        assert results[1]["cluster_id"] == 2 and not results[1]["consistent"]
+        assert results[1]["failed_proxies"] == [{"proxy_addr": "", "error": "no password"}]
+
+    @patch(f"{UTIL_PATH}.PayloadHandler.redis_get_password_by_cluster_id", return_value={"redis_proxy_password": ""})
+    def test_get_cluster_proxy_version(self, __):
+        proxies = [mock_proxy("1.1.1.1:50000"), mock_proxy("1.1.1.2:50000")]
+        results = {proxies[0].ip_port: "# Proxy\nVersion:1.4.0\n", proxies[1].ip_port: Exception("timeout")}
+        with patch(f"{UTIL_PATH}.Cluster.objects.get", return_value=mock_cluster(1, proxies)), patch(
+            f"{UTIL_PATH}.DRSApi.redis_rpc", fake_rpc(results)
+        ):
+            # 获取失败的proxy会抛出异常，并带上所有失败的proxy
+            with pytest.raises(Exception, match=f"{proxies[1].ip_port}: timeout"):
+                get_cluster_proxy_version(1)
+
+            results[proxies[1].ip_port] = "# Proxy\nVersion:1.4.0\n"
+            assert get_cluster_proxy_version(1) == ["predixy-1.4.0"]
@@ -8,6 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import json
 
 LOG_DATA = {
     "result": True,
@@ -116,3 +117,33 @@ class BKLogApiMock(object):
     def list_collectors(cls, *args, **kwargs):
         data = BK_LOG_LIST_COLLECTOR_DATA
         return data["data"]
+
+
+class BKLogFakeESBackend(object):
+    """
+    模拟日志平台ES的分页查询：按照排序字段升序，支持size和search_after
+    """
+
+    sort_fields = ["dtEventTimeStamp", "gseIndex", "iterationIndex"]
+
+    def __init__(self, total: int):
+        self.calls = []
+        self.hits = [
+            {
+                "_source": {
+                    "dtEventTimeStamp": 1565453112000 + index // 2,
+                    "gseIndex": index,
+                    "iterationIndex": 0,
+                    "log": json.dumps({"BackupId": index}),
+                },
+                "sort": [1565453112000 + index // 2, index, 0],
+            }
+            for index in range(total)
+        ]
+
+    def esquery_search(self, params, *args, **kwargs):
+        self.calls.append(params)
+        hits = self.hits
+        if params.get("search_after"):
+            hits = [hit for hit in hits if hit["sort"] > params["search_after"]]
+        return {"hits": {"hits": hits[: params["size"]], "total": len(self.hits)}}
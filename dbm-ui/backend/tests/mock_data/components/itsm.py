@@ -82,11 +82,12 @@ class ItsmApiMock(object):
         return response_data["data"]
 
     @classmethod
-    def ticket_approval_result(cls, *args, **kwargs):
+    def ticket_approval_result(cls, params=None, *args, **kwargs):
         response_data = copy.deepcopy(cls.base_info)
+        sns = (params or {}).get("sn") or ["REQ20200831000005"]
         response_data["data"] = [
             {
-                "sn": "REQ20200831000005",
+                "sn": sn,
                 "title": "测试内置审批",
                 "ticket_url": "https://***",
                 "current_status": "FINISHED",
@@ -94,15 +95,17 @@ class ItsmApiMock(object):
                 "update_at": "2020-08-31 20:57:22",
                 "approve_result": True,
             }
+            for sn in sns
         ]
 
         return response_data["data"]
 
     @classmethod
-    def get_ticket_logs(cls, *args, **kwargs):
+    def get_ticket_logs(cls, params=None, *args, **kwargs):
         response_data = copy.deepcopy(cls.base_info)
+        sn = ((params or {}).get("sn") or ["REQ20200831000005"])[0]
         response_data["data"] = {
-            "sn": "REQ20200831000005",
+            "sn": sn,
             "title": "测试内置审批日志",
             "create_at": "2020-08-31 20:57:22",
             "creator": "xxx(xxx)",
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import sys
+
+from backend.dbm_tools.management.commands.ticket_builder_registry import import_builder_modules
+from backend.ticket.builders import BuilderFactory
+from backend.ticket.constants import TicketType
+
+
+class TestBuilderRegistry:
+    def test_registry_up_to_date(self):
+        # 注册表需与代码中实际注册的构造器一致，否则需执行 manage.py ticket_builder_registry 重新生成
+        import_builder_modules()
+        assert BuilderFactory.diff_registry() == {"missing": [], "stale": [], "changed": []}
+
+    def test_lazy_import_builder(self):
+        ticket_type = TicketType.MYSQL_HA_APPLY
+        module = BuilderFactory.ticket_type__module[ticket_type]
+        builder_cls = BuilderFactory.get_builder_cls(ticket_type)
+
+        # 模拟构造器尚未导入，首次获取时按注册表导入
+        BuilderFactory.registry.pop(ticket_type)
+        sys.modules.pop(module)
+        try:
+            lazy_builder_cls = BuilderFactory.get_builder_cls(ticket_type)
+            assert lazy_builder_cls.__module__ == module
+            assert lazy_builder_cls.ticket_type == ticket_type
+            assert ticket_type in BuilderFactory.apply_ticket_type
+        finally:
+            BuilderFactory.registry[ticket_type] = builder_cls
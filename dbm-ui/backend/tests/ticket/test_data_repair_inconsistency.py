@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from backend.ticket.constants import TicketStatus, TicketType
+from backend.ticket.models import DataRepairInconsistency, Ticket
+
+pytestmark = pytest.mark.django_db
+
+
+def create_repair_ticket(status, details=None):
+    return Ticket.objects.create(
+        bk_biz_id=1,
+        creator="admin",
+        ticket_type=TicketType.MYSQL_DATA_REPAIR,
+        status=status,
+        details=details or {"infos": []},
+    )
+
+
+class TestDataRepairInconsistency:
+    def test_record_deduplicate(self):
+        now = timezone.now()
+        pair__record_id = DataRepairInconsistency.objects.record(1, [(1, 10, 11), (1, 10, 12), (1, 10, 11)], now)
+        assert len(pair__record_id) == 2
+
+        # 再次发现相同的主从对，只更新发现次数
+        again = DataRepairInconsistency.objects.record(1, [(1, 10, 11)], now + timedelta(days=1))
+        assert again[(1, 10, 11)] == pair__record_id[(1, 10, 11)]
+        record = DataRepairInconsistency.objects.get(id=again[(1, 10, 11)])
+        assert record.found_times == 2
+        assert DataRepairInconsistency.objects.count() == 2
+
+    def test_throttled_cluster_ids(self):
+        now = timezone.now()
+        since = now - timedelta(days=1)
+        running_ticket = create_repair_ticket(TicketStatus.RUNNING)
+        finished_ticket = create_repair_ticket(TicketStatus.SUCCEEDED)
+        Ticket.objects.filter(id=finished_ticket.id).update(create_at=now - timedelta(days=3))
+
+        pair__record_id = DataRepairInconsistency.objects.record(1, [(1, 10, 11), (2, 20, 21), (3, 30, 31)], now)
+        DataRepairInconsistency.objects.bind_ticket([pair__record_id[(1, 10, 11)]], running_ticket)
+        DataRepairInconsistency.objects.bind_ticket([pair__record_id[(2, 20, 21)]], finished_ticket)
+
+        # 集群1存在进行中的修复单据被节流，集群2的修复单据已结束且早于校验窗口，集群3从未修复
+        assert DataRepairInconsistency.objects.get_throttled_cluster_ids([1, 2, 3], since) == {1}
+
+        # 修复单据在校验窗口内创建，即使已结束也需要节流
+        Ticket.objects.filter(id=finished_ticket.id).update(create_at=now)
+        assert DataRepairInconsistency.objects.get_throttled_cluster_ids([1, 2, 3], since) == {1, 2}
+
+    def test_throttled_by_manual_ticket(self):
+        now = timezone.now()
+        since = now - timedelta(days=1)
+        # 人工提交的修复单据没有关联不一致记录，按单据详情中的集群节流
+        manual_ticket = create_repair_ticket(TicketStatus.RUNNING, details={"infos": [{"cluster_id": 4}]})
+        finished_ticket = create_repair_ticket(TicketStatus.SUCCEEDED, details={"infos": [{"cluster_id": 5}]})
+        Ticket.objects.filter(id=finished_ticket.id).update(create_at=now - timedelta(days=3))
+        assert DataRepairInconsistency.objects.get_throttled_cluster_ids([4, 5, 6], since) == {4}
+
+        Ticket.objects.filter(id=manual_ticket.id).update(status=TicketStatus.SUCCEEDED)
+        Ticket.objects.filter(id=manual_ticket.id).update(create_at=now - timedelta(days=3))
+        assert DataRepairInconsistency.objects.get_throttled_cluster_ids([4, 5, 6], since) == set()
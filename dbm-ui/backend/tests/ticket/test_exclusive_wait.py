@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from backend.ticket.constants import FlowType, TicketFlowStatus, TicketStatus, TicketType
+from backend.ticket.models import Flow, FlowExclusiveWait, Ticket
+
+pytestmark = pytest.mark.django_db
+
+
+def create_inner_flow(status=TicketFlowStatus.RUNNING):
+    ticket = Ticket.objects.create(
+        bk_biz_id=1, creator="admin", ticket_type=TicketType.MYSQL_HA_APPLY, status=TicketStatus.RUNNING
+    )
+    return Flow.objects.create(ticket=ticket, flow_type=FlowType.INNER_FLOW, status=status)
+
+
+class TestFlowExclusiveWait:
+    def test_release_in_fifo_order(self):
+        blocker, other_blocker = create_inner_flow(), create_inner_flow()
+        first, second, third = create_inner_flow(), create_inner_flow(), create_inner_flow()
+        FlowExclusiveWait.objects.register(first, [{"cluster_id": 1, "flow_id": blocker.id}])
+        FlowExclusiveWait.objects.register(
+            second, [{"cluster_id": 1, "flow_id": blocker.id}, {"cluster_id": 2, "flow_id": other_blocker.id}]
+        )
+        FlowExclusiveWait.objects.register(third, [{"cluster_id": 1, "flow_id": blocker.id}])
+
+        # second 仍被其他集群的操作阻塞，不会被唤醒
+        assert FlowExclusiveWait.objects.release(blocker.id) == [first.id, third.id]
+        assert FlowExclusiveWait.objects.release(blocker.id) == []
+        assert FlowExclusiveWait.objects.release(other_blocker.id) == [second.id]
+
+    def test_register_keeps_wait_since(self):
+        blocker, next_blocker, waiter = create_inner_flow(), create_inner_flow(), create_inner_flow()
+        FlowExclusiveWait.objects.register(waiter, [{"cluster_id": 1, "flow_id": blocker.id}])
+        wait_since = FlowExclusiveWait.objects.get(flow=waiter).wait_since
+
+        # 唤醒后再次被阻塞，排队时间不变
+        FlowExclusiveWait.objects.release(blocker.id)
+        FlowExclusiveWait.objects.register(waiter, [{"cluster_id": 1, "flow_id": next_blocker.id}])
+        wait = FlowExclusiveWait.objects.get(flow=waiter)
+        assert wait.blocking_flow_id == next_blocker.id
+        assert wait.wait_since == wait_since
+        assert not wait.is_released
+
+    def test_cluster_queues(self):
+        blocker, other_blocker = create_inner_flow(), create_inner_flow()
+        first, second = create_inner_flow(), create_inner_flow()
+        FlowExclusiveWait.objects.register(
+            first, [{"cluster_id": 1, "flow_id": blocker.id}, {"cluster_id": 1, "flow_id": other_blocker.id}]
+        )
+        FlowExclusiveWait.objects.register(second, [{"cluster_id": 1, "flow_id": blocker.id}])
+
+        queues = FlowExclusiveWait.objects.get_cluster_queues([1, 2])
+        assert list(queues.keys()) == [1]
+        assert queues[1]["depth"] == 2
+        assert [waiter["flow_id"] for waiter in queues[1]["waiters"]] == [first.id, second.id]
+
+    def test_release_on_flow_finished(self):
+        blocker, waiter = create_inner_flow(), create_inner_flow()
+        FlowExclusiveWait.objects.register(waiter, [{"cluster_id": 1, "flow_id": blocker.id}])
+
+        with patch("backend.ticket.signals.TicketFlowManager"), patch(
+            "backend.ticket.signals.transaction.on_commit"
+        ) as on_commit:
+            blocker.update_status(TicketFlowStatus.SUCCEEDED)
+        assert FlowExclusiveWait.objects.get(flow=waiter).is_released
+        on_commit.assert_called_once()
+
+    def test_register_with_finished_blocker(self):
+        blocker, finished_blocker = create_inner_flow(), create_inner_flow(TicketFlowStatus.SUCCEEDED)
+        waiter, other_waiter = create_inner_flow(), create_inner_flow()
+
+        # 阻塞flow在登记前已结束，等待直接释放，flow可以立即唤醒
+        assert FlowExclusiveWait.objects.register(waiter, [{"cluster_id": 1, "flow_id": finished_blocker.id}])
+        assert FlowExclusiveWait.objects.get(flow=waiter).is_released
+        assert not FlowExclusiveWait.objects.register(
+            other_waiter,
+            [{"cluster_id": 1, "flow_id": blocker.id}, {"cluster_id": 2, "flow_id": finished_blocker.id}],
+        )
+
+        # 已释放的等待不计入集群队列
+        queues = FlowExclusiveWait.objects.get_cluster_queues([1, 2])
+        assert list(queues.keys()) == [1]
+        assert [waiter["flow_id"] for waiter in queues[1]["waiters"]] == [other_waiter.id]
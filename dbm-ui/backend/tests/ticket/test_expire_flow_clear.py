@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from backend.configuration.constants import PLAT_BIZ_ID, DBType, SystemSettingsEnum
+from backend.configuration.models import SystemSettings
+from backend.constants import DEFAULT_SYSTEM_USER
+from backend.ticket.constants import (
+    FlowType,
+    FlowTypeConfig,
+    TicketExpireType,
+    TicketFlowStatus,
+    TicketStatus,
+    TicketType,
+)
+from backend.ticket.models import Flow, Ticket, TicketFlowsConfig
+from backend.ticket.tasks.ticket_tasks import TicketTask
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def expire_config():
+    TicketFlowsConfig.objects.filter(bk_biz_id=PLAT_BIZ_ID, ticket_type=TicketType.MYSQL_HA_APPLY).delete()
+    TicketFlowsConfig.objects.create(
+        bk_biz_id=PLAT_BIZ_ID,
+        group=DBType.MySQL,
+        ticket_type=TicketType.MYSQL_HA_APPLY,
+        configs={
+            FlowTypeConfig.EXPIRE_CONFIG: {
+                TicketExpireType.ITSM: -1,
+                TicketExpireType.FLOW_TODO: -1,
+                TicketExpireType.INNER_FLOW: 1,
+            }
+        },
+    )
+
+
+def create_failed_ticket(expired_days=0):
+    ticket = Ticket.objects.create(
+        bk_biz_id=1, creator="admin", ticket_type=TicketType.MYSQL_HA_APPLY, status=TicketStatus.FAILED
+    )
+    flow = Flow.objects.create(ticket=ticket, flow_type=FlowType.INNER_FLOW, status=TicketFlowStatus.FAILED)
+    # update_at为auto_now，只能通过update修改
+    Flow.objects.filter(id=flow.id).update(update_at=timezone.now() - timedelta(days=expired_days))
+    return ticket
+
+
+class TestAutoClearExpireFlow:
+    def test_revoke_expired_tickets(self, expire_config):
+        expired, fresh = create_failed_ticket(expired_days=2), create_failed_ticket()
+        finished = create_failed_ticket(expired_days=2)
+        Ticket.objects.filter(id=finished.id).update(status=TicketStatus.TERMINATED)
+
+        revoked_ticket_ids = []
+        with patch(
+            "backend.ticket.handler.TicketHandler.revoke_ticket",
+            lambda ticket_ids, operator: revoked_ticket_ids.extend(ticket_ids),
+        ):
+            summary = TicketTask.auto_clear_expire_flow()
+
+        assert revoked_ticket_ids == [expired.id]
+        assert fresh.id not in revoked_ticket_ids
+        assert summary["matched"] == summary["revoked"] == 1
+        # 每次运行的结果都会记录下来
+        records = SystemSettings.get_setting_value(key=SystemSettingsEnum.EXPIRE_TICKET_CLEAR_SUMMARY)
+        assert records[-1]["matched"] == records[-1]["revoked"] == 1
+
+    def test_revoke_under_ticket_lock(self, expire_config):
+        expired = create_failed_ticket(expired_days=2)
+        expire_tickets = Ticket.objects.filter(TicketTask.get_expire_ticket_filters(timezone.now()))
+
+        def locked_revoke(ticket_ids, operator):
+            # 终止单据时仍处于加锁事务中，用户并发的重试需等待锁释放，无法在校验后、终止前改变单据
+            assert connection.in_atomic_block
+            raise Exception("revoke failed")
+
+        with patch("backend.ticket.handler.TicketHandler.revoke_ticket", locked_revoke):
+            assert TicketTask.revoke_expire_ticket(expired.id, expire_tickets) == "failed"
+        # 终止失败只回滚终止的改动，单据仍保留原状态等待下次清理
+        assert Ticket.objects.get(id=expired.id).status == TicketStatus.FAILED
+
+    def test_skip_ticket_handled_by_user(self, expire_config):
+        expired = create_failed_ticket(expired_days=2)
+        expire_tickets = Ticket.objects.filter(TicketTask.get_expire_ticket_filters(timezone.now()))
+        assert list(expire_tickets.values_list("id", flat=True)) == [expired.id]
+
+        # 查询后用户重试了流程，加锁校验时不再过期
+        Flow.objects.filter(ticket=expired).update(status=TicketFlowStatus.RUNNING)
+        assert TicketTask.revoke_expire_ticket(expired.id, expire_tickets) == "skipped"
+
+    def test_revoke_without_skip_locked(self, expire_config):
+        expired = create_failed_ticket(expired_days=2)
+        expire_tickets = Ticket.objects.filter(TicketTask.get_expire_ticket_filters(timezone.now()))
+
+        # 不支持skip_locked的数据库退化为nowait加锁，校验通过后在同一事务中终止单据
+        with patch.object(connection.features, "has_select_for_update_skip_locked", False), patch(
+            "backend.ticket.handler.TicketHandler.revoke_ticket"
+        ) as revoke_ticket:
+            assert TicketTask.revoke_expire_ticket(expired.id, expire_tickets) == "revoked"
+        revoke_ticket.assert_called_once_with(ticket_ids=[expired.id], operator=DEFAULT_SYSTEM_USER)
+
+    def test_keep_recent_summary(self, expire_config):
+        with patch("backend.ticket.tasks.ticket_tasks.EXPIRE_FLOW_CLEAR_SUMMARY_KEEP", 2):
+            for __ in range(3):
+                TicketTask.auto_clear_expire_flow()
+        records = SystemSettings.get_setting_value(key=SystemSettingsEnum.EXPIRE_TICKET_CLEAR_SUMMARY)
+        assert len(records) == 2
+
+    def test_no_expire_config(self):
+        TicketFlowsConfig.objects.filter(bk_biz_id=PLAT_BIZ_ID).delete()
+        assert TicketTask.get_expire_ticket_filters(timezone.now()) is None
+        assert TicketTask.auto_clear_expire_flow()["matched"] == 0
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from backend.tests.mock_data.components.itsm import ItsmApiMock
+from backend.ticket.constants import (
+    FlowContext,
+    FlowType,
+    TicketFlowStatus,
+    TicketStatus,
+    TicketType,
+    TodoStatus,
+    TodoType,
+)
+from backend.ticket.flow_manager.itsm import ItsmFlow
+from backend.ticket.models import Flow, Ticket, Todo
+from backend.ticket.tasks.ticket_tasks import TicketTask
+
+pytestmark = pytest.mark.django_db
+
+
+class CountingItsmApi(ItsmApiMock):
+    """记录调用次数的 itsm mock"""
+
+    calls = []
+
+    @classmethod
+    def ticket_approval_result(cls, params=None, *args, **kwargs):
+        cls.calls.append(("ticket_approval_result", params))
+        return super().ticket_approval_result(params, *args, **kwargs)
+
+    @classmethod
+    def get_ticket_logs(cls, params=None, *args, **kwargs):
+        cls.calls.append(("get_ticket_logs", params))
+        return super().get_ticket_logs(params, *args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def counting_itsm_api():
+    CountingItsmApi.calls = []
+    with patch("backend.ticket.flow_manager.itsm.ItsmApi", CountingItsmApi):
+        yield
+
+
+def create_itsm_flows(count):
+    flows = []
+    for index in range(count):
+        ticket = Ticket.objects.create(
+            bk_biz_id=1,
+            creator="admin",
+            ticket_type=TicketType.MYSQL_HA_APPLY,
+            status=TicketStatus.APPROVE,
+        )
+        flow = Flow.objects.create(
+            ticket=ticket,
+            flow_type=FlowType.BK_ITSM,
+            flow_obj_id=f"REQ{index}",
+            status=TicketFlowStatus.RUNNING,
+        )
+        Todo.objects.create(name="itsm", flow=flow, ticket=ticket, type=TodoType.ITSM, creator="admin")
+        flows.append(flow)
+    return flows
+
+
+class TestItsmSnapshot:
+    def test_sync_snapshots_in_batch(self):
+        flows = create_itsm_flows(3)
+        changed_flows = ItsmFlow.sync_snapshots(flows)
+
+        approval_calls = [params for api, params in CountingItsmApi.calls if api == "ticket_approval_result"]
+        assert approval_calls == [{"sn": ["REQ0", "REQ1", "REQ2"]}]
+        assert len(changed_flows) == 3
+        for flow in Flow.objects.filter(id__in=[flow.id for flow in flows]):
+            snapshot = flow.context[FlowContext.ITSM_SNAPSHOT]
+            assert snapshot["approval_result"]["sn"] == flow.flow_obj_id
+            assert snapshot["logs"][2]["operator"] == "admin"
+
+        # 审批结果未变化时，不再拉取日志
+        CountingItsmApi.calls = []
+        assert ItsmFlow.sync_snapshots(list(Flow.objects.filter(id__in=[flow.id for flow in flows]))) == []
+        assert [api for api, _ in CountingItsmApi.calls] == ["ticket_approval_result"]
+
+    def test_keep_concurrent_context_changes(self):
+        flow = create_itsm_flows(1)[0]
+        ticket_approval_result = CountingItsmApi.ticket_approval_result
+
+        def update_context_while_syncing(params=None, *args, **kwargs):
+            # 查询审批结果期间，其他逻辑修改了flow上下文，内存中的flow已过期
+            Flow.objects.filter(id=flow.id).update(context={"expire_time": 1})
+            return ticket_approval_result(params, *args, **kwargs)
+
+        with patch.object(CountingItsmApi, "ticket_approval_result", side_effect=update_context_while_syncing):
+            ItsmFlow.sync_snapshots([flow])
+        assert flow.context["expire_time"] == 1
+
+        flow.refresh_from_db()
+        assert flow.context["expire_time"] == 1
+        assert flow.context[FlowContext.ITSM_SNAPSHOT]["approval_result"]["sn"] == flow.flow_obj_id
+
+    def test_status_read_from_snapshot(self):
+        flow = create_itsm_flows(1)[0]
+        TicketTask.sync_itsm_approval_snapshot()
+        CountingItsmApi.calls = []
+
+        # 周期同步后，流程和todo状态已根据快照流转
+        flow.refresh_from_db()
+        assert flow.status == TicketFlowStatus.SUCCEEDED
+        assert flow.todo_of_flow.first().status == TodoStatus.DONE_SUCCESS
+
+        itsm_flow = ItsmFlow(flow_obj=flow)
+        assert itsm_flow.ticket_approval_result["current_status"] == "FINISHED"
+        assert itsm_flow.url == "https://***"
+        assert CountingItsmApi.calls == []
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import datetime
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from backend import env
+from backend.core.notify.constants import NOTIFY_MAX_SEND_TIMES, MsgType
+from backend.core.notify.handlers import CmsiHandler, NotifyAdapter, NotifyOutboxDispatcher
+from backend.ticket.constants import NotifyOutboxStatus, TicketStatus, TicketType
+from backend.ticket.models import NotifyOutbox, Ticket
+
+pytestmark = pytest.mark.django_db
+
+
+class FlakyCmsiApi:
+    """按照预设结果发送消息的 cmsi，结果为 False 时发送失败"""
+
+    results = []
+    sent_msgs = []
+
+    @classmethod
+    def reset(cls, results):
+        cls.results = list(results)
+        cls.sent_msgs = []
+
+    @classmethod
+    def send_msg(cls, params):
+        if cls.results and not cls.results.pop(0):
+            raise Exception("cmsi unavailable")
+        cls.sent_msgs.append(params)
+
+
+@pytest.fixture(autouse=True)
+def fake_sender():
+    FlakyCmsiApi.reset([])
+    with patch("backend.core.notify.handlers.CmsiApi", FlakyCmsiApi), patch.object(
+        CmsiHandler, "get_msg_type", classmethod(lambda cls: [MsgType.MAIL.value, MsgType.RTX.value])
+    ), patch.object(Ticket, "get_current_operators", lambda self: {"operators": [], "helpers": []}), patch.object(
+        env, "BKCHAT_APIGW_DOMAIN", ""
+    ):
+        yield
+
+
+def create_ticket(creator="admin"):
+    return Ticket.objects.create(
+        bk_biz_id=1,
+        creator=creator,
+        ticket_type=TicketType.MYSQL_HA_APPLY,
+        status=TicketStatus.SUCCEEDED,
+        send_msg_config={TicketStatus.SUCCEEDED: {MsgType.MAIL.value: True}},
+    )
+
+
+def expire_send_at():
+    NotifyOutbox.objects.update(send_at=timezone.now() - datetime.timedelta(minutes=1))
+
+
+class TestNotifyOutbox:
+    def test_retry_with_backoff(self):
+        FlakyCmsiApi.reset([False, True])
+        ticket = create_ticket()
+
+        NotifyAdapter(ticket.id).send_msg()
+        outbox = NotifyOutbox.objects.get(ticket=ticket)
+        assert outbox.status == NotifyOutboxStatus.PENDING
+        assert outbox.send_times == 1
+        assert outbox.error
+
+        # 未到重试时间不会投递
+        NotifyOutboxDispatcher.dispatch()
+        assert NotifyOutbox.objects.get(id=outbox.id).send_times == 1
+
+        expire_send_at()
+        NotifyOutboxDispatcher.dispatch()
+        outbox.refresh_from_db()
+        assert outbox.status == NotifyOutboxStatus.SUCCEEDED
+        assert outbox.send_times == 2
+        assert len(FlakyCmsiApi.sent_msgs) == 1
+
+    def test_failed_after_max_send_times(self):
+        FlakyCmsiApi.reset([False] * NOTIFY_MAX_SEND_TIMES)
+        ticket = create_ticket()
+
+        NotifyAdapter(ticket.id).send_msg()
+        for __ in range(NOTIFY_MAX_SEND_TIMES):
+            expire_send_at()
+            NotifyOutboxDispatcher.dispatch()
+
+        outbox = NotifyOutbox.objects.get(ticket=ticket)
+        assert outbox.status == NotifyOutboxStatus.FAILED
+        assert outbox.send_times == NOTIFY_MAX_SEND_TIMES
+        assert not FlakyCmsiApi.sent_msgs
+
+    def test_deduplicate(self):
+        ticket = create_ticket()
+
+        NotifyAdapter(ticket.id).send_msg()
+        NotifyAdapter(ticket.id).send_msg()
+        assert NotifyOutbox.objects.filter(ticket=ticket).count() == 1
+        assert len(FlakyCmsiApi.sent_msgs) == 1
+
+    def test_digest(self):
+        tickets = [create_ticket(), create_ticket()]
+
+        with patch.object(env, "NOTIFY_DIGEST_WINDOW", 60):
+            for ticket in tickets:
+                NotifyAdapter(ticket.id).send_msg()
+            # 合并窗口内不投递
+            NotifyOutboxDispatcher.dispatch()
+            assert not FlakyCmsiApi.sent_msgs
+
+            expire_send_at()
+            NotifyOutboxDispatcher.dispatch()
+
+        assert len(FlakyCmsiApi.sent_msgs) == 1
+        assert str(tickets[0].id) in FlakyCmsiApi.sent_msgs[0]["content"]
+        assert str(tickets[1].id) in FlakyCmsiApi.sent_msgs[0]["content"]
+        assert NotifyOutbox.objects.filter(status=NotifyOutboxStatus.SUCCEEDED).count() == 2
+
+    def test_claim_in_batch(self):
+        FlakyCmsiApi.reset([False, False])
+        tickets = [create_ticket(), create_ticket()]
+        for ticket in tickets:
+            NotifyAdapter(ticket.id).send_msg()
+        expire_send_at()
+        # 后一张单据的通知更早到期，优先认领
+        NotifyOutbox.objects.filter(ticket=tickets[1]).update(send_at=timezone.now() - datetime.timedelta(minutes=2))
+
+        with patch("backend.core.notify.handlers.NOTIFY_DISPATCH_BATCH_SIZE", 1):
+            claimed = NotifyOutboxDispatcher.claim()
+            assert [outbox.ticket_id for outbox in claimed] == [tickets[1].id]
+            assert [outbox.ticket_id for outbox in NotifyOutboxDispatcher.claim()] == [tickets[0].id]
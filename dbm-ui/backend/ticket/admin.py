@@ -41,3 +41,36 @@ class TodoAdmin(admin.ModelAdmin):
     list_filter = ("type", "status", "done_at")
     search_fields = ("id", "name", "done_by", "ticket__id")
     raw_id_fields = ("ticket", "flow")
+
+
+@admin.register(models.NotifyOutbox)
+class NotifyOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "ticket_id", "phase", "msg_type", "receiver", "status", "send_times", "send_at", "sent_at")
+    list_filter = ("phase", "msg_type", "status")
+    search_fields = ("receiver", "ticket__id")
+    raw_id_fields = ("ticket",)
+
+
+@admin.register(models.FlowExclusiveWait)
+class FlowExclusiveWaitAdmin(admin.ModelAdmin):
+    list_display = ("id", "flow_id", "ticket_id", "cluster_id", "blocking_flow_id", "is_released", "wait_since")
+    list_filter = ("is_released",)
+    search_fields = ("cluster_id", "ticket__id")
+    raw_id_fields = ("flow", "ticket", "blocking_flow")
+
+
+@admin.register(models.DataRepairInconsistency)
+class DataRepairInconsistencyAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "bk_biz_id",
+        "cluster_id",
+        "master_id",
+        "slave_id",
+        "found_times",
+        "last_found_at",
+        "ticket_id",
+    )
+    list_filter = ("bk_biz_id",)
+    search_fields = ("cluster_id", "ticket__id")
+    raw_id_fields = ("ticket",)
@@ -32,12 +32,16 @@ class TicketConfig(AppConfig):
     name = "backend.ticket"
 
     def ready(self):
+        from backend import env
         from backend.ticket.builders import register_all_builders
         from backend.ticket.models import Flow
-        from backend.ticket.signals import update_ticket_status
+        from backend.ticket.signals import release_exclusive_waits, update_ticket_status
         from backend.ticket.todos import register_all_todos
 
-        register_all_builders()
+        # 按需加载时构造器在首次使用时导入，见 BuilderFactory.get_builder_cls
+        if not env.TICKET_BUILDER_LAZY_LOAD:
+            register_all_builders()
         register_all_todos()
         post_migrate.connect(init_ticket_flow_config, sender=self)
         post_save.connect(update_ticket_status, sender=Flow)
+        post_save.connect(release_exclusive_waits, sender=Flow)
@@ -29,6 +29,9 @@ from backend.ticket.models import Flow, Ticket, TicketFlowsConfig
 
 logger = logging.getLogger("root")
 
+# 单据类型与构造器模块的注册表文件
+BUILDER_REGISTRY_FILE = os.path.join(os.path.dirname(__file__), "builder_registry.json")
+
 
 class CallBackBuilderMixin(object):
     """为节点添加前置/后继钩子函数信息"""
@@ -119,7 +122,7 @@ class ItsmParamBuilder(CallBackBuilderMixin):
         self.details = copy.deepcopy(ticket.details)
 
     def get_approvers(self):
-        db_type = BuilderFactory.registry[self.ticket.ticket_type].group
+        db_type = BuilderFactory.get_builder_cls(self.ticket.ticket_type).group
         approvers = DBAdministrator.get_biz_db_type_admins(self.ticket.bk_biz_id, db_type)
         return ",".join(approvers)
 
@@ -441,8 +444,12 @@ class TicketFlowBuilder:
 
 
 class BuilderFactory:
-    # 单据的注册器类集合
+    # 单据的注册器类集合(已导入的构造器)
     registry = {}
+    # 单据类型与构造器模块的映射，用于按需导入构造器
+    ticket_type__module = {}
+    # 单据注册时的元信息，用于生成和校验注册表文件
+    ticket_type__register_meta = {}
     # 部署类单据集合
     apply_ticket_type = []
     # 敏感类单据集合
@@ -476,25 +483,117 @@ class BuilderFactory:
                 logger.warning(f"Builder [{ticket_type}] already exists. Will replace it")
             cls.registry[ticket_type] = wrapped_class
 
-            if kwargs.get("is_apply") and kwargs.get("is_apply") not in cls.apply_ticket_type:
-                cls.apply_ticket_type.append(ticket_type)
-            if kwargs.get("is_sensitive") and kwargs.get("is_sensitive") not in cls.sensitive_ticket_type:
-                cls.sensitive_ticket_type.append(ticket_type)
-            if kwargs.get("phase"):
-                cls.ticket_type__cluster_phase[ticket_type] = kwargs["phase"]
-            if kwargs.get("cluster_type"):
-                cls.ticket_type__cluster_type[ticket_type] = kwargs["cluster_type"]
-            if hasattr(ActionEnum, ticket_type) or kwargs.get("iam"):
-                # 单据类型和权限动作默认一一对应，如果是特殊指定的则通过iam参数传递
-                cls.ticket_type__iam_action[ticket_type] = getattr(ActionEnum, ticket_type, None) or kwargs.get("iam")
+            meta = cls._dump_register_meta(wrapped_class.__module__, **kwargs)
+            cls.ticket_type__module[ticket_type] = meta["module"]
+            cls.ticket_type__register_meta[ticket_type] = meta
+            cls._add_register_meta(ticket_type, **meta)
 
             return wrapped_class
 
         return inner_wrapper
 
+    @staticmethod
+    def _dump_register_meta(module: str, **kwargs) -> Dict:
+        """将注册参数转为可序列化的元信息，仅保留有效字段"""
+        meta = {"module": module}
+        if kwargs.get("is_apply"):
+            meta["is_apply"] = True
+        if kwargs.get("is_sensitive"):
+            meta["is_sensitive"] = True
+        if kwargs.get("phase"):
+            meta["phase"] = getattr(kwargs["phase"], "value", kwargs["phase"])
+        if kwargs.get("cluster_type"):
+            meta["cluster_type"] = getattr(kwargs["cluster_type"], "value", kwargs["cluster_type"])
+        if kwargs.get("iam"):
+            meta["iam"] = getattr(kwargs["iam"], "id", kwargs["iam"])
+        return meta
+
+    @classmethod
+    def _add_register_meta(
+        cls, ticket_type: str, is_apply=False, is_sensitive=False, phase=None, cluster_type=None, iam=None, **kwargs
+    ):
+        """将单据元信息归入不同的集合中"""
+        if is_apply and ticket_type not in cls.apply_ticket_type:
+            cls.apply_ticket_type.append(ticket_type)
+        if is_sensitive and ticket_type not in cls.sensitive_ticket_type:
+            cls.sensitive_ticket_type.append(ticket_type)
+        if phase:
+            cls.ticket_type__cluster_phase[ticket_type] = phase
+        if cluster_type:
+            cls.ticket_type__cluster_type[ticket_type] = cluster_type
+        # 单据类型和权限动作默认一一对应，如果是特殊指定的则通过iam参数传递
+        action = getattr(ActionEnum, ticket_type, None) or iam
+        if action:
+            cls.ticket_type__iam_action[ticket_type] = ActionEnum.get_action_by_id(action)
+
+    @classmethod
+    def load_registry(cls, registry_file: str = BUILDER_REGISTRY_FILE):
+        """
+        从注册表文件加载单据元信息，构造器类在首次使用时才导入。
+        注册表文件由 `python manage.py ticket_builder_registry` 生成
+        """
+        try:
+            with open(registry_file, encoding="utf-8") as f:
+                register_metas = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"load ticket builder registry failed, fallback to register all builders: {e}")
+            register_all_builders()
+            return
+
+        for ticket_type, meta in register_metas.items():
+            # 已导入的构造器以代码中的注册信息为准
+            if ticket_type in cls.registry:
+                continue
+            cls.ticket_type__module[ticket_type] = meta["module"]
+            cls._add_register_meta(ticket_type, **meta)
+
+    @classmethod
+    def load_all_builders(cls):
+        """导入全部构造器，用于需要遍历所有构造器类的场景"""
+        register_all_builders()
+        for module in set(cls.ticket_type__module.values()):
+            try:
+                importlib.import_module(module)
+            except ModuleNotFoundError as e:
+                logger.warning(f"ticket builder module [{module}] not found, please refresh the registry: {e}")
+
+    @classmethod
+    def get_ticket_types(cls):
+        """获取所有已注册的单据类型(无需导入构造器)"""
+        return set(cls.ticket_type__module.keys()) | set(cls.registry.keys())
+
+    @classmethod
+    def dump_registry(cls) -> Dict:
+        """导出已导入构造器的注册表，需先调用 load_all_builders"""
+        return {
+            ticket_type: cls.ticket_type__register_meta[ticket_type]
+            for ticket_type in sorted(cls.ticket_type__register_meta.keys())
+        }
+
+    @classmethod
+    def diff_registry(cls, registry_file: str = BUILDER_REGISTRY_FILE) -> Dict:
+        """比较注册表文件与代码中实际注册的构造器，返回缺失、多余和不一致的单据类型"""
+        cls.load_all_builders()
+        with open(registry_file, encoding="utf-8") as f:
+            register_metas = json.load(f)
+
+        actual_metas = cls.dump_registry()
+        return {
+            "missing": sorted(set(actual_metas) - set(register_metas)),
+            "stale": sorted(set(register_metas) - set(actual_metas)),
+            "changed": sorted(
+                ticket_type
+                for ticket_type in set(actual_metas) & set(register_metas)
+                if actual_metas[ticket_type] != register_metas[ticket_type]
+            ),
+        }
+
     @classmethod
     def get_builder_cls(cls, ticket_type: str):
-        """获取构造器类"""
+        """获取构造器类，未导入时按注册表导入对应模块"""
+        if ticket_type not in cls.registry and ticket_type in cls.ticket_type__module:
+            importlib.import_module(cls.ticket_type__module[ticket_type])
+
         if ticket_type not in cls.registry:
             logger.warning(f"Ticket Type: [{ticket_type}] does not exist in the registry")
             raise NotImplementedError
@@ -519,15 +618,18 @@ def register_all_builders(path=os.path.dirname(__file__), module_path="backend.t
     """递归注册当前目录下所有的构建器"""
     for name in os.listdir(path):
         # 忽略无效文件
-        if name.endswith(".pyc") or name in ["__init__.py", "__pycache__"]:
+        if name in ["__init__.py", "__pycache__"]:
             continue
 
         if os.path.isdir(os.path.join(path, name)):
             register_all_builders(os.path.join(path, name), ".".join([module_path, name]))
-        else:
+        elif name.endswith(".py"):
             try:
                 module_name = name.replace(".py", "")
                 import_path = ".".join([module_path, module_name])
                 importlib.import_module(import_path)
             except ModuleNotFoundError as e:
                 logger.warning(e)
+
+
+BuilderFactory.load_registry()
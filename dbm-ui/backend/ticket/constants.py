@@ -95,6 +95,14 @@ class TicketStatus(str, StructuredEnum):
     INNER_TODO = EnumField("INNER_TODO", _("待继续"))
 
 
+class NotifyOutboxStatus(str, StructuredEnum):
+    """通知发件箱状态枚举"""
+
+    PENDING = EnumField("PENDING", _("待发送"))
+    SUCCEEDED = EnumField("SUCCEEDED", _("已发送"))
+    FAILED = EnumField("FAILED", _("发送失败"))
+
+
 # 单据[正在进行]的状态合集
 TICKET_RUNNING_STATUS_SET = [
     TicketStatus.APPROVE,
@@ -113,6 +121,8 @@ TICKET_TODO_STATUS_SET = [
 ]
 # 单据[失败]的状态合集
 TICKET_FAILED_STATUS_SET = [TicketStatus.REVOKED, TicketStatus.TERMINATED, TicketStatus.FAILED]
+# 单据[已结束]的状态合集
+TICKET_FINISHED_STATUS_SET = [TicketStatus.SUCCEEDED, TicketStatus.REVOKED, TicketStatus.TERMINATED]
 
 
 class TicketFlowStatus(str, StructuredEnum):
@@ -127,6 +137,9 @@ class TicketFlowStatus(str, StructuredEnum):
     SKIPPED = EnumField("SKIPPED", _("跳过"))
 
 
+# 互斥阻塞中的流程状态，流程离开这些状态时释放在其上的互斥等待
+FLOW_EXCLUSIVE_BLOCKING_STATUS = [TicketFlowStatus.RUNNING, TicketFlowStatus.FAILED]
+
 # 流程成功状态
 FLOW_FINISHED_STATUS = [TicketFlowStatus.SKIPPED, TicketFlowStatus.SUCCEEDED]
 # 流程未执行状态
@@ -625,6 +638,7 @@ class FlowContext(str, StructuredEnum):
     """流程上下文枚举"""
 
     EXPIRE_TIME = EnumField("expire_time", _("超时时间"))
+    ITSM_SNAPSHOT = EnumField("itsm_snapshot", _("ITSM审批快照"))
 
 
 class FlowTypeConfig(str, StructuredEnum):
@@ -810,6 +824,20 @@ FLOW_TYPE__EXPIRE_TYPE_CONFIG = {
     FlowType.RESOURCE_BATCH_APPLY: TicketExpireType.FLOW_TODO,
 }
 
+# 自动数据修复：每批解析实例的集群数量
+DATA_REPAIR_CLUSTER_BATCH_SIZE = 200
+# 自动数据修复：分时间窗口查询校验日志，避免单次查询超过日志平台的条数上限被截断
+DATA_REPAIR_CHECKSUM_WINDOW_HOURS = 1
+# 自动数据修复：校验程序每轮上报的标记记录(db为固定值)总是一致的，在日志平台侧过滤。
+# 日志平台无法比较两个字段，真正的一致性判断仍需在拉取后进行
+DATA_REPAIR_CHECKSUM_QUERY_STRING = 'NOT db: "_dba_fake_daily" AND NOT db: "_dba_fake_round_start"'
+
+# 过期单据清理：每批终止的单据数量，以及单次运行的最大批次
+EXPIRE_FLOW_CLEAR_BATCH_SIZE = 100
+EXPIRE_FLOW_CLEAR_MAX_BATCHES = 10
+# 过期单据清理：保留最近的运行记录数
+EXPIRE_FLOW_CLEAR_SUMMARY_KEEP = 30
+
 # 根据流程类型来映射单据状态
 RUNNING_FLOW__TICKET_STATUS = {
     FlowType.BK_ITSM: TicketStatus.APPROVE,
@@ -15,6 +15,7 @@ from abc import ABC, abstractmethod
 from functools import reduce
 from typing import Any, Optional, Union
 
+from django.db import transaction
 from django.db.models import Q
 from django.utils.translation import gettext as _
 
@@ -33,7 +34,14 @@ from backend.ticket.constants import (
     TicketFlowStatus,
     TodoStatus,
 )
-from backend.ticket.models import ClusterOperateRecord, Flow, InstanceOperateRecord, TicketFlowsConfig, Todo
+from backend.ticket.models import (
+    ClusterOperateRecord,
+    Flow,
+    FlowExclusiveWait,
+    InstanceOperateRecord,
+    TicketFlowsConfig,
+    Todo,
+)
 
 logger = logging.getLogger("root")
 
@@ -125,9 +133,16 @@ class BaseTicketFlow(ABC):
         self.flow_obj.status = TicketFlowStatus.FAILED
         self.flow_obj.save(update_fields=["err_code", "err_msg", "status", "update_at"])
 
-        # 如果是自动重试，则认为flow和ticket都在执行，否则打印异常的堆栈
+        # 如果是自动重试，则认为flow和ticket都在执行，并等待阻塞的flow释放后唤醒，否则打印异常的堆栈
         if err_code == FlowErrCode.AUTO_EXCLUSIVE_ERROR.value:
             self.run_status_handler(flow_obj_id=self.flow_obj.flow_obj_id)
+            is_ready = FlowExclusiveWait.objects.register(self.flow_obj, blockers=getattr(err, "data", None) or [])
+            # 阻塞在登记前就已全部释放，直接唤醒
+            if is_ready:
+                from backend.ticket.tasks.ticket_tasks import wakeup_exclusive_inner_flow
+
+                flow_id = self.flow_obj.id
+                transaction.on_commit(lambda: wakeup_exclusive_inner_flow.delay([flow_id]))
         else:
             logger.error(traceback.format_exc())
 
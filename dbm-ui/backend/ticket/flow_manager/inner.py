@@ -35,7 +35,7 @@ from backend.ticket.constants import (
     TodoType,
 )
 from backend.ticket.flow_manager.base import BaseTicketFlow
-from backend.ticket.models import Flow, Todo
+from backend.ticket.models import Flow, FlowExclusiveWait, Todo
 from backend.ticket.todos import BaseTodoContext
 from backend.utils.basic import generate_root_id
 from backend.utils.time import datetime2str
@@ -190,6 +190,8 @@ class InnerFlow(BaseTicketFlow):
             # 记录inner flow的集群动作和实例动作
             self.create_cluster_operate_records()
             self.create_instance_operate_records()
+            # 执行成功后不再处于互斥等待
+            FlowExclusiveWait.objects.filter(flow=self.flow_obj).delete()
 
     def _run(self) -> None:
         # 创建并执行后台任务流程
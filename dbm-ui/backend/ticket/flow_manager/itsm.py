@@ -8,55 +8,113 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import logging
 from datetime import datetime
-from typing import Any, Union
+from typing import Any, List, Union
 
+from django.db import transaction
 from django.utils.translation import gettext as _
 
 from backend.components import ItsmApi
 from backend.components.itsm.constants import ItsmTicketStatus
 from backend.exceptions import ApiResultError
-from backend.ticket.constants import TicketFlowStatus, TicketStatus, TodoStatus, TodoType
+from backend.ticket.constants import FlowContext, TicketFlowStatus, TicketStatus, TodoStatus, TodoType
 from backend.ticket.flow_manager.base import BaseTicketFlow
 from backend.ticket.models import Flow, Todo
 from backend.ticket.todos.itsm_todo import ItsmTodoContext
+from backend.utils.batch_request import QUERY_ITSM_LIMIT, request_multi_thread
 from backend.utils.time import datetime2str, standardized_time_str
 
+logger = logging.getLogger("root")
+
 
 class ItsmFlow(BaseTicketFlow):
     def __init__(self, flow_obj: Flow):
         super().__init__(flow_obj=flow_obj)
 
     @property
-    def ticket_approval_result(self):
-        # 优先读取缓存，避免同一个对象内多次请求 ITSM
-        if getattr(self, "_ticket_approval_result", None):
-            return self._ticket_approval_result
+    def snapshot(self) -> dict:
+        """本地存储的ITSM审批快照，由周期任务批量同步"""
+        # 快照缺失时(单据刚提交尚未同步)才按需刷新，同一个对象内只刷新一次
+        if FlowContext.ITSM_SNAPSHOT not in self.flow_obj.context and not getattr(self, "_refreshed", False):
+            self.refresh_snapshot()
+        return self.flow_obj.context.get(FlowContext.ITSM_SNAPSHOT) or {}
 
-        # 调用ITSM接口查询审批状态
-        try:
-            data = ItsmApi.ticket_approval_result({"sn": [self.flow_obj.flow_obj_id]}, use_admin=True)
-            itsm_ticket_result = data[0]
-        except (IndexError, ApiResultError):
-            itsm_ticket_result = None
-
-        setattr(self, "_ticket_approval_result", itsm_ticket_result)
-        return itsm_ticket_result
+    @property
+    def ticket_approval_result(self):
+        return self.snapshot.get("approval_result")
 
     @property
     def ticket_logs(self):
-        # 同ticket_approval_result，优先读取缓存
-        if getattr(self, "_ticket_logs", None):
-            return self._ticket_logs
-
-        try:
-            itsm_logs = ItsmApi.get_ticket_logs({"sn": [self.flow_obj.flow_obj_id]}, use_admin=True)
-            ticket_logs = itsm_logs["logs"]
-        except (KeyError, ApiResultError):
-            ticket_logs = []
+        return self.snapshot.get("logs") or []
+
+    def refresh_snapshot(self):
+        """按需刷新当前单据的审批快照，用于单据详情查看和ITSM回调"""
+        setattr(self, "_refreshed", True)
+        self.sync_snapshots([self.flow_obj])
+
+    @classmethod
+    def sync_snapshots(cls, flows: List[Flow]) -> List[Flow]:
+        """
+        批量同步ITSM审批结果和单据日志到flow上下文，返回快照有变化的flow
+        @param flows: 待同步的itsm流程
+        """
+        sn__flow = {flow.flow_obj_id: flow for flow in flows if flow.flow_obj_id}
+        sns = list(sn__flow.keys())
+
+        # 审批结果接口支持批量查询，按批次请求
+        sn__approval_result = {}
+        for index in range(0, len(sns), QUERY_ITSM_LIMIT):
+            try:
+                data = ItsmApi.ticket_approval_result({"sn": sns[index : index + QUERY_ITSM_LIMIT]}, use_admin=True)
+            except ApiResultError as err:
+                logger.error(f"sync itsm approval result failed, sn: {sns[index : index + QUERY_ITSM_LIMIT]}, {err}")
+                continue
+            sn__approval_result.update({result["sn"]: result for result in data})
+
+        # 审批结果未变化的单据，日志也不会变化，只对有变化的单据拉取日志
+        changed_flows = []
+        for sn, approval_result in sn__approval_result.items():
+            if sn not in sn__flow:
+                continue
+            snapshot = sn__flow[sn].context.get(FlowContext.ITSM_SNAPSHOT) or {}
+            if snapshot.get("approval_result") != approval_result or "logs" not in snapshot:
+                changed_flows.append(sn__flow[sn])
+
+        def get_ticket_logs(sn):
+            try:
+                return ItsmApi.get_ticket_logs({"sn": [sn]}, use_admin=True)["logs"]
+            except (KeyError, ApiResultError):
+                return []
+
+        sn__logs = dict(
+            request_multi_thread(
+                get_ticket_logs,
+                params_list=[{"sn": flow.flow_obj_id} for flow in changed_flows],
+                get_data=lambda x: (x[0]["sn"], x[1]),
+                in_order=True,
+            )
+        )
 
-        setattr(self, "_ticket_logs", ticket_logs)
-        return ticket_logs
+        id__snapshot = {
+            flow.id: {
+                "approval_result": sn__approval_result[flow.flow_obj_id],
+                "logs": sn__logs.get(flow.flow_obj_id, []),
+            }
+            for flow in changed_flows
+        }
+        # 拉取日志期间其他逻辑可能修改了flow上下文，加锁重新读取后只合并快照字段，避免覆盖并发的修改
+        with transaction.atomic():
+            locked_flows = list(Flow.objects.select_for_update().filter(id__in=id__snapshot.keys()).order_by("id"))
+            for locked_flow in locked_flows:
+                locked_flow.context[FlowContext.ITSM_SNAPSHOT] = id__snapshot[locked_flow.id]
+            # 注意这里不更新update_at，避免影响itsm流程的超时判断
+            Flow.objects.bulk_update(locked_flows, fields=["context"])
+
+        id__context = {flow.id: flow.context for flow in locked_flows}
+        for flow in changed_flows:
+            flow.context = id__context.get(flow.id, flow.context)
+        return changed_flows
 
     @property
     def _start_time(self) -> str:
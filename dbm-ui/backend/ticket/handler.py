@@ -39,6 +39,7 @@ from backend.ticket.constants import (
     TodoType,
 )
 from backend.ticket.exceptions import TicketFlowsConfigException
+from backend.ticket.flow_manager.itsm import ItsmFlow
 from backend.ticket.flow_manager.manager import TicketFlowManager
 from backend.ticket.models import Flow, Ticket, TicketFlowsConfig, Todo
 from backend.ticket.todos import BaseTodoContext, TodoActorFactory
@@ -173,12 +174,13 @@ class TicketHandler:
     @classmethod
     def ticket_flow_config_init(cls):
         """初始化单据配置"""
+        BuilderFactory.load_all_builders()
         exist_flow_configs = TicketFlowsConfig.objects.all()
         exist_ticket_types = [config.ticket_type for config in exist_flow_configs]
 
         # 删除不存在的单据流程
         deleted_configs = [
-            config.id for config in exist_flow_configs if config.ticket_type not in BuilderFactory.registry.keys()
+            config.id for config in exist_flow_configs if config.ticket_type not in BuilderFactory.get_ticket_types()
         ]
         TicketFlowsConfig.objects.filter(id__in=deleted_configs).delete()
 
@@ -252,6 +254,12 @@ class TicketHandler:
 
         return sn
 
+    @classmethod
+    def refresh_itsm_snapshot(cls, ticket: Ticket):
+        """按需刷新单据中审批中的itsm流程快照，其余单据由周期任务批量同步"""
+        itsm_flows = ticket.flows.filter(flow_type=FlowType.BK_ITSM, status=TicketFlowStatus.RUNNING)
+        ItsmFlow.sync_snapshots(list(itsm_flows))
+
     @classmethod
     def operate_flow(cls, ticket_id, flow_id, func, *args, **kwargs):
         """进行flow操作，目前支持重试和终止"""
@@ -427,7 +435,7 @@ class TicketHandler:
             ]
             # 获取当前单据的执行流程描述
             config_map = cluster_config_map if cluster_info else biz_config_map
-            flow_desc = BuilderFactory.registry[flow_config.ticket_type].describe_ticket_flows(config_map)
+            flow_desc = BuilderFactory.get_builder_cls(flow_config.ticket_type).describe_ticket_flows(config_map)
             # 获取配置的基本信息
             flow_config_info = model_to_dict(flow_config)
             flow_config_info.update(
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ticket", "0013_todo_helpers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotifyOutbox",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("creator", models.CharField(max_length=64, verbose_name="创建人")),
+                ("create_at", models.DateTimeField(auto_now_add=True, verbose_name="创建时间")),
+                ("updater", models.CharField(max_length=64, verbose_name="修改人")),
+                ("update_at", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+                (
+                    "phase",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "等待中"),
+                            ("APPROVE", "待审批"),
+                            ("RESOURCE_REPLENISH", "待补货"),
+                            ("TODO", "待执行"),
+                            ("TIMER", "定时中"),
+                            ("RUNNING", "执行中"),
+                            ("SUCCEEDED", "已完成"),
+                            ("FAILED", "已失败"),
+                            ("REVOKED", "已撤销"),
+                            ("TERMINATED", "已终止"),
+                            ("INNER_TODO", "待继续"),
+                        ],
+                        max_length=32,
+                        verbose_name="单据阶段",
+                    ),
+                ),
+                ("msg_type", models.CharField(max_length=32, verbose_name="通知渠道")),
+                ("receiver", models.CharField(max_length=128, verbose_name="接收人")),
+                ("title", models.TextField(default="", verbose_name="通知标题")),
+                ("content", models.TextField(default="", verbose_name="通知内容")),
+                ("context", models.JSONField(default=dict, verbose_name="通知上下文")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PENDING", "待发送"), ("SUCCEEDED", "已发送"), ("FAILED", "发送失败")],
+                        default="PENDING",
+                        max_length=32,
+                        verbose_name="发送状态",
+                    ),
+                ),
+                ("send_times", models.IntegerField(default=0, verbose_name="已发送次数")),
+                ("send_at", models.DateTimeField(verbose_name="计划发送时间")),
+                ("sent_at", models.DateTimeField(null=True, verbose_name="发送成功时间")),
+                ("error", models.TextField(default="", verbose_name="失败信息")),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        help_text="关联工单",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notify_of_ticket",
+                        to="ticket.ticket",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "通知发件箱(NotifyOutbox)",
+                "verbose_name_plural": "通知发件箱(NotifyOutbox)",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="notifyoutbox",
+            index=models.Index(fields=["status", "send_at"], name="ticket_noti_status_8d20bb_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notifyoutbox",
+            index=models.Index(
+                fields=["ticket", "phase", "msg_type", "receiver"], name="ticket_noti_ticket__e65995_idx"
+            ),
+        ),
+    ]
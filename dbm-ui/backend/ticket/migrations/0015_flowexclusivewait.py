@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ticket", "0014_notifyoutbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlowExclusiveWait",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("creator", models.CharField(max_length=64, verbose_name="创建人")),
+                ("create_at", models.DateTimeField(auto_now_add=True, verbose_name="创建时间")),
+                ("updater", models.CharField(max_length=64, verbose_name="修改人")),
+                ("update_at", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+                ("cluster_id", models.IntegerField(verbose_name="集群ID")),
+                ("is_released", models.BooleanField(default=False, verbose_name="阻塞是否已释放")),
+                ("wait_since", models.DateTimeField(verbose_name="开始等待时间")),
+                (
+                    "blocking_flow",
+                    models.ForeignKey(
+                        help_text="阻塞的流程",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exclusive_waiters",
+                        to="ticket.flow",
+                    ),
+                ),
+                (
+                    "flow",
+                    models.ForeignKey(
+                        help_text="被阻塞的流程",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exclusive_waits",
+                        to="ticket.flow",
+                    ),
+                ),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        help_text="关联工单", on_delete=django.db.models.deletion.CASCADE, to="ticket.ticket"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "互斥等待记录(FlowExclusiveWait)",
+                "verbose_name_plural": "互斥等待记录(FlowExclusiveWait)",
+                "unique_together": {("flow", "cluster_id", "blocking_flow")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="flowexclusivewait",
+            index=models.Index(fields=["cluster_id", "wait_since"], name="ticket_flow_cluster_a78af7_idx"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ticket", "0015_flowexclusivewait"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flow",
+            index=models.Index(fields=["flow_type", "status", "update_at"], name="ticket_flow_flow_ty_751696_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(fields=["type", "status", "update_at"], name="ticket_todo_type_330103_idx"),
+        ),
+    ]
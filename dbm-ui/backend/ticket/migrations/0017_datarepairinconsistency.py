@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ticket", "0016_auto_20261019_1400"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataRepairInconsistency",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("creator", models.CharField(max_length=64, verbose_name="创建人")),
+                ("create_at", models.DateTimeField(auto_now_add=True, verbose_name="创建时间")),
+                ("updater", models.CharField(max_length=64, verbose_name="修改人")),
+                ("update_at", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+                ("bk_biz_id", models.IntegerField(verbose_name="业务ID")),
+                ("cluster_id", models.IntegerField(verbose_name="集群ID")),
+                ("master_id", models.IntegerField(verbose_name="master实例ID")),
+                ("slave_id", models.IntegerField(verbose_name="slave实例ID")),
+                ("found_times", models.IntegerField(default=1, verbose_name="发现次数")),
+                ("last_found_at", models.DateTimeField(verbose_name="最近发现时间")),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="最近一次关联的修复单据",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="repair_inconsistencies",
+                        to="ticket.ticket",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "数据不一致记录(DataRepairInconsistency)",
+                "verbose_name_plural": "数据不一致记录(DataRepairInconsistency)",
+                "unique_together": {("cluster_id", "master_id", "slave_id")},
+            },
+        ),
+    ]
@@ -8,6 +8,9 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from .data_repair import DataRepairInconsistency
+from .exclusive import FlowExclusiveWait
+from .notify import NotifyOutbox
 from .ticket import *
 from .ticket_result_relation import TicketResultRelation
 from .todo import *
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from django.db import models
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+
+from backend.bk_web.models import AuditedModel
+from backend.constants import DEFAULT_SYSTEM_USER
+from backend.ticket.constants import TICKET_FINISHED_STATUS_SET, TicketType
+
+# 主从对的唯一标识: (cluster_id, master_id, slave_id)
+RepairPair = Tuple[int, int, int]
+# 数据修复的单据类型
+DATA_REPAIR_TICKET_TYPES = [TicketType.MYSQL_DATA_REPAIR, TicketType.TENDBCLUSTER_DATA_REPAIR]
+
+
+class DataRepairInconsistencyManager(models.Manager):
+    def record(self, bk_biz_id: int, pairs: List[RepairPair], found_at: datetime) -> Dict[RepairPair, int]:
+        """记录校验发现的不一致主从对，已存在的记录只更新发现时间和次数，返回主从对和记录ID的映射"""
+        pairs = set(pairs)
+        cluster_ids = {cluster_id for cluster_id, __, __ in pairs}
+        exist_records = {
+            (record.cluster_id, record.master_id, record.slave_id): record
+            for record in self.filter(cluster_id__in=cluster_ids)
+        }
+
+        to_update, to_create = [], []
+        for pair in pairs:
+            if pair in exist_records:
+                record = exist_records[pair]
+                record.found_times, record.last_found_at = record.found_times + 1, found_at
+                to_update.append(record)
+            else:
+                cluster_id, master_id, slave_id = pair
+                to_create.append(
+                    self.model(
+                        bk_biz_id=bk_biz_id,
+                        cluster_id=cluster_id,
+                        master_id=master_id,
+                        slave_id=slave_id,
+                        last_found_at=found_at,
+                        creator=DEFAULT_SYSTEM_USER,
+                        updater=DEFAULT_SYSTEM_USER,
+                    )
+                )
+        self.bulk_update(to_update, fields=["found_times", "last_found_at"])
+        self.bulk_create(to_create)
+
+        pair__record_id = {
+            (cluster_id, master_id, slave_id): record_id
+            for record_id, cluster_id, master_id, slave_id in self.filter(cluster_id__in=cluster_ids).values_list(
+                "id", "cluster_id", "master_id", "slave_id"
+            )
+        }
+        return {pair: pair__record_id[pair] for pair in pairs}
+
+    def get_throttled_cluster_ids(self, cluster_ids: List[int], since: datetime) -> Set[int]:
+        """
+        获取需要节流的集群：存在未结束的修复单据，或者修复单据创建于since之后(校验结果可能早于修复)。
+        修复单据包括自动创建并关联了不一致记录的单据，以及人工提交的修复单据
+        """
+        from backend.ticket.models import Ticket
+
+        throttle_filters = Q(ticket__create_at__gte=since) | ~Q(ticket__status__in=TICKET_FINISHED_STATUS_SET)
+        records = self.filter(throttle_filters, cluster_id__in=cluster_ids, ticket__isnull=False)
+        throttled_cluster_ids = set(records.values_list("cluster_id", flat=True))
+
+        # 人工提交的修复单据没有关联记录，从单据详情中解析集群，需要节流的修复单据数量有限
+        ticket_filters = Q(create_at__gte=since) | ~Q(status__in=TICKET_FINISHED_STATUS_SET)
+        repair_tickets = Ticket.objects.filter(ticket_filters, ticket_type__in=DATA_REPAIR_TICKET_TYPES)
+        for details in repair_tickets.values_list("details", flat=True):
+            throttled_cluster_ids.update(info.get("cluster_id") for info in details.get("infos", []))
+
+        return throttled_cluster_ids & set(cluster_ids)
+
+    def bind_ticket(self, record_ids: List[int], ticket) -> int:
+        return self.filter(id__in=record_ids).update(ticket=ticket)
+
+
+class DataRepairInconsistency(AuditedModel):
+    """
+    例行数据校验发现的主从不一致记录，用于修复单据的去重和节流
+    """
+
+    bk_biz_id = models.IntegerField(_("业务ID"))
+    cluster_id = models.IntegerField(_("集群ID"))
+    master_id = models.IntegerField(_("master实例ID"))
+    slave_id = models.IntegerField(_("slave实例ID"))
+    found_times = models.IntegerField(_("发现次数"), default=1)
+    last_found_at = models.DateTimeField(_("最近发现时间"))
+    ticket = models.ForeignKey(
+        "Ticket",
+        help_text=_("最近一次关联的修复单据"),
+        related_name="repair_inconsistencies",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+
+    objects = DataRepairInconsistencyManager()
+
+    class Meta:
+        verbose_name_plural = verbose_name = _("数据不一致记录(DataRepairInconsistency)")
+        unique_together = (("cluster_id", "master_id", "slave_id"),)
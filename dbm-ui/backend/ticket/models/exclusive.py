@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from collections import defaultdict
+from typing import Dict, List
+
+from django.db import models
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from backend.bk_web.models import AuditedModel
+from backend.ticket.constants import FLOW_EXCLUSIVE_BLOCKING_STATUS
+
+
+class FlowExclusiveWaitManager(models.Manager):
+    def register(self, flow, blockers: List[Dict]) -> bool:
+        """
+        登记被互斥阻塞的flow，等待具体的阻塞flow释放，返回flow是否已无阻塞可以直接唤醒
+        @param flow: 被阻塞的flow
+        @param blockers: 阻塞信息，格式为[{"cluster_id": xx, "flow_id": xx}]
+        """
+        # 唤醒后再次被阻塞的flow保留最初的等待时间，保证排队先后顺序不变
+        wait_since = self.filter(flow=flow).aggregate(wait_since=Min("wait_since"))["wait_since"] or timezone.now()
+        # 每次互斥检查都会得到完整的阻塞集合，因此直接覆盖旧的等待记录
+        self.filter(flow=flow).delete()
+        waits = {
+            (blocker["cluster_id"], blocker["flow_id"]): self.model(
+                flow=flow,
+                ticket_id=flow.ticket_id,
+                cluster_id=blocker["cluster_id"],
+                blocking_flow_id=blocker["flow_id"],
+                wait_since=wait_since,
+                creator=flow.ticket.creator,
+            )
+            for blocker in blockers
+        }
+        self.bulk_create(waits.values())
+
+        # 阻塞flow可能在互斥检查之后、登记之前就已结束，此时其释放事件已错过，需要在这里补充释放
+        self.filter(flow=flow).exclude(blocking_flow__status__in=FLOW_EXCLUSIVE_BLOCKING_STATUS).update(
+            is_released=True
+        )
+        return not self.filter(flow=flow, is_released=False).exists()
+
+    def release(self, blocking_flow_id: int) -> List[int]:
+        """释放阻塞flow上的等待，返回已无阻塞可以唤醒的flow(按等待先后排序)"""
+        waiter_ids = set(
+            self.filter(blocking_flow_id=blocking_flow_id, is_released=False).values_list("flow_id", flat=True)
+        )
+        if not waiter_ids:
+            return []
+
+        self.filter(blocking_flow_id=blocking_flow_id).update(is_released=True)
+        ready_waits = (
+            self.filter(flow_id__in=waiter_ids)
+            .values("flow_id")
+            .annotate(wait_since=Min("wait_since"), blocking_count=Count("id", filter=Q(is_released=False)))
+            .filter(blocking_count=0)
+            .order_by("wait_since", "flow_id")
+        )
+        return [wait["flow_id"] for wait in ready_waits]
+
+    def get_cluster_queues(self, cluster_ids: List[int]) -> Dict[int, Dict]:
+        """查询集群上的等待队列，包括队列深度和等待时长"""
+        now = timezone.now()
+        waits = (
+            self.select_related("ticket")
+            .filter(cluster_id__in=cluster_ids, is_released=False)
+            .order_by("wait_since", "id")
+        )
+        cluster_queues: Dict[int, Dict] = defaultdict(lambda: {"depth": 0, "max_wait_seconds": 0, "waiters": []})
+        for wait in waits:
+            queue = cluster_queues[wait.cluster_id]
+            # 同一个flow可能被集群上的多个操作阻塞，队列中只记录一次
+            if wait.flow_id in [waiter["flow_id"] for waiter in queue["waiters"]]:
+                continue
+            wait_seconds = int((now - wait.wait_since).total_seconds())
+            queue["waiters"].append(
+                {
+                    "flow_id": wait.flow_id,
+                    "ticket_id": wait.ticket_id,
+                    "ticket_type": wait.ticket.ticket_type,
+                    "blocking_flow_id": wait.blocking_flow_id,
+                    "wait_since": wait.wait_since,
+                    "wait_seconds": wait_seconds,
+                }
+            )
+            queue["depth"] += 1
+            queue["max_wait_seconds"] = max(queue["max_wait_seconds"], wait_seconds)
+        return {cluster_id: cluster_queues[cluster_id] for cluster_id in cluster_ids if cluster_id in cluster_queues}
+
+
+class FlowExclusiveWait(AuditedModel):
+    """
+    互斥等待记录，被互斥阻塞的flow等待具体的阻塞flow释放后再唤醒
+    """
+
+    flow = models.ForeignKey("Flow", help_text=_("被阻塞的流程"), related_name="exclusive_waits", on_delete=models.CASCADE)
+    ticket = models.ForeignKey("Ticket", help_text=_("关联工单"), on_delete=models.CASCADE)
+    cluster_id = models.IntegerField(_("集群ID"))
+    blocking_flow = models.ForeignKey(
+        "Flow", help_text=_("阻塞的流程"), related_name="exclusive_waiters", on_delete=models.CASCADE
+    )
+    is_released = models.BooleanField(_("阻塞是否已释放"), default=False)
+    wait_since = models.DateTimeField(_("开始等待时间"))
+
+    objects = FlowExclusiveWaitManager()
+
+    class Meta:
+        verbose_name_plural = verbose_name = _("互斥等待记录(FlowExclusiveWait)")
+        unique_together = (("flow", "cluster_id", "blocking_flow"),)
+        indexes = [models.Index(fields=["cluster_id", "wait_since"])]
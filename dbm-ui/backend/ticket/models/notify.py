@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from backend.bk_web.constants import LEN_MIDDLE, LEN_SHORT
+from backend.bk_web.models import AuditedModel
+from backend.ticket.constants import NotifyOutboxStatus, TicketStatus
+
+
+class NotifyOutbox(AuditedModel):
+    """
+    单据通知发件箱，通知先落库再投递，失败后按退避时间重试
+    """
+
+    ticket = models.ForeignKey(
+        "Ticket", help_text=_("关联工单"), related_name="notify_of_ticket", on_delete=models.CASCADE
+    )
+    phase = models.CharField(_("单据阶段"), choices=TicketStatus.get_choices(), max_length=LEN_SHORT)
+    msg_type = models.CharField(_("通知渠道"), max_length=LEN_SHORT)
+    receiver = models.CharField(_("接收人"), max_length=LEN_MIDDLE)
+    title = models.TextField(_("通知标题"), default="")
+    content = models.TextField(_("通知内容"), default="")
+    context = models.JSONField(_("通知上下文"), default=dict)
+    status = models.CharField(
+        _("发送状态"), choices=NotifyOutboxStatus.get_choices(), max_length=LEN_SHORT, default=NotifyOutboxStatus.PENDING
+    )
+    send_times = models.IntegerField(_("已发送次数"), default=0)
+    send_at = models.DateTimeField(_("计划发送时间"))
+    sent_at = models.DateTimeField(_("发送成功时间"), null=True)
+    error = models.TextField(_("失败信息"), default="")
+
+    class Meta:
+        verbose_name_plural = verbose_name = _("通知发件箱(NotifyOutbox)")
+        indexes = [
+            models.Index(fields=["status", "send_at"]),
+            models.Index(fields=["ticket", "phase", "msg_type", "receiver"]),
+        ]
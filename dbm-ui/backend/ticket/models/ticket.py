@@ -68,7 +68,11 @@ class Flow(models.Model):
 
     class Meta:
         verbose_name_plural = verbose_name = _("单据流程(Flow)")
-        indexes = [models.Index(fields=["err_code"])]
+        indexes = [
+            models.Index(fields=["err_code"]),
+            # 用于过期流程的清理查询
+            models.Index(fields=["flow_type", "status", "update_at"]),
+        ]
 
     def update_details(self, **kwargs):
         self.details.update(kwargs)
@@ -340,7 +344,9 @@ class ClusterOperateRecordManager(models.Manager):
             active_ticket_type = record.ticket.ticket_type
             # 记录互斥信息。不存在互斥表默认为互斥
             if exclusive_ticket_map.get(ticket_type, {}).get(active_ticket_type, True):
-                exclusive_infos.append({"exclusive_ticket": record.ticket, "root_id": record.flow.flow_obj_id})
+                exclusive_infos.append(
+                    {"exclusive_ticket": record.ticket, "root_id": record.flow.flow_obj_id, "flow_id": record.flow_id}
+                )
         return exclusive_infos
 
     @staticmethod
@@ -103,6 +103,8 @@ class Todo(AuditedModel):
 
     class Meta:
         verbose_name_plural = verbose_name = _("待办(Todo)")
+        # 用于过期待办的清理查询
+        indexes = [models.Index(fields=["type", "status", "update_at"])]
 
     @property
     def url(self):
@@ -379,6 +379,13 @@ class ListTicketStatusSerializer(serializers.Serializer):
     ticket_ids = serializers.CharField(help_text=_("单据ID(逗号分割)"))
 
 
+class ExclusiveWaitQueueSerializer(serializers.Serializer):
+    cluster_ids = serializers.CharField(help_text=_("集群ID(逗号分割)"))
+
+    def validate_cluster_ids(self, value):
+        return [int(cluster_id) for cluster_id in value.split(",") if cluster_id]
+
+
 class BatchApprovalSerializer(serializers.Serializer):
     is_approved = serializers.BooleanField(help_text=_("是否通过"))
     ticket_ids = serializers.ListField(help_text=_("单据id集合"))
@@ -8,8 +8,12 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from django.db import transaction
+
+from backend.ticket.constants import FLOW_EXCLUSIVE_BLOCKING_STATUS
 from backend.ticket.flow_manager.manager import TicketFlowManager
-from backend.ticket.models import Flow
+from backend.ticket.models import Flow, FlowExclusiveWait
+from backend.ticket.tasks.ticket_tasks import wakeup_exclusive_inner_flow
 
 
 def update_ticket_status(sender, instance: Flow, **kwargs):
@@ -19,3 +23,16 @@ def update_ticket_status(sender, instance: Flow, **kwargs):
     if not instance.pk:
         return
     TicketFlowManager(instance.ticket).update_ticket_status()
+
+
+def release_exclusive_waits(sender, instance: Flow, **kwargs):
+    """
+    flow结束互斥阶段(运行中/失败以外的状态)时，释放在该flow上的互斥等待，并按先后顺序唤醒
+    """
+    if not instance.pk or instance.status in FLOW_EXCLUSIVE_BLOCKING_STATUS:
+        return
+    # 已结束的flow自身无需再等待
+    FlowExclusiveWait.objects.filter(flow=instance).delete()
+    ready_flow_ids = FlowExclusiveWait.objects.release(blocking_flow_id=instance.pk)
+    if ready_flow_ids:
+        transaction.on_commit(lambda: wakeup_exclusive_inner_flow.delay(ready_flow_ids))
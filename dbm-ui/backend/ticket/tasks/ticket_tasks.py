@@ -8,29 +8,37 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-import json
 import logging
 import operator
 from collections import defaultdict
 from datetime import datetime, timedelta
 from functools import reduce
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from celery import shared_task
 from celery.result import AsyncResult
+from django.db import DatabaseError, connection, transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
-from backend import env
-from backend.components import BKLogApi
-from backend.configuration.constants import PLAT_BIZ_ID, DBType
+from backend.components.bklog.handler import BKLogHandler
+from backend.configuration.constants import PLAT_BIZ_ID, SystemSettingsEnum
+from backend.configuration.models import SystemSettings
 from backend.constants import DEFAULT_SYSTEM_USER
 from backend.db_meta.enums import ClusterType, InstanceInnerRole
 from backend.db_meta.models import Cluster, StorageInstance
 from backend.ticket.builders.common.constants import MYSQL_CHECKSUM_TABLE, MySQLDataRepairTriggerMode
 from backend.ticket.constants import (
+    DATA_REPAIR_CHECKSUM_QUERY_STRING,
+    DATA_REPAIR_CHECKSUM_WINDOW_HOURS,
+    DATA_REPAIR_CLUSTER_BATCH_SIZE,
+    EXPIRE_FLOW_CLEAR_BATCH_SIZE,
+    EXPIRE_FLOW_CLEAR_MAX_BATCHES,
+    EXPIRE_FLOW_CLEAR_SUMMARY_KEEP,
+    FLOW_EXCLUSIVE_BLOCKING_STATUS,
     TICKET_EXPIRE_DEFAULT_CONFIG,
+    TICKET_FINISHED_STATUS_SET,
     TODO_RUNNING_STATUS,
     FlowErrCode,
     FlowType,
@@ -41,8 +49,9 @@ from backend.ticket.constants import (
     TodoType,
 )
 from backend.ticket.exceptions import TicketTaskTriggerException
+from backend.ticket.models import FlowExclusiveWait
 from backend.ticket.models.ticket import Flow, Ticket, TicketFlowsConfig
-from backend.utils.time import date2str, datetime2str
+from backend.utils.time import date2str
 
 logger = logging.getLogger("root")
 
@@ -63,231 +72,350 @@ class TicketTask(object):
 
     @classmethod
     def retry_exclusive_inner_flow(cls) -> None:
-        """重试互斥错误的inner flow"""
-        from backend.ticket.flow_manager.inner import InnerFlow
-
-        to_retry_flows = Flow.objects.filter(err_code=FlowErrCode.AUTO_EXCLUSIVE_ERROR)
-        if not to_retry_flows:
+        """兜底重试没有有效阻塞的互斥flow(如阻塞信息缺失、唤醒任务丢失)，其余flow由阻塞释放事件唤醒"""
+        # 阻塞flow已结束但未释放的等待(释放事件丢失)不再视为阻塞
+        blocked_flow_ids = FlowExclusiveWait.objects.filter(
+            is_released=False, blocking_flow__status__in=FLOW_EXCLUSIVE_BLOCKING_STATUS
+        ).values_list("flow_id", flat=True)
+        to_retry_flows = (
+            Flow.objects.filter(err_code=FlowErrCode.AUTO_EXCLUSIVE_ERROR)
+            .exclude(id__in=blocked_flow_ids)
+            .order_by("id")
+        )
+        to_retry_flow_ids = list(to_retry_flows.values_list("id", flat=True))
+        if not to_retry_flow_ids:
             return
 
         logger.info(
             f"Automatically retry the mutually exclusive flow, "
-            f"there are still {to_retry_flows.count()} flows waiting to be retried...."
+            f"there are still {len(to_retry_flow_ids)} flows waiting to be retried...."
         )
+        cls.wakeup_exclusive_inner_flow(to_retry_flow_ids)
 
-        for flow in to_retry_flows:
+    @classmethod
+    def wakeup_exclusive_inner_flow(cls, flow_ids: List[int]) -> None:
+        """按等待先后顺序唤醒互斥阻塞已释放的flow"""
+        from backend.ticket.flow_manager.inner import InnerFlow
+
+        flows = Flow.objects.in_bulk(flow_ids)
+        for flow_id in flow_ids:
+            # 唤醒前flow可能已被终止或者手动重试
+            flow = flows.get(flow_id)
+            if not flow or flow.err_code != FlowErrCode.AUTO_EXCLUSIVE_ERROR:
+                continue
             InnerFlow(flow_obj=flow).retry()
 
+    @classmethod
+    def sync_itsm_approval_snapshot(cls) -> None:
+        """批量同步审批中的itsm流程快照，并根据快照刷新流程状态"""
+        from backend.ticket.flow_manager.itsm import ItsmFlow
+
+        running_flows = list(Flow.objects.filter(flow_type=FlowType.BK_ITSM, status=TicketFlowStatus.RUNNING))
+        if not running_flows:
+            return
+
+        changed_flows = ItsmFlow.sync_snapshots(running_flows)
+        logger.info(f"sync itsm approval snapshot, running: {len(running_flows)}, changed: {len(changed_flows)}")
+
+        # 只有快照变化的流程才需要重新映射状态
+        for flow in changed_flows:
+            try:
+                ItsmFlow(flow_obj=flow).status
+            except Exception as err:  # pylint: disable=broad-except
+                logger.error(f"refresh itsm flow[{flow.id}] status failed, {err}")
+
+    @classmethod
+    def _get_checksum_instance_map(cls, cluster_ids: List[int], checksum_logs: List[Dict]) -> Dict[Tuple, Dict]:
+        """一次查询获取一批集群下校验日志涉及的实例，返回(集群ID, 实例角色, ip:port)和实例信息的映射"""
+        ips = {log["ip"] for log in checksum_logs} | {log["master_ip"] for log in checksum_logs}
+        instances = StorageInstance.objects.filter(
+            cluster__in=cluster_ids,
+            machine__ip__in=ips,
+            instance_inner_role__in=[InstanceInnerRole.MASTER, InstanceInnerRole.SLAVE],
+        ).values(
+            "id",
+            "port",
+            "instance_inner_role",
+            "cluster__id",
+            "machine__ip",
+            "machine__bk_host_id",
+            "machine__bk_cloud_id",
+        )
+        return {
+            (inst["cluster__id"], inst["instance_inner_role"], f"{inst['machine__ip']}:{inst['port']}"): inst
+            for inst in instances
+        }
+
+    @classmethod
+    def _create_data_repair_ticket(cls, bk_biz_id, db_type, repair_infos, record_ids, start_time, end_time):
+        """创建修复单据，并将不一致记录关联到该单据"""
+        from backend.ticket.flow_manager.manager import TicketFlowManager
+        from backend.ticket.models import DataRepairInconsistency
+
+        ticket_details = {
+            # "非innodb表是否修复"这个参数与校验保持一致，默认为false
+            "is_sync_non_innodb": False,
+            "is_ticket_consistent": False,
+            "checksum_table": MYSQL_CHECKSUM_TABLE,
+            "trigger_type": MySQLDataRepairTriggerMode.ROUTINE.value,
+            "start_time": date2str(start_time),
+            "end_time": date2str(end_time),
+            "infos": repair_infos,
+        }
+        try:
+            # 单据和不一致记录的关联在同一事务中落地，避免重复生成修复单据
+            with transaction.atomic():
+                ticket = Ticket.create_ticket(
+                    ticket_type=getattr(TicketType, f"{db_type.upper()}_DATA_REPAIR"),
+                    creator=DEFAULT_SYSTEM_USER,
+                    bk_biz_id=bk_biz_id,
+                    remark=_("集群存在数据不一致，自动创建的数据修复单据"),
+                    details=ticket_details,
+                    auto_execute=False,
+                )
+                DataRepairInconsistency.objects.bind_ticket(record_ids, ticket)
+            TicketFlowManager(ticket=ticket).run_next_flow()
+        except Exception as err:  # pylint: disable=broad-except
+            logger.exception(f"auto create data repair ticket failed, bk_biz_id: {bk_biz_id}, error: {err}")
+
     @classmethod
     def auto_create_data_repair_ticket(cls):
         """根据例行校验的结果自动创建修复单据"""
+        from backend.ticket.models import DataRepairInconsistency
 
         # 例行时间校验默认间隔一天
         now = datetime.now(timezone.utc).astimezone()
         start_time, end_time = now - timedelta(days=1), now
-        # TODO: 目前这个esquery_search最多支持10000条查询，后续可以改造成scroll进行查询
-        resp = BKLogApi.esquery_search(
-            {
-                "indices": f"{env.DBA_APP_BK_BIZ_ID}_bklog.mysql_checksum_result",
-                "start_time": datetime2str(start_time),
-                "end_time": datetime2str(end_time),
-                "query_string": "*",
-                "start": 0,
-                "size": 10000,
-                "sort_list": [["dtEventTimeStamp", "asc"], ["gseIndex", "asc"], ["iterationIndex", "asc"]],
-            }
-        )
 
-        # 根据集群ID聚合日志
+        # 按时间窗口查询校验日志，根据集群ID聚合日志，数据校验一致的日志无需处理
         cluster__checksum_logs_map: Dict[int, List[Dict]] = defaultdict(list)
-        for hit in resp["hits"]["hits"]:
-            checksum_log = json.loads(hit["_source"]["log"])
-            cluster__checksum_logs_map[checksum_log["cluster_id"]].append(checksum_log)
-
-        cluster_map = {c.id: c for c in Cluster.objects.filter(id__in=list(cluster__checksum_logs_map.keys()))}
-        biz__db_type__repair_infos: Dict[int, Dict[DBType, List]] = defaultdict(lambda: defaultdict(list))
-
-        # 为每个待修复的集群生成修复单据
-        for cluster_id, checksum_logs in cluster__checksum_logs_map.items():
-            # 忽略不在dbm meta信息中的集群
-            if cluster_id not in cluster_map:
-                logger.error(_("无法在dbm meta中查询到集群{}的相关信息，请排查该集群的状态".format(cluster_id)))
-                continue
-
-            cluster = cluster_map[cluster_id]
+        window_start_time = start_time
+        while window_start_time < end_time:
+            window_end_time = min(window_start_time + timedelta(hours=DATA_REPAIR_CHECKSUM_WINDOW_HOURS), end_time)
+            result = BKLogHandler.query_all_logs(
+                collector="mysql_checksum_result",
+                start_time=window_start_time,
+                end_time=window_end_time,
+                query_string=DATA_REPAIR_CHECKSUM_QUERY_STRING,
+            )
+            # 截断时仍处理已拉取的日志，未拉取的不一致记录需人工关注
+            if result["truncated"]:
+                logger.error(_("数据校验日志在[{}, {}]内超过查询上限被截断，部分集群可能未生成修复单据").format(window_start_time, window_end_time))
+            for log in result["logs"]:
+                if log["master_crc"] == log["this_crc"] and log["master_cnt"] == log["this_cnt"]:
+                    continue
+                cluster__checksum_logs_map[log["cluster_id"]].append(log)
+            window_start_time = window_end_time
+
+        # 存在未结束或在校验窗口内创建的修复单据的集群，本次不再生成修复单据
+        cluster_ids = sorted(cluster__checksum_logs_map.keys())
+        throttled_cluster_ids = DataRepairInconsistency.objects.get_throttled_cluster_ids(cluster_ids, start_time)
+        biz__db_type__repair_infos: Dict[int, Dict[str, List]] = defaultdict(lambda: defaultdict(list))
+        biz__db_type__record_ids: Dict[int, Dict[str, List]] = defaultdict(lambda: defaultdict(list))
+
+        for index in range(0, len(cluster_ids), DATA_REPAIR_CLUSTER_BATCH_SIZE):
+            batch_cluster_ids = cluster_ids[index : index + DATA_REPAIR_CLUSTER_BATCH_SIZE]
+            cluster_map = {c.id: c for c in Cluster.objects.filter(id__in=batch_cluster_ids)}
+            batch_logs = [log for cluster_id in batch_cluster_ids for log in cluster__checksum_logs_map[cluster_id]]
+            instance_map = cls._get_checksum_instance_map(batch_cluster_ids, batch_logs)
+
+            # 为每个待修复的集群生成修复信息
+            for cluster_id in batch_cluster_ids:
+                # 忽略不在dbm meta信息中的集群
+                if cluster_id not in cluster_map:
+                    logger.error(_("无法在dbm meta中查询到集群{}的相关信息，请排查该集群的状态".format(cluster_id)))
+                    continue
 
-            # 根据logs获取ip:port和实例的映射
-            inst_filter_list = [
-                (
-                    Q(
-                        cluster=cluster,
-                        machine__ip=log["ip"],
-                        port=log["port"],
-                        instance_inner_role=InstanceInnerRole.SLAVE,
-                    )
-                    | Q(
-                        cluster=cluster,
-                        machine__ip=log["master_ip"],
-                        port=log["master_port"],
-                        instance_inner_role=InstanceInnerRole.MASTER,
+                cluster = cluster_map[cluster_id]
+                data_repair_infos: List[Dict[str, Any]] = []
+                repair_pairs: List[Tuple[int, int, int]] = []
+                for log in cluster__checksum_logs_map[cluster_id]:
+                    master = instance_map.get(
+                        (cluster_id, InstanceInnerRole.MASTER, f"{log['master_ip']}:{log['master_port']}")
                     )
-                )
-                for log in checksum_logs
-            ]
-            inst_filters = reduce(operator.or_, inst_filter_list)
-            ip_port__instance_id_map: Dict[str, StorageInstance] = {
-                f"{inst.machine.ip}:{inst.port}": inst
-                for inst in StorageInstance.objects.select_related("machine").filter(inst_filters)
-            }
-
-            data_repair_infos: List[Dict[str, Any]] = []
-            master_slave_exists: Dict[str, Dict[str, bool]] = defaultdict(lambda: defaultdict(bool))
-            for log in checksum_logs:
-                master_ip_port, slave_ip_port = (
-                    f"{log['master_ip']}:{log['master_port']}",
-                    f"{log['ip']}:{log['port']}",
-                )
-                # 如果在meta信息中查询不出master或slave，则跳过
-                if (
-                    master_ip_port not in ip_port__instance_id_map.keys()
-                    or slave_ip_port not in ip_port__instance_id_map.keys()
-                ):
+                    slave = instance_map.get((cluster_id, InstanceInnerRole.SLAVE, f"{log['ip']}:{log['port']}"))
+                    # 如果在meta信息中查询不出master或slave，或者是重复的主从对，则跳过
+                    if not master or not slave or (cluster_id, master["id"], slave["id"]) in repair_pairs:
+                        continue
+
+                    # 标记需要检验的master/slave，并缓存到修复信息中
+                    repair_pairs.append((cluster_id, master["id"], slave["id"]))
+                    master_data_repair_info = {
+                        "id": master["id"],
+                        "bk_biz_id": log["bk_biz_id"],
+                        "ip": log["master_ip"],
+                        "port": log["master_port"],
+                        "bk_host_id": master["machine__bk_host_id"],
+                        "bk_cloud_id": master["machine__bk_cloud_id"],
+                    }
+                    slave_data_repair_info = {
+                        "id": slave["id"],
+                        "bk_biz_id": log["bk_biz_id"],
+                        "ip": log["ip"],
+                        "port": log["port"],
+                        "bk_host_id": slave["machine__bk_host_id"],
+                        "bk_cloud_id": slave["machine__bk_cloud_id"],
+                        "is_consistent": False,
+                    }
+                    # 注意这里要区别集群类型
+                    if cluster.cluster_type == ClusterType.TenDBCluster or not data_repair_infos:
+                        data_repair_infos.append(
+                            {"master": master_data_repair_info, "slaves": [slave_data_repair_info]}
+                        )
+                    elif cluster.cluster_type == ClusterType.TenDBHA:
+                        data_repair_infos[0]["slaves"].append(slave_data_repair_info)
+
+                # 如果不存在需要修复的slave，则跳过
+                if not data_repair_infos:
+                    logger.info(_("集群{}数据校验正确，不需要进行数据修复".format(cluster_id)))
                     continue
 
-                # 如果数据校验一致 or 重复的主从对，则跳过
-                is_consistent = log["master_crc"] == log["this_crc"] and log["master_cnt"] == log["this_cnt"]
-                if is_consistent or master_slave_exists[master_ip_port][slave_ip_port]:
+                # 不一致信息都落地记录，节流的集群只记录不生成单据
+                pair__record_id = DataRepairInconsistency.objects.record(cluster.bk_biz_id, repair_pairs, now)
+                if cluster_id in throttled_cluster_ids:
+                    logger.info(_("集群{}存在进行中的数据修复单据，跳过本次修复".format(cluster_id)))
                     continue
 
-                # 标记需要检验的master/slave，并缓存到修复信息中
-                master_slave_exists[master_ip_port][slave_ip_port] = True
-                master = ip_port__instance_id_map[master_ip_port]
-                master_data_repair_info = {
-                    "id": master.id,
-                    "bk_biz_id": log["bk_biz_id"],
-                    "ip": log["master_ip"],
-                    "port": log["master_port"],
-                    "bk_host_id": master.machine.bk_host_id,
-                    "bk_cloud_id": master.machine.bk_cloud_id,
-                }
-                slave = ip_port__instance_id_map[slave_ip_port]
-                slave_data_repair_info = {
-                    "id": slave.id,
-                    "bk_biz_id": log["bk_biz_id"],
-                    "ip": log["ip"],
-                    "port": log["port"],
-                    "bk_host_id": slave.machine.bk_host_id,
-                    "bk_cloud_id": slave.machine.bk_cloud_id,
-                    "is_consistent": is_consistent,
-                }
-                # 注意这里要区别集群类型
-                if cluster.cluster_type == ClusterType.TenDBCluster or not data_repair_infos:
-                    data_repair_infos.append({"master": master_data_repair_info, "slaves": [slave_data_repair_info]})
-                elif cluster.cluster_type == ClusterType.TenDBHA:
-                    data_repair_infos[0]["slaves"].append(slave_data_repair_info)
-
-            # 如果不存在需要修复的slave，则跳过
-            if not data_repair_infos:
-                logger.info(_("集群{}数据校验正确，不需要进行数据修复".format(cluster_id)))
-                continue
-
-            # 获取修复单据详情信息
-            ticket_infos = [
-                {"cluster_id": cluster_id, "master": data_info["master"], "slaves": data_info["slaves"]}
-                for data_info in data_repair_infos
-            ]
-            db_type = ClusterType.cluster_type_to_db_type(cluster.cluster_type)
-            biz__db_type__repair_infos[cluster.bk_biz_id][db_type].extend(ticket_infos)
+                # 获取修复单据详情信息
+                db_type = ClusterType.cluster_type_to_db_type(cluster.cluster_type)
+                biz__db_type__repair_infos[cluster.bk_biz_id][db_type].extend(
+                    [
+                        {"cluster_id": cluster_id, "master": data_info["master"], "slaves": data_info["slaves"]}
+                        for data_info in data_repair_infos
+                    ]
+                )
+                biz__db_type__record_ids[cluster.bk_biz_id][db_type].extend(pair__record_id.values())
 
         # 构造修复单据
         for biz, db_type__repair_infos in biz__db_type__repair_infos.items():
             for db_type, repair_infos in db_type__repair_infos.items():
-                ticket_details = {
-                    # "非innodb表是否修复"这个参数与校验保持一致，默认为false
-                    "is_sync_non_innodb": False,
-                    "is_ticket_consistent": False,
-                    "checksum_table": MYSQL_CHECKSUM_TABLE,
-                    "trigger_type": MySQLDataRepairTriggerMode.ROUTINE.value,
-                    "start_time": date2str(start_time),
-                    "end_time": date2str(end_time),
-                    "infos": [
-                        {
-                            "cluster_id": data_info["cluster_id"],
-                            "master": data_info["master"],
-                            "slaves": data_info["slaves"],
-                        }
-                        for data_info in repair_infos
-                    ],
-                }
-                ticket_type = getattr(TicketType, f"{db_type.upper()}_DATA_REPAIR")
-                _create_ticket.apply_async(
-                    kwargs={
-                        "ticket_type": ticket_type,
-                        "creator": DEFAULT_SYSTEM_USER,
-                        "bk_biz_id": biz,
-                        "remark": _("集群存在数据不一致，自动创建的数据修复单据"),
-                        "details": ticket_details,
-                    }
-                )
+                record_ids = biz__db_type__record_ids[biz][db_type]
+                cls._create_data_repair_ticket(biz, db_type, repair_infos, record_ids, start_time, end_time)
 
     @classmethod
-    def auto_clear_expire_flow(cls):
-        """清理过期的单据和flow，避免重试带来问题"""
-        from backend.ticket.handler import TicketHandler
+    def get_expire_ticket_filters(cls, now: datetime) -> Optional[Q]:
+        """获取超时过期单据的过滤条件，以子查询的方式组合，不在内存中收集单据ID"""
         from backend.ticket.models import Todo
 
-        # 一次批量只操作100个单据
-        batch = 100
-        now = datetime.now()
         # 只考虑平台级别的过期配置，暂不考虑业务和集群粒度
-        ticket_configs = TicketFlowsConfig.objects.filter(bk_biz_id=PLAT_BIZ_ID)
-
-        def get_expire_flow_tickets(expire_type):
-            """获取超时过期的过滤条件"""
-            qs, ticket_ids = [], []
-            for cnf in ticket_configs:
-                expire_days = cnf.configs.get(FlowTypeConfig.EXPIRE_CONFIG, TICKET_EXPIRE_DEFAULT_CONFIG)[expire_type]
+        ticket_configs = TicketFlowsConfig.objects.filter(bk_biz_id=PLAT_BIZ_ID).values("ticket_type", "configs")
+        # 按照过期类型和过期天数聚合单据类型，减少过滤条件的数量
+        expire_type__days__ticket_types: Dict[str, Dict[int, List[str]]] = defaultdict(lambda: defaultdict(list))
+        for cnf in ticket_configs:
+            expire_config = cnf["configs"].get(FlowTypeConfig.EXPIRE_CONFIG, TICKET_EXPIRE_DEFAULT_CONFIG)
+            for expire_type in TicketExpireType.get_values():
+                expire_days = expire_config.get(expire_type, TICKET_EXPIRE_DEFAULT_CONFIG[expire_type])
+                # 如果设置为无限制过期，则不进行过滤
                 if expire_days < 0:
                     continue
-                qs.append(Q(update_at__lt=now - timedelta(days=expire_days), ticket__ticket_type=cnf.ticket_type))
-
-            # 如果设置为无限制过期，则不进行过滤
-            if not qs:
-                return ticket_ids
-
-            filters = reduce(operator.or_, qs)
-            # itsm: 审批中的流程
-            if expire_type == TicketExpireType.ITSM:
-                filters &= Q(flow_type=FlowType.BK_ITSM, status=TicketFlowStatus.RUNNING)
-                ticket_ids = list(Flow.objects.filter(filters).values_list("ticket", flat=True))
-            # inner flow / pipeline: 失败的流程和pipeline暂停节点(防止重试)
-            elif expire_type == TicketExpireType.INNER_FLOW:
-                f = filters & Q(flow_type=FlowType.INNER_FLOW, status=TicketFlowStatus.FAILED)
-                ticket_ids = list(Flow.objects.filter(f).values_list("ticket", flat=True))
-                f = filters & Q(type=TodoType.INNER_APPROVE, status__in=TODO_RUNNING_STATUS)
-                ticket_ids.extend(list(Todo.objects.filter(f).values_list("ticket", flat=True)))
-            # flow-pause: 流程中的暂定节点
-            elif expire_type == TicketExpireType.FLOW_TODO:
-                filters &= Q(type__in=[TodoType.APPROVE, TodoType.RESOURCE_REPLENISH], status__in=TODO_RUNNING_STATUS)
-                ticket_ids = list(Todo.objects.filter(filters).values_list("ticket", flat=True))
-
-            return ticket_ids
-
-        # 根据超时保护类型，获取需要过期处理的单据
-        expire_ticket_ids = []
-        for expire_type in TicketExpireType.get_values():
-            expire_ticket_ids.extend(get_expire_flow_tickets(expire_type))
-
-        # 终止单据
-        TicketHandler.revoke_ticket(ticket_ids=expire_ticket_ids[:batch], operator=DEFAULT_SYSTEM_USER)
-        # print(expire_ticket_ids)
+                expire_type__days__ticket_types[expire_type][expire_days].append(cnf["ticket_type"])
+
+        def get_expire_filters(expire_type):
+            days__ticket_types = expire_type__days__ticket_types[expire_type]
+            qs = [
+                Q(update_at__lt=now - timedelta(days=expire_days), ticket__ticket_type__in=ticket_types)
+                for expire_days, ticket_types in days__ticket_types.items()
+            ]
+            return reduce(operator.or_, qs) if qs else None
+
+        expire_querysets = []
+        # itsm: 审批中的流程
+        filters = get_expire_filters(TicketExpireType.ITSM)
+        if filters:
+            filters &= Q(flow_type=FlowType.BK_ITSM, status=TicketFlowStatus.RUNNING)
+            expire_querysets.append(Flow.objects.filter(filters))
+        # inner flow / pipeline: 失败的流程和pipeline暂停节点(防止重试)
+        filters = get_expire_filters(TicketExpireType.INNER_FLOW)
+        if filters:
+            f = filters & Q(flow_type=FlowType.INNER_FLOW, status=TicketFlowStatus.FAILED)
+            expire_querysets.append(Flow.objects.filter(f))
+            f = filters & Q(type=TodoType.INNER_APPROVE, status__in=TODO_RUNNING_STATUS)
+            expire_querysets.append(Todo.objects.filter(f))
+        # flow-pause: 流程中的暂定节点
+        filters = get_expire_filters(TicketExpireType.FLOW_TODO)
+        if filters:
+            filters &= Q(type__in=[TodoType.APPROVE, TodoType.RESOURCE_REPLENISH], status__in=TODO_RUNNING_STATUS)
+            expire_querysets.append(Todo.objects.filter(filters))
+
+        if not expire_querysets:
+            return None
+        return reduce(operator.or_, [Q(id__in=qs.values("ticket_id")) for qs in expire_querysets])
+
+    @classmethod
+    def revoke_expire_ticket(cls, ticket_id: int, expire_tickets) -> str:
+        """在持有单据锁的事务中校验单据仍然过期并终止单据，返回处理结果"""
+        from backend.ticket.handler import TicketHandler
+
+        # 正在被用户操作的单据直接跳过，留给下次清理。不支持skip_locked的数据库(如MySQL 8.0.1以下)退化为nowait
+        lock_kwargs = {}
+        if connection.features.has_select_for_update_skip_locked:
+            lock_kwargs = {"skip_locked": True}
+        elif connection.features.has_select_for_update_nowait:
+            lock_kwargs = {"nowait": True}
+
+        try:
+            with transaction.atomic():
+                ticket = Ticket.objects.select_for_update(**lock_kwargs).filter(id=ticket_id).first()
+                # 加锁后重新校验，用户可能在查询后处理过该单据
+                if not ticket or not expire_tickets.filter(id=ticket_id).exists():
+                    return "skipped"
+                # 终止单据时仍持有单据锁，用户的重试/审批需等待终止完成，避免校验结果在终止前失效
+                try:
+                    with transaction.atomic():
+                        TicketHandler.revoke_ticket(ticket_ids=[ticket_id], operator=DEFAULT_SYSTEM_USER)
+                except Exception as err:  # pylint: disable=broad-except
+                    logger.exception(f"auto clear expire ticket[{ticket_id}] failed, error: {err}")
+                    return "failed"
+        except DatabaseError as err:
+            # nowait加锁冲突
+            logger.warning(f"auto clear expire ticket[{ticket_id}] lock failed, error: {err}")
+            return "skipped"
+        return "revoked"
+
+    @classmethod
+    def record_expire_clear_summary(cls, summary: Dict[str, int]) -> None:
+        """记录过期单据清理的运行结果，仅保留最近的若干次"""
+        records = SystemSettings.get_setting_value(key=SystemSettingsEnum.EXPIRE_TICKET_CLEAR_SUMMARY, default=[])
+        records.append({"run_time": date2str(timezone.now(), "%Y-%m-%d %H:%M:%S"), **summary})
+        SystemSettings.insert_setting_value(
+            key=SystemSettingsEnum.EXPIRE_TICKET_CLEAR_SUMMARY,
+            value=records[-EXPIRE_FLOW_CLEAR_SUMMARY_KEEP:],
+            value_type="list",
+        )
+
+    @classmethod
+    def auto_clear_expire_flow(cls) -> Dict[str, int]:
+        """清理过期的单据和flow，避免重试带来问题"""
+        summary = {"batches": 0, "matched": 0, "revoked": 0, "skipped": 0, "failed": 0}
+        expire_filters = cls.get_expire_ticket_filters(now=datetime.now())
+        if expire_filters:
+            expire_tickets = Ticket.objects.filter(expire_filters).exclude(status__in=TICKET_FINISHED_STATUS_SET)
+            # 按单据ID游标分批终止，每次运行限制批次数，避免单次运行耗时过长
+            last_ticket_id = 0
+            for __ in range(EXPIRE_FLOW_CLEAR_MAX_BATCHES):
+                ticket_ids = list(
+                    expire_tickets.filter(id__gt=last_ticket_id)
+                    .order_by("id")
+                    .values_list("id", flat=True)[:EXPIRE_FLOW_CLEAR_BATCH_SIZE]
+                )
+                if not ticket_ids:
+                    break
+                last_ticket_id = ticket_ids[-1]
+                summary["batches"] += 1
+                summary["matched"] += len(ticket_ids)
+                for ticket_id in ticket_ids:
+                    summary[cls.revoke_expire_ticket(ticket_id, expire_tickets)] += 1
+
+        logger.info(f"auto clear expire flow summary: {summary}")
+        cls.record_expire_clear_summary(summary)
+        return summary
 
 
 # ----------------------------- 异步执行任务函数 ----------------------------------------
 @shared_task
-def _create_ticket(ticket_type, creator, bk_biz_id, remark, details) -> None:
-    """创建一个新单据"""
-    Ticket.create_ticket(ticket_type=ticket_type, creator=creator, bk_biz_id=bk_biz_id, remark=remark, details=details)
+def wakeup_exclusive_inner_flow(flow_ids: List[int]) -> None:
+    """唤醒互斥阻塞已释放的flow"""
+    TicketTask.wakeup_exclusive_inner_flow(flow_ids)
 
 
 @shared_task
@@ -55,13 +55,21 @@ from backend.ticket.exceptions import TicketDuplicationException
 from backend.ticket.filters import ClusterOpRecordListFilter, InstanceOpRecordListFilter, TicketListFilter
 from backend.ticket.flow_manager.manager import TicketFlowManager
 from backend.ticket.handler import TicketHandler
-from backend.ticket.models import ClusterOperateRecord, Flow, InstanceOperateRecord, Ticket, TicketFlowsConfig
+from backend.ticket.models import (
+    ClusterOperateRecord,
+    Flow,
+    FlowExclusiveWait,
+    InstanceOperateRecord,
+    Ticket,
+    TicketFlowsConfig,
+)
 from backend.ticket.serializers import (
     BatchTicketOperateSerializer,
     BatchTodoOperateSerializer,
     ClusterModifyOpSerializer,
     CreateTicketFlowConfigSerializer,
     DeleteTicketFlowConfigSerializer,
+    ExclusiveWaitQueueSerializer,
     FastCreateCloudComponentSerializer,
     GetInnerFlowSerializer,
     GetNodesSLZ,
@@ -95,6 +103,7 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
     serializer_class = TicketSerializer
     filter_class = TicketListFilter
     pagination_class = AuditedLimitOffsetPagination
+    replica_actions = ["list"]
 
     def _get_custom_permissions(self):
         # 创建单据，关联单据类型的动作
@@ -129,6 +138,7 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
             "get_tickets_count",
             "query_ticket_flow_describe",
             "list_ticket_status",
+            "get_exclusive_wait_queues",
             "get_inner_flow_infos",
             "revoke_ticket",
         ]:
@@ -295,6 +305,16 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
         ticket_status_map = {ticket.id: ticket.status for ticket in Ticket.objects.filter(id__in=ticket_ids)}
         return Response(ticket_status_map)
 
+    @common_swagger_auto_schema(
+        operation_summary=_("查询集群互斥等待队列"),
+        query_serializer=ExclusiveWaitQueueSerializer(),
+        tags=[TICKET_TAG],
+    )
+    @action(methods=["GET"], detail=False, serializer_class=ExclusiveWaitQueueSerializer, filter_class=None)
+    def get_exclusive_wait_queues(self, request, *args, **kwargs):
+        cluster_ids = self.params_validate(self.get_serializer_class())["cluster_ids"]
+        return Response(FlowExclusiveWait.objects.get_cluster_queues(cluster_ids))
+
     @common_swagger_auto_schema(
         operation_summary=_("创建单据"),
         responses={status.HTTP_200_OK: TicketSerializer(label=_("创建单据"))},
@@ -322,6 +342,8 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
     def flows(self, request, *args, **kwargs):
         """补充todo列表"""
         ticket = self.get_object()
+        # 查看单据时刷新审批快照，保证审批状态实时
+        TicketHandler.refresh_itsm_snapshot(ticket)
         serializer = self.get_serializer(ticket.flows, many=True)
         return Response(serializer.data)
 
@@ -333,6 +355,8 @@ class TicketViewSet(viewsets.AuditedModelViewSet):
     @action(methods=["POST"], detail=True, permission_classes=[AllowAny])
     def callback(self, request, pk):
         ticket = Ticket.objects.get(id=pk)
+        # 审批回调时快照可能尚未同步，先刷新再流转
+        TicketHandler.refresh_itsm_snapshot(ticket)
         manager = TicketFlowManager(ticket=ticket)
         manager.run_next_flow()
         return Response()
@@ -43,6 +43,7 @@ api_patterns = [
     path("cluster_entry/", include("backend.db_services.cluster_entry.urls")),
     path("dbresource/", include("backend.db_services.dbresource.urls")),
     path("partition/", include("backend.db_services.partition.urls")),
+    path("backup_catalog/", include("backend.db_services.backup_catalog.urls")),
     path("packages/", include("backend.db_package.urls")),
     path("version/", include("backend.db_services.version.urls")),
     path("metadata/", include("backend.db_services.meta_import.urls")),
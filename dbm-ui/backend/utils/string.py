@@ -207,3 +207,23 @@ def base64_decode(content: Union[str, bytes]) -> str:
     if isinstance(content, str):
         content = content.encode("utf-8")
     return base64.b64decode(content).decode("utf-8")
+
+
+# SQL字符串字面量的转义规则，与MySQL的转义字符保持一致
+SQL_LITERAL_ESCAPE_MAP = {
+    "\\": "\\\\",
+    "'": "\\'",
+    '"': '\\"',
+    "\0": "\\0",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\x1a": "\\Z",
+}
+
+
+def quote_sql_literal(value: Any) -> str:
+    """
+    将值转义并包裹为SQL单引号字面量，用于无法参数绑定的场景(如DRS远程执行SQL)
+    @param value: 待转义的值
+    """
+    return "'{}'".format("".join([SQL_LITERAL_ESCAPE_MAP.get(char, char) for char in str(value)]))
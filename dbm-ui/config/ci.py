@@ -30,7 +30,17 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.environ.get("DB_NAME", "bk-dbm.sqlite3"),
-    }
+    },
+    "report_db": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("REPORT_DB_NAME", "bk-dbm-report.sqlite3"),
+    },
+    # 只读从库，测试时镜像 default 库
+    "replica_db": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("DB_NAME", "bk-dbm.sqlite3"),
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
 LOGGING = {
@@ -122,8 +122,10 @@ INSTALLED_APPS += (
     "backend.db_services.redis.autofix",
     "backend.db_services.redis.maxmemory_set",
     "backend.db_dirty",
+    "backend.db_event",
     "backend.db_periodic_task",
     "backend.db_report",
+    "backend.db_services.backup_catalog",
     "backend.db_services.redis.slots_migrate",
     "backend.db_services.redis.redis_modules",
     "backend.db_services.mysql.dumper",
@@ -166,6 +168,8 @@ MIDDLEWARE = (
     # django国际化中间件
     "django.middleware.locale.LocaleMiddleware",
     "backend.bk_web.middleware.RequestProviderMiddleware",
+    # 只读接口的从库路由
+    "backend.bk_web.middleware.ReplicaRoutingMiddleware",
 )
 
 AUTHENTICATION_BACKENDS = [
@@ -199,6 +203,9 @@ WSGI_APPLICATION = "wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 MAX_DBCONN_RETRY_TIMES = 3
+# 重连的退避时间(秒)，按重试次数指数增长并加上随机抖动，避免数据库抖动后所有连接同时重连
+DBCONN_RETRY_BACKOFF = 0.2
+DBCONN_RETRY_MAX_BACKOFF = 5
 
 DATABASES = {
     "default": {
@@ -229,7 +236,30 @@ DATABASES = {
     },
 }
 
-DATABASE_ROUTERS = ["backend.db_report.database_router.ReportRouter"]
+# 只读从库(可选)，标记了 replica_actions 的只读接口会查询从库，减轻主库压力
+if os.environ.get("REPLICA_DB_HOST"):
+    DATABASES["replica_db"] = {
+        "ENGINE": "django.db.backends.mysql",
+        "NAME": os.environ.get("REPLICA_DB_NAME", DATABASES["default"]["NAME"]),
+        "USER": os.environ.get("REPLICA_DB_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.environ.get("REPLICA_DB_PASSWORD", DATABASES["default"]["PASSWORD"]),
+        "HOST": os.environ.get("REPLICA_DB_HOST"),
+        "PORT": os.environ.get("REPLICA_DB_PORT", DATABASES["default"]["PORT"]),
+        "OPTIONS": {"init_command": "SET default_storage_engine=INNODB", "charset": "utf8mb4"},
+        "TEST": {"MIRROR": "default"},
+    }
+
+# gevent worker 下每个请求都会新建和断开数据库连接，开启连接池后复用连接并限制连接数
+if env.DB_POOL_ENABLE:
+    for db_alias in ["default", "report_db"]:
+        DATABASES[db_alias]["ENGINE"] = "backend.core.db_pool"
+        DATABASES[db_alias]["POOL"] = {"MAX_SIZE": env.DB_POOL_SIZE, "CHECKOUT_TIMEOUT": env.DB_POOL_CHECKOUT_TIMEOUT}
+
+# ReplicaRouter 需要在 ReportRouter 之前，未命中从库时交给后续的路由处理
+DATABASE_ROUTERS = [
+    "backend.bk_web.database_router.ReplicaRouter",
+    "backend.db_report.database_router.ReportRouter",
+]
 
 # Cache - 缓存后端采用redis
 # https://docs.djangoproject.com/en/3.2/ref/settings/#cache
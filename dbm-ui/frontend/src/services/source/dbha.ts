@@ -11,6 +11,8 @@
  * the specific language governing permissions and limitations under the License.
  */
 
+import type { ListBase } from '@services/types';
+
 import http, { type IRequestPayload } from '../http';
 
 const path = '/apis/event/dbha';
@@ -20,7 +22,7 @@ const path = '/apis/event/dbha';
  */
 export function getEventSwitchList(params: Record<string, any>, payload = {} as IRequestPayload) {
   return http.get<
-    {
+    ListBase<{
       app: string;
       bk_biz_id: number;
       bk_biz_name: string;
@@ -46,7 +48,7 @@ export function getEventSwitchList(params: Record<string, any>, payload = {} as
       switch_result: string;
       switch_start_time: string;
       uid: number;
-    }[]
+    }[]>
   >(`${path}/ls/`, params, payload);
 }
 
@@ -27,3 +27,23 @@ export function queryMysqlHigherVersionPkgList(params: {
     }[]
   >(`/apis/mysql/toolbox/query_higher_version_pkg_list/`, params);
 }
+
+/**
+ * 批量查询mysql版本升级可用版本列表，按集群当前版本分组
+ */
+export function batchQueryMysqlHigherVersionPkgList(params: {
+  cluster_ids: number[];
+  higher_major_version?: boolean; // 代表是否跨版本升级, 默认false
+}) {
+  return http.post<{
+    version_groups: {
+      version: string;
+      cluster_ids: number[];
+      pkg_list: ServiceReturnType<typeof queryMysqlHigherVersionPkgList>;
+    }[];
+    failed_clusters: {
+      cluster_id: number;
+      message: string;
+    }[];
+  }>(`/apis/mysql/toolbox/batch_query_higher_version_pkg_list/`, params);
+}
@@ -23,6 +23,8 @@ export function batchFetchFile(params: { file_path_list: string[] }) {
     Array<{
       content: string;
       path: string;
+      size: number | null;
+      truncated: boolean;
       url: string;
     }>
   >(`${path}/batch_fetch_file_content/`, params);
@@ -35,6 +37,8 @@ export function getFileContent(params: { file_path: string }) {
   return http.get<{
     content: string;
     path: string;
+    size: number | null;
+    truncated: boolean;
     url: string;
   }>(`${path}/fetch_file_content/`, params);
 }
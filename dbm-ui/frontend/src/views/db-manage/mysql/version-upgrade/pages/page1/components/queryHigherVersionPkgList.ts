@@ -0,0 +1,73 @@
+/*
+ * TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-DB管理系统(BlueKing-BK-DBM) available.
+ *
+ * Copyright (C) 2017-2023 THL A29 Limited, a Tencent company. All rights reserved.
+ *
+ * Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at https://opensource.org/licenses/MIT
+ *
+ * Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+ * on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for
+ * the specific language governing permissions and limitations under the License.
+ */
+import { batchQueryMysqlHigherVersionPkgList, queryMysqlHigherVersionPkgList } from '@services/source/mysqlToolbox';
+
+import { messageError } from '@utils';
+
+type PkgList = ServiceReturnType<typeof queryMysqlHigherVersionPkgList>;
+
+interface PendingRequest {
+  clusterId: number;
+  resolve: (pkgList: PkgList) => void;
+  reject: (error: Error) => void;
+}
+
+// 按是否跨版本升级分组，同一轮渲染中各行的查询合并为一次批量请求
+const pendingMap = new Map<boolean, PendingRequest[]>();
+
+const flush = (higherMajorVersion: boolean) => {
+  const pendingList = pendingMap.get(higherMajorVersion) || [];
+  pendingMap.delete(higherMajorVersion);
+
+  batchQueryMysqlHigherVersionPkgList({
+    cluster_ids: [...new Set(pendingList.map((item) => item.clusterId))],
+    higher_major_version: higherMajorVersion,
+  })
+    .then(({ version_groups: versionGroups, failed_clusters: failedClusters }) => {
+      const pkgListMap = versionGroups.reduce<Record<number, PkgList>>((prevMap, groupItem) => {
+        groupItem.cluster_ids.forEach((clusterId) => Object.assign(prevMap, { [clusterId]: groupItem.pkg_list }));
+        return prevMap;
+      }, {});
+      const errorMap = failedClusters.reduce<Record<number, string>>(
+        (prevMap, failedItem) => Object.assign(prevMap, { [failedItem.cluster_id]: failedItem.message }),
+        {},
+      );
+      pendingList.forEach(({ clusterId, resolve, reject }) => {
+        if (clusterId in errorMap) {
+          // 单个集群查询失败只影响该行
+          messageError(errorMap[clusterId]);
+          reject(new Error(errorMap[clusterId]));
+        } else {
+          resolve(pkgListMap[clusterId] || []);
+        }
+      });
+    })
+    .catch((error) => pendingList.forEach(({ reject }) => reject(error)));
+};
+
+/**
+ * 查询集群可用的升级包，同一轮渲染中的多个集群合并为一次批量请求
+ */
+export const queryHigherVersionPkgList = (params: { cluster_id: number; higher_major_version?: boolean }) =>
+  new Promise<PkgList>((resolve, reject) => {
+    const higherMajorVersion = Boolean(params.higher_major_version);
+    if (!pendingMap.has(higherMajorVersion)) {
+      pendingMap.set(higherMajorVersion, []);
+      Promise.resolve().then(() => flush(higherMajorVersion));
+    }
+    pendingMap.get(higherMajorVersion)!.push({
+      clusterId: params.cluster_id,
+      resolve,
+      reject,
+    });
+  });